@@ -3,11 +3,64 @@ Data Extractor Agent - Extracts structured information from job-related emails
 """
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from utils.config import get_ai_config
+from utils.config import get_ai_config, get_prompt_config
+from utils.text_normalizer import NORMALIZER_VERSION, normalize_email, truncate_to_tokens
+from utils.result_cache import EXTRACTION, content_hash, get_result_cache, prompt_version
+from utils.llm_executor import call_agent, get_llm_executor
+from utils.logger import agent_debug_mode, get_item_log
 from typing import Dict, Optional
 import json
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
+# Editing the prompt changes EXTRACTOR_PROMPT_VERSION, so cached results miss
+EXTRACTOR_PROMPT = """
+Extract structured information from this job-related email.
+
+Email Type: {email_type}
+Subject: {subject}
+From: {from_address}
+Date: {email_date}
+Body: {body}
+
+Extract the following information:
+1. Company Name: The name of the company
+2. Role/Position Title: The job title or position
+3. Location: Job location (city, state, country, or "Remote")
+4. Application Status: Current status (applied, rejected, interview_scheduled, offer_received, etc.)
+5. Application Date: When you applied (if mentioned)
+6. Salary Range: If mentioned
+7. Job Description URL: Any links to job posting
+8. Next Steps: Any action items or next steps mentioned
+9. Interview Date/Time: If an interview is scheduled
+10. Contact Person: Name of recruiter or contact person
+
+Respond in JSON format:
+{{
+    "company_name": "string or null",
+    "role_title": "string or null",
+    "location": "string or null",
+    "status": "string",
+    "application_date": "YYYY-MM-DD or null",
+    "salary_range": "string or null",
+    "application_url": "string or null",
+    "next_steps": "string or null",
+    "interview_datetime": "YYYY-MM-DD HH:MM or null",
+    "contact_person": "string or null",
+    "additional_notes": "any other relevant information"
+}}
+
+Important:
+- Use null for fields that cannot be determined
+- For status, use one of: applied, rejected, interview_scheduled, offer_received, follow_up_needed
+- Extract dates in YYYY-MM-DD format
+- Be accurate and don't make assumptions
+"""
+
+EXTRACTOR_PROMPT_VERSION = prompt_version(EXTRACTOR_PROMPT, NORMALIZER_VERSION)
+
 
 def create_data_extractor_agent() -> Agent:
     """
@@ -28,9 +81,10 @@ def create_data_extractor_agent() -> Agent:
         model=OpenAIChat(
             id=ai_config['model'],
             api_key=ai_config['openai_api_key'],
+            base_url=ai_config['openai_base_url'],
             temperature=0.1  # Lower temperature for more consistent extraction
         ),
-        debug_mode=True,
+        debug_mode=agent_debug_mode(),
         markdown=True,
     )
     
@@ -51,60 +105,36 @@ def extract_data_task(agent: Agent, email: Dict, classification: Dict) -> Dict:
     """
     subject = email.get('subject', '')
     from_address = email.get('from', '')
-    body = email.get('text', '') or email.get('body', '')
     email_date = email.get('date', '')
     
-    # Truncate body if too long
-    if len(body) > 3000:
-        body = body[:3000] + "..."
+    # Normalized (HTML/quotes/footers stripped) and truncated by tokens
+    body = truncate_to_tokens(normalize_email(email), get_prompt_config()['extractor_max_tokens'])
     
     email_type = classification.get('classification', 'unknown')
     
-    prompt = f"""
-Extract structured information from this job-related email.
-
-Email Type: {email_type}
-Subject: {subject}
-From: {from_address}
-Date: {email_date}
-Body: {body}
-
-Extract the following information:
-1. Company Name: The name of the company
-2. Role/Position Title: The job title or position
-3. Location: Job location (city, state, country, or "Remote")
-4. Application Status: Current status (applied, rejected, interview_scheduled, offer_received, etc.)
-5. Application Date: When you applied (if mentioned)
-6. Salary Range: If mentioned
-7. Job Description URL: Any links to job posting
-8. Next Steps: Any action items or next steps mentioned
-9. Interview Date/Time: If an interview is scheduled
-10. Contact Person: Name of recruiter or contact person
-
-Respond in JSON format:
-{{
-    "company_name": "string or null",
-    "role_title": "string or null",
-    "location": "string or null",
-    "status": "string",
-    "application_date": "YYYY-MM-DD or null",
-    "salary_range": "string or null",
-    "application_url": "string or null",
-    "next_steps": "string or null",
-    "interview_datetime": "YYYY-MM-DD HH:MM or null",
-    "contact_person": "string or null",
-    "additional_notes": "any other relevant information"
-}}
-
-Important:
-- Use null for fields that cannot be determined
-- For status, use one of: applied, rejected, interview_scheduled, offer_received, follow_up_needed
-- Extract dates in YYYY-MM-DD format
-- Be accurate and don't make assumptions
-"""
+    prompt = EXTRACTOR_PROMPT.format(
+        email_type=email_type,
+        subject=subject,
+        from_address=from_address,
+        email_date=email_date,
+        body=body
+    )
+    
+    # Same email, classification, prompt and model: reuse the stored result
+    cache = get_result_cache()
+    cache_args = (
+        email.get('internet_message_id') or email.get('message_id'),
+        content_hash(email_type, subject, from_address, email_date, body),
+        EXTRACTOR_PROMPT_VERSION,
+        f"{agent.model.id}@{agent.model.temperature}",
+    )
+    if cache:
+        cached = cache.get(EXTRACTION, *cache_args)
+        if cached is not None:
+            return dict(cached, email_message_id=email.get('message_id'))
     
     try:
-        response = agent.run(prompt)
+        response = call_agent(agent, prompt, expected_output_tokens=400)
         response_text = str(response.content)
         
         # Extract JSON from markdown if present
@@ -126,10 +156,12 @@ Important:
         extracted_data['email_message_id'] = email.get('message_id')
         extracted_data['classification'] = email_type
         
+        if cache:
+            cache.put(EXTRACTION, *cache_args, extracted_data)
         return extracted_data
         
     except Exception as e:
-        print(f"✗ Error extracting data: {e}")
+        logger.error(f"✗ Error extracting data: {e}", extra={'message_id': email.get('message_id')})
         # Return minimal data
         return {
             'company_name': extract_company_fallback(from_address, subject),
@@ -202,21 +234,32 @@ def extract_data_batch(agent: Agent, emails: list, classifications: list) -> lis
     Returns:
         List of extracted data dictionaries
     """
-    print(f"\n{'='*60}")
-    print(f"📊 Data Extractor Agent: Extracting data from {len(emails)} emails")
-    print(f"{'='*60}\n")
+    logger.debug(f"\n{'='*60}\n📊 Data Extractor Agent: Extracting data from {len(emails)} emails\n{'='*60}\n")
+    
+    pairs = [
+        (email, classification)
+        for email, classification in zip(emails, classifications)
+        if classification.get('is_job_related', False)
+    ]
+    if len(pairs) < len(emails):
+        logger.debug(f"Skipping {len(emails) - len(pairs)} emails: Not job-related")
+    
+    def run_extraction(worker_agent: Agent, pair: tuple) -> Dict:
+        return extract_data_task(worker_agent, *pair)
     
-    results = []
-    for i, (email, classification) in enumerate(zip(emails, classifications), 1):
-        if classification.get('is_job_related', False):
-            print(f"Extracting data {i}/{len(emails)}: {email.get('subject', 'No subject')[:50]}...")
-            extracted = extract_data_task(agent, email, classification)
-            results.append(extracted)
-            print(f"  ✓ Extracted: {extracted.get('company_name', 'Unknown')} - {extracted.get('role_title', 'Unknown')}")
-        else:
-            print(f"Skipping {i}/{len(emails)}: Not job-related")
+    # Several extraction calls in flight at once, under the shared rate limits
+    results = get_llm_executor().map(agent, run_extraction, pairs)
+    item_log = get_item_log('extract')
+    for i, ((email, _), extracted) in enumerate(zip(pairs, results), 1):
+        item_log.item(
+            logger,
+            "Extracted %d/%d: %.50s...\n  ✓ Extracted: %s - %s",
+            i, len(pairs), email.get('subject', 'No subject'),
+            extracted.get('company_name', 'Unknown'), extracted.get('role_title', 'Unknown'),
+            message_id=email.get('message_id')
+        )
     
-    print(f"\n✓ Data extraction complete: {len(results)} records extracted")
+    logger.debug(f"\n✓ Data extraction complete: {len(results)} records extracted")
     return results
 
 
@@ -9,9 +9,15 @@ except ImportError:
     JobApplication = None
     EmailLog = None
     get_session = None
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
+from utils.logger import agent_debug_mode, get_item_log
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
 
 
 def create_database_manager_agent() -> Agent:
@@ -28,14 +34,46 @@ def create_database_manager_agent() -> Agent:
         instructions="""You are an expert at managing databases and ensuring data 
         integrity. You handle all database operations including creating, updating, 
         and querying job application records.""",
-        debug_mode=True,
+        debug_mode=agent_debug_mode(),
     )
     
     return agent
 
 
+_backend_sessionmaker = None
+_backend_sessionmaker_lock = threading.Lock()
+
+
+def running_in_backend() -> bool:
+    """Whether this process is the backend (API or sync worker), where models.database is the backend schema"""
+    module = sys.modules.get('models.database')
+    return module is not None and hasattr(module, 'EmailAccount')
+
+
+def _backend_session():
+    """Session on the backend's own database (DATABASE_URL) for agents running inside the backend"""
+    global _backend_sessionmaker
+    # The backend schema is already loaded as models.database; importing it
+    # again as ios_app.backend.models.database would define every table twice
+    sys.modules.setdefault('ios_app.backend.models.database', sys.modules['models.database'])
+    with _backend_sessionmaker_lock:
+        if _backend_sessionmaker is None:
+            from core.config import settings
+            from sqlalchemy import create_engine
+            from sqlalchemy.engine import make_url
+            from sqlalchemy.orm import sessionmaker
+            
+            # The API uses an async driver (asyncpg, aiosqlite); agents use the sync one
+            url = make_url(settings.DATABASE_URL)
+            url = url.set(drivername=url.get_backend_name())
+            _backend_sessionmaker = sessionmaker(bind=create_engine(url, pool_pre_ping=True))
+    return _backend_sessionmaker()
+
+
 def get_local_session():
     """Get database session handling both standalone and backend modes"""
+    if running_in_backend():
+        return _backend_session(), True
     try:
         # Try to use backend models if available
         from ios_app.backend.models.database import JobApplication as BackendJobApplication
@@ -81,7 +119,7 @@ def save_application_task(agent: Agent, extracted_data: Dict) -> Optional[int]:
             role = extracted_data.get('role_title')
             
             if not company or not role:
-                print(f"  ✗ Missing company or role information, skipping...")
+                logger.debug("  ✗ Missing company or role information, skipping...")
                 return None
             
             # Check existing
@@ -92,14 +130,14 @@ def save_application_task(agent: Agent, extracted_data: Dict) -> Optional[int]:
             ).first()
             
             if existing_app:
-                print(f"  ↻ Updating existing application: {company} - {role}")
+                logger.debug("  ↻ Updating existing application: %s - %s", company, role)
                 # Update status logic could go here
                 # For now just update notes
                 new_note = f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M')}] {extracted_data.get('classification', 'Update')}: {extracted_data.get('additional_notes', '')}"
                 existing_app.notes = (existing_app.notes or '') + new_note
                 app_id = existing_app.id
             else:
-                print(f"  ✓ Creating new application: {company} - {role}")
+                logger.debug("  ✓ Creating new application: %s - %s", company, role)
                 
                 # Map status string to Enum
                 status_str = extracted_data.get('status', 'applied').lower()
@@ -138,28 +176,401 @@ def save_application_task(agent: Agent, extracted_data: Dict) -> Optional[int]:
                     subject=extracted_data.get('email_subject'),
                     from_address=extracted_data.get('email_from'),
                     is_job_related=True,
-                    # classification=extracted_data.get('classification') # Enum mismatch potential, skip for now
+                    classification=to_email_classification(extracted_data.get('classification')),
                 )
                 session.add(email_log)
+            else:
+                # Logged at classification time (see log_classifications_batch)
+                existing_log.application_id = app_id
+            
+            # Later replies in this conversation attach here without the LLM
+            register_thread_keys(session, app_id, extracted_data.get('thread_keys') or [])
             
             session.commit()
-            print(f"  ✓ Saved to backend database (ID: {app_id})")
+            logger.debug("  ✓ Saved to backend database (ID: %s)", app_id)
             return app_id
             
         else:
-            print("  ✗ Backend models not available. Standalone mode not fully implemented in this patch.")
+            logger.error("  ✗ Backend models not available. Standalone mode not fully implemented in this patch.")
             return None
         
     except Exception as e:
         session.rollback()
-        print(f"  ✗ Error saving to database: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"  ✗ Error saving to database: {e}")
         return None
     finally:
         session.close()
 
 
+def to_email_classification(classification: Optional[str]):
+    """
+    Map a classifier label to the backend EmailClassification enum
+    
+    Args:
+        classification: Label such as 'rejection' or 'interview_request'
+        
+    Returns:
+        EmailClassification member, or None for unknown labels
+    """
+    from ios_app.backend.models.database import EmailClassification
+    
+    try:
+        return EmailClassification(classification)
+    except ValueError:
+        return None
+
+
+def log_classifications_batch(agent: Agent, emails: List[Dict], classifications: List[Dict]) -> int:
+    """
+    Record classifications in the backend EmailLog table
+    
+    Every classified email is logged with its label, confidence and
+    normalized body, so the local classifier can be trained from them
+    (see utils.local_classifier).
+    
+    Args:
+        agent: The database manager agent
+        emails: Email dictionaries
+        classifications: Classification result for each email
+        
+    Returns:
+        Number of emails logged
+    """
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return 0
+    
+    try:
+        from ios_app.backend.models.database import EmailLog
+        
+        logged = 0
+        for email, classification in zip(emails, classifications):
+            message_id = email.get('message_id')
+            label = to_email_classification(classification.get('classification'))
+            if not message_id or label is None:
+                continue
+            
+            email_log = session.query(EmailLog).filter_by(message_id=message_id).first()
+            if not email_log:
+                email_log = EmailLog(message_id=message_id)
+                session.add(email_log)
+            email_log.subject = email.get('subject')
+            email_log.from_address = email.get('from')
+            email_log.email_date = email.get('date')
+            email_log.body_text = email.get('normalized_body')
+            email_log.is_job_related = classification.get('is_job_related', False)
+            email_log.classification = label
+            email_log.confidence_score = classification.get('confidence')
+            email_log.meta_data = {'classification_source': classification.get('source', 'llm')}
+            logged += 1
+        
+        session.commit()
+        return logged
+        
+    except Exception as e:
+        session.rollback()
+        logger.error(f"  ✗ Error logging classifications: {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def record_processing_times(agent: Agent, message_ids: List[str], processing_time_ms: int, timings_ms: Dict[str, int]) -> int:
+    """
+    Record how long the workflow took on logged emails
+    
+    Args:
+        agent: The database manager agent
+        message_ids: Message ids of the emails of one batch
+        processing_time_ms: Time from the start of classification to the
+            end of the batch's last stage
+        timings_ms: Per-stage wall time and queue wait of the batch, stored
+            in the log's meta_data
+        
+    Returns:
+        Number of email logs updated
+    """
+    message_ids = [message_id for message_id in message_ids if message_id]
+    if not message_ids:
+        return 0
+    
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return 0
+    
+    try:
+        from ios_app.backend.models.database import EmailLog
+        
+        updated = 0
+        for email_log in session.query(EmailLog).filter(EmailLog.message_id.in_(message_ids)):
+            email_log.processing_time_ms = processing_time_ms
+            # Assign a new dict so the JSON column is marked as changed
+            email_log.meta_data = dict(email_log.meta_data or {}, timings_ms=timings_ms)
+            updated += 1
+        
+        session.commit()
+        return updated
+        
+    except Exception as e:
+        session.rollback()
+        logger.error(f"  ✗ Error recording processing times: {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def load_uid_keyed_message_ids(agent: Agent) -> List[str]:
+    """
+    Get message ids stored under the bare IMAP UID, the key used before
+    message_id became the RFC Message-ID (see EmailClient._assign_message_ids)
+    
+    Args:
+        agent: The database manager agent
+    
+    Returns:
+        UID keys found in EmailLog or JobApplication, in UID order
+    """
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return []
+    
+    try:
+        from ios_app.backend.models.database import JobApplication, EmailLog
+        
+        keys = {message_id for (message_id,) in session.query(EmailLog.message_id)}
+        keys.update(message_id for (message_id,) in session.query(JobApplication.email_message_id) if message_id)
+        return sorted((key for key in keys if key.isdigit()), key=int)
+    
+    except Exception as e:
+        logger.error(f"  ✗ Error reading message ids: {e}")
+        return []
+    finally:
+        session.close()
+
+
+def rekey_message_ids(agent: Agent, key_map: Dict[str, str]) -> int:
+    """
+    Move EmailLog rows and application links from old message ids to new ones
+    
+    An email that was already logged again under its new id keeps that
+    newer log; the old one is dropped.
+    
+    Args:
+        agent: The database manager agent
+        key_map: Old message id to new message id
+    
+    Returns:
+        Number of email logs and applications updated
+    """
+    if not key_map:
+        return 0
+    
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return 0
+    
+    try:
+        from ios_app.backend.models.database import JobApplication, EmailLog
+        
+        new_ids = set(key_map.values())
+        logged = {message_id for (message_id,) in session.query(EmailLog.message_id).filter(EmailLog.message_id.in_(new_ids))}
+        linked = {
+            message_id for (message_id,) in
+            session.query(JobApplication.email_message_id).filter(JobApplication.email_message_id.in_(new_ids))
+        }
+        
+        updated = 0
+        for email_log in session.query(EmailLog).filter(EmailLog.message_id.in_(list(key_map))):
+            new_id = key_map[email_log.message_id]
+            if new_id in logged:
+                session.delete(email_log)
+            else:
+                email_log.message_id = new_id
+                logged.add(new_id)
+            updated += 1
+        for application in session.query(JobApplication).filter(JobApplication.email_message_id.in_(list(key_map))):
+            new_id = key_map[application.email_message_id]
+            # email_message_id is unique; a newer application keeps the link
+            if new_id not in linked:
+                application.email_message_id = new_id
+                linked.add(new_id)
+                updated += 1
+        
+        session.commit()
+        return updated
+    
+    except Exception as e:
+        session.rollback()
+        logger.error(f"  ✗ Error rewriting message ids: {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def _ensure_thread_table(session):
+    """Create the email_threads table in databases created before it existed"""
+    from ios_app.backend.models.database import EmailThread
+    
+    EmailThread.__table__.create(bind=session.get_bind(), checkfirst=True)
+
+
+def register_thread_keys(session, application_id: int, keys: List[str]) -> int:
+    """
+    Add thread keys of an application to the thread index
+    
+    Keys already registered keep their application (the first saved one wins).
+    
+    Args:
+        session: Backend database session (committed by the caller)
+        application_id: JobApplication the keys belong to
+        keys: Keys from utils.thread_index.thread_keys
+        
+    Returns:
+        Number of keys added
+    """
+    if not keys:
+        return 0
+    
+    from ios_app.backend.models.database import EmailThread
+    
+    _ensure_thread_table(session)
+    known = {
+        key for (key,) in session.query(EmailThread.thread_key).filter(EmailThread.thread_key.in_(keys))
+    }
+    new_keys = [key for key in dict.fromkeys(keys) if key not in known]
+    for key in new_keys:
+        session.add(EmailThread(thread_key=key, application_id=application_id))
+    return len(new_keys)
+
+
+def find_thread_applications(agent: Agent, emails: List[Dict]) -> Dict[int, int]:
+    """
+    Find emails that reply in threads of known applications
+    
+    Args:
+        agent: The database manager agent
+        emails: Email dictionaries
+        
+    Returns:
+        Dictionary mapping email index to JobApplication id
+    """
+    from utils.thread_index import lookup_keys
+    
+    keys_by_email = {i: lookup_keys(email) for i, email in enumerate(emails)}
+    all_keys = {key for keys in keys_by_email.values() for key in keys}
+    if not all_keys:
+        return {}
+    
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return {}
+    
+    try:
+        from ios_app.backend.models.database import EmailThread
+        
+        _ensure_thread_table(session)
+        known = dict(
+            session.query(EmailThread.thread_key, EmailThread.application_id)
+            .filter(EmailThread.thread_key.in_(all_keys))
+            .all()
+        )
+        
+        matches = {}
+        for i, keys in keys_by_email.items():
+            # Keys are ordered nearest first, so the direct parent decides
+            application_id = next((known[key] for key in keys if key in known), None)
+            if application_id is not None:
+                matches[i] = application_id
+        return matches
+        
+    except Exception as e:
+        logger.error(f"  ✗ Error looking up email threads: {e}")
+        return {}
+    finally:
+        session.close()
+
+
+# Status a reply in a known thread moves its application to
+REPLY_STATUS = {
+    'interview_request': 'interview_scheduled',
+    'offer': 'offer_received',
+    'rejection': 'rejected',
+}
+
+# Statuses in order of progress; replies never move an application backwards
+STATUS_PROGRESS = [
+    'applied', 'in_progress', 'interview_scheduled', 'interview_completed', 'offer_received',
+]
+
+
+def attach_thread_replies_batch(agent: Agent, emails: List[Dict], classifications: List[Dict]) -> List[int]:
+    """
+    Attach replies in known threads to their existing applications
+    
+    Each reply is linked to the application in EmailLog, its own thread keys
+    are registered, a note is added, and the application status advances
+    when the status check found an interview, offer or rejection.
+    
+    Args:
+        agent: The database manager agent
+        emails: Email dictionaries of thread replies
+        classifications: ThreadIndex.classify_reply result for each email
+        
+    Returns:
+        List of application IDs updated
+    """
+    from utils.thread_index import thread_keys
+    
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return []
+    
+    try:
+        from ios_app.backend.models.database import JobApplication, EmailLog, ApplicationStatus
+        
+        updated = []
+        for email, classification in zip(emails, classifications):
+            application = session.get(JobApplication, classification['application_id'])
+            if application is None:
+                continue
+            
+            email_log = session.query(EmailLog).filter_by(message_id=email.get('message_id')).first()
+            if email_log:
+                email_log.application_id = application.id
+            
+            label = classification['classification']
+            new_status = REPLY_STATUS.get(label)
+            current = application.status.value if application.status else 'applied'
+            if new_status and current in STATUS_PROGRESS and (
+                new_status == 'rejected' or STATUS_PROGRESS.index(new_status) > STATUS_PROGRESS.index(current)
+            ):
+                logger.debug("  ↻ %s - %s: %s → %s", application.company_name, application.role_title, current, new_status)
+                application.status = ApplicationStatus(new_status)
+            
+            note = f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M')}] {label} (thread reply): {email.get('subject', '')}"
+            application.notes = (application.notes or '') + note
+            register_thread_keys(session, application.id, thread_keys(email))
+            # Flush so the next reply of the same thread sees these keys
+            session.flush()
+            updated.append(application.id)
+        
+        session.commit()
+        return updated
+        
+    except Exception as e:
+        session.rollback()
+        logger.error(f"  ✗ Error attaching thread replies: {e}")
+        return []
+    finally:
+        session.close()
+
+
 def save_applications_batch(agent: Agent, extracted_data_list: List[Dict]) -> List[int]:
     """
     Save multiple applications to the database
@@ -171,21 +582,223 @@ def save_applications_batch(agent: Agent, extracted_data_list: List[Dict]) -> Li
     Returns:
         List of application IDs
     """
-    print(f"\n{'='*60}")
-    print(f"💾 Database Manager Agent: Saving {len(extracted_data_list)} applications")
-    print(f"{'='*60}\n")
+    logger.debug(f"\n{'='*60}\n💾 Database Manager Agent: Saving {len(extracted_data_list)} applications\n{'='*60}\n")
     
     saved_ids = []
+    item_log = get_item_log('save')
     for i, data in enumerate(extracted_data_list, 1):
-        print(f"Processing {i}/{len(extracted_data_list)}: {data.get('company_name', 'Unknown')} - {data.get('role_title', 'Unknown')}")
+        item_log.item(
+            logger,
+            "Processing %d/%d: %s - %s",
+            i, len(extracted_data_list), data.get('company_name', 'Unknown'), data.get('role_title', 'Unknown'),
+            message_id=data.get('email_message_id')
+        )
         app_id = save_application_task(agent, data)
+        # Read back by the work ledger to checkpoint saved records
+        data['application_id'] = app_id
         if app_id:
             saved_ids.append(app_id)
     
-    print(f"\n✓ Database operations complete: {len(saved_ids)} applications saved/updated")
+    logger.debug(f"\n✓ Database operations complete: {len(saved_ids)} applications saved/updated")
     return saved_ids
 
 
+def _open_ledger():
+    """
+    Open a session on the database holding the work ledger
+    
+    The ledger lives next to the applications it tracks: in the backend
+    database, or in the standalone SQLite database for the CLI.
+    
+    Returns:
+        (session, WorkLedgerEntry model) tuple
+    """
+    session, is_backend = get_local_session()
+    if is_backend:
+        from ios_app.backend.models.database import WorkLedgerEntry
+    else:
+        from models.database import WorkLedgerEntry
+    return session, WorkLedgerEntry
+
+
+def _ensure_ledger_table(session, model):
+    """Create the work_ledger table in databases created before it existed"""
+    model.__table__.create(bind=session.get_bind(), checkfirst=True)
+
+
+def load_ledger_entries(agent: Agent, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+    """
+    Get work ledger entries of emails
+    
+    Args:
+        agent: The database manager agent
+        keys: (account, message_id) keys to look up (see work_ledger.ledger_key)
+    
+    Returns:
+        Dictionary mapping (account, message_id) to its stage, classification,
+        extracted_data and application_id (emails without an entry are left out)
+    """
+    if not keys:
+        return {}
+    
+    session, WorkLedgerEntry = _open_ledger()
+    try:
+        _ensure_ledger_table(session, WorkLedgerEntry)
+        keys = set(keys)
+        entries = session.query(WorkLedgerEntry).filter(
+            WorkLedgerEntry.message_id.in_({message_id for _, message_id in keys})
+        ).all()
+        return {
+            (entry.account, entry.message_id): {
+                'stage': entry.stage,
+                'classification': entry.classification,
+                'extracted_data': entry.extracted_data,
+                'application_id': entry.application_id,
+            }
+            for entry in entries if (entry.account, entry.message_id) in keys
+        }
+    
+    except Exception as e:
+        logger.error(f"  ✗ Error reading work ledger: {e}")
+        return {}
+    finally:
+        session.close()
+
+
+def record_ledger_entries(agent: Agent, records: List[Dict], run_id: Optional[str] = None) -> int:
+    """
+    Write stage checkpoints to the work ledger
+    
+    An entry only moves forward through the stages; a record for an
+    earlier stage just refreshes the stored email and attempt count.
+    
+    Args:
+        agent: The database manager agent
+        records: Dictionaries with account, message_id and stage, plus any
+            of email, classification, extracted_data, application_id and
+            attempt (True to count one more run picking the email up)
+        run_id: Id of the run writing the records
+    
+    Returns:
+        Number of records written
+    """
+    if not records:
+        return 0
+    
+    from utils.work_ledger import STAGES, DONE
+    
+    session, WorkLedgerEntry = _open_ledger()
+    try:
+        _ensure_ledger_table(session, WorkLedgerEntry)
+        message_ids = {record['message_id'] for record in records}
+        entries = {
+            (entry.account, entry.message_id): entry
+            for entry in session.query(WorkLedgerEntry).filter(WorkLedgerEntry.message_id.in_(message_ids))
+        }
+        
+        for record in records:
+            key = (record['account'], record['message_id'])
+            entry = entries.get(key)
+            if entry is None:
+                entry = WorkLedgerEntry(account=key[0], message_id=key[1], stage=record['stage'], attempts=0)
+                session.add(entry)
+                entries[key] = entry
+            elif STAGES.index(record['stage']) > STAGES.index(entry.stage):
+                entry.stage = record['stage']
+            
+            for field in ('email', 'classification', 'extracted_data', 'application_id'):
+                if record.get(field) is not None:
+                    setattr(entry, field, record[field])
+            if record.get('attempt'):
+                entry.attempts = (entry.attempts or 0) + 1
+            if entry.stage == DONE:
+                entry.email = None
+            entry.run_id = run_id
+        
+        session.commit()
+        return len(records)
+    
+    except Exception as e:
+        session.rollback()
+        logger.error(f"  ✗ Error writing work ledger: {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def load_unfinished_emails(
+    agent: Agent,
+    max_attempts: int,
+    limit: int,
+    accounts: Optional[List[str]] = None
+) -> List[Dict]:
+    """
+    Get emails an earlier run picked up but did not finish
+    
+    Args:
+        agent: The database manager agent
+        max_attempts: Emails picked up this many times are skipped, so an
+            email that keeps crashing the workflow is not retried forever
+        limit: Maximum number of emails returned
+        accounts: Only resume emails of these accounts (default: all)
+    
+    Returns:
+        Email dictionaries restored from their ledger snapshots, oldest first
+    """
+    from utils.work_ledger import DONE, restore_email
+    
+    session, WorkLedgerEntry = _open_ledger()
+    try:
+        _ensure_ledger_table(session, WorkLedgerEntry)
+        query = session.query(WorkLedgerEntry).filter(
+            WorkLedgerEntry.stage != DONE,
+            WorkLedgerEntry.attempts < max_attempts
+        )
+        if accounts is not None:
+            query = query.filter(WorkLedgerEntry.account.in_(accounts))
+        entries = (
+            query
+            .order_by(WorkLedgerEntry.id)
+            .limit(limit)
+            .all()
+        )
+        return [restore_email(entry.email) for entry in entries if entry.email]
+    
+    except Exception as e:
+        logger.error(f"  ✗ Error reading work ledger: {e}")
+        return []
+    finally:
+        session.close()
+
+
+def get_ledger_stats(agent: Agent) -> Dict[str, int]:
+    """
+    Count work ledger entries by stage
+    
+    Args:
+        agent: The database manager agent
+    
+    Returns:
+        Dictionary mapping stage to number of emails
+    """
+    from sqlalchemy import func
+    
+    session, WorkLedgerEntry = _open_ledger()
+    try:
+        _ensure_ledger_table(session, WorkLedgerEntry)
+        return dict(
+            session.query(WorkLedgerEntry.stage, func.count(WorkLedgerEntry.id))
+            .group_by(WorkLedgerEntry.stage)
+            .all()
+        )
+    
+    except Exception as e:
+        logger.error(f"  ✗ Error reading work ledger: {e}")
+        return {}
+    finally:
+        session.close()
+
+
 def get_all_applications(agent: Agent) -> List[Dict]:
     """
     Get all job applications from the database
@@ -202,7 +815,7 @@ def get_all_applications(agent: Agent) -> List[Dict]:
         applications = session.query(JobApplication).all()
         return [app.to_dict() for app in applications]
     except Exception as e:
-        print(f"✗ Error fetching applications: {e}")
+        logger.error(f"✗ Error fetching applications: {e}")
         return []
     finally:
         session.close()
@@ -225,7 +838,7 @@ def get_applications_by_status(agent: Agent, status: str) -> List[Dict]:
         applications = session.query(JobApplication).filter_by(status=status).all()
         return [app.to_dict() for app in applications]
     except Exception as e:
-        print(f"✗ Error fetching applications: {e}")
+        logger.error(f"✗ Error fetching applications: {e}")
         return []
     finally:
         session.close()
@@ -289,7 +902,7 @@ def get_statistics(agent: Agent) -> Dict:
             return stats
         
     except Exception as e:
-        print(f"✗ Error getting statistics: {e}")
+        logger.error(f"✗ Error getting statistics: {e}")
         return {}
     finally:
         session.close()
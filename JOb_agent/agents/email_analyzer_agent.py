@@ -0,0 +1,374 @@
+"""
+Email Analyzer Agent - Classifies an email and extracts its application data in one LLM call
+
+The fused alternative to running the classifier agent and then the data
+extractor agent on the same email: the body is sent once and one structured
+response carries both the classification and the extracted fields (null for
+emails that are not job-related). Enabled with AGENT_MODE=fused; the
+two-agent path stays the default so the two can be compared run by run.
+"""
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from utils.config import get_ai_config, get_prompt_config
+from utils.text_normalizer import NORMALIZER_VERSION, count_tokens, normalize_email, truncate_to_tokens
+from utils.result_cache import FUSED, content_hash, get_result_cache, prompt_version
+from utils.llm_executor import call_agent, get_llm_executor
+from utils.logger import agent_debug_mode
+from agents.email_classifier_agent import (
+    BATCH_CLASSIFIER_PROMPT, BATCH_EMAIL_TEMPLATE, CLASSIFIER_PROMPT, VALID_CLASSIFICATIONS, extract_json_text
+)
+from agents.data_extractor_agent import EXTRACTOR_PROMPT, map_classification_to_status
+from typing import Dict, List, Optional
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Editing the prompt changes FUSED_PROMPT_VERSION, so cached results miss
+FUSED_PROMPT = """
+Analyze this email and determine:
+1. Is it job-related? (yes/no)
+2. If yes, what type is it? Choose from:
+   - application_confirmation: Automated confirmation of application receipt
+   - rejection: Rejection email
+   - interview_request: Interview invitation or scheduling
+   - offer: Job offer
+   - follow_up: Follow-up from recruiter
+   - general: Other job-related communication
+   - not_job_related: Not related to job applications
+3. If it is job-related, extract:
+   - Company Name: The name of the company
+   - Role/Position Title: The job title or position
+   - Location: Job location (city, state, country, or "Remote")
+   - Application Status: Current status
+   - Application Date: When you applied (if mentioned)
+   - Salary Range: If mentioned
+   - Job Description URL: Any links to job posting
+   - Next Steps: Any action items or next steps mentioned
+   - Interview Date/Time: If an interview is scheduled
+   - Contact Person: Name of recruiter or contact person
+
+Email Details:
+Subject: {subject}
+From: {from_address}
+Date: {email_date}
+Body: {body}
+
+Respond in JSON format:
+{{
+    "is_job_related": true/false,
+    "classification": "type",
+    "confidence": 0.0-1.0,
+    "reasoning": "brief explanation",
+    "extracted": {{
+        "company_name": "string or null",
+        "role_title": "string or null",
+        "location": "string or null",
+        "status": "string",
+        "application_date": "YYYY-MM-DD or null",
+        "salary_range": "string or null",
+        "application_url": "string or null",
+        "next_steps": "string or null",
+        "interview_datetime": "YYYY-MM-DD HH:MM or null",
+        "contact_person": "string or null",
+        "additional_notes": "any other relevant information"
+    }}
+}}
+
+Important:
+- Set "extracted" to null if the email is not job-related
+- Use null for fields that cannot be determined
+- For status, use one of: applied, rejected, interview_scheduled, offer_received, follow_up_needed
+- Extract dates in YYYY-MM-DD format
+- Be accurate and don't make assumptions
+"""
+
+FUSED_PROMPT_VERSION = prompt_version(FUSED_PROMPT, NORMALIZER_VERSION)
+
+EXTRACTED_FIELDS = (
+    'company_name', 'role_title', 'location', 'status', 'application_date',
+    'salary_range', 'application_url', 'next_steps', 'interview_datetime',
+    'contact_person', 'additional_notes',
+)
+
+
+class FusedSavings:
+    """Per-run comparison of fused calls against an estimate of the two-agent prompts they replace"""
+    
+    def __init__(self):
+        """Initialize empty counters"""
+        self._lock = threading.Lock()
+        self.emails = 0
+        self.job_related = 0
+        self.fused_prompt_tokens = 0
+        self.fused_output_tokens = 0
+        self.fused_seconds = 0.0
+        self.two_agent_prompt_tokens = 0
+        # Emails per classifier request on the two-agent path
+        self.classifier_batch_size = max(get_prompt_config()['classifier_batch_size'], 1)
+    
+    def record(self, email: Dict, prompt: str, response_text: str, seconds: float, is_job_related: bool):
+        """
+        Record one fused call
+        
+        The two-agent equivalent is estimated by rendering the prompts the
+        configured two-agent path would send for the email: its block of a
+        packed classifier request plus its share of the packed instructions
+        (or the single-email classifier prompt when CLASSIFIER_BATCH_SIZE is
+        1), plus the extractor prompt for job-related emails.
+        
+        Args:
+            email: Email dictionary that was analyzed
+            prompt: Fused prompt that was sent
+            response_text: Raw model response
+            seconds: Call latency (including retries)
+            is_job_related: Whether the email was classified job-related
+        """
+        prompt_config = get_prompt_config()
+        subject = email.get('subject', '')
+        from_address = email.get('from', '')
+        normalized = normalize_email(email)
+        classifier_body = truncate_to_tokens(normalized, prompt_config['classifier_max_tokens'])
+        batch_size = self.classifier_batch_size
+        if batch_size > 1:
+            two_agent_tokens = count_tokens(BATCH_EMAIL_TEMPLATE.format(
+                message_id='m0',
+                subject=subject,
+                from_address=from_address,
+                body=classifier_body
+            )) + count_tokens(BATCH_CLASSIFIER_PROMPT.format(emails='')) / batch_size
+        else:
+            two_agent_tokens = count_tokens(CLASSIFIER_PROMPT.format(
+                subject=subject,
+                from_address=from_address,
+                body=classifier_body
+            ))
+        if is_job_related:
+            two_agent_tokens += count_tokens(EXTRACTOR_PROMPT.format(
+                email_type='',
+                subject=subject,
+                from_address=from_address,
+                email_date=email.get('date', ''),
+                body=truncate_to_tokens(normalized, prompt_config['extractor_max_tokens'])
+            ))
+        
+        with self._lock:
+            self.emails += 1
+            self.job_related += int(is_job_related)
+            self.fused_prompt_tokens += count_tokens(prompt)
+            self.fused_output_tokens += count_tokens(response_text)
+            self.fused_seconds += seconds
+            self.two_agent_prompt_tokens += two_agent_tokens
+    
+    def report(self) -> Dict:
+        """
+        Get the token savings of this run
+        
+        Fused numbers are measured; the two-agent numbers (``_est`` keys)
+        are estimates from rendered prompts, since the two-agent path did
+        not run. Its latency is not estimated; compare fused_llm_seconds
+        with the LLM time of a two-agent run on the same mail instead.
+        
+        Returns:
+            Dictionary with call counts and prompt tokens of both paths, the
+            estimated saved share of prompt tokens and the fused LLM seconds
+        """
+        with self._lock:
+            two_agent_calls = -(-self.emails // self.classifier_batch_size) + self.job_related
+            two_agent_tokens = round(self.two_agent_prompt_tokens)
+            saved_tokens = two_agent_tokens - self.fused_prompt_tokens
+            return {
+                'emails': self.emails,
+                'fused_calls': self.emails,
+                'two_agent_calls_est': two_agent_calls,
+                'fused_prompt_tokens': self.fused_prompt_tokens,
+                'fused_output_tokens': self.fused_output_tokens,
+                'two_agent_prompt_tokens_est': two_agent_tokens,
+                'saved_prompt_tokens_est': saved_tokens,
+                'saved_token_ratio_est': saved_tokens / two_agent_tokens if two_agent_tokens else 0.0,
+                'fused_llm_seconds': self.fused_seconds,
+            }
+    
+    def print_report(self):
+        """Log token savings"""
+        report = self.report()
+        if not report['emails']:
+            return
+        logger.info(
+            f"🔗 Fused analysis: {report['fused_calls']} calls instead of ~{report['two_agent_calls_est']}, "
+            f"{report['fused_prompt_tokens']} prompt tokens instead of ~{report['two_agent_prompt_tokens_est']} "
+            f"({report['saved_token_ratio_est']:.0%} saved, estimated), LLM time {report['fused_llm_seconds']:.1f}s"
+        )
+
+
+def create_email_analyzer_agent() -> Agent:
+    """
+    Create an agent that classifies emails and extracts their data in one pass
+    
+    Returns:
+        Configured Agent instance
+    """
+    ai_config = get_ai_config()
+    
+    agent = Agent(
+        name="Email Analyzer Agent",
+        role="Email Classification and Extraction Specialist",
+        description="Classify emails and extract job application details in a single pass",
+        instructions="""You are an expert at analyzing emails about job applications.
+        You determine whether an email is job-related and what type it is, and for
+        job-related emails you extract company names, job titles, locations, dates,
+        and other relevant information accurately.""",
+        model=OpenAIChat(
+            id=ai_config['model'],
+            api_key=ai_config['openai_api_key'],
+            base_url=ai_config['openai_base_url'],
+            temperature=0.1  # Same as the extractor; the output is mostly extraction
+        ),
+        debug_mode=agent_debug_mode(),
+        markdown=True,
+    )
+    
+    return agent
+
+
+def _to_extracted_data(email: Dict, classification: str, fields: Optional[Dict]) -> Dict:
+    """Build the extract_data_task-shaped dictionary from the fused response fields"""
+    fields = fields or {}
+    extracted_data = {field: fields.get(field) for field in EXTRACTED_FIELDS}
+    extracted_data['status'] = extracted_data['status'] or map_classification_to_status(classification)
+    extracted_data['email_subject'] = email.get('subject', '')
+    extracted_data['email_from'] = email.get('from', '')
+    extracted_data['email_date'] = email.get('date', '')
+    extracted_data['email_message_id'] = email.get('message_id')
+    extracted_data['classification'] = classification
+    return extracted_data
+
+
+def analyze_email_task(agent: Agent, email: Dict, savings: Optional[FusedSavings] = None) -> Dict:
+    """
+    Task to classify an email and extract its data in one call
+    
+    Args:
+        agent: The email analyzer agent
+        email: Email dictionary with subject, from, date, body, etc.
+        savings: Per-run savings recorder
+    
+    Returns:
+        Classification result dictionary (same shape as classify_email_task)
+        with an 'extracted' key: the extract_data_task-shaped dictionary for
+        job-related emails, None otherwise
+    """
+    subject = email.get('subject', '')
+    from_address = email.get('from', '')
+    email_date = email.get('date', '')
+    
+    # Extraction needs the larger body budget, so the fused prompt uses it
+    body = truncate_to_tokens(normalize_email(email), get_prompt_config()['extractor_max_tokens'])
+    
+    prompt = FUSED_PROMPT.format(
+        subject=subject,
+        from_address=from_address,
+        email_date=email_date,
+        body=body
+    )
+    
+    # Same email, prompt and model: reuse the stored result
+    cache = get_result_cache()
+    cache_args = (
+        email.get('internet_message_id') or email.get('message_id'),
+        content_hash(subject, from_address, email_date, body),
+        FUSED_PROMPT_VERSION,
+        f"{agent.model.id}@{agent.model.temperature}",
+    )
+    if cache:
+        cached = cache.get(FUSED, *cache_args)
+        if cached is not None:
+            if cached['extracted'] is not None:
+                cached['extracted']['email_message_id'] = email.get('message_id')
+            return dict(cached, message_id=email.get('message_id'), cached=True)
+    
+    try:
+        started = time.perf_counter()
+        response = call_agent(agent, prompt, expected_output_tokens=450)
+        response_text = str(response.content)
+        result = json.loads(extract_json_text(response_text))
+        
+        classification = result.get('classification', 'unknown')
+        if classification not in VALID_CLASSIFICATIONS:
+            classification = 'general' if result.get('is_job_related') else 'not_job_related'
+        is_job_related = bool(result.get('is_job_related', False)) and classification != 'not_job_related'
+        
+        analysis = {
+            'message_id': email.get('message_id'),
+            'is_job_related': is_job_related,
+            'classification': classification,
+            'confidence': result.get('confidence', 0.0),
+            'reasoning': result.get('reasoning', ''),
+            'source': 'llm_fused',
+            'extracted': _to_extracted_data(email, classification, result.get('extracted')) if is_job_related else None,
+        }
+        if savings:
+            savings.record(email, prompt, response_text, time.perf_counter() - started, is_job_related)
+        if cache:
+            cache.put(FUSED, *cache_args, analysis)
+        return analysis
+    
+    except Exception as e:
+        logger.error(f"✗ Error analyzing email: {e}", extra={'message_id': email.get('message_id')})
+        return {
+            'message_id': email.get('message_id'),
+            'is_job_related': False,
+            'classification': 'error',
+            'confidence': 0.0,
+            'reasoning': f'Analysis error: {str(e)}',
+            'source': 'llm_fused',
+            'extracted': None,
+        }
+
+
+def analyze_emails_batch(agent: Agent, emails: List[Dict], savings: Optional[FusedSavings] = None) -> List[Dict]:
+    """
+    Classify and extract multiple emails, one fused call each
+    
+    Used as the LLM stage of classify_emails_batch, so rules and the local
+    model still decide what they can before any call is made.
+    
+    Args:
+        agent: The email analyzer agent
+        emails: List of email dictionaries
+        savings: Per-run savings recorder
+    
+    Returns:
+        List of analyze_email_task results, in the order of ``emails``
+    """
+    if emails:
+        logger.debug(f"Analyzing {len(emails)} emails with the fused LLM agent...")
+    
+    def run_analysis(worker_agent: Agent, email: Dict) -> Dict:
+        return analyze_email_task(worker_agent, email, savings)
+    
+    # Several calls in flight at once, under the shared rate limits
+    return get_llm_executor().map(agent, run_analysis, emails)
+
+
+if __name__ == "__main__":
+    # Test the email analyzer agent
+    agent = create_email_analyzer_agent()
+    print(f"Created agent: {agent.name}")
+    
+    test_email = {
+        'message_id': 'test123',
+        'subject': 'Interview Invitation - Senior Software Engineer at TechCorp',
+        'from': 'recruiter@techcorp.com',
+        'date': '2024-01-15',
+        'body': 'We would like to invite you for an interview on January 20, 2024 at 2:00 PM '
+                'for the Senior Software Engineer position in San Francisco, CA.\n\nJane Smith\nSenior Recruiter'
+    }
+    
+    savings = FusedSavings()
+    result = analyze_email_task(agent, test_email, savings)
+    print(f"\nAnalysis result:")
+    print(json.dumps(result, indent=2))
+    savings.print_report()
@@ -3,9 +3,86 @@ Email Classifier Agent - Classifies emails as job-related and determines their t
 """
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from utils.config import get_ai_config
-from typing import Dict, Optional
+from utils.config import get_ai_config, get_prompt_config
+from utils.text_normalizer import NORMALIZER_VERSION, count_tokens, normalize_email, truncate_to_tokens
+from utils.result_cache import CLASSIFICATION, content_hash, get_result_cache, prompt_version
+from utils.email_rules import RuleFilter
+from utils.llm_executor import call_agent, get_llm_executor
+from utils.logger import agent_debug_mode, get_item_log
+from typing import Callable, Dict, List, Optional
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Editing the prompt changes CLASSIFIER_PROMPT_VERSION, so cached results miss
+CLASSIFIER_PROMPT = """
+Analyze this email and determine:
+1. Is it job-related? (yes/no)
+2. If yes, what type is it? Choose from:
+   - application_confirmation: Automated confirmation of application receipt
+   - rejection: Rejection email
+   - interview_request: Interview invitation or scheduling
+   - offer: Job offer
+   - follow_up: Follow-up from recruiter
+   - general: Other job-related communication
+   - not_job_related: Not related to job applications
+
+Email Details:
+Subject: {subject}
+From: {from_address}
+Body: {body}
+
+Respond in JSON format:
+{{
+    "is_job_related": true/false,
+    "classification": "type",
+    "confidence": 0.0-1.0,
+    "reasoning": "brief explanation"
+}}
+"""
+
+CLASSIFIER_PROMPT_VERSION = prompt_version(CLASSIFIER_PROMPT, NORMALIZER_VERSION)
+
+# Several emails per request; {emails} is filled with BATCH_EMAIL_TEMPLATE blocks
+BATCH_CLASSIFIER_PROMPT = """
+Analyze each of the emails below and determine:
+1. Is it job-related? (yes/no)
+2. If yes, what type is it? Choose from:
+   - application_confirmation: Automated confirmation of application receipt
+   - rejection: Rejection email
+   - interview_request: Interview invitation or scheduling
+   - offer: Job offer
+   - follow_up: Follow-up from recruiter
+   - general: Other job-related communication
+   - not_job_related: Not related to job applications
+
+{emails}
+Respond with a JSON array containing exactly one object per email:
+[
+    {{
+        "message_id": "the message_id shown above the email",
+        "is_job_related": true/false,
+        "classification": "type",
+        "confidence": 0.0-1.0,
+        "reasoning": "brief explanation"
+    }}
+]
+"""
+
+BATCH_EMAIL_TEMPLATE = """--- Email (message_id: {message_id}) ---
+Subject: {subject}
+From: {from_address}
+Body: {body}
+
+"""
+
+BATCH_CLASSIFIER_PROMPT_VERSION = prompt_version(BATCH_CLASSIFIER_PROMPT, BATCH_EMAIL_TEMPLATE, NORMALIZER_VERSION)
+
+VALID_CLASSIFICATIONS = {
+    'application_confirmation', 'rejection', 'interview_request', 'offer',
+    'follow_up', 'general', 'not_job_related',
+}
 
 
 def create_email_classifier_agent() -> Agent:
@@ -28,15 +105,29 @@ def create_email_classifier_agent() -> Agent:
         model=OpenAIChat(
             id=ai_config['model'],
             api_key=ai_config['openai_api_key'],
+            base_url=ai_config['openai_base_url'],
             temperature=ai_config['temperature']
         ),
-        debug_mode=True,
+        debug_mode=agent_debug_mode(),
         markdown=True,
     )
     
     return agent
 
 
+def extract_json_text(response_text: str) -> str:
+    """Strip markdown code fences around a JSON response"""
+    if '```json' in response_text:
+        json_start = response_text.find('```json') + 7
+        json_end = response_text.find('```', json_start)
+        return response_text[json_start:json_end].strip()
+    if '```' in response_text:
+        json_start = response_text.find('```') + 3
+        json_end = response_text.find('```', json_start)
+        return response_text[json_start:json_end].strip()
+    return response_text
+
+
 def classify_email_task(agent: Agent, email: Dict) -> Dict:
     """
     Task to classify a single email
@@ -50,104 +141,297 @@ def classify_email_task(agent: Agent, email: Dict) -> Dict:
     """
     subject = email.get('subject', '')
     from_address = email.get('from', '')
-    body = email.get('text', '') or email.get('body', '')
     
-    # Truncate body if too long
-    if len(body) > 2000:
-        body = body[:2000] + "..."
+    # Normalized (HTML/quotes/footers stripped) and truncated by tokens
+    body = truncate_to_tokens(normalize_email(email), get_prompt_config()['classifier_max_tokens'])
     
-    prompt = f"""
-Analyze this email and determine:
-1. Is it job-related? (yes/no)
-2. If yes, what type is it? Choose from:
-   - application_confirmation: Automated confirmation of application receipt
-   - rejection: Rejection email
-   - interview_request: Interview invitation or scheduling
-   - offer: Job offer
-   - follow_up: Follow-up from recruiter
-   - general: Other job-related communication
-   - not_job_related: Not related to job applications
-
-Email Details:
-Subject: {subject}
-From: {from_address}
-Body: {body}
-
-Respond in JSON format:
-{{
-    "is_job_related": true/false,
-    "classification": "type",
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation"
-}}
-"""
+    prompt = CLASSIFIER_PROMPT.format(subject=subject, from_address=from_address, body=body)
+    
+    # Same email, same prompt and model: reuse the stored result
+    cache = get_result_cache()
+    cache_args = (
+        email.get('internet_message_id') or email.get('message_id'),
+        content_hash(subject, from_address, body),
+        CLASSIFIER_PROMPT_VERSION,
+        f"{agent.model.id}@{agent.model.temperature}",
+    )
+    if cache:
+        cached = cache.get(CLASSIFICATION, *cache_args)
+        if cached is not None:
+            return dict(cached, message_id=email.get('message_id'), cached=True)
     
     try:
-        response = agent.run(prompt)
+        response = call_agent(agent, prompt, expected_output_tokens=150)
         
         # Parse the response
         # The response might be wrapped in markdown code blocks
-        response_text = str(response.content)
+        result = json.loads(extract_json_text(str(response.content)))
         
-        # Extract JSON from markdown if present
-        if '```json' in response_text:
-            json_start = response_text.find('```json') + 7
-            json_end = response_text.find('```', json_start)
-            response_text = response_text[json_start:json_end].strip()
-        elif '```' in response_text:
-            json_start = response_text.find('```') + 3
-            json_end = response_text.find('```', json_start)
-            response_text = response_text[json_start:json_end].strip()
-        
-        result = json.loads(response_text)
-        
-        return {
+        classification = {
             'message_id': email.get('message_id'),
             'is_job_related': result.get('is_job_related', False),
             'classification': result.get('classification', 'unknown'),
             'confidence': result.get('confidence', 0.0),
             'reasoning': result.get('reasoning', ''),
+            'source': 'llm',
         }
+        if cache:
+            cache.put(CLASSIFICATION, *cache_args, classification)
+        return classification
         
     except Exception as e:
-        print(f"✗ Error classifying email: {e}")
-        return {
-            'message_id': email.get('message_id'),
-            'is_job_related': False,
-            'classification': 'error',
-            'confidence': 0.0,
-            'reasoning': f'Classification error: {str(e)}',
-        }
+        logger.error(f"✗ Error classifying email: {e}", extra={'message_id': email.get('message_id')})
+        return _error_classification(email, e)
 
 
-def classify_emails_batch(agent: Agent, emails: list) -> list:
+def _error_classification(email: Dict, error: Exception) -> Dict:
+    """Classification result of an email the LLM could not classify"""
+    return {
+        'message_id': email.get('message_id'),
+        'is_job_related': False,
+        'classification': 'error',
+        'confidence': 0.0,
+        'reasoning': f'Classification error: {str(error)}',
+        'source': 'llm',
+    }
+
+
+def classify_emails_packed(
+    agent: Agent,
+    emails: List[Dict],
+    batch_size: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None
+) -> List[Dict]:
+    """
+    Classify emails with several emails packed into each LLM request
+    
+    Emails are grouped greedily until ``batch_size`` emails or
+    ``max_batch_tokens`` body tokens, and each group is sent as one prompt
+    asking for a JSON array keyed by message_id. Groups whose response
+    cannot be parsed are split in half and retried; elements that are
+    missing or invalid are retried on their own.
+    
+    Args:
+        agent: The email classifier agent
+        emails: Email dictionaries
+        batch_size: Emails per request (default: CLASSIFIER_BATCH_SIZE)
+        max_batch_tokens: Token budget of the emails in one request
+            (default: CLASSIFIER_BATCH_MAX_TOKENS)
+        
+    Returns:
+        Classification results, in the order of ``emails``
+    """
+    prompt_config = get_prompt_config()
+    batch_size = batch_size or prompt_config['classifier_batch_size']
+    max_batch_tokens = max_batch_tokens or prompt_config['classifier_batch_max_tokens']
+    
+    results: List[Optional[Dict]] = [None] * len(emails)
+    blocks = []
+    cache = get_result_cache()
+    model_key = f"{agent.model.id}@{agent.model.temperature}"
+    
+    for i, email in enumerate(emails):
+        subject = email.get('subject', '')
+        from_address = email.get('from', '')
+        body = truncate_to_tokens(normalize_email(email), prompt_config['classifier_max_tokens'])
+        cache_args = (
+            email.get('internet_message_id') or email.get('message_id'),
+            content_hash(subject, from_address, body),
+            BATCH_CLASSIFIER_PROMPT_VERSION,
+            model_key,
+        )
+        cached = cache.get(CLASSIFICATION, *cache_args) if cache else None
+        if cached is not None:
+            results[i] = dict(cached, message_id=email.get('message_id'), cached=True)
+            continue
+        
+        # Short per-batch ids keep the prompt small and are always unique
+        block = BATCH_EMAIL_TEMPLATE.format(
+            message_id=f"m{i}",
+            subject=subject,
+            from_address=from_address,
+            body=body
+        )
+        blocks.append((i, block, count_tokens(block), cache_args))
+    
+    # Greedy packing by count and token budget
+    batches, current, current_tokens = [], [], 0
+    for item in blocks:
+        if current and (len(current) >= batch_size or current_tokens + item[2] > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += item[2]
+    if current:
+        batches.append(current)
+    
+    if batches:
+        logger.debug(f"Classifying {len(blocks)} emails in {len(batches)} batched requests...")
+    
+    def run_batch(worker_agent: Agent, batch: List[tuple]) -> Dict[int, Dict]:
+        return _classify_packed_batch(worker_agent, emails, batch)
+    
+    # Batches run concurrently under the shared rate limits
+    for batch, batch_results in zip(batches, get_llm_executor().map(agent, run_batch, batches)):
+        for i, result in batch_results.items():
+            results[i] = result
+            cache_args = next(item[3] for item in batch if item[0] == i)
+            if cache and result.get('classification') != 'error':
+                cache.put(CLASSIFICATION, *cache_args, result)
+    
+    return results
+
+
+def _classify_packed_batch(agent: Agent, emails: List[Dict], batch: List[tuple]) -> Dict[int, Dict]:
+    """
+    Run one packed request, splitting and retrying on parse failures
+    
+    A failed request (provider or network error after the executor's
+    retries) marks the whole batch as errored instead of splitting it.
+    
+    Args:
+        agent: The email classifier agent
+        emails: All email dictionaries (indexed by the batch items)
+        batch: (email index, prompt block, tokens, cache args) items
+        
+    Returns:
+        Dictionary mapping email index to classification result
+    """
+    if len(batch) == 1:
+        index = batch[0][0]
+        return {index: classify_email_task(agent, emails[index])}
+    
+    prompt = BATCH_CLASSIFIER_PROMPT.format(emails=''.join(item[1] for item in batch))
+    try:
+        response = call_agent(agent, prompt, expected_output_tokens=80 * len(batch))
+    except Exception as e:
+        # The executor already retried transient errors; splitting would
+        # only repeat the failing call for every half
+        logger.error(f"✗ Error classifying batch of {len(batch)}: {e}")
+        return {item[0]: _error_classification(emails[item[0]], e) for item in batch}
+    
+    parsed = {}
+    try:
+        items = json.loads(extract_json_text(str(response.content)))
+        if not isinstance(items, list):
+            raise ValueError("response is not a JSON array")
+        ids = {f"m{item[0]}": item[0] for item in batch}
+        for element in items:
+            index = ids.get(str(element.get('message_id'))) if isinstance(element, dict) else None
+            result = _validate_batch_element(element, emails[index]) if index is not None else None
+            if result is not None:
+                parsed[index] = result
+    except ValueError as e:  # Includes json.JSONDecodeError
+        logger.warning(f"  ⚠️  Batch of {len(batch)} could not be parsed ({e}), splitting...")
+    
+    missing = [item for item in batch if item[0] not in parsed]
+    if len(missing) == len(batch):
+        middle = len(batch) // 2
+        parsed.update(_classify_packed_batch(agent, emails, batch[:middle]))
+        parsed.update(_classify_packed_batch(agent, emails, batch[middle:]))
+    elif missing:
+        logger.warning(f"  ↻ Retrying {len(missing)} emails missing from the batch response...")
+        parsed.update(_classify_packed_batch(agent, emails, missing))
+    
+    return parsed
+
+
+def _validate_batch_element(element: Dict, email: Dict) -> Optional[Dict]:
+    """Check one element of a batch response; returns the result or None if invalid"""
+    classification = element.get('classification')
+    is_job_related = element.get('is_job_related')
+    confidence = element.get('confidence', 0.0)
+    if classification not in VALID_CLASSIFICATIONS or not isinstance(is_job_related, bool):
+        return None
+    if not isinstance(confidence, (int, float)) or not 0.0 <= confidence <= 1.0:
+        return None
+    return {
+        'message_id': email.get('message_id'),
+        'is_job_related': is_job_related,
+        'classification': classification,
+        'confidence': float(confidence),
+        'reasoning': str(element.get('reasoning', '')),
+        'source': 'llm',
+    }
+
+
+def classify_emails_batch(
+    agent: Agent,
+    emails: list,
+    rule_filter: Optional[RuleFilter] = None,
+    local_model=None,
+    llm_stage: Optional[Callable[[List[Dict]], List[Dict]]] = None
+) -> list:
     """
     Classify multiple emails
     
+    Emails go through up to three stages, each only seeing what the
+    previous one left undecided: the rule pre-filter, the local model
+    (whole batch at once), and finally the LLM classifier, several emails
+    per request when CLASSIFIER_BATCH_SIZE > 1.
+    
     Args:
         agent: The email classifier agent
         emails: List of email dictionaries
+        rule_filter: Rule pre-filter; emails it decides are not sent to the LLM
+        local_model: Trained utils.local_classifier.LocalClassifier; confident
+            predictions are not sent to the LLM
+        llm_stage: Replaces the LLM classifier for the undecided emails
+            (e.g. the fused analyzer of agents.email_analyzer_agent)
         
     Returns:
         List of classification results
     """
-    print(f"\n{'='*60}")
-    print(f"🤖 Email Classifier Agent: Classifying {len(emails)} emails")
-    print(f"{'='*60}\n")
-    
-    results = []
-    for i, email in enumerate(emails, 1):
-        print(f"Classifying email {i}/{len(emails)}: {email.get('subject', 'No subject')[:50]}...")
-        result = classify_email_task(agent, email)
-        results.append(result)
+    logger.debug(f"\n{'='*60}\n🤖 Email Classifier Agent: Classifying {len(emails)} emails\n{'='*60}\n")
+    
+    results = [rule_filter.classify(email) if rule_filter else None for email in emails]
+    
+    pending = [i for i, result in enumerate(results) if result is None]
+    deferred_predictions = {}
+    if local_model is not None and pending:
+        predictions = local_model.classify_batch([emails[i] for i in pending])
+        for i, prediction in zip(pending, predictions):
+            if local_model.accept(prediction):
+                results[i] = prediction
+            else:
+                deferred_predictions[i] = prediction
+    
+    decided = [result is not None for result in results]
+    llm_indices = [i for i, result in enumerate(results) if result is None]
+    llm_emails = [emails[i] for i in llm_indices]
+    if llm_stage is not None:
+        llm_results = llm_stage(llm_emails) if llm_emails else []
+    elif len(llm_indices) > 1 and get_prompt_config()['classifier_batch_size'] > 1:
+        llm_results = classify_emails_packed(agent, llm_emails)
+    else:
+        # One request per email, several in flight at once
+        if llm_emails:
+            logger.debug(f"Classifying {len(llm_emails)} emails with the LLM...")
+        llm_results = get_llm_executor().map(agent, classify_email_task, llm_emails)
+    for i, result in zip(llm_indices, llm_results):
+        results[i] = result
+    
+    item_log = get_item_log('classify')
+    for i, email in enumerate(emails):
+        source = results[i].get('source', 'llm') if decided[i] else 'llm'
+        if i in deferred_predictions:
+            local_model.record_agreement(deferred_predictions[i], results[i])
+        result = results[i]
         
-        if result['is_job_related']:
-            print(f"  ✓ Job-related: {result['classification']} (confidence: {result['confidence']:.2f})")
-        else:
-            print(f"  ✗ Not job-related")
+        # Per-email lines are sampled in production (see utils.logger)
+        item_log.item(
+            logger,
+            "Classified email %d/%d by %s: %.50s...\n  %s: %s (confidence: %.2f)",
+            i + 1, len(emails), source, email.get('subject', 'No subject'),
+            "✓ Job-related" if result['is_job_related'] else "✗ Not job-related",
+            result['classification'], result.get('confidence') or 0.0,
+            message_id=email.get('message_id'),
+            source=source,
+            classification=result['classification']
+        )
     
     job_related_count = sum(1 for r in results if r['is_job_related'])
-    print(f"\n✓ Classification complete: {job_related_count}/{len(emails)} job-related emails found")
+    logger.debug(f"\n✓ Classification complete: {job_related_count}/{len(emails)} job-related emails found")
     
     return results
 
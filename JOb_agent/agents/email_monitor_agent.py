@@ -3,7 +3,13 @@ Email Monitor Agent - Monitors and fetches emails from inbox
 """
 from agno.agent import Agent
 from utils.email_client import EmailClient
-from typing import List, Dict
+from utils.mbox_source import MboxSource
+from utils.logger import agent_debug_mode
+from typing import Callable, Iterator, List, Dict, Optional
+from itertools import islice
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def create_email_monitor_agent() -> Agent:
@@ -20,7 +26,7 @@ def create_email_monitor_agent() -> Agent:
         instructions="""You are an expert at monitoring email inboxes and identifying 
         relevant emails. You work efficiently to fetch emails without missing any 
         important messages.""",
-        debug_mode=True,
+        debug_mode=agent_debug_mode(),
     )
     
     return agent
@@ -33,83 +39,179 @@ def fetch_emails_task(agent: Agent, days: int = 7, mode: str = 'recent') -> List
     Args:
         agent: The email monitor agent
         days: Number of days to look back (for 'recent' mode)
-        mode: 'recent', 'unread', or 'all'
+        mode: 'recent', 'unread', 'incremental', 'headers_first', or 'all'
         
     Returns:
         List of email dictionaries
     """
-    print(f"\n{'='*60}")
-    print(f"📧 Email Monitor Agent: Fetching emails (mode: {mode})")
-    print(f"{'='*60}\n")
+    logger.info(f"\n{'='*60}\n📧 Email Monitor Agent: Fetching emails (mode: {mode})\n{'='*60}\n")
     
     client = EmailClient()
     
     try:
         if not client.connect():
-            print("Failed to connect to email server")
+            logger.error("Failed to connect to email server")
             return []
         
-        if mode == 'unread':
+        if len(client.config['folders']) > 1 and mode != 'headers_first':
+            emails = client.fetch_folders_parallel(mode=mode, days=days)
+        elif mode == 'unread':
             emails = client.fetch_unread_emails()
+        elif mode == 'incremental':
+            emails = client.fetch_new_emails()
+        elif mode == 'headers_first':
+            emails = client.fetch_recent_emails_headers_first(days=days)
         elif mode == 'recent':
             emails = client.fetch_recent_emails(days=days)
         else:
             emails = client.fetch_recent_emails(days=days)
         
-        print(f"\n✓ Successfully fetched {len(emails)} emails")
+        logger.info(f"\n✓ Successfully fetched {len(emails)} emails")
         return emails
         
     except Exception as e:
-        print(f"✗ Error in email monitoring: {e}")
+        logger.error(f"✗ Error in email monitoring: {e}")
         return []
         
     finally:
         client.disconnect()
 
 
-def search_job_emails_task(agent: Agent, days: int = 30) -> List[Dict]:
+def iter_email_chunks_task(
+    agent: Agent,
+    days: int = 7,
+    mode: str = 'recent',
+    chunk_size: Optional[int] = None,
+    source: str = 'imap',
+    checkpoint: Optional[Callable[[List[Dict]], None]] = None
+) -> Iterator[List[Dict]]:
+    """
+    Task to stream emails from inbox in bounded chunks
+    
+    Unlike fetch_emails_task, at most one chunk of messages is held in
+    memory, so peak memory stays flat regardless of the lookback window.
+    
+    Args:
+        agent: The email monitor agent
+        days: Number of days to look back (for 'recent' mode)
+        mode: 'recent', 'unread', 'incremental', 'headers_first', or 'all'
+        chunk_size: Emails per chunk (default: FETCH_CHUNK_SIZE)
+        source: 'imap' or 'mbox:/path' to replay an mbox file or .eml directory
+        checkpoint: Called with each fetched UID chunk before the
+            'incremental' sync watermark moves past it (see
+            EmailClient.iter_new_emails)
+        
+    Yields:
+        Lists of email dictionaries
+    """
+    if source != 'imap':
+        yield from iter_offline_email_chunks(source, chunk_size=chunk_size)
+        return
+    
+    logger.info(f"\n{'='*60}\n📧 Email Monitor Agent: Streaming emails (mode: {mode})\n{'='*60}\n")
+    
+    client = EmailClient()
+    chunk_size = chunk_size or client.config['fetch_chunk_size']
+    
+    try:
+        if not client.connect():
+            logger.error("Failed to connect to email server")
+            return
+        
+        if len(client.config['folders']) > 1 and mode != 'headers_first':
+            # Folders are streamed one after another on this connection
+            emails = client.iter_folders(mode=mode, days=days, chunk_size=chunk_size, checkpoint=checkpoint)
+        elif mode == 'unread':
+            emails = client.iter_unread_emails(chunk_size=chunk_size)
+        elif mode == 'incremental':
+            emails = client.iter_new_emails(chunk_size=chunk_size, checkpoint=checkpoint)
+        elif mode == 'headers_first':
+            # Bodies are already partial; the candidate list is small
+            emails = iter(client.fetch_recent_emails_headers_first(days=days))
+        else:
+            emails = client.iter_recent_emails(days=days, chunk_size=chunk_size)
+        
+        total = 0
+        while True:
+            chunk = list(islice(emails, chunk_size))
+            if not chunk:
+                break
+            total += len(chunk)
+            yield chunk
+        
+        logger.info(f"\n✓ Successfully streamed {total} emails")
+        
+    except Exception as e:
+        logger.error(f"✗ Error in email monitoring: {e}")
+        
+    finally:
+        client.disconnect()
+
+
+def iter_offline_email_chunks(source: str, chunk_size: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Stream emails from an offline mbox/.eml source in bounded chunks
+    
+    Args:
+        source: 'mbox:/path' to an mbox file or a directory of .eml/.mbox files
+        chunk_size: Emails per chunk (default: FETCH_CHUNK_SIZE)
+        
+    Yields:
+        Lists of email dictionaries
+    """
+    mbox_source = MboxSource.from_source_spec(source)
+    
+    logger.info(f"\n{'='*60}\n📧 Email Monitor Agent: Replaying {mbox_source.path} ({mbox_source.workers} parser processes)\n{'='*60}\n")
+    
+    total = 0
+    for chunk in mbox_source.iter_chunks(chunk_size=chunk_size):
+        total += len(chunk)
+        yield chunk
+    
+    logger.info(f"\n✓ Successfully replayed {total} emails")
+
+
+def search_job_emails_task(
+    agent: Agent,
+    days: int = 30,
+    keywords: Optional[List[str]] = None,
+    senders: Optional[List[str]] = None
+) -> List[Dict]:
     """
     Task to search for job-related emails using keywords
     
+    Runs one OR'd IMAP SEARCH on the server instead of downloading the
+    lookback window once per keyword.
+    
     Args:
         agent: The email monitor agent
         days: Number of days to look back
+        keywords: Keywords to search for (default: JOB_SEARCH_KEYWORDS)
+        senders: Sender fragments to search for (default: JOB_SEARCH_SENDERS)
         
     Returns:
         List of job-related email dictionaries
     """
-    print(f"\n{'='*60}")
-    print(f"🔍 Email Monitor Agent: Searching for job-related emails")
-    print(f"{'='*60}\n")
-    
-    # Common job-related keywords
-    job_keywords = [
-        'application', 'interview', 'position', 'opportunity',
-        'recruiter', 'hiring', 'job', 'career', 'offer'
-    ]
+    logger.info(f"\n{'='*60}\n🔍 Email Monitor Agent: Searching for job-related emails\n{'='*60}\n")
     
     client = EmailClient()
-    all_job_emails = []
     
     try:
         if not client.connect():
-            print("Failed to connect to email server")
+            logger.error("Failed to connect to email server")
             return []
         
-        # Search for each keyword
-        for keyword in job_keywords:
-            emails = client.search_emails(keyword, days=days)
-            all_job_emails.extend(emails)
-        
-        # Remove duplicates based on message_id
-        unique_emails = {email['message_id']: email for email in all_job_emails}
-        unique_job_emails = list(unique_emails.values())
+        unique_job_emails = client.search_job_emails(
+            keywords=keywords,
+            senders=senders,
+            days=days
+        )
         
-        print(f"\n✓ Found {len(unique_job_emails)} unique job-related emails")
+        logger.info(f"\n✓ Found {len(unique_job_emails)} unique job-related emails")
         return unique_job_emails
         
     except Exception as e:
-        print(f"✗ Error searching for job emails: {e}")
+        logger.error(f"✗ Error searching for job emails: {e}")
         return []
         
     finally:
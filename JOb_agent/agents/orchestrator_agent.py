@@ -2,11 +2,46 @@
 Orchestrator Agent - Coordinates all agents in the job tracking workflow
 """
 from agno.agent import Agent
-from agents.email_monitor_agent import create_email_monitor_agent, fetch_emails_task
+from agents.email_monitor_agent import create_email_monitor_agent, iter_email_chunks_task
 from agents.email_classifier_agent import create_email_classifier_agent, classify_emails_batch
 from agents.data_extractor_agent import create_data_extractor_agent, extract_data_batch
-from agents.database_manager_agent import create_database_manager_agent, save_applications_batch, get_statistics
-from typing import Dict, List
+from agents.email_analyzer_agent import FusedSavings, create_email_analyzer_agent, analyze_emails_batch
+from agents.database_manager_agent import (
+    create_database_manager_agent,
+    save_applications_batch,
+    log_classifications_batch,
+    find_thread_applications,
+    attach_thread_replies_batch,
+    record_processing_times,
+    load_ledger_entries,
+    record_ledger_entries,
+    load_unfinished_emails,
+    get_statistics
+)
+from utils.text_normalizer import normalize_emails
+from utils.email_rules import RuleFilter
+from utils.thread_index import ThreadIndex, thread_keys
+from utils.template_index import TemplateIndex, load_template_index
+from utils.work_ledger import WorkLedger
+from utils.config import get_email_config, get_prompt_config, get_rules_config, get_pipeline_config, get_ledger_config
+from utils.email_client import mailbox_account_key
+from utils.result_cache import ResultCache, get_result_cache
+from utils.llm_executor import get_llm_executor
+from utils.metrics import get_metrics
+from utils.pipeline import Pipeline, Stage
+from utils.logger import agent_debug_mode, configure_logging
+try:
+    from utils.local_classifier import load_local_classifier
+except ImportError:
+    # NumPy not installed; uncertain emails all go to the LLM classifier
+    load_local_classifier = None
+from functools import partial
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+import time
+
+logger = logging.getLogger(__name__)
 
 
 def create_orchestrator_agent() -> Agent:
@@ -23,7 +58,7 @@ def create_orchestrator_agent() -> Agent:
         instructions="""You are an expert at coordinating complex workflows. You 
         manage the entire job tracking pipeline, ensuring each agent performs 
         its task efficiently and data flows smoothly between agents.""",
-        debug_mode=True,
+        debug_mode=agent_debug_mode(),
     )
     
     return agent
@@ -32,23 +67,45 @@ def create_orchestrator_agent() -> Agent:
 def run_job_tracking_workflow(
     orchestrator: Agent,
     mode: str = 'recent',
-    days: int = 7
+    days: int = 7,
+    emails: Optional[List[Dict]] = None,
+    email_stream: Optional[Callable[[Optional[Callable[[List[Dict]], None]]], Iterable[Dict]]] = None,
+    source: str = 'imap',
+    agent_mode: Optional[str] = None,
+    execution_mode: Optional[str] = None
 ) -> Dict:
     """
     Run the complete job tracking workflow
     
     Args:
         orchestrator: The orchestrator agent
-        mode: Email fetching mode ('recent', 'unread', 'all')
+        mode: Email fetching mode ('recent', 'unread', 'incremental', 'headers_first', 'all')
         days: Number of days to look back (for 'recent' mode)
-        
+        emails: Already fetched emails to process; skips the fetch step when given
+        email_stream: Called with the work ledger checkpoint to stream emails
+            from an open connection (e.g. EmailClient.iter_new_emails of an
+            IDLE connection); used instead of the fetch step when given
+        source: 'imap' or 'mbox:/path' to replay exported mail from disk
+        agent_mode: 'two_agent' or 'fused' (default: AGENT_MODE)
+        execution_mode: 'chunked' runs classify, extract and save per fetched
+            chunk; 'pipelined' runs them as overlapping stages fed by bounded
+            queues (default: EXECUTION_MODE)
+    
     Returns:
         Dictionary with workflow results and statistics
     """
-    print(f"\n{'='*80}")
-    print(f"🚀 ORCHESTRATOR: Starting Job Tracking Workflow")
-    print(f"   Mode: {mode}, Days: {days}")
-    print(f"{'='*80}\n")
+    configure_logging()
+    agent_mode = agent_mode or get_prompt_config()['agent_mode']
+    pipeline_config = get_pipeline_config()
+    execution_mode = execution_mode or pipeline_config['execution_mode']
+    
+    logger.info(
+        f"\n{'='*80}\n"
+        f"🚀 ORCHESTRATOR: Starting Job Tracking Workflow\n"
+        f"   Mode: {mode}, Days: {days}, Source: {source}, Agents: {agent_mode}, Execution: {execution_mode}\n"
+        f"{'='*80}\n",
+        extra={'mode': mode, 'days': days, 'source': source, 'agent_mode': agent_mode, 'execution_mode': execution_mode}
+    )
     
     results = {
         'emails_fetched': 0,
@@ -59,85 +116,554 @@ def run_job_tracking_workflow(
     
     try:
         # Step 1: Create all agents
-        print("📋 Step 1: Initializing agents...")
+        logger.info("📋 Step 1: Initializing agents...")
         email_monitor = create_email_monitor_agent()
         email_classifier = create_email_classifier_agent()
         data_extractor = create_data_extractor_agent()
         database_manager = create_database_manager_agent()
-        print("✓ All agents initialized\n")
-        
-        # Step 2: Fetch emails
-        print("📋 Step 2: Fetching emails...")
-        emails = fetch_emails_task(email_monitor, days=days, mode=mode)
-        results['emails_fetched'] = len(emails)
-        
-        if not emails:
-            print("ℹ No emails found. Workflow complete.\n")
-            return results
+        email_analyzer = create_email_analyzer_agent() if agent_mode == 'fused' else None
+        fused_savings = FusedSavings() if email_analyzer else None
+        rules_config = get_rules_config()
+        rule_filter = RuleFilter() if rules_config['rules_enabled'] else None
+        thread_index = ThreadIndex() if rules_config['thread_index_enabled'] else None
+        template_index = load_template_index()
+        ledger_config = get_ledger_config()
+        ledger = WorkLedger(
+            partial(load_ledger_entries, database_manager),
+            partial(record_ledger_entries, database_manager)
+        ) if ledger_config['ledger_enabled'] else None
+        local_model = load_local_classifier() if load_local_classifier else None
+        result_cache = get_result_cache()
+        cache_counters_before = result_cache.counters() if result_cache else None
+        llm_executor = get_llm_executor()
+        llm_mark = llm_executor.mark()
+        metrics = get_metrics()
+        metrics_mark = metrics.snapshot()
+        logger.info("✓ All agents initialized\n")
         
-        # Step 3: Classify emails
-        print("\n📋 Step 3: Classifying emails...")
-        classifications = classify_emails_batch(email_classifier, emails)
+        # Step 2: Fetch emails (streamed in bounded chunks)
+        if emails is None:
+            logger.info("📋 Step 2: Streaming emails...")
+            # Fetched emails are checkpointed on the fetching thread before
+            # the sync watermark moves past them, while later stages may
+            # still have them queued
+            email_chunks = iter_email_chunks_task(
+                email_monitor,
+                days=days,
+                mode=mode,
+                source=source,
+                checkpoint=ledger.mark_fetched if ledger else None
+            )
+        elif email_stream is not None:
+            logger.info("📋 Step 2: Streaming new emails from the open connection...")
+            stream = iter(email_stream(ledger.mark_fetched if ledger else None))
+            chunk_size = get_email_config()['fetch_chunk_size']
+            email_chunks = iter(lambda: list(islice(stream, chunk_size)), [])
+        else:
+            logger.info(f"📋 Step 2: Using {len(emails)} pushed emails")
+            email_chunks = [emails] if emails else []
         
-        # Filter job-related emails
-        job_related_data = [
-            (email, classification)
-            for email, classification in zip(emails, classifications)
-            if classification.get('is_job_related', False)
-        ]
-        results['job_related_emails'] = len(job_related_data)
+        # Emails an interrupted run left unfinished go first; their finished
+        # stages are taken from the ledger instead of the agents
+        if ledger:
+            # Only the accounts this run reads from (offline sources use '')
+            if emails is not None:
+                accounts = {email.get('account') or '' for email in emails}
+            else:
+                accounts = {mailbox_account_key(get_email_config()) if source == 'imap' else ''}
+            unfinished = load_unfinished_emails(
+                database_manager,
+                ledger_config['max_attempts'],
+                ledger_config['resume_limit'],
+                accounts=sorted(accounts)
+            )
+            if unfinished:
+                logger.info(f"♻️  Resuming {len(unfinished)} unfinished emails from an interrupted run")
+                ledger.count_resumed(len(unfinished))
+                email_chunks = chain([unfinished], email_chunks)
         
-        if not job_related_data:
-            print("ℹ No job-related emails found. Workflow complete.\n")
-            return results
-        
-        job_emails, job_classifications = zip(*job_related_data)
+        pipeline = None
+        if execution_mode == 'pipelined':
+            # Steps 2-5 overlap: small batches flow through stage worker pools
+            # while later emails are still being fetched
+            pipeline = Pipeline([
+                Stage('classify', timed_stage('classify', partial(
+                    classify_batch_stage,
+                    email_classifier,
+                    database_manager,
+                    rule_filter=rule_filter,
+                    local_model=local_model,
+                    email_analyzer=email_analyzer,
+                    fused_savings=fused_savings,
+                    thread_index=thread_index,
+                    ledger=ledger
+                )), workers=pipeline_config['classify_workers']),
+                Stage('extract', timed_stage('extract', partial(
+                    extract_batch_stage,
+                    data_extractor,
+                    template_index=template_index,
+                    ledger=ledger
+                )), workers=pipeline_config['extract_workers']),
+                Stage('save', timed_stage('save', partial(
+                    save_batch_stage,
+                    database_manager,
+                    thread_index=thread_index,
+                    ledger=ledger
+                ), on_done=partial(record_batch_timings, database_manager)),
+                    workers=pipeline_config['save_workers']),
+            ], queue_size=pipeline_config['queue_size'])
+            
+            def email_batches():
+                batch_size = pipeline_config['batch_size']
+                for chunk in email_chunks:
+                    results['emails_fetched'] += len(chunk)
+                    for start in range(0, len(chunk), batch_size):
+                        yield {'emails': chunk[start:start + batch_size]}
+            
+            all_chunk_results = pipeline.run(email_batches(), size=lambda batch: len(batch['emails']))
+        else:
+            # Steps 3-5 run per chunk so only one chunk is held in memory
+            all_chunk_results = []
+            for chunk in email_chunks:
+                results['emails_fetched'] += len(chunk)
+                all_chunk_results.append(process_email_chunk(
+                    email_classifier,
+                    data_extractor,
+                    database_manager,
+                    chunk,
+                    rule_filter=rule_filter,
+                    local_model=local_model,
+                    email_analyzer=email_analyzer,
+                    fused_savings=fused_savings,
+                    thread_index=thread_index,
+                    template_index=template_index,
+                    ledger=ledger
+                ))
         
-        # Step 4: Extract data
-        print("\n📋 Step 4: Extracting structured data...")
-        extracted_data_list = extract_data_batch(
-            data_extractor,
-            list(job_emails),
-            list(job_classifications)
-        )
+        for chunk_results in all_chunk_results:
+            results['job_related_emails'] += chunk_results['job_related_emails']
+            results['applications_saved'] += chunk_results['applications_saved']
         
-        if not extracted_data_list:
-            print("ℹ No data extracted. Workflow complete.\n")
+        if not results['emails_fetched']:
+            logger.info("ℹ No emails found. Workflow complete.\n")
             return results
         
-        # Step 5: Save to database
-        print("\n📋 Step 5: Saving to database...")
-        saved_ids = save_applications_batch(database_manager, extracted_data_list)
-        results['applications_saved'] = len(saved_ids)
+        if ledger:
+            results['ledger_stats'] = ledger.report()
+        if template_index:
+            template_index.save()
+            results['template_stats'] = template_index.report()
+        if thread_index:
+            results['thread_stats'] = thread_index.report()
+        if rule_filter:
+            results['rule_stats'] = rule_filter.report()
+        if local_model:
+            results['local_model_stats'] = local_model.report()
+        if result_cache:
+            results['result_cache_stats'] = ResultCache.hit_ratios(
+                result_cache.counters() - cache_counters_before
+            )
+        if fused_savings:
+            results['fused_savings'] = fused_savings.report()
+        if pipeline:
+            results['pipeline_stats'] = pipeline.report()
+        results['llm_call_stats'] = llm_executor.report(since=llm_mark)
+        results['instrumentation'] = metrics.report(since=metrics_mark)
+        metrics.flush()
         
         # Step 6: Get final statistics
-        print("\n📋 Step 6: Generating statistics...")
+        logger.info("\n📋 Step 6: Generating statistics...")
         stats = get_statistics(database_manager)
         results['statistics'] = stats
         
         # Print summary
-        print(f"\n{'='*80}")
-        print(f"✅ WORKFLOW COMPLETE - Summary")
-        print(f"{'='*80}")
-        print(f"📧 Emails fetched: {results['emails_fetched']}")
-        print(f"🎯 Job-related emails: {results['job_related_emails']}")
-        print(f"💾 Applications saved/updated: {results['applications_saved']}")
-        print(f"\n📊 Database Statistics:")
-        print(f"   Total applications: {stats.get('total_applications', 0)}")
-        print(f"   By status:")
-        for status, count in stats.get('by_status', {}).items():
-            print(f"      - {status}: {count}")
-        print(f"{'='*80}\n")
+        logger.info(
+            f"\n{'='*80}\n✅ WORKFLOW COMPLETE - Summary\n{'='*80}\n"
+            f"📧 Emails fetched: {results['emails_fetched']}\n"
+            f"🎯 Job-related emails: {results['job_related_emails']}\n"
+            f"💾 Applications saved/updated: {results['applications_saved']}",
+            extra={key: results[key] for key in ('emails_fetched', 'job_related_emails', 'applications_saved')}
+        )
+        if ledger:
+            ledger.print_report()
+        if thread_index:
+            thread_index.print_report()
+        if template_index:
+            template_index.print_report()
+        if rule_filter:
+            rule_filter.print_report()
+        if local_model:
+            local_model.print_report()
+        if result_cache:
+            for kind, cache_stats in results['result_cache_stats'].items():
+                logger.info(f"🗄️  Result cache ({kind}): {cache_stats['hits']}/{cache_stats['lookups']} hits ({cache_stats['hit_ratio']:.0%})")
+        if fused_savings:
+            fused_savings.print_report()
+        if pipeline:
+            pipeline.print_report()
+        llm_executor.print_report(since=llm_mark)
+        metrics.print_report(since=metrics_mark)
+        logger.info(
+            f"\n📊 Database Statistics:\n"
+            f"   Total applications: {stats.get('total_applications', 0)}\n"
+            f"   By status:" +
+            ''.join(f"\n      - {status}: {count}" for status, count in stats.get('by_status', {}).items()) +
+            f"\n{'='*80}\n"
+        )
         
         return results
-        
+    
     except Exception as e:
         error_msg = f"Error in workflow: {str(e)}"
-        print(f"\n✗ {error_msg}\n")
+        logger.error(f"\n✗ {error_msg}\n", exc_info=True)
         results['errors'].append(error_msg)
         return results
 
 
+def process_email_chunk(
+    email_classifier: Agent,
+    data_extractor: Agent,
+    database_manager: Agent,
+    emails: List[Dict],
+    rule_filter: Optional[RuleFilter] = None,
+    local_model=None,
+    email_analyzer: Optional[Agent] = None,
+    fused_savings: Optional[FusedSavings] = None,
+    thread_index: Optional[ThreadIndex] = None,
+    template_index: Optional[TemplateIndex] = None,
+    ledger: Optional[WorkLedger] = None
+) -> Dict:
+    """
+    Classify, extract and save one chunk of emails
+    
+    Args:
+        email_classifier: The email classifier agent
+        data_extractor: The data extractor agent
+        database_manager: The database manager agent
+        emails: Email dictionaries in this chunk
+        rule_filter: Rule pre-filter applied before the classifier agent
+        local_model: Local classifier consulted before the classifier agent
+        email_analyzer: Fused analyzer agent; when given it replaces the
+            classifier agent and extracts in the same call
+        fused_savings: Savings recorder for the fused analyzer
+        thread_index: Thread index; replies in threads of known applications
+            skip classification and extraction
+        template_index: ATS template index; emails of learned templates
+            skip the extractor agent, and extractor results train it
+        ledger: Work ledger; stages finished by an earlier run are skipped
+            and each finished stage is checkpointed
+    
+    Returns:
+        Dictionary with job_related_emails and applications_saved counts
+    """
+    batch = timed_stage('classify', partial(
+        classify_batch_stage,
+        email_classifier,
+        database_manager,
+        rule_filter=rule_filter,
+        local_model=local_model,
+        email_analyzer=email_analyzer,
+        fused_savings=fused_savings,
+        thread_index=thread_index,
+        ledger=ledger
+    ))({'emails': emails})
+    batch = timed_stage('extract', partial(
+        extract_batch_stage, data_extractor, template_index=template_index, ledger=ledger
+    ))(batch)
+    return timed_stage('save', partial(
+        save_batch_stage, database_manager, thread_index=thread_index, ledger=ledger
+    ), on_done=partial(record_batch_timings, database_manager))(batch)
+
+
+def timed_stage(name: str, stage: Callable[[Dict], Dict], on_done: Optional[Callable[[Dict], None]] = None) -> Callable[[Dict], Dict]:
+    """
+    Wrap a batch stage to time it
+    
+    The batch collects its wall time in each stage and the time it waited
+    between stages (queues in pipelined mode) in 'timings_ms'; the stage
+    time is also recorded in utils.metrics.
+    
+    Args:
+        name: Stage name
+        stage: Stage function taking and returning a batch dictionary
+        on_done: Called with the batch after the stage (e.g. record_batch_timings
+            after the last stage)
+    
+    Returns:
+        Stage function with the same signature
+    """
+    def run(batch: Dict):
+        started = time.perf_counter()
+        timings = batch.setdefault('timings_ms', {})
+        batch.setdefault('started_at', started)
+        if 'stage_finished_at' in batch:
+            timings[f'{name}_queue_wait'] = round((started - batch['stage_finished_at']) * 1000)
+        
+        result = stage(batch)
+        
+        finished = time.perf_counter()
+        timings[name] = round((finished - started) * 1000)
+        batch['stage_finished_at'] = finished
+        get_metrics().observe_stage(
+            name,
+            finished - started,
+            len(batch['emails']) + len(batch.get('resumed_extracted', []))
+        )
+        if on_done:
+            on_done(batch)
+        return result
+    
+    return run
+
+
+def record_batch_timings(database_manager: Agent, batch: Dict):
+    """
+    Write a finished batch's processing time to the EmailLog of each of its emails
+    
+    Args:
+        database_manager: The database manager agent
+        batch: Batch that went through every stage of timed_stage()
+    """
+    emails = batch['emails'] + [email for email, _ in batch.get('resumed_extracted', [])]
+    elapsed = batch['stage_finished_at'] - batch['started_at']
+    metrics = get_metrics()
+    for _ in emails:
+        metrics.observe_email(elapsed)
+    record_processing_times(
+        database_manager,
+        [email.get('message_id') for email in emails],
+        round(elapsed * 1000),
+        batch['timings_ms']
+    )
+
+
+def classify_batch_stage(
+    email_classifier: Agent,
+    database_manager: Agent,
+    batch: Dict,
+    rule_filter: Optional[RuleFilter] = None,
+    local_model=None,
+    email_analyzer: Optional[Agent] = None,
+    fused_savings: Optional[FusedSavings] = None,
+    thread_index: Optional[ThreadIndex] = None,
+    ledger: Optional[WorkLedger] = None
+) -> Dict:
+    """
+    Step 3 of process_email_chunk: normalize, classify and log a batch of emails
+    
+    Args:
+        email_classifier: The email classifier agent
+        database_manager: The database manager agent
+        batch: Dictionary with the batch's 'emails'
+        rule_filter: Rule pre-filter applied before the classifier agent
+        local_model: Local classifier consulted before the classifier agent
+        email_analyzer: Fused analyzer agent replacing the classifier agent
+        fused_savings: Savings recorder for the fused analyzer
+        thread_index: Thread index; matched replies are attached here and
+            skip the later stages
+        ledger: Work ledger; emails an earlier run finished are dropped and
+            stored classifications are reused
+    
+    Returns:
+        The batch with 'job_related_data' (email, classification) pairs that
+        still need extraction, 'resumed_extracted' (email, extracted data)
+        pairs that only need saving and the 'job_related_emails' count
+    """
+    emails = batch['emails']
+    stored_classifications, batch['resumed_extracted'] = {}, []
+    if ledger:
+        emails, stored_classifications, batch['resumed_extracted'] = ledger.resume(emails)
+        batch['emails'] = emails
+    
+    # Step 3: Normalize bodies once for both LLM agents, then classify
+    logger.debug("\n📋 Step 3: Normalizing and classifying emails...")
+    normalize_emails(emails)
+    if ledger:
+        ledger.mark_fetched(emails + [email for email, _ in batch['resumed_extracted']])
+    
+    # Replies in threads of known applications skip the classifier, unless
+    # the status check finds them ambiguous
+    thread_matches, thread_classifications = {}, {}
+    if thread_index:
+        thread_index.count(len(emails))
+        for i, application_id in find_thread_applications(database_manager, emails).items():
+            reply = thread_index.classify_reply(emails[i], application_id)
+            if reply is not None:
+                thread_matches[i] = application_id
+                thread_classifications[i] = reply
+    
+    new_emails = [
+        email for i, email in enumerate(emails)
+        if i not in thread_matches and email.get('message_id') not in stored_classifications
+    ]
+    new_classifications = iter(classify_emails_batch(
+        email_classifier,
+        new_emails,
+        rule_filter=rule_filter,
+        local_model=local_model,
+        llm_stage=partial(analyze_emails_batch, email_analyzer, savings=fused_savings) if email_analyzer else None
+    ) if new_emails else [])
+    classifications = [
+        thread_classifications[i] if i in thread_matches
+        else stored_classifications[email['message_id']] if email.get('message_id') in stored_classifications
+        else next(new_classifications)
+        for i, email in enumerate(emails)
+    ]
+    log_classifications_batch(database_manager, emails, classifications)
+    
+    if thread_matches:
+        logger.debug(f"\n🧵 Attaching {len(thread_matches)} thread replies to known applications...")
+        attach_thread_replies_batch(
+            database_manager,
+            [emails[i] for i in sorted(thread_matches)],
+            [classifications[i] for i in sorted(thread_matches)]
+        )
+    if ledger:
+        ledger.mark_classified(emails, classifications, set(thread_matches))
+    
+    # Filter job-related emails that still need extraction
+    batch['job_related_data'] = [
+        (email, classification)
+        for i, (email, classification) in enumerate(zip(emails, classifications))
+        if classification.get('is_job_related', False) and i not in thread_matches
+    ]
+    batch['job_related_emails'] = (
+        len(batch['job_related_data']) + len(thread_matches) + len(batch['resumed_extracted'])
+    )
+    return batch
+
+
+def extract_batch_stage(
+    data_extractor: Agent,
+    batch: Dict,
+    template_index: Optional[TemplateIndex] = None,
+    ledger: Optional[WorkLedger] = None
+) -> Dict:
+    """
+    Step 4 of process_email_chunk: extract structured data from a classified batch
+    
+    Args:
+        data_extractor: The data extractor agent
+        batch: classify_batch_stage() result
+        template_index: ATS template index; emails of learned templates
+            skip the extractor agent, and extractor results train it
+        ledger: Work ledger; extraction results are checkpointed
+    
+    Returns:
+        The batch with its 'extracted_data_list', including records an
+        earlier run had already extracted
+    """
+    job_related_data = batch['job_related_data']
+    resumed = [extracted_data for _, extracted_data in batch['resumed_extracted']]
+    batch['extracted_data_list'] = resumed
+    if not job_related_data:
+        if not resumed:
+            logger.debug("ℹ No job-related emails in this chunk.\n")
+        return batch
+    
+    # Fused analysis already extracted its emails; the extractor only sees
+    # job-related emails decided by rules or the local model
+    pre_extracted = [(e, c['extracted']) for e, c in job_related_data if c.get('extracted')]
+    to_extract = [(e, c) for e, c in job_related_data if not c.get('extracted')]
+    
+    # Step 4: Extract data
+    logger.debug("\n📋 Step 4: Extracting structured data...")
+    
+    # Emails of learned ATS templates are filled without the extractor agent;
+    # a sample of them is also extracted by the agent to measure accuracy
+    template_extracted, audits = [], {}
+    if template_index and to_extract:
+        remaining = []
+        for email, classification in to_extract:
+            fast_result = template_index.extract(email, classification)
+            if fast_result is None:
+                remaining.append((email, classification))
+            elif template_index.should_audit():
+                audits[id(email)] = fast_result
+                remaining.append((email, classification))
+            else:
+                template_extracted.append(fast_result)
+        to_extract = remaining
+        if template_extracted:
+            logger.debug(f"✓ {len(template_extracted)} records extracted from ATS templates")
+    
+    agent_extracted = []
+    if to_extract:
+        job_emails, job_classifications = zip(*to_extract)
+        agent_extracted = list(zip(job_emails, extract_data_batch(
+            data_extractor,
+            list(job_emails),
+            list(job_classifications)
+        )))
+    elif pre_extracted:
+        logger.debug(f"✓ {len(pre_extracted)} records extracted by the fused analyzer")
+    
+    if template_index:
+        for email, extracted_data in pre_extracted + agent_extracted:
+            if id(email) in audits:
+                template_index.record_audit(audits[id(email)], extracted_data)
+            template_index.learn(email, extracted_data)
+    
+    extracted_data_list = (
+        [extracted_data for _, extracted_data in pre_extracted + agent_extracted] +
+        template_extracted
+    )
+    if ledger:
+        ledger.mark_extracted(extracted_data_list)
+    batch['extracted_data_list'] = extracted_data_list + resumed
+    return batch
+
+
+def save_batch_stage(
+    database_manager: Agent,
+    batch: Dict,
+    thread_index: Optional[ThreadIndex] = None,
+    ledger: Optional[WorkLedger] = None
+) -> Dict:
+    """
+    Step 5 of process_email_chunk: save a batch's extracted applications
+    
+    Args:
+        database_manager: The database manager agent
+        batch: extract_batch_stage() result
+        thread_index: Thread index; each saved email's thread is registered
+        ledger: Work ledger; saved records are marked done
+    
+    Returns:
+        Dictionary with job_related_emails and applications_saved counts
+    """
+    chunk_results = {
+        'job_related_emails': batch['job_related_emails'],
+        'applications_saved': 0,
+    }
+    extracted_data_list = batch['extracted_data_list']
+    
+    if not extracted_data_list:
+        if batch['job_related_data'] or batch['resumed_extracted']:
+            logger.debug("ℹ No data extracted from this chunk.\n")
+        return chunk_results
+    
+    # Register each saved email's thread so later replies attach to it
+    if thread_index:
+        emails_by_id = {
+            email.get('message_id'): email
+            for email in batch['emails'] + [email for email, _ in batch['resumed_extracted']]
+        }
+        for extracted_data in extracted_data_list:
+            email = emails_by_id.get(extracted_data.get('email_message_id'))
+            if email is not None:
+                extracted_data['thread_keys'] = thread_keys(email)
+    
+    # Step 5: Save to database
+    logger.debug("\n📋 Step 5: Saving to database...")
+    saved_ids = save_applications_batch(database_manager, extracted_data_list)
+    chunk_results['applications_saved'] = len(saved_ids)
+    if ledger:
+        ledger.mark_saved(extracted_data_list)
+    
+    return chunk_results
+
+
 def run_continuous_monitoring(
     orchestrator: Agent,
     interval_seconds: int = 3600
@@ -152,22 +678,23 @@ def run_continuous_monitoring(
     import time
     from datetime import datetime
     
-    print(f"\n{'='*80}")
-    print(f"🔄 CONTINUOUS MONITORING MODE")
-    print(f"   Checking every {interval_seconds} seconds ({interval_seconds/60:.0f} minutes)")
-    print(f"   Press Ctrl+C to stop")
-    print(f"{'='*80}\n")
+    configure_logging()
+    logger.info(
+        f"\n{'='*80}\n🔄 CONTINUOUS MONITORING MODE\n"
+        f"   Checking every {interval_seconds} seconds ({interval_seconds/60:.0f} minutes)\n"
+        f"   Press Ctrl+C to stop\n{'='*80}\n"
+    )
     
     try:
         while True:
-            print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running workflow...")
-            run_job_tracking_workflow(orchestrator, mode='unread')
+            logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running workflow...")
+            run_job_tracking_workflow(orchestrator, mode='incremental')
             
-            print(f"\n⏰ Next check in {interval_seconds/60:.0f} minutes...")
+            logger.info(f"\n⏰ Next check in {interval_seconds/60:.0f} minutes...")
             time.sleep(interval_seconds)
-            
+    
     except KeyboardInterrupt:
-        print(f"\n\n🛑 Monitoring stopped by user")
+        logger.info(f"\n\n🛑 Monitoring stopped by user")
 
 
 def run_scheduled_monitoring(
@@ -186,17 +713,18 @@ def run_scheduled_monitoring(
     from datetime import datetime
     
     def job():
-        print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running scheduled workflow...")
-        run_job_tracking_workflow(orchestrator, mode='unread')
+        logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running scheduled workflow...")
+        run_job_tracking_workflow(orchestrator, mode='incremental')
     
     # Schedule the job
     schedule.every(interval_seconds).seconds.do(job)
     
-    print(f"\n{'='*80}")
-    print(f"📅 SCHEDULED MONITORING MODE")
-    print(f"   Checking every {interval_seconds} seconds ({interval_seconds/60:.0f} minutes)")
-    print(f"   Press Ctrl+C to stop")
-    print(f"{'='*80}\n")
+    configure_logging()
+    logger.info(
+        f"\n{'='*80}\n📅 SCHEDULED MONITORING MODE\n"
+        f"   Checking every {interval_seconds} seconds ({interval_seconds/60:.0f} minutes)\n"
+        f"   Press Ctrl+C to stop\n{'='*80}\n"
+    )
     
     # Run once immediately
     job()
@@ -206,9 +734,80 @@ def run_scheduled_monitoring(
             schedule.run_pending()
             time.sleep(1)
     except KeyboardInterrupt:
-        print(f"\n\n🛑 Monitoring stopped by user")
+        logger.info(f"\n\n🛑 Monitoring stopped by user")
 
 
+def run_idle_monitoring(
+    orchestrator: Agent,
+    folder: str = 'INBOX',
+    idle_timeout: int = 1500
+):
+    """
+    Run push-driven monitoring using IMAP IDLE
+    
+    Keeps one authenticated connection in IDLE, wakes up on EXISTS
+    notifications and streams only the new UIDs into the workflow. New emails
+    are checkpointed in the work ledger before the sync watermark moves past
+    them. IDLE is re-armed every ``idle_timeout`` seconds, before the server
+    drops it.
+    
+    Args:
+        orchestrator: The orchestrator agent
+        folder: Email folder to watch
+        idle_timeout: Seconds before IDLE is re-armed (must be < 29 minutes)
+    """
+    import time
+    from datetime import datetime
+    from utils.email_client import EmailClient
+    
+    configure_logging()
+    logger.info(
+        f"\n{'='*80}\n⚡ IDLE MONITORING MODE\n"
+        f"   Watching {folder}, re-arming IDLE every {idle_timeout/60:.0f} minutes\n"
+        f"   Press Ctrl+C to stop\n{'='*80}\n"
+    )
+    
+    client = EmailClient()
+    
+    try:
+        while True:
+            if not client.connect():
+                logger.warning("⏰ Retrying connection in 60 seconds...")
+                time.sleep(60)
+                continue
+            
+            try:
+                # The fetch runs inside the workflow so each chunk is in the
+                # work ledger before the watermark moves past it
+                def stream_new_emails(checkpoint):
+                    return client.iter_new_emails(folder=folder, checkpoint=checkpoint)
+                
+                # Catch up on anything that arrived while disconnected
+                has_new_mail = True
+                while True:
+                    if has_new_mail:
+                        logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Processing new emails...")
+                        run_job_tracking_workflow(orchestrator, mode='incremental', email_stream=stream_new_emails)
+                    
+                    has_new_mail = client.wait_for_new_mail(timeout=idle_timeout)
+            
+            except KeyboardInterrupt:
+                raise
+            except Exception as e:
+                logger.warning(f"✗ IDLE connection lost: {e}, reconnecting...")
+                try:
+                    client.disconnect()
+                except Exception:
+                    pass
+                time.sleep(5)
+    
+    except KeyboardInterrupt:
+        logger.info(f"\n\n🛑 Monitoring stopped by user")
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+
 if __name__ == "__main__":
     # Test the orchestrator
     orchestrator = create_orchestrator_agent()
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+import sys
+from pathlib import Path
+
+# Add project root (JOb_agent/) to sys.path to allow importing utils
+project_root = Path(__file__).resolve().parent.parent.parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+try:
+    from utils.metrics import get_metrics
+except ImportError as e:
+    print(f"Error importing metrics: {e}")
+    get_metrics = None
+
+router = APIRouter()
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("", response_class=PlainTextResponse)
+async def get_pipeline_metrics():
+    """
+    Stage timings, agent calls, tokens and cache hits of workflow runs, in Prometheus text format
+    
+    Syncs run in worker processes (services.sync_jobs); their totals are included
+    when the API and the workers share METRICS_MULTIPROC_DIR, otherwise only this
+    process's runs are reported
+    """
+    if get_metrics is None:
+        raise HTTPException(status_code=503, detail="Metrics not available")
+    return PlainTextResponse(get_metrics().render(), media_type=CONTENT_TYPE)
@@ -1,86 +1,80 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-import sys
-import os
-from pathlib import Path
+from fastapi import APIRouter, HTTPException
 import logging
 
-# Add project root to sys.path to allow importing agents
-# Current file: ios_app/backend/api/routes/sync.py
-# Root: JOb_agent/
-current_file = Path(__file__).resolve()
-backend_dir = current_file.parent.parent.parent
-project_root = backend_dir.parent.parent
-print(f"DEBUG: project_root={project_root}")
-print(f"DEBUG: agents path exists? {(project_root / 'agents').exists()}")
-sys.path.append(str(project_root))
-
 try:
-    from agents.orchestrator_agent import create_orchestrator_agent, run_job_tracking_workflow
+    from services.sync_jobs import (
+        ACCOUNTS, WORKFLOW, SyncJobConflict,
+        get_sync_job, list_sync_jobs, submit_sync_job
+    )
 except ImportError as e:
-    print(f"Error importing agents: {e}")
-    # Fallback for when running in a different context
-    create_orchestrator_agent = None
-    run_job_tracking_workflow = None
+    print(f"Error importing sync jobs: {e}")
+    submit_sync_job = None
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Global state to track sync status
-sync_state = {
-    "is_running": False,
-    "last_run": None,
-    "last_status": None,
-    "last_result": None
-}
+# Syncs run on the worker tier (services.sync_jobs); their status is stored in
+# the sync_jobs table, so every API process reports the same state.
 
-def run_sync_task():
-    """Background task to run the sync workflow"""
-    global sync_state
+async def submit(kind: str, params: dict, message: str):
+    """Queue a sync job, answering 409 while another one is active"""
+    if not submit_sync_job:
+        raise HTTPException(status_code=503, detail="Sync jobs not available")
     
-    if not create_orchestrator_agent:
-        logger.error("Agents module not found")
-        sync_state["is_running"] = False
-        sync_state["last_status"] = "failed"
-        sync_state["last_result"] = {"error": "Agents module not found"}
-        return
-
     try:
-        logger.info("Starting background sync task...")
-        orchestrator = create_orchestrator_agent()
-        
-        # Run workflow (fetch recent emails from last 7 days)
-        results = run_job_tracking_workflow(orchestrator, mode='recent', days=7)
-        
-        sync_state["last_result"] = results
-        sync_state["last_status"] = "success"
-        logger.info(f"Sync task completed: {results}")
-        
-    except Exception as e:
-        logger.error(f"Sync task failed: {e}", exc_info=True)
-        sync_state["last_status"] = "failed"
-        sync_state["last_result"] = {"error": str(e)}
-        
-    finally:
-        sync_state["is_running"] = False
-        from datetime import datetime
-        sync_state["last_run"] = datetime.utcnow().isoformat()
+        job = await submit_sync_job(kind, params)
+    except SyncJobConflict as e:
+        raise HTTPException(status_code=409, detail="Sync already in progress", headers={"X-Sync-Job-Id": e.job_id})
+    
+    if job["status"] == "failed":
+        raise HTTPException(status_code=503, detail=job["error"])
+    
+    return {"message": message, "status": job["status"], "job_id": job["job_id"]}
 
 @router.get("/")
 async def get_sync_status():
-    """Get current sync status"""
-    return sync_state
-
-@router.post("/run")
-async def trigger_sync(background_tasks: BackgroundTasks):
-    """Trigger a manual sync of emails"""
-    global sync_state
+    """Get current sync status (latest sync job)"""
+    if not submit_sync_job:
+        raise HTTPException(status_code=503, detail="Sync jobs not available")
     
-    if sync_state["is_running"]:
-        raise HTTPException(status_code=409, detail="Sync already in progress")
+    jobs = await list_sync_jobs(limit=1)
+    if not jobs:
+        return {"is_running": False, "last_run": None, "last_status": None, "last_result": None, "job": None}
     
-    sync_state["is_running"] = True
-    sync_state["last_status"] = "running"
-    
-    background_tasks.add_task(run_sync_task)
+    job = jobs[0]
+    running = job["status"] in ("queued", "running")
+    return {
+        "is_running": running,
+        "last_run": job["finished_at"],
+        "last_status": "running" if running else job["status"],
+        "last_result": job["result"] if job["error"] is None else {"error": job["error"]},
+        "job": job,
+    }
+
+@router.get("/jobs")
+async def get_sync_jobs(limit: int = 20):
+    """List recent sync jobs, newest first"""
+    if not submit_sync_job:
+        raise HTTPException(status_code=503, detail="Sync jobs not available")
+    return await list_sync_jobs(limit=min(max(limit, 1), 100))
+
+@router.get("/jobs/{job_id}")
+async def get_sync_job_status(job_id: str):
+    """Get the status and result of one sync job"""
+    if not submit_sync_job:
+        raise HTTPException(status_code=503, detail="Sync jobs not available")
     
-    return {"message": "Sync started", "status": "running"}
+    job = await get_sync_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
+
+@router.post("/run")
+async def trigger_sync(days: int = 7):
+    """Trigger a manual sync of emails"""
+    return await submit(WORKFLOW, {"days": days}, "Sync started")
+
+@router.post("/accounts/run")
+async def trigger_accounts_sync(force: bool = False):
+    """Trigger a concurrent sync of all active email accounts"""
+    return await submit(ACCOUNTS, {"force": force}, "Multi-account sync started")
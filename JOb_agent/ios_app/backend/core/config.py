@@ -63,6 +63,18 @@ class Settings(BaseSettings):
     # Email Settings
     EMAIL_CHECK_INTERVAL: int = Field(default=3600, env="EMAIL_CHECK_INTERVAL")
     EMAIL_LOOKBACK_DAYS: int = Field(default=30, env="EMAIL_LOOKBACK_DAYS")
+    EMAIL_ENCRYPTION_KEY: Optional[str] = Field(default=None, env="EMAIL_ENCRYPTION_KEY")  # Fernet key
+    
+    # Multi-account sync engine
+    SYNC_MAX_CONCURRENT_ACCOUNTS: int = Field(default=20, env="SYNC_MAX_CONCURRENT_ACCOUNTS")
+    SYNC_MAX_PER_PROVIDER: int = Field(default=5, env="SYNC_MAX_PER_PROVIDER")
+    
+    # Sync worker tier: 'celery' needs CELERY_BROKER_URL, 'local' runs jobs in a process pool
+    # of the API process, 'auto' picks celery when a broker is configured
+    SYNC_JOB_BACKEND: str = Field(default="auto", env="SYNC_JOB_BACKEND")
+    SYNC_LOCAL_WORKERS: int = Field(default=2, env="SYNC_LOCAL_WORKERS")
+    # Queued/running jobs older than this are failed as lost (worker crash)
+    SYNC_JOB_TIMEOUT_MINUTES: int = Field(default=120, env="SYNC_JOB_TIMEOUT_MINUTES")
     
     # File Storage (AWS S3 or GCP)
     STORAGE_PROVIDER: str = Field(default="s3", env="STORAGE_PROVIDER")
@@ -0,0 +1,22 @@
+"""
+Encryption helpers for stored email account credentials
+"""
+from cryptography.fernet import Fernet
+from core.config import settings
+
+
+def _get_fernet() -> Fernet:
+    """Get the Fernet cipher for email credentials"""
+    if not settings.EMAIL_ENCRYPTION_KEY:
+        raise ValueError("EMAIL_ENCRYPTION_KEY is not configured")
+    return Fernet(settings.EMAIL_ENCRYPTION_KEY.encode())
+
+
+def encrypt_email_password(password: str) -> str:
+    """Encrypt an email account password for storage in EmailAccount.encrypted_password"""
+    return _get_fernet().encrypt(password.encode()).decode()
+
+
+def decrypt_email_password(encrypted_password: str) -> str:
+    """Decrypt EmailAccount.encrypted_password"""
+    return _get_fernet().decrypt(encrypted_password.encode()).decode()
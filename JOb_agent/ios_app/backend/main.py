@@ -7,13 +7,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime
 
-from api.routes import auth, applications, analytics, email_accounts, sync, simple_jobs
+from api.routes import auth, applications, analytics, email_accounts, sync, simple_jobs, metrics
 from core.config import settings
 from core.database import engine, Base
 from core.logging_config import setup_logging
+from services.sync_jobs import shutdown_local_pool
 
 # Setup logging
 setup_logging()
@@ -37,6 +39,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down JobTracker API...")
+    # Waits for running local sync jobs; keep the event loop responsive meanwhile
+    await asyncio.to_thread(shutdown_local_pool)
     await engine.dispose()
     logger.info("JobTracker API shutdown complete")
 
@@ -95,6 +99,7 @@ app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytic
 app.include_router(email_accounts.router, prefix="/api/v1/email-accounts", tags=["Email Accounts"])
 app.include_router(sync.router, prefix="/api/v1/sync", tags=["Sync"])
 app.include_router(simple_jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])  # NEW: LinkedIn jobs
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])  # Prometheus scrape target
 
 
 # Global exception handler
@@ -1,7 +1,7 @@
 """
 Database models for JobTracker backend
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean, Float, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -99,6 +99,24 @@ class EmailAccount(Base):
         return f"<EmailAccount(email='{self.email_address}')>"
 
 
+class MailboxSyncState(Base):
+    """Incremental IMAP sync position per account and folder (see utils.sync_state)"""
+    __tablename__ = "mailbox_sync_state"
+    __table_args__ = (UniqueConstraint("account", "folder", name="uq_sync_account_folder"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # email_address@imap_server, as built by EmailClient
+    account = Column(String(255), nullable=False)
+    folder = Column(String(255), nullable=False)
+    uid_validity = Column(Integer, nullable=False)
+    last_uid = Column(Integer, nullable=False, default=0)
+    last_sync = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<MailboxSyncState(account='{self.account}', folder='{self.folder}', last_uid={self.last_uid})>"
+
+
 class JobApplication(Base):
     """Job application model"""
     __tablename__ = "job_applications"
@@ -156,6 +174,7 @@ class JobApplication(Base):
     # Relationships
     user = relationship("User", back_populates="applications")
     emails = relationship("EmailLog", back_populates="application", cascade="all, delete-orphan")
+    threads = relationship("EmailThread", back_populates="application", cascade="all, delete-orphan")
     documents = relationship("Document", back_populates="application", cascade="all, delete-orphan")
     
     def __repr__(self):
@@ -199,6 +218,89 @@ class EmailLog(Base):
         return f"<EmailLog(message_id='{self.message_id}')>"
 
 
+class WorkLedgerEntry(Base):
+    """Work ledger entry: how far the agent workflow got with one email (see utils.work_ledger)"""
+    __tablename__ = "work_ledger"
+    # The same message can reach several accounts; each is processed on its own
+    __table_args__ = (UniqueConstraint("account", "message_id", name="uq_ledger_account_message"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Mailbox the email was fetched from (email_address@imap_server, '' offline)
+    account = Column(String(255), nullable=False, default="")
+    # Same key as EmailLog.message_id: the RFC Message-ID, or
+    # account/folder/UIDVALIDITY:UID when the header is missing
+    message_id = Column(String(255), nullable=False, index=True)
+    
+    # fetched -> classified -> extracted -> done
+    stage = Column(String(20), nullable=False, index=True)
+    
+    # Intermediate results; email is cleared once the email is done
+    email = Column(JSON, nullable=True)
+    classification = Column(JSON, nullable=True)
+    extracted_data = Column(JSON, nullable=True)
+    application_id = Column(Integer, ForeignKey("job_applications.id"), nullable=True)
+    
+    # Runs that picked the email up; resume gives up after WORK_LEDGER_MAX_ATTEMPTS
+    attempts = Column(Integer, default=0)
+    run_id = Column(String(32), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<WorkLedgerEntry(message_id='{self.message_id}', stage='{self.stage}')>"
+
+
+class EmailThread(Base):
+    """Thread index entry: an email thread key known to belong to an application"""
+    __tablename__ = "email_threads"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    application_id = Column(Integer, ForeignKey("job_applications.id"), nullable=False, index=True)
+    
+    # 'gm:<X-GM-THRID>' or 'id:<Message-ID>' (see utils.thread_index)
+    thread_key = Column(String(255), unique=True, nullable=False, index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    application = relationship("JobApplication", back_populates="threads")
+    
+    def __repr__(self):
+        return f"<EmailThread(thread_key='{self.thread_key}')>"
+
+
+class SyncJob(Base):
+    """Sync job: one manual or multi-account sync run by the worker tier (see services.sync_jobs)"""
+    __tablename__ = "sync_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    
+    # 'workflow' (agent workflow on recent mail) or 'accounts' (all active EmailAccounts)
+    kind = Column(String(20), nullable=False)
+    params = Column(JSON, default={})
+    
+    # queued -> running -> success / partial / failed
+    status = Column(String(20), nullable=False, index=True)
+    # True while queued or running, NULL afterwards; the unique constraint
+    # lets only one job be active at a time (NULLs never conflict)
+    active = Column(Boolean, nullable=True, unique=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # 'celery' or 'local', and the host:pid of the worker that ran the job
+    backend = Column(String(20), nullable=False)
+    worker = Column(String(255), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<SyncJob(id='{self.id}', kind='{self.kind}', status='{self.status}')>"
+
+
 class Document(Base):
     """Document model for resumes, cover letters, etc."""
     __tablename__ = "documents"
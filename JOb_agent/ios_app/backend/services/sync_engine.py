@@ -0,0 +1,255 @@
+"""
+Multi-account sync engine
+Fetches mail for every active EmailAccount concurrently, under a global
+concurrency limit and a per-provider limit, and reports per-account timings.
+"""
+import asyncio
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.security import decrypt_email_password
+from models.database import EmailAccount
+
+# Make the agents/utils packages importable (same layout as api/routes/sync.py)
+project_root = Path(__file__).resolve().parents[3]
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from utils.config import get_email_config
+from utils.email_client import EmailClient
+
+logger = logging.getLogger(__name__)
+
+
+def account_to_email_config(account: EmailAccount) -> Dict:
+    """
+    Build an EmailClient configuration from an EmailAccount row
+    
+    Args:
+        account: The email account
+    
+    Returns:
+        Email configuration dictionary (see utils.config.get_email_config)
+    """
+    config = get_email_config()
+    config.update({
+        'email_address': account.email_address,
+        'email_password': decrypt_email_password(account.encrypted_password),
+        'imap_server': account.imap_server,
+        'imap_port': account.imap_port,
+        'lookback_days': account.lookback_days,
+    })
+    return config
+
+
+def pool_limited_per_provider(max_per_provider: int, email_config: Dict) -> int:
+    """
+    Cap accounts synced at once per provider to what the IMAP pool can serve
+    
+    With several FETCH_FOLDERS an account holds up to FOLDER_FETCH_WORKERS
+    sessions at once (see EmailClient.fetch_folders_parallel). More
+    concurrent accounts than IMAP_POOL_MAX_SESSIONS_PER_SERVER can cover
+    would only wait in the pool until acquire times out.
+    
+    Args:
+        max_per_provider: Requested accounts per provider (SYNC_MAX_PER_PROVIDER)
+        email_config: Email configuration (see utils.config.get_email_config)
+    
+    Returns:
+        Accounts per provider the pool can serve without starving
+    """
+    if not email_config['pool_enabled']:
+        return max_per_provider
+    folders = len(email_config['folders'])
+    sessions_per_account = min(email_config['folder_workers'], folders) if folders > 1 else 1
+    pool_limit = max(1, email_config['pool_max_sessions_per_server'] // sessions_per_account)
+    if max_per_provider > pool_limit:
+        logger.warning(
+            f"SYNC_MAX_PER_PROVIDER={max_per_provider} needs up to {max_per_provider * sessions_per_account} "
+            f"IMAP sessions per server but IMAP_POOL_MAX_SESSIONS_PER_SERVER="
+            f"{email_config['pool_max_sessions_per_server']}; syncing {pool_limit} accounts per provider at once"
+        )
+        return pool_limit
+    return max_per_provider
+
+
+def is_account_due(account: EmailAccount, now: datetime) -> bool:
+    """Check whether sync_interval_minutes has elapsed since the account's last sync"""
+    if not account.last_sync:
+        return True
+    last_sync = account.last_sync
+    if last_sync.tzinfo is None:
+        last_sync = last_sync.replace(tzinfo=timezone.utc)
+    return now - last_sync >= timedelta(minutes=account.sync_interval_minutes or 60)
+
+
+def sync_account(account_id: int, config: Dict, process: bool = True) -> Dict:
+    """
+    Fetch new mail for one account and optionally run it through the agent pipeline
+    
+    Runs in a worker thread; all IMAP and LLM calls here are blocking.
+    
+    Args:
+        account_id: EmailAccount id
+        config: Email configuration for the account
+        process: Run classification/extraction/saving on the fetched emails
+    
+    Returns:
+        Per-account result with timings in milliseconds
+    """
+    result = {
+        'account_id': account_id,
+        'email_address': config['email_address'],
+        'status': 'success',
+        'emails_fetched': 0,
+        'job_related_emails': 0,
+        'applications_saved': 0,
+        'fetch_ms': 0,
+        'process_ms': 0,
+        'error': None,
+    }
+    
+    fetch_start = time.perf_counter()
+    client = EmailClient(config=config)
+    if not client.connect():
+        result['status'] = 'failed'
+        result['error'] = 'Could not connect to email server'
+        result['fetch_ms'] = int((time.perf_counter() - fetch_start) * 1000)
+        return result
+    try:
+        if len(config['folders']) > 1:
+            emails = client.fetch_folders_parallel(mode='incremental')
+        else:
+            emails = client.fetch_new_emails()
+    finally:
+        client.disconnect()
+    result['fetch_ms'] = int((time.perf_counter() - fetch_start) * 1000)
+    result['emails_fetched'] = len(emails)
+    
+    if process and emails:
+        from agents.orchestrator_agent import create_orchestrator_agent, run_job_tracking_workflow
+        
+        process_start = time.perf_counter()
+        workflow_results = run_job_tracking_workflow(
+            create_orchestrator_agent(),
+            mode='incremental',
+            emails=emails
+        )
+        result['process_ms'] = int((time.perf_counter() - process_start) * 1000)
+        result['job_related_emails'] = workflow_results.get('job_related_emails', 0)
+        result['applications_saved'] = workflow_results.get('applications_saved', 0)
+        if workflow_results.get('errors'):
+            result['status'] = 'failed'
+            result['error'] = '; '.join(workflow_results['errors'])
+    
+    return result
+
+
+async def load_active_accounts() -> List[EmailAccount]:
+    """Load all active, sync-enabled email accounts"""
+    async with AsyncSessionLocal() as session:
+        query = select(EmailAccount).where(
+            EmailAccount.is_active == True,
+            EmailAccount.sync_enabled == True
+        )
+        result = await session.execute(query)
+        return list(result.scalars().all())
+
+
+async def run_accounts_sync(
+    force: bool = False,
+    process: bool = True,
+    max_concurrent: Optional[int] = None,
+    max_per_provider: Optional[int] = None
+) -> Dict:
+    """
+    Sync all due email accounts concurrently
+    
+    Args:
+        force: Sync every active account, ignoring sync_interval_minutes
+        process: Run fetched emails through the agent pipeline
+        max_concurrent: Accounts synced at once (default: SYNC_MAX_CONCURRENT_ACCOUNTS)
+        max_per_provider: Accounts per provider synced at once (default:
+            SYNC_MAX_PER_PROVIDER), capped by pool_limited_per_provider
+    
+    Returns:
+        Summary with per-account results and totals
+    """
+    max_concurrent = max_concurrent or settings.SYNC_MAX_CONCURRENT_ACCOUNTS
+    max_per_provider = pool_limited_per_provider(
+        max_per_provider or settings.SYNC_MAX_PER_PROVIDER,
+        get_email_config()
+    )
+    
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    
+    accounts = await load_active_accounts()
+    due_accounts = [account for account in accounts if force or is_account_due(account, now)]
+    logger.info(f"Sync engine: {len(due_accounts)}/{len(accounts)} accounts due")
+    
+    global_limit = asyncio.Semaphore(max_concurrent)
+    provider_limits: Dict[str, asyncio.Semaphore] = {}
+    loop = asyncio.get_running_loop()
+    
+    async def run_one(account: EmailAccount, executor: ThreadPoolExecutor) -> Dict:
+        provider_limit = provider_limits.setdefault(
+            account.provider,
+            asyncio.Semaphore(max_per_provider)
+        )
+        queued = time.perf_counter()
+        async with global_limit, provider_limit:
+            wait_ms = int((time.perf_counter() - queued) * 1000)
+            started_account = time.perf_counter()
+            try:
+                config = account_to_email_config(account)
+                result = await loop.run_in_executor(executor, sync_account, account.id, config, process)
+            except Exception as e:
+                logger.error(f"Sync failed for account {account.id}: {e}", exc_info=True)
+                result = {
+                    'account_id': account.id,
+                    'email_address': account.email_address,
+                    'status': 'failed',
+                    'error': str(e),
+                }
+            result['provider'] = account.provider
+            result['queue_wait_ms'] = wait_ms
+            result['total_ms'] = int((time.perf_counter() - started_account) * 1000)
+            return result
+    
+    with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="account-sync") as executor:
+        results = await asyncio.gather(*(run_one(account, executor) for account in due_accounts))
+    
+    succeeded_ids = [r['account_id'] for r in results if r['status'] == 'success']
+    if succeeded_ids:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(EmailAccount)
+                .where(EmailAccount.id.in_(succeeded_ids))
+                .values(last_sync=now)
+            )
+            await session.commit()
+    
+    summary = {
+        'accounts_total': len(accounts),
+        'accounts_synced': len(due_accounts),
+        'succeeded': len(succeeded_ids),
+        'failed': len(results) - len(succeeded_ids),
+        'emails_fetched': sum(r.get('emails_fetched', 0) for r in results),
+        'duration_ms': int((time.perf_counter() - started) * 1000),
+        'accounts': results,
+    }
+    logger.info(
+        f"Sync engine finished: {summary['succeeded']} succeeded, {summary['failed']} failed, "
+        f"{summary['emails_fetched']} emails in {summary['duration_ms']} ms"
+    )
+    return summary
@@ -0,0 +1,325 @@
+"""
+Sync jobs - manual and multi-account syncs run by a worker tier
+
+The API only records a SyncJob row and hands its id to a worker, so request
+latency does not depend on running syncs. Workers load the job, mark it
+running, run the blocking agent workflow or the multi-account sync engine
+and store the result on the row; every API process (and every uvicorn
+worker) reads status from the database.
+
+Backends (SYNC_JOB_BACKEND):
+- celery: jobs go to the CELERY_BROKER_URL queue and run on Celery workers
+  (see worker.py), which scale out across hosts.
+- local: jobs run in a process pool of SYNC_LOCAL_WORKERS processes owned by
+  the API process, for setups without a broker.
+- auto (default): celery when CELERY_BROKER_URL is set, local otherwise.
+
+Only one sync job is active at a time, enforced by the unique sync_jobs.active
+column so concurrent submits from several API processes cannot both win; a
+queued or running job older than SYNC_JOB_TIMEOUT_MINUTES is failed as lost
+so a crashed worker does not block syncing for good.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from core.config import settings
+from core.database import AsyncSessionLocal, engine
+from models.database import SyncJob
+
+# Make the agents/utils packages importable (same layout as api/routes/sync.py)
+project_root = Path(__file__).resolve().parents[3]
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+logger = logging.getLogger(__name__)
+
+WORKFLOW = 'workflow'
+ACCOUNTS = 'accounts'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+CELERY_TASK_NAME = 'sync.run_job'
+
+
+class SyncJobConflict(Exception):
+    """Raised when a sync job is submitted while another one is active"""
+    
+    def __init__(self, job_id: str):
+        super().__init__(f"Sync job {job_id} already in progress")
+        self.job_id = job_id
+
+
+def job_backend() -> str:
+    """
+    Resolve SYNC_JOB_BACKEND
+    
+    Returns:
+        'celery' or 'local'
+    """
+    backend = settings.SYNC_JOB_BACKEND.lower()
+    if backend == 'auto':
+        return 'celery' if settings.CELERY_BROKER_URL else 'local'
+    return backend
+
+
+def job_to_dict(job: SyncJob) -> Dict:
+    """Serialize a SyncJob row for the API"""
+    return {
+        'job_id': job.id,
+        'kind': job.kind,
+        'params': job.params or {},
+        'status': job.status,
+        'result': job.result,
+        'error': job.error,
+        'backend': job.backend,
+        'worker': job.worker,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+async def _fail_lost_jobs(session, now: datetime):
+    """Fail active jobs older than SYNC_JOB_TIMEOUT_MINUTES"""
+    cutoff = now - timedelta(minutes=settings.SYNC_JOB_TIMEOUT_MINUTES)
+    result = await session.execute(
+        update(SyncJob)
+        .where(SyncJob.status.in_(ACTIVE_STATUSES), SyncJob.created_at < cutoff)
+        .values(status='failed', active=None, error='Job lost: no result within SYNC_JOB_TIMEOUT_MINUTES', finished_at=now)
+    )
+    if result.rowcount:
+        logger.warning(f"Failed {result.rowcount} lost sync jobs")
+
+
+async def submit_sync_job(kind: str, params: Optional[Dict] = None) -> Dict:
+    """
+    Record a sync job and hand it to the worker tier
+    
+    Args:
+        kind: WORKFLOW or ACCOUNTS
+        params: Job parameters (days for WORKFLOW, force for ACCOUNTS)
+    
+    Returns:
+        The queued job (job_to_dict)
+    
+    Raises:
+        SyncJobConflict: Another sync job is queued or running
+    """
+    now = datetime.now(timezone.utc)
+    backend = job_backend()
+    async with AsyncSessionLocal() as session:
+        await _fail_lost_jobs(session, now)
+        await session.commit()
+        
+        job = SyncJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=params or {},
+            status=QUEUED,
+            active=True,
+            backend=backend,
+            created_at=now,
+        )
+        session.add(job)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Another job holds the active slot (possibly inserted by another
+            # API process a moment ago)
+            await session.rollback()
+            active = await session.execute(select(SyncJob.id).where(SyncJob.active == True))
+            raise SyncJobConflict(active.scalar_one_or_none() or '')
+        job_dict = job_to_dict(job)
+    
+    try:
+        # Publishing to the broker is a blocking network call
+        await asyncio.to_thread(dispatch_job, job_dict['job_id'], backend)
+    except Exception as e:
+        logger.error(f"Could not dispatch sync job {job_dict['job_id']}: {e}", exc_info=True)
+        await _finish_job(job_dict['job_id'], 'failed', None, f"Could not dispatch job: {e}")
+        job_dict.update(status='failed', error=f"Could not dispatch job: {e}")
+    return job_dict
+
+
+async def get_sync_job(job_id: str) -> Optional[Dict]:
+    """Get one sync job (job_to_dict), or None if it does not exist"""
+    async with AsyncSessionLocal() as session:
+        job = await session.get(SyncJob, job_id)
+        return job_to_dict(job) if job else None
+
+
+async def list_sync_jobs(limit: int = 20) -> List[Dict]:
+    """Get the most recent sync jobs, newest first"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(SyncJob).order_by(SyncJob.created_at.desc()).limit(limit)
+        )
+        return [job_to_dict(job) for job in result.scalars().all()]
+
+
+# --- Dispatch ---
+
+_local_pool: Optional[ProcessPoolExecutor] = None
+_local_pool_lock = threading.Lock()
+
+
+def get_local_pool() -> ProcessPoolExecutor:
+    """
+    Get the process pool of the local backend, creating it on first use
+    
+    Worker processes are spawned rather than forked so they do not inherit
+    the API's event loop and database connections.
+    
+    Returns:
+        Shared ProcessPoolExecutor with SYNC_LOCAL_WORKERS processes
+    """
+    global _local_pool
+    with _local_pool_lock:
+        if _local_pool is None:
+            _local_pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.SYNC_LOCAL_WORKERS),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _local_pool
+
+
+def shutdown_local_pool():
+    """Stop the local process pool (waits for running jobs)"""
+    global _local_pool
+    with _local_pool_lock:
+        if _local_pool is not None:
+            _local_pool.shutdown(wait=True)
+            _local_pool = None
+
+
+def _log_local_failure(future: Future):
+    """Log jobs whose worker process died before recording a result"""
+    error = future.exception()
+    if error:
+        logger.error(f"Local sync worker failed: {error}")
+
+
+def dispatch_job(job_id: str, backend: str):
+    """
+    Hand a queued job to a worker
+    
+    Args:
+        job_id: SyncJob id
+        backend: 'celery' or 'local'
+    """
+    if backend == 'celery':
+        from worker import celery_app
+        
+        celery_app.send_task(CELERY_TASK_NAME, args=[job_id])
+    else:
+        future = get_local_pool().submit(execute_sync_job, job_id)
+        future.add_done_callback(_log_local_failure)
+    logger.info(f"Dispatched sync job {job_id} to {backend} worker")
+
+
+# --- Worker side ---
+
+def _run(coro):
+    """
+    Run a coroutine on a fresh event loop of this worker
+    
+    The engine's pooled connections belong to the loop that opened them, so
+    they are disposed before the loop closes.
+    """
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+    
+    return asyncio.run(run_and_dispose())
+
+
+async def _start_job(job_id: str) -> Optional[SyncJob]:
+    """Mark a queued job running; None if it is not queued (e.g. redelivered)"""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id, SyncJob.status == QUEUED)
+            .values(
+                status=RUNNING,
+                started_at=datetime.now(timezone.utc),
+                worker=f"{socket.gethostname()}:{os.getpid()}"
+            )
+        )
+        await session.commit()
+        if not result.rowcount:
+            return None
+        return await session.get(SyncJob, job_id)
+
+
+async def _finish_job(job_id: str, status: str, result: Optional[Dict], error: Optional[str]):
+    """Store the outcome of a job"""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id)
+            .values(status=status, active=None, result=result, error=error, finished_at=datetime.now(timezone.utc))
+        )
+        await session.commit()
+
+
+def run_workflow_job(params: Dict) -> Dict:
+    """Run the agent workflow on recent mail of the configured account"""
+    from agents.orchestrator_agent import create_orchestrator_agent, run_job_tracking_workflow
+    
+    orchestrator = create_orchestrator_agent()
+    return run_job_tracking_workflow(orchestrator, mode='recent', days=params.get('days', 7))
+
+
+def execute_sync_job(job_id: str) -> str:
+    """
+    Run one sync job to completion (entry point of Celery and local workers)
+    
+    Args:
+        job_id: SyncJob id
+    
+    Returns:
+        Final job status, or 'skipped' if the job was not queued
+    """
+    job = _run(_start_job(job_id))
+    if job is None:
+        logger.warning(f"Sync job {job_id} is not queued; skipping")
+        return 'skipped'
+    
+    logger.info(f"Running sync job {job_id} ({job.kind})")
+    result, error = None, None
+    try:
+        if job.kind == ACCOUNTS:
+            from services.sync_engine import run_accounts_sync
+            
+            result = _run(run_accounts_sync(force=job.params.get('force', False)))
+            status = 'success' if result['failed'] == 0 else 'partial'
+        else:
+            result = run_workflow_job(job.params or {})
+            status = 'success'
+        # Workflow results hold datetimes and other non-JSON values
+        result = json.loads(json.dumps(result, default=str))
+    except Exception as e:
+        logger.error(f"Sync job {job_id} failed: {e}", exc_info=True)
+        status, error = 'failed', str(e)
+    
+    _run(_finish_job(job_id, status, result, error))
+    logger.info(f"Sync job {job_id} finished: {status}")
+    return status
@@ -0,0 +1,40 @@
+"""
+Celery worker for sync jobs
+
+Runs the SyncJobs the API queues on CELERY_BROKER_URL (see services.sync_jobs).
+Start as many workers as needed, on any host that can reach the broker and
+the database:
+
+    cd ios_app/backend
+    celery -A worker worker --concurrency 2 --loglevel info
+"""
+import logging
+
+from celery import Celery
+
+from core.config import settings
+from core.logging_config import setup_logging
+from services.sync_jobs import CELERY_TASK_NAME, execute_sync_job
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "jobtracker",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+celery_app.conf.update(
+    # Syncs run for minutes: don't reserve jobs another idle worker could
+    # start; a job lost with its worker is failed after SYNC_JOB_TIMEOUT_MINUTES
+    worker_prefetch_multiplier=1,
+    task_track_started=True,
+    # Status lives on the SyncJob row; the Celery result is only the final status
+    result_expires=86400,
+)
+
+
+@celery_app.task(name=CELERY_TASK_NAME)
+def run_sync_job(job_id: str) -> str:
+    """Run one queued SyncJob"""
+    return execute_sync_job(job_id)
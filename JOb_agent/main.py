@@ -8,23 +8,27 @@ from agents.orchestrator_agent import (
     create_orchestrator_agent,
     run_job_tracking_workflow,
     run_continuous_monitoring,
-    run_scheduled_monitoring
+    run_scheduled_monitoring,
+    run_idle_monitoring
 )
-from utils.config import validate_config
+from utils.config import validate_config, get_monitoring_config
+from utils.logger import configure_logging
 
 
 def main():
     """Main function to run the job tracker"""
     
+    configure_logging()
+    
     # Parse command line arguments
     parser = argparse.ArgumentParser(
         description='Job Application Email Tracker - Multi-Agent System'
     )
     parser.add_argument(
         '--mode',
-        choices=['once', 'continuous', 'scheduled'],
+        choices=['once', 'continuous', 'scheduled', 'idle'],
         default='once',
-        help='Monitoring mode: once (single run), continuous, or scheduled'
+        help='Monitoring mode: once (single run), continuous, scheduled, or idle (IMAP push)'
     )
     parser.add_argument(
         '--interval',
@@ -40,9 +44,16 @@ def main():
     )
     parser.add_argument(
         '--email-mode',
-        choices=['recent', 'unread', 'all'],
+        choices=['recent', 'unread', 'incremental', 'headers_first', 'all'],
         default='recent',
-        help='Email fetching mode: recent, unread, or all'
+        help='Email fetching mode: recent, unread, incremental (only mail since last sync), '
+             'headers_first (bodies only for keyword/sender matches), or all'
+    )
+    parser.add_argument(
+        '--source',
+        default='imap',
+        help='Email source: imap (default) or mbox:/path to replay an mbox file '
+             'or a directory of .eml files (single run only)'
     )
     parser.add_argument(
         '--init-db',
@@ -52,6 +63,12 @@ def main():
     
     args = parser.parse_args()
     
+    if args.source != 'imap':
+        if not args.source.startswith('mbox:'):
+            parser.error("--source must be 'imap' or 'mbox:/path'")
+        if args.mode != 'once':
+            parser.error("--source mbox:/path only supports --mode once")
+    
     # Print banner
     print("""
 ╔═══════════════════════════════════════════════════════════════╗
@@ -70,7 +87,7 @@ def main():
     
     # Validate configuration
     print("Validating configuration...")
-    if not validate_config():
+    if not validate_config(require_email=args.source == 'imap'):
         print("\n✗ Configuration validation failed!")
         print("Please check your .env file and ensure all required fields are set.")
         print("See .env.example for reference.")
@@ -88,11 +105,12 @@ def main():
     # Run based on mode
     try:
         if args.mode == 'once':
-            print(f"Running single workflow (mode: {args.email_mode}, days: {args.days})...\n")
+            print(f"Running single workflow (mode: {args.email_mode}, days: {args.days}, source: {args.source})...\n")
             results = run_job_tracking_workflow(
                 orchestrator,
                 mode=args.email_mode,
-                days=args.days
+                days=args.days,
+                source=args.source
             )
             
             if results.get('errors'):
@@ -111,6 +129,13 @@ def main():
             run_scheduled_monitoring(orchestrator, interval_seconds=args.interval)
             return 0
             
+        elif args.mode == 'idle':
+            run_idle_monitoring(
+                orchestrator,
+                idle_timeout=get_monitoring_config()['idle_timeout']
+            )
+            return 0
+            
     except KeyboardInterrupt:
         print("\n\n👋 Goodbye!")
         return 0
@@ -4,6 +4,7 @@ Initialize models package
 from models.database import (
     JobApplication,
     EmailLog,
+    MailboxSyncState,
     init_database,
     get_session,
     create_db_engine
@@ -12,6 +13,7 @@ from models.database import (
 __all__ = [
     'JobApplication',
     'EmailLog',
+    'MailboxSyncState',
     'init_database',
     'get_session',
     'create_db_engine',
@@ -1,7 +1,7 @@
 """
 Database models for job application tracking
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, UniqueConstraint, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -89,6 +89,46 @@ class EmailLog(Base):
         return f"<EmailLog(message_id='{self.message_id}', is_job_related={self.is_job_related})>"
 
 
+class MailboxSyncState(Base):
+    """Model for tracking the incremental IMAP sync position per account and folder"""
+    
+    __tablename__ = 'mailbox_sync_state'
+    __table_args__ = (UniqueConstraint('account', 'folder', name='uq_sync_account_folder'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account = Column(String(255), nullable=False)  # email_address@imap_server
+    folder = Column(String(255), nullable=False)
+    uid_validity = Column(Integer, nullable=False)
+    last_uid = Column(Integer, nullable=False, default=0)
+    last_sync = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<MailboxSyncState(account='{self.account}', folder='{self.folder}', last_uid={self.last_uid})>"
+
+
+class WorkLedgerEntry(Base):
+    """Model for tracking how far the agent workflow got with one email (see utils.work_ledger)"""
+    
+    __tablename__ = 'work_ledger'
+    __table_args__ = (UniqueConstraint('account', 'message_id', name='uq_ledger_account_message'),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    account = Column(String(255), nullable=False, default='')  # email_address@imap_server, '' offline
+    message_id = Column(String(255), nullable=False, index=True)
+    stage = Column(String(20), nullable=False, index=True)  # fetched -> classified -> extracted -> done
+    email = Column(JSON, nullable=True)  # Cleared once the email is done
+    classification = Column(JSON, nullable=True)
+    extracted_data = Column(JSON, nullable=True)
+    application_id = Column(Integer, ForeignKey('job_applications.id'), nullable=True)
+    attempts = Column(Integer, default=0)
+    run_id = Column(String(32), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<WorkLedgerEntry(message_id='{self.message_id}', stage='{self.stage}')>"
+
+
 # Database setup
 def get_database_url():
     """Get database URL from environment or use default"""
@@ -0,0 +1,71 @@
+"""
+Shared pytest setup
+
+Run from the JOb_agent directory:
+
+    pytest tests
+"""
+import importlib
+import os
+import sys
+import pytest
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(AGENT_DIR, 'ios_app', 'backend')
+
+# Make the agents/utils packages importable
+sys.path.insert(0, AGENT_DIR)
+
+# Backend modules (models.database, core.*), imported once and only put in
+# sys.modules while a backend_db test runs
+_backend_modules = None
+
+
+@pytest.fixture
+def standalone_db(tmp_path, monkeypatch):
+    """Point the standalone schema (models/database.py) at a fresh SQLite file"""
+    from models.database import init_database
+    
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'job_tracker.db'}")
+    init_database()
+    return tmp_path / 'job_tracker.db'
+
+
+def _import_backend_modules(tmp_path) -> dict:
+    """Import the backend schema the way the backend does, as models.database"""
+    global _backend_modules
+    if _backend_modules is None:
+        with pytest.MonkeyPatch.context() as patch:
+            # Settings the backend refuses to start without; the async engine
+            # is never connected, sessions come from backend_db
+            patch.setenv('SECRET_KEY', 'test')
+            patch.setenv('REDIS_URL', 'redis://localhost:6379/0')
+            patch.setenv('DATABASE_URL', f"sqlite+aiosqlite:///{tmp_path / 'unused.db'}")
+            patch.syspath_prepend(BACKEND_DIR)
+            standalone = {name: sys.modules.pop(name) for name in ('models', 'models.database') if name in sys.modules}
+            before = set(sys.modules)
+            try:
+                importlib.import_module('models.database')
+            finally:
+                _backend_modules = {name: sys.modules.pop(name) for name in set(sys.modules) - before}
+                sys.modules.update(standalone)
+    return _backend_modules
+
+
+@pytest.fixture
+def backend_db(tmp_path, monkeypatch):
+    """Run the agents as inside the backend, on a fresh SQLite file with the backend schema"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from agents import database_manager_agent
+    
+    for name, module in _import_backend_modules(tmp_path).items():
+        monkeypatch.setitem(sys.modules, name, module)
+    schema = sys.modules['models.database']
+    monkeypatch.setitem(sys.modules, 'ios_app.backend.models.database', schema)
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'backend.db'}")
+    schema.Base.metadata.create_all(engine)
+    monkeypatch.setattr(database_manager_agent, '_backend_sessionmaker', sessionmaker(bind=engine))
+    yield schema
+    engine.dispose()
@@ -0,0 +1,67 @@
+"""In-memory stand-in for imap_tools.MailBox used by the email client tests"""
+from datetime import datetime
+from types import SimpleNamespace
+
+
+class FakeFolder:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+    
+    def set(self, folder):
+        self.mailbox.selected = folder
+    
+    def status(self, folder, items):
+        return {'UIDVALIDITY': self.mailbox.uid_validity, 'UIDNEXT': self.mailbox.uid_next[folder]}
+
+
+class FakeMailbox:
+    """Just enough of imap_tools.MailBox for uids() and bulk fetch()"""
+    
+    def __init__(self, uids=(), uid_validity=1, uid_next=None, folders=None):
+        folders = folders or {'INBOX': uids}
+        self.folders = {
+            folder: {str(uid): self._message(folder, uid, message_id) for uid, message_id in self._pairs(uids)}
+            for folder, uids in folders.items()
+        }
+        self.uid_validity = uid_validity
+        self.uid_next = {
+            folder: uid_next or max(map(int, messages), default=0) + 1
+            for folder, messages in self.folders.items()
+        }
+        self.selected = 'INBOX'
+        self.folder = FakeFolder(self)
+        self.client = SimpleNamespace(capabilities=(), noop=lambda: ('OK', [b'NOOP completed']))
+        self.logged_out = False
+    
+    @staticmethod
+    def _pairs(uids):
+        """UIDs may be given as (uid, Message-ID) pairs; '' means no header"""
+        for uid in uids:
+            yield uid if isinstance(uid, tuple) else (uid, f'<{uid}@example.com>')
+    
+    @staticmethod
+    def _message(folder, uid, message_id):
+        return SimpleNamespace(
+            uid=str(uid),
+            headers={'message-id': (message_id,)} if message_id else {},
+            subject=f'{folder} message {uid}',
+            from_='hr@example.com',
+            to=('me@example.com',),
+            date=datetime(2026, 1, 1),
+            text='body',
+            html='',
+        )
+    
+    def uids(self, criteria):
+        # Like "UID n:*", the criteria are not applied; the client filters
+        return list(self.folders[self.selected])
+    
+    def fetch(self, criteria, **kwargs):
+        wanted = set(str(criteria).split('UID ')[1].strip(')').split(','))
+        return [msg for uid, msg in self.folders[self.selected].items() if uid in wanted]
+    
+    def login(self, username, password):
+        return self
+    
+    def logout(self):
+        self.logged_out = True
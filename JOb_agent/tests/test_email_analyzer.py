@@ -0,0 +1,77 @@
+"""Tests for the fused classify + extract analyzer (agents/email_analyzer_agent.py)"""
+from types import SimpleNamespace
+import json
+
+from agents import email_analyzer_agent
+from agents.email_analyzer_agent import FusedSavings, analyze_email_task
+
+
+def make_email(i):
+    return {'message_id': f'<{i}@x>', 'subject': f'Newsletter {i}', 'from': 'news@shop.com', 'body': 'Weekly deals'}
+
+
+def record_emails(savings, count):
+    for i in range(count):
+        savings.record(make_email(i), 'fused prompt ' * 50, '{}', 0.5, is_job_related=(i == 0))
+
+
+def test_two_agent_estimate_uses_packed_classifier(monkeypatch):
+    monkeypatch.setenv('CLASSIFIER_BATCH_SIZE', '10')
+    packed = FusedSavings()
+    record_emails(packed, 10)
+    
+    monkeypatch.setenv('CLASSIFIER_BATCH_SIZE', '1')
+    single = FusedSavings()
+    record_emails(single, 10)
+    
+    packed_report, single_report = packed.report(), single.report()
+    # One packed classifier request for all ten, plus one extraction
+    assert packed_report['two_agent_calls_est'] == 2
+    assert single_report['two_agent_calls_est'] == 11
+    # The packed instructions are shared, so the estimated baseline is smaller
+    assert packed_report['two_agent_prompt_tokens_est'] < single_report['two_agent_prompt_tokens_est']
+    assert packed_report['fused_llm_seconds'] == 5.0
+
+
+def test_failed_analysis_keeps_its_source(monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    
+    def failing_call(agent, prompt, expected_output_tokens=300):
+        raise ConnectionError('provider unavailable')
+    
+    monkeypatch.setattr(email_analyzer_agent, 'call_agent', failing_call)
+    agent = SimpleNamespace(name='analyzer', model=SimpleNamespace(id='test-model', temperature=0.0))
+    
+    result = analyze_email_task(agent, make_email(1))
+    
+    assert (result['classification'], result['source'], result['extracted']) == ('error', 'llm_fused', None)
+
+
+def test_one_call_classifies_and_extracts(monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    replies = iter([
+        {'is_job_related': True, 'classification': 'interview_request', 'confidence': 0.9,
+         'extracted': {'company_name': 'Acme', 'role_title': 'Engineer'}},
+        # Unknown types fall back by is_job_related; unrelated mail has no extraction
+        {'is_job_related': False, 'classification': 'spam', 'extracted': {'company_name': 'Shop'}},
+    ])
+    prompts = []
+    
+    def fused_call(agent, prompt, expected_output_tokens=300):
+        prompts.append(prompt)
+        return SimpleNamespace(content=json.dumps(next(replies)))
+    
+    monkeypatch.setattr(email_analyzer_agent, 'call_agent', fused_call)
+    agent = SimpleNamespace(name='analyzer', model=SimpleNamespace(id='test-model', temperature=0.0))
+    savings = FusedSavings()
+    
+    job = analyze_email_task(agent, make_email(1), savings)
+    other = analyze_email_task(agent, make_email(2), savings)
+    
+    assert len(prompts) == 2
+    assert (job['classification'], job['source']) == ('interview_request', 'llm_fused')
+    assert job['extracted']['company_name'] == 'Acme'
+    assert job['extracted']['email_message_id'] == '<1@x>'
+    assert job['extracted']['status'] == email_analyzer_agent.map_classification_to_status('interview_request')
+    assert (other['classification'], other['extracted']) == ('not_job_related', None)
+    assert (savings.emails, savings.job_related) == (2, 1)
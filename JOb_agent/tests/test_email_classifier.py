@@ -0,0 +1,138 @@
+"""Tests for packed LLM classification (agents/email_classifier_agent.py)"""
+from types import SimpleNamespace
+import json
+import re
+
+import pytest
+
+from agents import email_classifier_agent
+from agents.email_classifier_agent import classify_email_task, classify_emails_packed
+from utils import result_cache
+from utils.result_cache import ResultCache
+
+
+class FakeProvider:
+    """Stands in for call_agent: answers each packed prompt with reply(ids)"""
+    
+    def __init__(self, reply):
+        self.reply = reply
+        self.batches = []
+    
+    def __call__(self, agent, prompt, expected_output_tokens=300):
+        ids = re.findall(r'message_id: (m\d+)', prompt, re.IGNORECASE)
+        if not ids:
+            # Single-email prompt (a batch of one)
+            self.batches.append(['single'])
+            return SimpleNamespace(content=json.dumps(json.loads(answer(['single']))[0]))
+        self.batches.append(ids)
+        return SimpleNamespace(content=self.reply(ids))
+
+
+def answer(ids):
+    return json.dumps([
+        {'message_id': i, 'is_job_related': True, 'classification': 'application_confirmation', 'confidence': 0.9}
+        for i in ids
+    ])
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'false')
+    return SimpleNamespace(name='classifier', model=SimpleNamespace(id='test-model', temperature=0.0))
+
+
+def make_emails(count):
+    return [
+        {'message_id': f'<{i}@x>', 'subject': f'Application {i}', 'from': 'jobs@acme.com', 'body': 'Thanks for applying'}
+        for i in range(count)
+    ]
+
+
+def test_packed_response_is_mapped_back_to_emails(agent, monkeypatch):
+    provider = FakeProvider(answer)
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', provider)
+    
+    results = classify_emails_packed(agent, make_emails(4), batch_size=4, max_batch_tokens=100000)
+    
+    assert len(provider.batches) == 1
+    assert [result['message_id'] for result in results] == ['<0@x>', '<1@x>', '<2@x>', '<3@x>']
+    assert {result['classification'] for result in results} == {'application_confirmation'}
+
+
+def test_unparseable_batch_is_split(agent, monkeypatch):
+    provider = FakeProvider(lambda ids: 'not json' if len(ids) > 2 else answer(ids))
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', provider)
+    
+    results = classify_emails_packed(agent, make_emails(4), batch_size=4, max_batch_tokens=100000)
+    
+    assert sorted(map(len, provider.batches)) == [2, 2, 4]
+    assert all(result['classification'] == 'application_confirmation' for result in results)
+
+
+def test_missing_and_invalid_elements_are_retried_alone(agent, monkeypatch):
+    def reply(ids):
+        if len(ids) < 4:
+            return answer(ids)
+        # m1 is left out and m2 has an unknown classification
+        elements = json.loads(answer(ids))
+        elements[2]['classification'] = 'maybe'
+        return json.dumps([elements[0], elements[2], elements[3]])
+    
+    provider = FakeProvider(reply)
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', provider)
+    
+    results = classify_emails_packed(agent, make_emails(4), batch_size=4, max_batch_tokens=100000)
+    
+    assert provider.batches == [['m0', 'm1', 'm2', 'm3'], ['m1', 'm2']]
+    assert all(result['classification'] == 'application_confirmation' for result in results)
+
+
+def test_batches_respect_the_token_budget(agent, monkeypatch):
+    provider = FakeProvider(answer)
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', provider)
+    emails = make_emails(4)
+    emails[1]['body'] = 'Thanks for applying. ' * 200
+    
+    results = classify_emails_packed(agent, emails, batch_size=10, max_batch_tokens=300)
+    
+    # The long body fills a request on its own, so m0 and m1 go out alone
+    assert sorted(provider.batches) == [['m2', 'm3'], ['single'], ['single']]
+    assert all(result['classification'] == 'application_confirmation' for result in results)
+
+
+def test_provider_error_marks_batch_without_splitting(agent, monkeypatch):
+    calls = []
+    
+    def failing_call(agent, prompt, expected_output_tokens=300):
+        calls.append(prompt)
+        raise ConnectionError('provider unavailable')
+    
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', failing_call)
+    
+    results = classify_emails_packed(agent, make_emails(4), batch_size=4, max_batch_tokens=100000)
+    
+    assert len(calls) == 1
+    assert [result['classification'] for result in results] == ['error'] * 4
+    assert {result['source'] for result in results} == {'llm'}
+
+
+def test_repeated_email_is_served_from_the_result_cache(agent, monkeypatch, tmp_path):
+    monkeypatch.setenv('RESULT_CACHE_ENABLED', 'true')
+    monkeypatch.setattr(result_cache, '_cache', ResultCache(str(tmp_path / 'results.db'), ttl_seconds=3600))
+    calls = []
+    
+    def single_call(agent, prompt, expected_output_tokens=300):
+        calls.append(prompt)
+        return SimpleNamespace(content='{"is_job_related": true, "classification": "rejection", "confidence": 0.9}')
+    
+    monkeypatch.setattr(email_classifier_agent, 'call_agent', single_call)
+    first = classify_email_task(agent, make_emails(1)[0])
+    second = classify_email_task(agent, make_emails(1)[0])
+    
+    assert len(calls) == 1
+    assert (first['classification'], second['classification']) == ('rejection', 'rejection')
+    assert second['cached'] is True and 'cached' not in first
+    
+    # Edited content misses
+    classify_email_task(agent, dict(make_emails(1)[0], body='We would like to schedule an interview'))
+    assert len(calls) == 2
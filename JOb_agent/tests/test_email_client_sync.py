@@ -0,0 +1,143 @@
+"""Tests for incremental IMAP sync and its watermark (EmailClient.iter_new_emails)"""
+import pytest
+
+from fake_imap import FakeMailbox
+from utils.email_client import EmailClient
+from utils.sync_state import load_sync_state, save_sync_state
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 2,
+    'lookback_days': 30,
+    'fetch_thread_ids': False,
+}
+ACCOUNT = 'me@example.com@imap.example.com'
+
+
+@pytest.fixture
+def client(standalone_db, monkeypatch):
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    return EmailClient(config=dict(CONFIG), use_pool=False)
+
+
+def test_incremental_sync_starts_after_the_watermark(client):
+    save_sync_state(ACCOUNT, 'INBOX', 1, 3)
+    client.mailbox = FakeMailbox([1, 2, 3, 4, 5])
+    
+    assert [e['uid'] for e in client.iter_new_emails()] == ['4', '5']
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 5
+
+
+def test_interrupted_full_resync_resumes_after_the_last_chunk(client):
+    client.mailbox = FakeMailbox([1, 2, 3, 4, 5], uid_next=9)
+    
+    emails = client.iter_new_emails()
+    consumed = [next(emails)['uid'] for _ in range(3)]
+    emails.close()
+    
+    # Only the first chunk (UIDs 1-2) has been fully consumed
+    assert consumed == ['1', '2', '3']
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 2
+    
+    assert [e['uid'] for e in client.iter_new_emails()] == ['3', '4', '5']
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 5
+
+
+def test_completed_full_resync_moves_the_watermark_to_uidnext(client):
+    # UIDs 6-8 are outside the lookback window (or were expunged)
+    client.mailbox = FakeMailbox([1, 2, 3], uid_next=9)
+    
+    assert len(list(client.iter_new_emails())) == 3
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 8
+
+
+def test_uidvalidity_change_runs_a_full_resync(client):
+    save_sync_state(ACCOUNT, 'INBOX', 1, 500)
+    client.mailbox = FakeMailbox([1, 2, 3], uid_validity=2)
+    
+    assert [e['uid'] for e in client.iter_new_emails()] == ['1', '2', '3']
+    state = load_sync_state(ACCOUNT, 'INBOX')
+    assert (state['uid_validity'], state['last_uid']) == (2, 3)
+
+
+def test_no_new_mail_fetches_nothing(client):
+    save_sync_state(ACCOUNT, 'INBOX', 1, 5)
+    # "UID 6:*" still returns UID 5, the newest message
+    client.mailbox = FakeMailbox([3, 4, 5])
+    
+    assert list(client.iter_new_emails()) == []
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 5
+
+
+def test_resync_searches_the_lookback_window_instead_of_uids(client, monkeypatch):
+    save_sync_state(ACCOUNT, 'INBOX', 1, 500)
+    client.mailbox = FakeMailbox([1, 2], uid_validity=2)
+    searches = []
+    search = client.mailbox.uids
+    monkeypatch.setattr(client.mailbox, 'uids', lambda criteria: searches.append(str(criteria)) or search(criteria))
+    
+    list(client.iter_new_emails())
+    save_sync_state(ACCOUNT, 'INBOX', 2, 2)
+    list(client.iter_new_emails())
+    
+    assert searches[0].startswith('(SINCE ')
+    assert searches[1] == '(UID 3:*)'
+
+
+def test_message_id_is_the_rfc_message_id_or_a_qualified_uid(client):
+    client.mailbox = FakeMailbox([(1, '<a@example.com>'), (2, '')], uid_validity=42)
+    
+    emails = list(client.iter_recent_emails())
+    
+    assert [e['message_id'] for e in emails] == ['<a@example.com>', f'{ACCOUNT}/INBOX/42:2']
+
+
+def test_iter_folders_streams_every_folder_once_per_message(client):
+    client.mailbox = FakeMailbox(folders={
+        'INBOX': [(1, '<a@example.com>'), (2, '<b@example.com>')],
+        # Gmail exposes labelled mail in several folders under new UIDs
+        'Jobs': [(7, '<b@example.com>'), (8, '<c@example.com>'), (9, '')],
+    })
+    
+    emails = list(client.iter_folders(folders=['INBOX', 'Jobs'], mode='incremental'))
+    
+    assert [e['message_id'] for e in emails] == [
+        '<a@example.com>', '<b@example.com>', '<c@example.com>', f'{ACCOUNT}/Jobs/1:9'
+    ]
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 2
+    assert load_sync_state(ACCOUNT, 'Jobs')['last_uid'] == 9
+    
+    # Single-folder mode uses the same keys
+    single = list(client.iter_recent_emails(folder='Jobs'))
+    assert [e['message_id'] for e in single][1:] == ['<c@example.com>', f'{ACCOUNT}/Jobs/1:9']
+
+
+def test_chunks_are_checkpointed_before_the_watermark_moves(client):
+    save_sync_state(ACCOUNT, 'INBOX', 1, 0)
+    client.mailbox = FakeMailbox([1, 2, 3, 4, 5])
+    checkpoints = []
+    
+    def checkpoint(emails):
+        checkpoints.append(([e['uid'] for e in emails], load_sync_state(ACCOUNT, 'INBOX')['last_uid']))
+    
+    list(client.iter_new_emails(checkpoint=checkpoint))
+    
+    # Each chunk is checkpointed while the watermark is still before it
+    assert checkpoints == [(['1', '2'], 0), (['3', '4'], 2), (['5'], 4)]
+
+
+def test_direct_connection_uses_the_configured_port(client, monkeypatch):
+    from utils import email_client
+    
+    opened = []
+    
+    def mailbox(host, port):
+        opened.append((host, port))
+        return FakeMailbox([1])
+    
+    monkeypatch.setattr(email_client, 'MailBox', mailbox)
+    client.config.update(imap_port=1993, email_password='secret')
+    
+    assert client.connect()
+    assert opened == [('imap.example.com', 1993)]
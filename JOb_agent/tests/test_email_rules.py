@@ -0,0 +1,103 @@
+"""Tests for the rule-based email pre-filter (utils/email_rules.py)"""
+from utils.email_rules import RuleFilter
+
+
+def make_email(sender: str, subject: str, body: str = '', list_unsubscribe: str = None) -> dict:
+    return {
+        'message_id': '<1@example.com>',
+        'from': sender,
+        'subject': subject,
+        'body': body,
+        'list_unsubscribe': list_unsubscribe,
+    }
+
+
+def test_ats_sender_is_typed_by_body():
+    rules = RuleFilter(ats_domains={'greenhouse.io'}, non_job_domains=set())
+    
+    result = rules.classify(make_email(
+        'Acme <no-reply@us.greenhouse.io>',
+        'Your application to Acme',
+        'Unfortunately we have decided to move forward with other candidates.'
+    ))
+    
+    assert result['is_job_related'] is True
+    assert result['classification'] == 'rejection'
+    assert result['source'] == 'rules'
+
+
+def test_ats_confirmation():
+    rules = RuleFilter(ats_domains={'lever.co'}, non_job_domains=set())
+    
+    result = rules.classify(make_email('jobs@hire.lever.co', 'Acme', 'Thank you for applying to Acme!'))
+    
+    assert result['classification'] == 'application_confirmation'
+
+
+def test_confirmation_promising_interview_is_confirmation():
+    rules = RuleFilter(ats_domains={'greenhouse.io'}, non_job_domains=set())
+    
+    result = rules.classify(make_email(
+        'Acme <no-reply@us.greenhouse.io>',
+        'Thank you for applying to Acme',
+        'Thanks for applying to the Data Engineer role. Our team is reviewing your '
+        'application, and if there is a fit we will reach out to schedule an interview.'
+    ))
+    
+    assert result['classification'] == 'application_confirmation'
+
+
+def test_confirmation_with_unfortunately_is_not_rejection():
+    rules = RuleFilter(ats_domains={'lever.co'}, non_job_domains=set())
+    
+    result = rules.classify(make_email(
+        'jobs@hire.lever.co',
+        'Acme',
+        'Thank you for your application to Acme. Unfortunately, due to the high volume '
+        'of applications, we are unable to respond to every applicant individually.'
+    ))
+    
+    assert result['classification'] == 'application_confirmation'
+
+
+def test_non_job_sender():
+    rules = RuleFilter(ats_domains=set(), non_job_domains={'paypal.com'})
+    
+    result = rules.classify(make_email('service@mail.paypal.com', 'Your receipt'))
+    
+    assert result['is_job_related'] is False
+    assert result['classification'] == 'not_job_related'
+
+
+def test_bulk_mail_without_job_subject_is_not_job_related():
+    rules = RuleFilter(ats_domains=set(), non_job_domains=set())
+    
+    result = rules.classify(make_email('news@shop.com', 'Weekly deals', list_unsubscribe='<mailto:u@shop.com>'))
+    
+    assert result['classification'] == 'not_job_related'
+
+
+def test_bulk_mail_with_job_subject_goes_to_classifier():
+    rules = RuleFilter(ats_domains=set(), non_job_domains=set())
+    
+    for subject in (
+        'Thanks for applying to Acme',
+        'We received your application',
+        'You applied for Data Engineer',
+        'New job matches for you',
+        'Interview invitation',
+    ):
+        email = make_email('talent@acme.com', subject, list_unsubscribe='<mailto:u@acme.com>')
+        assert rules.classify(email) is None, subject
+
+
+def test_unknown_sender_is_uncertain_and_counted():
+    rules = RuleFilter(ats_domains={'lever.co'}, non_job_domains={'paypal.com'})
+    
+    assert rules.classify(make_email('friend@gmail.com', 'Lunch?')) is None
+    rules.classify(make_email('a@paypal.com', 'Receipt'))
+    
+    report = rules.report()
+    assert report['total'] == 2
+    assert report['decided'] == 1
+    assert report['by_rule'] == {'uncertain': 1, 'non_job_sender': 1}
@@ -0,0 +1,60 @@
+"""Tests for the server-side job keyword search (EmailClient.search_job_emails)"""
+import pytest
+
+from fake_imap import FakeMailbox
+from utils.email_client import EmailClient
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 2,
+    'fetch_thread_ids': False,
+}
+
+
+class SearchingMailbox(FakeMailbox):
+    """FakeMailbox that records SEARCH criteria and answers with fixed UIDs"""
+    
+    def __init__(self, uids, matches):
+        super().__init__(uids)
+        self.matches = matches
+        self.searches = []
+        self.fetches = []
+    
+    def uids(self, criteria):
+        self.searches.append(str(criteria))
+        return list(self.matches)
+    
+    def fetch(self, criteria, **kwargs):
+        self.fetches.append(str(criteria))
+        return super().fetch(criteria, **kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    return EmailClient(config=dict(CONFIG), use_pool=False)
+
+
+def test_keywords_and_senders_are_one_or_search(client):
+    # A message matching several terms is reported once per term by some servers
+    client.mailbox = SearchingMailbox([1, 2, 3], matches=['1', '3', '3'])
+    
+    emails = client.search_job_emails(keywords=['interview', 'offer'], senders=['greenhouse.io'], days=30)
+    
+    assert len(client.mailbox.searches) == 1
+    search = client.mailbox.searches[0]
+    assert search.startswith('((OR OR OR OR ')
+    for term in ('SUBJECT "interview"', 'BODY "interview"', 'SUBJECT "offer"', 'BODY "offer"', 'FROM "greenhouse.io"'):
+        assert term in search
+    assert ' SINCE ' in search
+    # Only the matches are fetched, each once
+    assert [email['uid'] for email in emails] == ['1', '3']
+    assert client.mailbox.fetches == ['(UID 1,3)']
+
+
+def test_search_without_terms_does_not_hit_the_server(client):
+    client.mailbox = SearchingMailbox([1], matches=['1'])
+    
+    assert client.search_job_emails(keywords=[], senders=[]) == []
+    assert client.mailbox.searches == []
@@ -0,0 +1,74 @@
+"""Tests for the two-phase header-first fetch (EmailClient.fetch_recent_emails_headers_first)"""
+import pytest
+
+from fake_imap import FakeMailbox
+from utils.email_client import EmailClient
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 2,
+    'body_fetch_bytes': 2048,
+    'fetch_thread_ids': False,
+}
+
+HEADER = b'Message-ID: <{uid}@example.com>\r\nContent-Type: text/plain; charset=utf-8\r\n\r\n'
+
+
+class PartialFetchMailbox(FakeMailbox):
+    """FakeMailbox answering header searches and raw partial UID FETCH commands"""
+    
+    def __init__(self, uids, bodies, uid_after_literals=False):
+        super().__init__(uids)
+        self.bodies = bodies
+        self.uid_after_literals = uid_after_literals
+        self.commands = []
+        self.client.uid = self.uid_command
+    
+    def fetch(self, criteria, **kwargs):
+        if 'UID ' not in str(criteria):
+            return list(self.folders[self.selected].values())
+        return super().fetch(criteria, **kwargs)
+    
+    def uid_command(self, command, uids, items):
+        self.commands.append((command, uids, items))
+        size = int(items.split('<0.')[1].rstrip('>)'))
+        data = []
+        for seq, uid in enumerate(uids.split(','), 1):
+            header = HEADER.replace(b'{uid}', uid.encode())
+            text = self.bodies[uid].encode()[:size]
+            if self.uid_after_literals:
+                data += [(f'{seq} (BODY[HEADER] {{{len(header)}}}'.encode(), header),
+                         (f' BODY[TEXT]<0> {{{len(text)}}}'.encode(), text), f' UID {uid})'.encode()]
+            else:
+                data += [(f'{seq} (UID {uid} BODY[HEADER] {{{len(header)}}}'.encode(), header),
+                         (f' BODY[TEXT]<0> {{{len(text)}}}'.encode(), text), b')']
+        return 'OK', data
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    return EmailClient(config=dict(CONFIG), use_pool=False)
+
+
+@pytest.mark.parametrize('uid_after_literals', [False, True])
+def test_partial_bodies_are_truncated_and_grouped_by_uid(client, uid_after_literals):
+    client.mailbox = PartialFetchMailbox([], {'4': 'Thanks for applying. ' * 10, '7': 'Interview invite'}, uid_after_literals)
+    
+    bodies = client.fetch_partial_bodies(['4', '7'], max_bytes=40)
+    
+    assert client.mailbox.commands == [('FETCH', '4,7', '(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.40>)')]
+    assert bodies['4']['text'] == ('Thanks for applying. ' * 2)[:40]
+    assert bodies['7']['text'] == 'Interview invite'
+
+
+def test_only_prefiltered_candidates_get_bodies(client):
+    client.mailbox = PartialFetchMailbox([1, 2, 3], {'2': 'We would like to schedule an interview'})
+    
+    emails = client.fetch_recent_emails_headers_first(days=7, prefilter=lambda email: email['uid'] == '2')
+    
+    assert [email['uid'] for email in emails] == ['2']
+    assert emails[0]['text'] == 'We would like to schedule an interview'
+    assert emails[0]['message_id'] == '<2@example.com>'
+    assert client.mailbox.commands == [('FETCH', '2', '(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.2048>)')]
@@ -0,0 +1,62 @@
+"""Tests for push-driven IMAP IDLE monitoring (orchestrator_agent.run_idle_monitoring)"""
+from types import SimpleNamespace
+
+from fake_imap import FakeMailbox
+from agents import orchestrator_agent
+from utils import email_client
+from utils.sync_state import load_sync_state
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 2,
+    'lookback_days': 30,
+    'fetch_thread_ids': False,
+}
+ACCOUNT = 'me@example.com@imap.example.com'
+
+
+def test_idle_wakeups_stream_new_mail_through_the_ledger_checkpoint(standalone_db, monkeypatch):
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    mailbox = FakeMailbox([1, 2])
+    
+    def idle_wait(timeout):
+        if '3' in mailbox.folders['INBOX']:
+            raise KeyboardInterrupt
+        mailbox.folders['INBOX']['3'] = FakeMailbox._message('INBOX', 3, '<3@example.com>')
+        mailbox.uid_next['INBOX'] = 4
+        return [b'* 3 EXISTS']
+    
+    mailbox.idle = SimpleNamespace(wait=idle_wait)
+    
+    class Client(email_client.EmailClient):
+        def __init__(self):
+            super().__init__(config=dict(CONFIG), use_pool=False)
+        
+        def connect(self):
+            self.mailbox = mailbox
+            return True
+    
+    runs = []
+    
+    def workflow(orchestrator, mode, email_stream):
+        checkpoints = []
+        
+        def checkpoint(emails):
+            checkpoints.append(([e['uid'] for e in emails], (load_sync_state(ACCOUNT, 'INBOX') or {}).get('last_uid')))
+        
+        uids = [e['uid'] for e in email_stream(checkpoint)]
+        runs.append((mode, uids, checkpoints))
+    
+    monkeypatch.setattr(email_client, 'EmailClient', Client)
+    monkeypatch.setattr(orchestrator_agent, 'run_job_tracking_workflow', workflow)
+    
+    orchestrator_agent.run_idle_monitoring(None)
+    
+    # Catch-up on connect, then the new UID after the EXISTS notification;
+    # each chunk is checkpointed before the watermark moves past it
+    assert runs == [
+        ('incremental', ['1', '2'], [(['1', '2'], None)]),
+        ('incremental', ['3'], [(['3'], 2)]),
+    ]
+    assert load_sync_state(ACCOUNT, 'INBOX')['last_uid'] == 3
@@ -0,0 +1,81 @@
+"""Tests for the IMAP connection pool (utils/imap_pool.py) and pooled folder fan-out"""
+import threading
+
+import pytest
+
+from fake_imap import FakeMailbox
+from utils import email_client
+from utils.email_client import EmailClient
+from utils.imap_pool import IMAPConnectionPool
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'email_password': 'secret',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 10,
+    'fetch_thread_ids': False,
+    'folders': ['INBOX', 'Jobs', 'Updates'],
+    'folder_workers': 2,
+}
+FOLDERS = {
+    'INBOX': [(1, '<a@example.com>')],
+    'Jobs': [(1, '<b@example.com>'), (2, '<a@example.com>')],
+    'Updates': [(1, '<c@example.com>')],
+}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A pool whose logins open FakeMailbox sessions; .logins counts them"""
+    pool = IMAPConnectionPool(max_sessions_per_server=2, acquire_timeout=0.2)
+    pool.logins = 0
+    
+    def login(config):
+        pool.logins += 1
+        return FakeMailbox(folders=FOLDERS)
+    
+    monkeypatch.setattr(pool, '_login', login)
+    monkeypatch.setattr(email_client, 'get_connection_pool', lambda: pool)
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    return pool
+
+
+def test_acquire_times_out_when_the_server_limit_is_reached(pool):
+    first, second = pool.acquire(CONFIG), pool.acquire(CONFIG)
+    
+    with pytest.raises(TimeoutError):
+        pool.acquire(CONFIG)
+    
+    # A released session is handed to the next caller without a new login
+    pool.release(CONFIG, first)
+    assert pool.acquire(CONFIG) is first
+    assert pool.logins == 2
+
+
+def test_waiting_acquire_gets_a_session_released_meanwhile(pool):
+    pool.acquire_timeout = 5
+    held = [pool.acquire(CONFIG), pool.acquire(CONFIG)]
+    threading.Timer(0.05, pool.release, args=(CONFIG, held[0])).start()
+    
+    assert pool.acquire(CONFIG) is held[0]
+
+
+def test_parallel_folders_stay_within_folder_workers_sessions(pool):
+    client = EmailClient(config=dict(CONFIG), use_pool=True)
+    assert client.connect()
+    
+    emails = client.fetch_folders_parallel(max_workers=2)
+    
+    assert sorted(e['message_id'] for e in emails) == ['<a@example.com>', '<b@example.com>', '<c@example.com>']
+    # The parent session scans INBOX; Jobs and Updates share one more session
+    assert pool.logins == 2
+    assert pool.stats()['open_per_server'] == {'imap.example.com': 2}
+
+
+def test_folder_without_a_session_fails_the_fetch(pool):
+    pool.max_sessions_per_server = 1
+    client = EmailClient(config=dict(CONFIG), use_pool=True)
+    assert client.connect()
+    
+    with pytest.raises(ConnectionError):
+        client.fetch_folders_parallel(max_workers=2)
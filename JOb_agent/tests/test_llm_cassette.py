@@ -0,0 +1,66 @@
+"""Tests for recording and replaying agent calls (utils/llm_cassette.py)"""
+from types import SimpleNamespace
+
+import pytest
+
+from utils.llm_cassette import CassetteMissError, LLMCassette
+from utils.llm_executor import LLMExecutor
+
+
+class RecordingAgent:
+    name = 'classifier'
+    model = SimpleNamespace(id='test-model')
+    
+    def __init__(self):
+        self.prompts = []
+    
+    def run(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=f'answer to {prompt}', metrics={})
+
+
+class OfflineAgent(RecordingAgent):
+    def run(self, prompt):
+        raise AssertionError('replay must not reach the provider')
+
+
+def make_executor(cassette):
+    return LLMExecutor(max_concurrency=1, requests_per_minute=100000, tokens_per_minute=10**9, cassette=cassette)
+
+
+def test_recorded_calls_replay_without_the_provider(tmp_path):
+    path = str(tmp_path / 'calls.jsonl')
+    live = RecordingAgent()
+    recorder = make_executor(LLMCassette(path, mode='record'))
+    recorded = [recorder.call(live, prompt).content for prompt in ('first', 'second')]
+    
+    replayer = make_executor(LLMCassette(path, mode='replay', replay_latency=False))
+    replayed = [replayer.call(OfflineAgent(), prompt).content for prompt in ('first', 'second')]
+    
+    assert replayed == recorded == ['answer to first', 'answer to second']
+    assert live.prompts == ['first', 'second']
+    assert replayer.cassette.counters == {'hits': 2, 'misses': 0, 'recorded': 0}
+    assert replayer.report()['calls'] == 2
+
+
+def test_replay_miss_raises_and_auto_mode_records_it(tmp_path):
+    path = str(tmp_path / 'calls.jsonl')
+    
+    with pytest.raises(CassetteMissError):
+        make_executor(LLMCassette(path, mode='replay')).call(OfflineAgent(), 'new prompt')
+    
+    live = RecordingAgent()
+    auto = make_executor(LLMCassette(path, mode='auto'))
+    auto.call(live, 'new prompt')
+    auto.call(live, 'new prompt')
+    
+    assert live.prompts == ['new prompt']
+    assert len(LLMCassette(path)) == 1
+
+
+def test_recordings_are_keyed_by_model(tmp_path):
+    cassette = LLMCassette(str(tmp_path / 'calls.jsonl'), mode='auto')
+    cassette.record('model-a', 'prompt', 'a', 0.1)
+    
+    assert cassette.replay('model-b', 'prompt') is None
+    assert str(cassette.replay('model-a', 'prompt')) == 'a'
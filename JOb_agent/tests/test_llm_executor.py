@@ -0,0 +1,124 @@
+"""Tests for the rate-limited LLM call executor (utils/llm_executor.py)"""
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from utils import llm_executor
+from utils.llm_executor import LLMExecutor, TokenBucket
+
+
+class FakeAgent:
+    """Agent whose run() records how many calls are in flight"""
+    
+    name = 'fake'
+    
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def run(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return type('Response', (), {'content': prompt, 'metrics': {}})()
+
+
+def test_concurrency_limit_is_shared_by_concurrent_maps():
+    executor = LLMExecutor(max_concurrency=2, requests_per_minute=100000, tokens_per_minute=10**9)
+    agent = FakeAgent()
+    
+    def task(worker_agent, item):
+        return executor.call(worker_agent, item).content
+    
+    # Two pipeline workers mapping at once must not double the limit
+    with ThreadPoolExecutor(max_workers=2) as workers:
+        results = list(workers.map(lambda items: executor.map(agent, task, items), [['a', 'b', 'c'], ['d', 'e', 'f']]))
+    
+    assert results == [['a', 'b', 'c'], ['d', 'e', 'f']]
+    assert agent.peak == 2
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+        self.response = type('Response', (), {'headers': {'retry-after': retry_after} if retry_after else {}})()
+
+
+class FlakyAgent(FakeAgent):
+    """Fails with the given errors before answering"""
+    
+    def __init__(self, errors):
+        super().__init__(delay=0)
+        self.errors = list(errors)
+        self.calls = 0
+    
+    def run(self, prompt):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().run(prompt)
+
+
+def make_executor(monkeypatch, sleeps, **kwargs):
+    monkeypatch.setattr(llm_executor.time, 'sleep', sleeps.append)
+    settings = dict(max_concurrency=1, requests_per_minute=100000, tokens_per_minute=10**9, backoff_base=1.0)
+    settings.update(kwargs)
+    return LLMExecutor(**settings)
+
+
+def test_token_bucket_makes_callers_wait_once_empty():
+    bucket = TokenBucket(rate_per_minute=60)
+    
+    assert bucket.reserve(60) == 0.0
+    # One token per second refill; the next caller waits about a second
+    assert 0.9 < bucket.reserve(1) <= 1.0
+    # Requests larger than the capacity are capped instead of waiting forever
+    assert bucket.reserve(1000) <= 61.0
+
+
+def test_rate_limits_and_server_errors_are_retried_with_backoff(monkeypatch):
+    sleeps = []
+    executor = make_executor(monkeypatch, sleeps)
+    agent = FlakyAgent([HTTPError(429, retry_after='7'), HTTPError(503)])
+    
+    response = executor.call(agent, 'prompt')
+    
+    assert response.content == 'prompt'
+    assert agent.calls == 3
+    # Retry-After wins over a shorter jittered backoff; the next is capped by 2s
+    assert sleeps[0] == 7.0 and 0.0 <= sleeps[1] <= 2.0
+    report = executor.report()
+    assert (report['calls'], report['retries'], report['failures']) == (3, 2, 0)
+
+
+def test_client_errors_and_exhausted_retries_raise(monkeypatch):
+    executor = make_executor(monkeypatch, [], max_retries=1)
+    
+    with pytest.raises(HTTPError):
+        executor.call(FlakyAgent([HTTPError(400)]), 'prompt')
+    with pytest.raises(HTTPError):
+        executor.call(FlakyAgent([HTTPError(500), HTTPError(500)]), 'prompt')
+    
+    report = executor.report()
+    assert (report['calls'], report['retries'], report['failures']) == (3, 1, 2)
+
+
+def test_calls_wait_on_the_request_rate(monkeypatch):
+    sleeps = []
+    executor = make_executor(monkeypatch, sleeps, requests_per_minute=2)
+    
+    for _ in range(3):
+        executor.call(FakeAgent(delay=0), 'prompt')
+    
+    # The third request exceeds 2 per minute and waits about 30 seconds
+    waits = [seconds for seconds in sleeps if seconds]
+    assert len(waits) == 1 and 29.0 < waits[0] <= 30.0
+    assert executor.report()['throttle_seconds'] == waits[0]
@@ -0,0 +1,68 @@
+"""Tests for the logging profiles and sampled per-email lines (utils/logger.py)"""
+import io
+import json
+import logging
+
+import pytest
+
+from utils.logger import PACKAGE_LOGGERS, ItemLog, agent_debug_mode, configure_logging
+
+
+@pytest.fixture
+def production(monkeypatch):
+    """Configure the production profile; the package loggers are put back afterwards"""
+    saved = [
+        (logger, logger.handlers, logger.level, logger.propagate)
+        for logger in map(logging.getLogger, PACKAGE_LOGGERS)
+    ]
+    monkeypatch.setenv('LOG_PROFILE', 'production')
+    for name in ('LOG_LEVEL', 'LOG_OUTPUT', 'LOG_ITEM_SAMPLE_RATE', 'LOG_PROGRESS_EVERY', 'AGENT_DEBUG_MODE'):
+        monkeypatch.delenv(name, raising=False)
+    yield configure_logging(force=True)
+    for logger, handlers, level, propagate in saved:
+        logger.handlers, logger.level, logger.propagate = handlers, level, propagate
+
+
+def test_production_writes_json_lines_at_info(production):
+    output = io.StringIO()
+    logging.getLogger('utils').handlers[0].setStream(output)
+    logger = logging.getLogger('utils.some_stage')
+    logger.debug("step detail")
+    logger.info("\n%s\n✓ Classified %d emails\n%s", '=' * 20, 3, '=' * 20, extra={'stage': 'classify'})
+    
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert (entry['level'], entry['logger'], entry['stage']) == ('INFO', 'utils.some_stage', 'classify')
+    assert entry['message'] == '✓ Classified 3 emails'
+    assert agent_debug_mode() is False
+    assert (production['item_sample_rate'], production['progress_every']) == (0.01, 500)
+
+
+def test_item_log_samples_lines_and_counts_every_email(caplog):
+    logger = logging.getLogger('test.item_log')
+    item_log = ItemLog('classify', sample_rate=0.25, progress_every=4)
+    
+    with caplog.at_level(logging.INFO, logger='test.item_log'):
+        for n in range(8):
+            item_log.item(logger, "email %d classified", n, email_type='rejection')
+    
+    messages = [record.getMessage() for record in caplog.records]
+    assert [message for message in messages if message.startswith('email')] == ['email 0 classified', 'email 4 classified']
+    assert [message.split(' (')[0] for message in messages if 'processed' in message] == [
+        'classify: 4 emails processed', 'classify: 8 emails processed'
+    ]
+    assert item_log.count == 8
+    assert caplog.records[0].email_type == 'rejection'
+
+
+def test_item_log_without_sampling_writes_no_item_lines(caplog):
+    logger = logging.getLogger('test.item_log')
+    item_log = ItemLog('save', sample_rate=0)
+    
+    with caplog.at_level(logging.INFO, logger='test.item_log'):
+        for n in range(5):
+            item_log.item(logger, "email %d saved", n)
+    
+    assert caplog.records == []
+    assert item_log.count == 5
@@ -0,0 +1,60 @@
+"""Tests for offline mbox/.eml replay (utils/mbox_source.py)"""
+import mailbox
+
+import pytest
+
+from utils.mbox_source import MboxSource
+
+
+def make_message(n, message_id=True):
+    header = f"Message-ID: <{n}@example.com>\n" if message_id else ''
+    return (
+        f"{header}From: jobs{n}@acme.com\nTo: me@example.com\nSubject: Application {n}\n"
+        f"Date: Thu, 1 Jan 2026 10:00:00 +0000\nContent-Type: text/plain\n\nThanks for applying ({n})\n"
+    )
+
+
+@pytest.fixture
+def export(tmp_path):
+    archive = mailbox.mbox(str(tmp_path / 'Jobs.mbox'))
+    for n in range(1, 6):
+        archive.add(make_message(n, message_id=n != 3))
+    archive.flush()
+    archive.close()
+    (tmp_path / 'inbox').mkdir()
+    (tmp_path / 'inbox' / 'reply.eml').write_text(make_message(9))
+    return tmp_path
+
+
+def test_mbox_messages_become_email_dicts(export):
+    emails = list(MboxSource(str(export / 'Jobs.mbox'), workers=1).iter_emails())
+    
+    assert [email['subject'] for email in emails] == [f'Application {n}' for n in range(1, 6)]
+    assert emails[0]['message_id'] == '<1@example.com>'
+    assert emails[0]['folder'] == 'Jobs'
+    assert emails[0]['text'].strip() == 'Thanks for applying (1)'
+    # Without a Message-ID the position in the archive identifies the message
+    assert emails[2]['message_id'] == f"{export / 'Jobs.mbox'}:2"
+
+
+def test_directory_replay_is_ordered_and_chunked(export):
+    chunks = list(MboxSource(str(export), workers=1).iter_chunks(chunk_size=4))
+    
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert [email['subject'] for chunk in chunks for email in chunk][-2:] == ['Application 5', 'Application 9']
+    assert chunks[-1][-1]['folder'] == 'inbox'
+
+
+def test_parser_pool_keeps_source_order(export):
+    inline = [email['message_id'] for email in MboxSource(str(export), workers=1).iter_emails()]
+    pooled = [email['message_id'] for email in MboxSource(str(export), workers=2).iter_emails(window=3)]
+    
+    assert pooled == inline
+
+
+def test_source_spec_is_validated(export):
+    assert MboxSource.from_source_spec(f"mbox:{export}").path == export
+    with pytest.raises(ValueError):
+        MboxSource.from_source_spec(f"maildir:{export}")
+    with pytest.raises(FileNotFoundError):
+        MboxSource.from_source_spec(f"mbox:{export / 'missing.mbox'}")
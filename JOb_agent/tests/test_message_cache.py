@@ -0,0 +1,80 @@
+"""Tests for the local message body cache (utils/message_cache.py)"""
+import pytest
+
+from fake_imap import FakeMailbox
+from utils.email_client import EmailClient
+from utils.message_cache import MessageCache
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 10,
+    'lookback_days': 30,
+    'fetch_thread_ids': False,
+}
+
+
+class CountingMailbox(FakeMailbox):
+    """FakeMailbox counting the messages fetched with and without bodies"""
+    
+    def __init__(self, uids):
+        super().__init__(uids)
+        self.header_fetches = 0
+        self.body_fetches = 0
+    
+    def fetch(self, criteria, headers_only=False, **kwargs):
+        messages = super().fetch(criteria)
+        if headers_only:
+            self.header_fetches += len(messages)
+        else:
+            self.body_fetches += len(messages)
+        return messages
+
+
+def test_bodies_round_trip_and_identical_bodies_are_stored_once(tmp_path):
+    cache = MessageCache(str(tmp_path), max_bytes=10 ** 6)
+    body = {'body': 'Thanks for applying', 'html': None, 'text': 'Thanks for applying'}
+    
+    cache.put('<a@x>', body)
+    cache.put('<b@x>', body)
+    
+    assert cache.get('<a@x>') == body
+    assert cache.get('<missing@x>') is None
+    assert len(list((tmp_path / 'objects').rglob('*.json.z'))) == 1
+    assert cache.stats()['entries'] == 2
+
+
+def test_least_recently_used_messages_are_evicted(tmp_path):
+    cache = MessageCache(str(tmp_path), max_bytes=10 ** 6)
+    for name in ('old', 'used', 'new'):
+        cache.put(f'<{name}@x>', {'text': f'{name} ' * 200})
+    cache.get('<old@x>')
+    cache.get('<used@x>')
+    
+    # Keep room for two of the three messages
+    cache.prune(max_bytes=cache.total_bytes() * 2 // 3 + 1)
+    
+    assert cache.get('<new@x>') is None
+    assert cache.get('<old@x>') is not None and cache.get('<used@x>') is not None
+
+
+@pytest.fixture
+def client(standalone_db, tmp_path, monkeypatch):
+    monkeypatch.setenv('MESSAGE_CACHE_ENABLED', 'false')
+    client = EmailClient(config=dict(CONFIG), use_pool=False)
+    client.cache = MessageCache(str(tmp_path / 'messages'), max_bytes=10 ** 6)
+    return client
+
+
+def test_cached_bodies_are_not_downloaded_again(client):
+    client.mailbox = CountingMailbox([1, 2, 3])
+    first = list(client.iter_recent_emails())
+    assert (client.mailbox.header_fetches, client.mailbox.body_fetches) == (3, 3)
+    
+    # A later run over the same window only needs headers
+    client.mailbox = CountingMailbox([1, 2, 3, 4])
+    second = list(client.iter_recent_emails())
+    
+    assert (client.mailbox.header_fetches, client.mailbox.body_fetches) == (4, 1)
+    assert [e['text'] for e in second[:3]] == [e['text'] for e in first]
+    assert [e['message_id'] for e in second] == [f'<{uid}@example.com>' for uid in (1, 2, 3, 4)]
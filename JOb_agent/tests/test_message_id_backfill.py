@@ -0,0 +1,46 @@
+"""Tests for rekeying UID-keyed email logs (utils/message_id_backfill.py)"""
+from fake_imap import FakeMailbox
+from agents.database_manager_agent import get_local_session
+from utils.email_client import EmailClient
+from utils.message_id_backfill import backfill_message_ids
+
+CONFIG = {
+    'email_address': 'me@example.com',
+    'imap_server': 'imap.example.com',
+    'fetch_chunk_size': 2,
+    'fetch_thread_ids': False,
+}
+ACCOUNT = 'me@example.com@imap.example.com'
+
+
+def test_uid_keys_are_rewritten_to_message_ids(backend_db):
+    session, _ = get_local_session()
+    session.add_all([
+        backend_db.EmailLog(message_id='1', subject='Old log'),
+        backend_db.EmailLog(message_id='2', subject='No Message-ID header'),
+        # Logged again under the new key since the change; the newer log wins
+        backend_db.EmailLog(message_id='3', subject='Old duplicate'),
+        backend_db.EmailLog(message_id='<3@example.com>', subject='New log'),
+        backend_db.EmailLog(message_id='<other@example.com>', subject='Untouched'),
+        backend_db.JobApplication(user_id=1, company_name='Acme', role_title='Engineer', email_message_id='1'),
+    ])
+    session.commit()
+    session.close()
+    
+    client = EmailClient(config=dict(CONFIG), use_pool=False)
+    client.mailbox = FakeMailbox([1, (2, ''), 3])
+    
+    result = backfill_message_ids(None, client)
+    
+    assert result == {'uid_keys': 3, 'found': 3, 'updated': 4}
+    session, _ = get_local_session()
+    logs = dict(session.query(backend_db.EmailLog.message_id, backend_db.EmailLog.subject))
+    application = session.query(backend_db.JobApplication).one()
+    session.close()
+    assert logs == {
+        '<1@example.com>': 'Old log',
+        f'{ACCOUNT}/INBOX/1:2': 'No Message-ID header',
+        '<3@example.com>': 'New log',
+        '<other@example.com>': 'Untouched',
+    }
+    assert application.email_message_id == '<1@example.com>'
@@ -0,0 +1,95 @@
+"""Tests for the metrics registry, its multiprocess totals and run reports (utils/metrics.py)"""
+from types import SimpleNamespace
+
+import pytest
+
+from utils import metrics as metrics_module
+from utils.llm_executor import LLMExecutor
+from utils.metrics import MetricsRegistry
+
+
+def flush_as(metrics, tmp_path, name):
+    """Flush a registry and rename its state file as if another process wrote it"""
+    metrics.flush()
+    metrics._state_path.rename(tmp_path / name)
+
+
+def test_render_adds_up_the_totals_of_every_process(tmp_path):
+    for n, emails in enumerate((10, 20)):
+        worker = MetricsRegistry(multiproc_dir=str(tmp_path))
+        worker.observe_stage('classify', 0.2, emails=emails)
+        worker.observe_llm_call('classifier', 1.5, 'ok', prompt_tokens=100)
+        flush_as(worker, tmp_path, f"worker-{n}.json")
+    
+    api = MetricsRegistry(multiproc_dir=str(tmp_path))
+    api.observe_stage('save', 0.01, emails=2)
+    text = api.render()
+    
+    assert 'job_agent_stage_emails_total{stage="classify"} 30' in text
+    assert 'job_agent_stage_emails_total{stage="save"} 2' in text
+    assert 'job_agent_stage_duration_seconds_count{stage="classify"} 2' in text
+    assert 'job_agent_stage_duration_seconds_bucket{stage="classify",le="0.25"} 2' in text
+    assert 'job_agent_llm_prompt_tokens_total{agent="classifier"} 200' in text
+
+
+def test_own_state_file_is_not_counted_twice(tmp_path):
+    metrics = MetricsRegistry(multiproc_dir=str(tmp_path))
+    metrics.observe_stage('extract', 1.0, emails=3)
+    metrics.flush()
+    
+    assert 'job_agent_stage_emails_total{stage="extract"} 3' in metrics.render()
+
+
+def test_unreadable_state_files_are_skipped(tmp_path):
+    (tmp_path / 'crashed-1.json').write_text('{"job_agent_stage_emails_total": [[["classify"], 4')
+    
+    metrics = MetricsRegistry(multiproc_dir=str(tmp_path))
+    metrics.observe_stage('classify', 0.1, emails=1)
+    
+    assert 'job_agent_stage_emails_total{stage="classify"} 1' in metrics.render()
+
+
+def test_without_a_directory_only_this_process_is_rendered(tmp_path):
+    metrics = MetricsRegistry()
+    metrics.observe_cache_lookup('classification', hit=True)
+    metrics.flush()
+    
+    assert 'job_agent_result_cache_lookups_total{kind="classification",result="hit"} 1' in metrics.render()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_report_since_a_snapshot_counts_one_run_with_its_cost():
+    metrics = MetricsRegistry(prompt_price_per_mtok=3.0, completion_price_per_mtok=15.0)
+    metrics.observe_stage('classify', 1.0, emails=5)
+    metrics.observe_llm_call('classifier', 0.5, 'ok', prompt_tokens=1000, completion_tokens=100)
+    before = metrics.snapshot()
+    
+    metrics.observe_stage('classify', 2.0, emails=10)
+    metrics.observe_queue_wait('classify', 0.5)
+    metrics.observe_llm_call('classifier', 0.4, 'retried', throttle_seconds=0.2)
+    metrics.observe_llm_call('classifier', 0.6, 'ok', prompt_tokens=2000, completion_tokens=200)
+    metrics.observe_email(0.3)
+    report = metrics.report(since=before)
+    
+    assert report['stages'] == {'classify': {'batches': 1, 'emails': 10, 'seconds': 2.0, 'queue_wait_seconds': 0.5}}
+    classifier = report['agents']['classifier']
+    assert (classifier['calls'], classifier['retries'], classifier['failures']) == (2, 1, 0)
+    assert (classifier['prompt_tokens'], classifier['completion_tokens']) == (2000, 200)
+    assert classifier['cost_usd'] == pytest.approx((2000 * 3.0 + 200 * 15.0) / 1e6)
+    assert classifier['throttle_seconds'] == pytest.approx(0.2)
+    assert report['emails'] == 1 and report['mean_email_seconds'] == pytest.approx(0.3)
+
+
+def test_executor_calls_report_provider_token_counts(monkeypatch):
+    metrics = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, '_metrics', metrics)
+    agent = SimpleNamespace(
+        name='extractor',
+        model=SimpleNamespace(id='test-model'),
+        run=lambda prompt: SimpleNamespace(content='{}', metrics={'input_tokens': [120], 'output_tokens': [30]}),
+    )
+    
+    LLMExecutor(max_concurrency=1, requests_per_minute=100000, tokens_per_minute=10**9).call(agent, 'prompt')
+    
+    extractor = metrics.report()['agents']['extractor']
+    assert (extractor['calls'], extractor['prompt_tokens'], extractor['completion_tokens']) == (1, 120, 30)
@@ -0,0 +1,102 @@
+"""Tests for the staged pipeline runner (utils/pipeline.py)"""
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import Pipeline, Stage
+
+
+def run(pipeline, source, timeout=5):
+    """Run a pipeline on a thread so a hang fails the test instead of blocking it"""
+    outcome = {}
+    
+    def target():
+        try:
+            outcome['result'] = pipeline.run(source)
+        except BaseException as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), 'pipeline did not shut down'
+    return outcome
+
+
+def test_items_flow_through_every_stage():
+    pipeline = Pipeline([
+        Stage('double', lambda x: x * 2, workers=3),
+        # None drops an item
+        Stage('odd', lambda x: None if x % 4 == 0 else x),
+        Stage('str', str, workers=2),
+    ], queue_size=2)
+    
+    outcome = run(pipeline, range(20))
+    
+    assert sorted(outcome['result'], key=int) == [str(x * 2) for x in range(20) if (x * 2) % 4]
+    report = pipeline.report()
+    assert [report[name]['items'] for name in ('fetch', 'double', 'odd', 'str')] == [20, 20, 20, 10]
+
+
+def test_stage_error_stops_the_source_and_is_raised():
+    pulled = []
+    
+    def source():
+        for i in range(10_000):
+            pulled.append(i)
+            yield i
+    
+    def fail_on_five(x):
+        if x == 5:
+            raise ValueError('bad item')
+        return x
+    
+    outcome = run(Pipeline([Stage('check', fail_on_five), Stage('slow', lambda x: time.sleep(0.01) or x)], queue_size=2), source())
+    
+    assert isinstance(outcome['error'], ValueError)
+    # Bounded queues: the source stopped long before the end
+    assert len(pulled) < 100
+
+
+def test_source_error_is_raised_after_queued_items_stop():
+    def source():
+        yield 1
+        yield 2
+        raise RuntimeError('connection lost')
+    
+    outcome = run(Pipeline([Stage('identity', lambda x: x)]), source())
+    
+    assert isinstance(outcome['error'], RuntimeError)
+
+
+def test_error_in_last_stage_does_not_hang_blocked_upstream_workers():
+    def fail(x):
+        time.sleep(0.05)
+        raise KeyError(x)
+    
+    # The first stage keeps producing into a full queue the failing stage never drains
+    outcome = run(Pipeline([Stage('fast', lambda x: x, workers=4), Stage('fail', fail)], queue_size=1), range(1000))
+    
+    assert isinstance(outcome['error'], KeyError)
+
+
+def test_keyboard_interrupt_in_the_source_stops_the_stages():
+    def source():
+        yield 1
+        raise KeyboardInterrupt
+    
+    outcome = run(Pipeline([Stage('identity', lambda x: x, workers=2)]), source())
+    
+    assert isinstance(outcome['error'], KeyboardInterrupt)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_pipeline_can_run_again_with_fresh_counters(workers):
+    pipeline = Pipeline([Stage('identity', lambda x: x, workers=workers)])
+    
+    run(pipeline, range(5))
+    outcome = run(pipeline, range(3))
+    
+    assert sorted(outcome['result']) == [0, 1, 2]
+    assert pipeline.report()['identity']['items'] == 3
@@ -0,0 +1,51 @@
+"""Tests for the classification/extraction result cache (utils/result_cache.py)"""
+from utils.result_cache import ResultCache, CLASSIFICATION, EXTRACTION, content_hash
+
+
+def test_prune_keeps_every_current_version_of_a_kind(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'), ttl_seconds=3600)
+    content = content_hash('Subject', 'Body')
+    cache.put(CLASSIFICATION, '<single@x>', content, 'single-v2', 'model', {'classification': 'rejection'})
+    cache.put(CLASSIFICATION, '<packed@x>', content, 'packed-v1', 'model', {'classification': 'offer'})
+    cache.put(CLASSIFICATION, '<old@x>', content, 'single-v1', 'model', {'classification': 'general'})
+    cache.put(EXTRACTION, '<single@x>', content, 'extract-v1', 'model', {'company_name': 'Acme'})
+    
+    removed = cache.prune({
+        CLASSIFICATION: ('single-v2', 'packed-v1'),
+        EXTRACTION: 'extract-v1',
+    })
+    
+    assert removed == 1
+    assert cache.get(CLASSIFICATION, '<packed@x>', content, 'packed-v1', 'model') == {'classification': 'offer'}
+    assert cache.get(CLASSIFICATION, '<single@x>', content, 'single-v2', 'model') is not None
+    assert cache.get(EXTRACTION, '<single@x>', content, 'extract-v1', 'model') is not None
+    assert cache.stats()['entries'] == {CLASSIFICATION: 2, EXTRACTION: 1}
+
+
+def test_lookup_misses_until_stored_and_on_any_key_change(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'), ttl_seconds=3600)
+    content = content_hash('Subject', 'Body')
+    
+    assert cache.get(CLASSIFICATION, '<a@x>', content, 'v1', 'model') is None
+    cache.put(CLASSIFICATION, '<a@x>', content, 'v1', 'model', {'classification': 'offer'})
+    
+    assert cache.get(CLASSIFICATION, '<a@x>', content, 'v1', 'model') == {'classification': 'offer'}
+    assert cache.get(CLASSIFICATION, '<a@x>', content_hash('Subject', 'Edited'), 'v1', 'model') is None
+    assert cache.get(CLASSIFICATION, '<a@x>', content, 'v2', 'model') is None
+    assert cache.get(CLASSIFICATION, '<a@x>', content, 'v1', 'other-model') is None
+    assert cache.get(EXTRACTION, '<a@x>', content, 'v1', 'model') is None
+    
+    ratios = ResultCache.hit_ratios(cache.counters())
+    assert (ratios[CLASSIFICATION]['hits'], ratios[CLASSIFICATION]['lookups']) == (1, 5)
+
+
+def test_expired_and_unidentified_emails_are_not_served(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results.db'), ttl_seconds=3600)
+    cache.put(CLASSIFICATION, '<a@x>', 'hash', 'v1', 'model', {'classification': 'offer'})
+    cache.put(CLASSIFICATION, None, 'hash', 'v1', 'model', {'classification': 'offer'})
+    # Two hours old
+    cache._conn.execute("UPDATE results SET created_at = created_at - 7200")
+    
+    assert cache.get(CLASSIFICATION, '<a@x>', 'hash', 'v1', 'model') is None
+    assert cache.stats()['entries'] == {CLASSIFICATION: 1}
+    assert cache.prune() == 1
@@ -0,0 +1,68 @@
+"""Tests for single-flight sync job submission (ios_app/backend/services/sync_jobs.py)"""
+import asyncio
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def sync_jobs(backend_db, tmp_path, monkeypatch):
+    """services.sync_jobs on a fresh async SQLite database, with dispatch recorded instead of run"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    
+    monkeypatch.syspath_prepend(BACKEND_DIR)
+    from services import sync_jobs
+    
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'backend.db'}")
+    monkeypatch.setattr(sync_jobs, 'AsyncSessionLocal', async_sessionmaker(engine, expire_on_commit=False))
+    sync_jobs.dispatched = []
+    monkeypatch.setattr(sync_jobs, 'dispatch_job', lambda job_id, backend: sync_jobs.dispatched.append(job_id))
+    yield sync_jobs
+    asyncio.run(engine.dispose())
+
+
+def test_concurrent_submits_queue_exactly_one_job(sync_jobs):
+    async def submit_many():
+        return await asyncio.gather(
+            *(sync_jobs.submit_sync_job(sync_jobs.WORKFLOW, {'days': 7}) for _ in range(5)),
+            return_exceptions=True
+        )
+    
+    outcomes = asyncio.run(submit_many())
+    
+    jobs = [outcome for outcome in outcomes if isinstance(outcome, dict)]
+    conflicts = [outcome for outcome in outcomes if isinstance(outcome, sync_jobs.SyncJobConflict)]
+    assert len(jobs) == 1 and len(conflicts) == 4
+    assert sync_jobs.dispatched == [jobs[0]['job_id']]
+    assert {conflict.job_id for conflict in conflicts} == {jobs[0]['job_id']}
+
+
+def test_finished_job_frees_the_active_slot(sync_jobs):
+    async def run():
+        first = await sync_jobs.submit_sync_job(sync_jobs.ACCOUNTS, {'force': False})
+        await sync_jobs._finish_job(first['job_id'], 'success', {'failed': 0}, None)
+        second = await sync_jobs.submit_sync_job(sync_jobs.ACCOUNTS, {'force': True})
+        return first, second, await sync_jobs.list_sync_jobs()
+    
+    first, second, jobs = asyncio.run(run())
+    
+    assert first['job_id'] != second['job_id']
+    assert {job['job_id']: job['status'] for job in jobs} == {first['job_id']: 'success', second['job_id']: 'queued'}
+
+
+def test_database_allows_only_one_active_job(backend_db, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.orm import Session
+    
+    def job(job_id, active):
+        return backend_db.SyncJob(id=job_id, kind='workflow', status='queued', backend='local', active=active)
+    
+    with Session(create_engine(f"sqlite:///{tmp_path / 'backend.db'}")) as session:
+        session.add_all([job('a', True), job('b', None), job('c', None)])
+        session.commit()
+        
+        session.add(job('d', True))
+        with pytest.raises(IntegrityError):
+            session.commit()
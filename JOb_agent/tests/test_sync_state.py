@@ -0,0 +1,22 @@
+"""Tests for the persistent IMAP sync watermark (utils/sync_state.py)"""
+from utils.sync_state import load_sync_state, save_sync_state
+
+
+def test_state_round_trips_through_the_database(standalone_db):
+    assert load_sync_state('me@example.com@imap.example.com', 'INBOX') is None
+    
+    assert save_sync_state('me@example.com@imap.example.com', 'INBOX', 7, 120)
+    assert save_sync_state('me@example.com@imap.example.com', 'INBOX', 7, 150)
+    
+    state = load_sync_state('me@example.com@imap.example.com', 'INBOX')
+    assert (state['uid_validity'], state['last_uid']) == (7, 150)
+
+
+def test_state_is_kept_per_account_and_folder(standalone_db):
+    save_sync_state('a@example.com@imap', 'INBOX', 1, 10)
+    save_sync_state('b@example.com@imap', 'INBOX', 1, 99)
+    save_sync_state('a@example.com@imap', 'Jobs', 3, 5)
+    
+    assert load_sync_state('a@example.com@imap', 'INBOX')['last_uid'] == 10
+    assert load_sync_state('b@example.com@imap', 'INBOX')['last_uid'] == 99
+    assert load_sync_state('a@example.com@imap', 'Jobs')['uid_validity'] == 3
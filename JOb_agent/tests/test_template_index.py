@@ -0,0 +1,116 @@
+"""Tests for ATS template fingerprinting and the template fast path (utils/template_index.py)"""
+import os
+import stat
+from utils.template_index import TemplateIndex, hamming_distance, simhash
+
+CONFIRMATION = (
+    "Thank you for your interest in {company}! We have received your application for the "
+    "{role} position and our team is reviewing it. If your background is a fit, a recruiter "
+    "will reach out to discuss next steps.\n\nBest,\nThe {company} Recruiting Team"
+)
+REJECTION = (
+    "Thank you for your interest in {company}! We have reviewed your application for the "
+    "{role} position and unfortunately we will not be moving forward at this time.\n\n"
+    "Best,\nThe {company} Recruiting Team"
+)
+EXAMPLES = [('Acme', 'Data Engineer'), ('Globex', 'Software Engineer'), ('Initech', 'Product Manager')]
+
+
+def make_email(template: str, company: str, role: str) -> dict:
+    return {
+        'message_id': f"{company}-{role}",
+        'subject': f"Your application to {company}",
+        'from': 'no-reply@greenhouse.io',
+        'body': template.format(company=company, role=role),
+    }
+
+
+def extraction(company: str, role: str, status: str = 'applied', classification: str = 'application_confirmation') -> dict:
+    return {'company_name': company, 'role_title': role, 'status': status, 'classification': classification}
+
+
+def learned_index(**kwargs) -> TemplateIndex:
+    index = TemplateIndex(audit_rate=0.0, **kwargs)
+    for company, role in EXAMPLES:
+        index.learn(make_email(CONFIRMATION, company, role), extraction(company, role))
+    return index
+
+
+def test_emails_of_one_template_share_a_fingerprint():
+    a = simhash(CONFIRMATION.format(company='Acme', role='Data Engineer'))
+    b = simhash(CONFIRMATION.format(company='Umbrella Corp', role='Backend Developer'))
+    
+    assert hamming_distance(a, b) <= 4
+
+
+def test_ready_template_fills_slots_without_the_extractor():
+    index = learned_index()
+    
+    result = index.extract(
+        make_email(CONFIRMATION, 'Umbrella', 'Backend Developer'),
+        {'classification': 'application_confirmation'}
+    )
+    
+    assert result['company_name'] == 'Umbrella'
+    assert result['role_title'] == 'Backend Developer'
+    assert result['status'] == 'applied'
+    assert result['extraction_source'] == 'template'
+
+
+def test_template_is_not_ready_before_min_examples():
+    index = TemplateIndex(audit_rate=0.0)
+    for company, role in EXAMPLES[:2]:
+        index.learn(make_email(CONFIRMATION, company, role), extraction(company, role))
+    
+    assert index.extract(make_email(CONFIRMATION, 'Umbrella', 'Analyst'), {'classification': 'application_confirmation'}) is None
+
+
+def test_differently_classified_email_is_not_fast_pathed():
+    # Even when a rejection falls within max_distance of a confirmation
+    # template, its classifier label keeps it off the fast path
+    index = learned_index(max_distance=64)
+    
+    result = index.extract(make_email(REJECTION, 'Umbrella', 'Backend Developer'), {'classification': 'rejection'})
+    
+    assert result is None
+    assert index.counters['label_mismatch'] == 1
+
+
+def test_examples_with_mixed_labels_do_not_make_a_ready_template():
+    index = TemplateIndex(audit_rate=0.0)
+    for (company, role), label in zip(EXAMPLES, ('application_confirmation', 'rejection', 'application_confirmation')):
+        index.learn(make_email(CONFIRMATION, company, role), extraction(company, role, classification=label))
+    
+    assert index.report()['ready_templates'] == 0
+
+
+def test_audit_disagreement_sends_template_back_to_learning():
+    index = learned_index()
+    email = make_email(CONFIRMATION, 'Umbrella', 'Backend Developer')
+    fast = index.extract(email, {'classification': 'application_confirmation'})
+    
+    agreed = index.record_audit(fast, extraction('Umbrella', 'Backend Developer', status='rejected'))
+    
+    assert agreed is False
+    assert index.extract(email, {'classification': 'application_confirmation'}) is None
+
+
+def test_concurrent_saves_merge_instead_of_overwriting(tmp_path):
+    path = str(tmp_path / 'ats_templates.json')
+    first = learned_index(path=path)
+    second = TemplateIndex(path=path, audit_rate=0.0)
+    for company, role in EXAMPLES:
+        second.learn(make_email(REJECTION, company, role), extraction(company, role, 'rejected', 'rejection'))
+    
+    first.save()
+    second.save()
+    
+    merged = TemplateIndex.load(path)
+    assert merged.report()['ready_templates'] == 2
+    assert merged.extract(make_email(CONFIRMATION, 'Umbrella', 'Analyst'), {'classification': 'application_confirmation'})
+    assert merged.extract(make_email(REJECTION, 'Umbrella', 'Analyst'), {'classification': 'rejection'})['status'] == 'rejected'
+    # Saving again does not duplicate examples
+    second.save()
+    assert [len(t['examples']) for t in TemplateIndex.load(path).templates] == [3, 3]
+    if os.name == 'posix':
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
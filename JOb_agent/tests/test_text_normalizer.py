@@ -0,0 +1,50 @@
+"""Tests for email body normalization (utils/text_normalizer.py)"""
+from utils import text_normalizer
+from utils.text_normalizer import count_tokens, normalize_body, normalize_email
+
+
+def test_html_body_is_converted_and_footer_dropped():
+    html_body = (
+        "<html><body><p>Hi Jane,</p><p>Thanks for applying to Acme.</p>"
+        + "<p>We will review your application.</p>" * 5
+        + "<p>Unsubscribe from these emails</p></body></html>"
+    )
+    
+    text = normalize_body('', html_body)
+    
+    assert text.startswith('Hi Jane,\n\nThanks for applying to Acme.')
+    assert 'Unsubscribe' not in text
+    assert '<p>' not in text
+
+
+def test_normalize_email_stores_result_on_email():
+    email = {'body': 'Hello\n\n\n\nworld'}
+    
+    assert normalize_email(email) == 'Hello\n\nworld'
+    assert email['normalized_body'] == 'Hello\n\nworld'
+
+
+def test_normalize_email_reuses_stored_result():
+    email = {'body': 'Hello', 'normalized_body': 'Already normalized'}
+    
+    assert normalize_email(email) == 'Already normalized'
+
+
+class _OfflineTiktoken:
+    calls = 0
+    
+    @classmethod
+    def get_encoding(cls, name):
+        cls.calls += 1
+        raise ConnectionError("could not download o200k_base")
+
+
+def test_token_count_falls_back_when_encoding_cannot_be_loaded(monkeypatch):
+    monkeypatch.setattr(text_normalizer, 'tiktoken', _OfflineTiktoken)
+    monkeypatch.setattr(text_normalizer, '_encoding', None)
+    monkeypatch.setattr(text_normalizer, '_encoding_failed', False)
+    
+    assert count_tokens('x' * 40) == 10
+    assert count_tokens('x' * 8) == 2
+    # The download is not retried on every call
+    assert _OfflineTiktoken.calls == 1
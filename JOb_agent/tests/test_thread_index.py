@@ -0,0 +1,64 @@
+"""Tests for thread keys and the reply status check (utils/thread_index.py)"""
+from utils.thread_index import ThreadIndex, lookup_keys, thread_keys
+
+
+def reply(subject: str, body: str) -> dict:
+    return {'message_id': '42', 'subject': subject, 'body': body}
+
+
+def test_thread_keys_include_own_id_gmail_thread_and_references():
+    email = {
+        'internet_message_id': '<c@mail>',
+        'gmail_thread_id': 1789,
+        'in_reply_to': '<b@mail>',
+        'references': '<a@mail> <b@mail>',
+    }
+    
+    assert lookup_keys(email) == ['gm:1789', 'id:<b@mail>', 'id:<a@mail>']
+    assert thread_keys(email) == ['id:<c@mail>', 'gm:1789', 'id:<b@mail>', 'id:<a@mail>']
+
+
+def test_bare_unfortunately_does_not_reject():
+    index = ThreadIndex()
+    
+    result = index.classify_reply(
+        reply('Re: Next steps', "Unfortunately I'm out Friday, can we reschedule the interview?"),
+        application_id=7
+    )
+    
+    assert result['classification'] == 'interview_request'
+    assert result['application_id'] == 7
+    assert result['source'] == 'thread'
+
+
+def test_conclusive_rejection():
+    index = ThreadIndex()
+    
+    result = index.classify_reply(
+        reply('Re: Your application', 'Unfortunately we have decided to move forward with other candidates.'),
+        application_id=7
+    )
+    
+    assert result['classification'] == 'rejection'
+
+
+def test_rejection_mentioning_an_interview_goes_to_the_classifier():
+    index = ThreadIndex()
+    
+    result = index.classify_reply(
+        reply('Re: Interview', 'Thanks for the interview. We regret to inform you we chose other candidates.'),
+        application_id=7
+    )
+    
+    assert result is None
+    assert index.report()['ambiguous'] == 1
+    assert index.report()['matched'] == 0
+
+
+def test_reply_without_status_words_is_follow_up():
+    index = ThreadIndex()
+    
+    result = index.classify_reply(reply('Re: Portfolio', 'Here is the link you asked for.'), application_id=3)
+    
+    assert result['classification'] == 'follow_up'
+    assert index.report()['by_classification'] == {'follow_up': 1}
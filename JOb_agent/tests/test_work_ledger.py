@@ -0,0 +1,131 @@
+"""Tests for work ledger checkpoints and resume (utils/work_ledger.py)"""
+from functools import partial
+
+from agents.database_manager_agent import (
+    get_ledger_stats, load_ledger_entries, load_unfinished_emails, record_ledger_entries
+)
+from utils.work_ledger import CLASSIFIED, DONE, EXTRACTED, FETCHED, WorkLedger
+
+ACCOUNT = 'me@example.com@imap.example.com'
+
+
+def make_ledger():
+    return WorkLedger(partial(load_ledger_entries, None), partial(record_ledger_entries, None))
+
+
+def make_email(message_id, account=ACCOUNT):
+    return {
+        'message_id': message_id,
+        'account': account,
+        'uid': '1',
+        'folder': 'INBOX',
+        'subject': f'Application {message_id}',
+        'from': 'jobs@example.com',
+        'body': 'Thank you for applying',
+    }
+
+
+def stage_of(message_id, account=ACCOUNT):
+    entry = load_ledger_entries(None, [(account, message_id)]).get((account, message_id))
+    return entry and entry['stage']
+
+
+def test_emails_move_forward_through_the_stages(backend_db):
+    ledger = make_ledger()
+    job, other = make_email('<job@x>'), make_email('<news@x>')
+    
+    pending, _, _ = ledger.resume([job, other])
+    ledger.mark_fetched(pending)
+    assert (stage_of('<job@x>'), stage_of('<news@x>')) == (FETCHED, FETCHED)
+    
+    ledger.mark_classified(
+        [job, other],
+        [{'classification': 'application_confirmation', 'is_job_related': True}, {'classification': 'other'}],
+        attached=set()
+    )
+    assert (stage_of('<job@x>'), stage_of('<news@x>')) == (CLASSIFIED, DONE)
+    
+    record = {'email_message_id': '<job@x>', 'company_name': 'Acme', 'role_title': 'Engineer'}
+    ledger.mark_extracted([record])
+    assert stage_of('<job@x>') == EXTRACTED
+    
+    ledger.mark_saved([dict(record, application_id=None)])
+    assert stage_of('<job@x>') == EXTRACTED  # failed save is retried
+    
+    ledger.mark_saved([dict(record, application_id=7)])
+    assert stage_of('<job@x>') == DONE
+    
+    # A later fetch never moves an email back
+    make_ledger().mark_fetched([job])
+    assert stage_of('<job@x>') == DONE
+    assert get_ledger_stats(None) == {DONE: 2}
+
+
+def test_failed_classification_stays_fetched(backend_db):
+    ledger = make_ledger()
+    email = make_email('<a@x>')
+    ledger.mark_fetched([email])
+    ledger.mark_classified([email], [{'classification': 'error'}], attached=set())
+    
+    assert stage_of('<a@x>') == FETCHED
+
+
+def test_resume_skips_finished_stages(backend_db):
+    first = make_ledger()
+    done, classified, extracted, fetched = (make_email(f'<{n}@x>') for n in ('done', 'cls', 'ext', 'new'))
+    first.mark_fetched([done, classified, extracted, fetched])
+    first.mark_classified(
+        [done, classified, extracted],
+        [{'classification': 'other'}] + [{'classification': 'interview_request', 'is_job_related': True}] * 2,
+        attached=set()
+    )
+    first.mark_extracted([{'email_message_id': '<ext@x>', 'company_name': 'Acme'}])
+    
+    second = make_ledger()
+    pending, classifications, resumed_extracted = second.resume([done, classified, extracted, fetched, fetched])
+    
+    assert [email['message_id'] for email in pending] == ['<cls@x>', '<new@x>']
+    assert classifications['<cls@x>']['classification'] == 'interview_request'
+    assert [(email['message_id'], data['company_name']) for email, data in resumed_extracted] == [('<ext@x>', 'Acme')]
+    report = second.report()
+    assert (report['skipped_done'], report['skipped_classify'], report['skipped_extract'], report['duplicates']) == (1, 1, 1, 1)
+
+
+def test_same_message_in_two_accounts_is_tracked_separately(backend_db):
+    ledger = make_ledger()
+    mine, theirs = make_email('<shared@x>'), make_email('<shared@x>', account='other@example.com@imap')
+    ledger.mark_fetched([mine])
+    ledger.mark_classified([mine], [{'classification': 'other'}], attached=set())
+    
+    pending, _, _ = make_ledger().resume([mine, theirs])
+    
+    assert pending == [theirs]
+    assert stage_of('<shared@x>') == DONE
+    assert stage_of('<shared@x>', account='other@example.com@imap') is None
+
+
+def test_unfinished_emails_are_resumed_per_account(backend_db):
+    ledger = make_ledger()
+    ledger.mark_fetched([make_email('<a@x>'), make_email('<b@x>', account='other@example.com@imap')])
+    
+    unfinished = load_unfinished_emails(None, max_attempts=3, limit=10, accounts=[ACCOUNT])
+    
+    assert [(email['message_id'], email['account']) for email in unfinished] == [('<a@x>', ACCOUNT)]
+    assert unfinished[0]['subject'] == 'Application <a@x>'
+    
+    # Emails picked up max_attempts times are given up on
+    make_ledger().mark_fetched([make_email('<a@x>')])
+    make_ledger().mark_fetched([make_email('<a@x>')])
+    assert load_unfinished_emails(None, max_attempts=3, limit=10, accounts=[ACCOUNT]) == []
+
+
+def test_ledger_runs_on_the_standalone_database(standalone_db):
+    ledger = make_ledger()
+    job = make_email('<cli@x>')
+    ledger.mark_fetched([job])
+    
+    assert stage_of('<cli@x>') == FETCHED
+    assert [email['message_id'] for email in load_unfinished_emails(None, max_attempts=3, limit=10)] == ['<cli@x>']
+    
+    ledger.mark_classified([job], [{'classification': 'other'}], attached=set())
+    assert get_ledger_stats(None) == {DONE: 1}
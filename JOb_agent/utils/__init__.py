@@ -5,16 +5,73 @@ from utils.config import (
     load_api_key,
     get_email_config,
     get_ai_config,
+    get_prompt_config,
+    get_llm_executor_config,
+    get_llm_stub_config,
     get_monitoring_config,
+    get_search_config,
+    get_rules_config,
+    get_classifier_config,
+    get_template_config,
+    get_pipeline_config,
+    get_ledger_config,
+    get_metrics_config,
+    get_logging_config,
+    get_cache_config,
     validate_config
 )
 from utils.email_client import EmailClient
+from utils.imap_pool import IMAPConnectionPool, get_connection_pool
+from utils.message_cache import MessageCache, get_message_cache
+from utils.mbox_source import MboxSource
+from utils.email_rules import RuleFilter
+from utils.thread_index import ThreadIndex
+from utils.template_index import TemplateIndex
+from utils.result_cache import ResultCache, get_result_cache
+from utils.llm_executor import LLMExecutor, get_llm_executor
+from utils.llm_cassette import LLMCassette, get_llm_cassette
+from utils.pipeline import Pipeline, Stage
+from utils.metrics import MetricsRegistry, get_metrics
+from utils.logger import ItemLog, configure_logging, get_item_log
 
 __all__ = [
     'load_api_key',
     'get_email_config',
     'get_ai_config',
+    'get_prompt_config',
+    'get_llm_executor_config',
+    'get_llm_stub_config',
     'get_monitoring_config',
+    'get_search_config',
+    'get_rules_config',
+    'get_classifier_config',
+    'get_template_config',
+    'get_pipeline_config',
+    'get_ledger_config',
+    'get_metrics_config',
+    'get_logging_config',
+    'get_cache_config',
     'validate_config',
     'EmailClient',
+    'IMAPConnectionPool',
+    'get_connection_pool',
+    'MessageCache',
+    'get_message_cache',
+    'MboxSource',
+    'RuleFilter',
+    'ThreadIndex',
+    'TemplateIndex',
+    'ResultCache',
+    'get_result_cache',
+    'LLMExecutor',
+    'get_llm_executor',
+    'LLMCassette',
+    'get_llm_cassette',
+    'Pipeline',
+    'Stage',
+    'MetricsRegistry',
+    'get_metrics',
+    'ItemLog',
+    'configure_logging',
+    'get_item_log',
 ]
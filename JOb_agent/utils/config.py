@@ -38,6 +38,23 @@ def get_email_config() -> dict:
         'email_password': os.getenv('EMAIL_PASSWORD'),
         'imap_server': os.getenv('EMAIL_IMAP_SERVER', 'imap.gmail.com'),
         'imap_port': int(os.getenv('EMAIL_IMAP_PORT', '993')),
+        # Partial body fetch size for header-first mode; covers the ~3000 chars
+        # the agents read plus MIME/transfer-encoding overhead
+        'body_fetch_bytes': int(os.getenv('BODY_FETCH_BYTES', '8192')),
+        # Messages fetched per round trip by the iter_* generators
+        'fetch_chunk_size': int(os.getenv('FETCH_CHUNK_SIZE', '50')),
+        # Folders scanned by iter_folders and fetch_folders_parallel (e.g. INBOX,[Gmail]/Updates)
+        'folders': _split_list(os.getenv('FETCH_FOLDERS', 'INBOX')),
+        'folder_workers': int(os.getenv('FOLDER_FETCH_WORKERS', '4')),
+        # Connection pooling (see utils.imap_pool)
+        'pool_enabled': os.getenv('IMAP_POOL_ENABLED', 'true').lower() == 'true',
+        'pool_max_sessions_per_server': int(os.getenv('IMAP_POOL_MAX_SESSIONS_PER_SERVER', '10')),
+        'pool_max_idle_per_account': int(os.getenv('IMAP_POOL_MAX_IDLE_PER_ACCOUNT', '2')),
+        'pool_noop_interval': int(os.getenv('IMAP_POOL_NOOP_INTERVAL', '300')),
+        # MIME parser processes for offline mbox/.eml sources (see utils.mbox_source)
+        'parse_workers': int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 1))),
+        # Extra X-GM-THRID round trip per chunk on Gmail (see utils.thread_index)
+        'fetch_thread_ids': os.getenv('FETCH_GMAIL_THREAD_IDS', 'true').lower() == 'true',
     }
 
 
@@ -52,10 +69,75 @@ def get_ai_config() -> dict:
         'model': os.getenv('AI_MODEL', 'gpt-4o-mini'),
         'temperature': float(os.getenv('TEMPERATURE', '0.3')),
         'openai_api_key': load_api_key('OPENAI_API_KEY'),
+        # OpenAI-compatible endpoint, e.g. the local stand-in (see utils.llm_stub_server)
+        'openai_base_url': os.getenv('OPENAI_BASE_URL') or None,
         'google_api_key': load_api_key('GOOGLE_API_KEY'),
     }
 
 
+def get_prompt_config() -> dict:
+    """
+    Get prompt construction settings from environment variables
+    
+    Returns:
+        Dictionary with body token budgets, batching and agent mode for the LLM agents
+    """
+    return {
+        # Body token budgets after normalization (see utils.text_normalizer)
+        'classifier_max_tokens': int(os.getenv('CLASSIFIER_MAX_TOKENS', '500')),
+        'extractor_max_tokens': int(os.getenv('EXTRACTOR_MAX_TOKENS', '750')),
+        # Emails packed into one classification request (1 = one request per email)
+        'classifier_batch_size': int(os.getenv('CLASSIFIER_BATCH_SIZE', '10')),
+        # Token budget of the packed emails in one classification request
+        'classifier_batch_max_tokens': int(os.getenv('CLASSIFIER_BATCH_MAX_TOKENS', '6000')),
+        # 'two_agent' (classifier, then extractor) or 'fused' (one call for both)
+        'agent_mode': os.getenv('AGENT_MODE', 'two_agent').lower(),
+    }
+
+
+def get_llm_executor_config() -> dict:
+    """
+    Get LLM call concurrency, rate limit and retry settings from environment variables
+    
+    Returns:
+        Dictionary with executor settings (see utils.llm_executor)
+    """
+    return {
+        'max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+        # Keep below the provider limits of your API key tier
+        'requests_per_minute': int(os.getenv('LLM_REQUESTS_PER_MINUTE', '500')),
+        'tokens_per_minute': int(os.getenv('LLM_TOKENS_PER_MINUTE', '200000')),
+        'max_retries': int(os.getenv('LLM_MAX_RETRIES', '5')),
+        'backoff_base': float(os.getenv('LLM_BACKOFF_BASE', '1.0')),
+        'backoff_max': float(os.getenv('LLM_BACKOFF_MAX', '60')),
+        # Record/replay of agent calls (see utils.llm_cassette): off, record, replay or auto
+        'cassette_mode': os.getenv('LLM_CASSETTE_MODE', 'off').lower(),
+        'cassette_path': os.getenv('LLM_CASSETTE_PATH', '.cassettes/llm_calls.jsonl'),
+        'cassette_replay_latency': os.getenv('LLM_CASSETTE_REPLAY_LATENCY', 'true').lower() == 'true',
+    }
+
+
+def get_llm_stub_config() -> dict:
+    """
+    Get settings of the local stand-in model server from environment variables
+    
+    Returns:
+        Dictionary with the listen address and latency/error distributions
+        (see utils.llm_stub_server)
+    """
+    return {
+        'host': os.getenv('LLM_STUB_HOST', '127.0.0.1'),
+        'port': int(os.getenv('LLM_STUB_PORT', '8765')),
+        # Log-normal time to first token plus a per-output-token cost
+        'latency_median_ms': float(os.getenv('LLM_STUB_LATENCY_MEDIAN_MS', '700')),
+        'latency_sigma': float(os.getenv('LLM_STUB_LATENCY_SIGMA', '0.5')),
+        'ms_per_output_token': float(os.getenv('LLM_STUB_MS_PER_OUTPUT_TOKEN', '12')),
+        # Share of requests answered with 429 / 500
+        'rate_limit_rate': float(os.getenv('LLM_STUB_RATE_LIMIT_RATE', '0.02')),
+        'server_error_rate': float(os.getenv('LLM_STUB_SERVER_ERROR_RATE', '0.01')),
+    }
+
+
 def get_monitoring_config() -> dict:
     """
     Get monitoring configuration from environment variables
@@ -66,24 +148,202 @@ def get_monitoring_config() -> dict:
     return {
         'check_interval': int(os.getenv('CHECK_INTERVAL', '3600')),
         'lookback_days': int(os.getenv('LOOKBACK_DAYS', '30')),
+        # Re-arm IDLE before the 29 minute server timeout (RFC 2177)
+        'idle_timeout': int(os.getenv('IDLE_TIMEOUT', '1500')),
+    }
+
+
+def get_search_config() -> dict:
+    """
+    Get job email search configuration from environment variables
+    
+    Returns:
+        Dictionary with search keywords and sender patterns
+    """
+    return {
+        'job_keywords': _split_list(os.getenv(
+            'JOB_SEARCH_KEYWORDS',
+            'application,interview,position,opportunity,recruiter,hiring,job,career,offer'
+        )),
+        'job_senders': _split_list(os.getenv('JOB_SEARCH_SENDERS', '')),
+    }
+
+
+def get_rules_config() -> dict:
+    """
+    Get rule-based pre-filter configuration from environment variables
+    
+    Returns:
+        Dictionary with the enable flags and extra sender domains
+    """
+    return {
+        'rules_enabled': os.getenv('RULES_ENABLED', 'true').lower() == 'true',
+        # Replies in threads of known applications skip the classifier (see utils.thread_index)
+        'thread_index_enabled': os.getenv('THREAD_INDEX_ENABLED', 'true').lower() == 'true',
+        # Added to the built-in lists in utils.email_rules
+        'ats_domains': [d.lower() for d in _split_list(os.getenv('RULES_ATS_DOMAINS', ''))],
+        'non_job_domains': [d.lower() for d in _split_list(os.getenv('RULES_NON_JOB_DOMAINS', ''))],
+    }
+
+
+def get_classifier_config() -> dict:
+    """
+    Get local classifier configuration from environment variables
+    
+    Returns:
+        Dictionary with model location and confidence thresholds
+    """
+    return {
+        'local_model_enabled': os.getenv('LOCAL_MODEL_ENABLED', 'true').lower() == 'true',
+        'local_model_path': os.getenv('LOCAL_MODEL_PATH', '.models/email_classifier.npz'),
+        # Predictions below this confidence fall back to the LLM classifier
+        'local_model_threshold': float(os.getenv('LOCAL_MODEL_THRESHOLD', '0.85')),
+        # Stored labels below this confidence are not used for training
+        'min_label_confidence': float(os.getenv('LOCAL_MODEL_MIN_LABEL_CONFIDENCE', '0.7')),
+    }
+
+
+def get_template_config() -> dict:
+    """
+    Get ATS template index configuration from environment variables
+    
+    Returns:
+        Dictionary with index location, matching and learning thresholds
+    """
+    return {
+        'template_index_enabled': os.getenv('TEMPLATE_INDEX_ENABLED', 'true').lower() == 'true',
+        'template_index_path': os.getenv('TEMPLATE_INDEX_PATH', '.models/ats_templates.json'),
+        # SimHash bits that may differ between emails of one template (of 64)
+        'max_distance': int(os.getenv('TEMPLATE_MAX_DISTANCE', '4')),
+        # Consistent LLM extractions needed before a template is used
+        'min_examples': int(os.getenv('TEMPLATE_MIN_EXAMPLES', '3')),
+        # Share of fast-path extractions also sent to the extractor to measure accuracy
+        'audit_rate': float(os.getenv('TEMPLATE_AUDIT_RATE', '0.1')),
+    }
+
+
+def get_pipeline_config() -> dict:
+    """
+    Get pipelined workflow configuration from environment variables
+    
+    Returns:
+        Dictionary with the execution mode, batch and queue sizes and
+        workers per stage
+    """
+    return {
+        # 'pipelined' overlaps fetch, classify, extract and save; 'chunked' runs them per chunk
+        'execution_mode': os.getenv('EXECUTION_MODE', 'chunked').lower(),
+        # Emails per batch passed between stages
+        'batch_size': int(os.getenv('PIPELINE_BATCH_SIZE', '10')),
+        # Batches that may wait between two stages before the earlier stage blocks
+        'queue_size': int(os.getenv('PIPELINE_QUEUE_SIZE', '4')),
+        'classify_workers': int(os.getenv('PIPELINE_CLASSIFY_WORKERS', '2')),
+        'extract_workers': int(os.getenv('PIPELINE_EXTRACT_WORKERS', '2')),
+        'save_workers': int(os.getenv('PIPELINE_SAVE_WORKERS', '1')),
+    }
+
+
+def get_ledger_config() -> dict:
+    """
+    Get work ledger (checkpoint and resume) configuration from environment variables
+    
+    Returns:
+        Dictionary with the ledger switch and resume limits
+    """
+    return {
+        'ledger_enabled': os.getenv('WORK_LEDGER_ENABLED', 'true').lower() == 'true',
+        # Runs that may pick up an unfinished email before resume gives up on it
+        'max_attempts': int(os.getenv('WORK_LEDGER_MAX_ATTEMPTS', '3')),
+        # Unfinished emails from earlier runs processed first in a new run
+        'resume_limit': int(os.getenv('WORK_LEDGER_RESUME_LIMIT', '500')),
+    }
+
+
+def get_metrics_config() -> dict:
+    """
+    Get instrumentation configuration from environment variables
+    
+    Returns:
+        Dictionary with model token prices used for run cost estimates and
+        the directory processes share their metrics through
+    """
+    return {
+        # USD per million tokens; defaults are gpt-4o-mini list prices
+        'prompt_price_per_mtok': float(os.getenv('LLM_PROMPT_PRICE_PER_MTOK', '0.15')),
+        'completion_price_per_mtok': float(os.getenv('LLM_COMPLETION_PRICE_PER_MTOK', '0.60')),
+        # Shared by the API and its sync workers so /metrics covers all of them
+        'multiproc_dir': os.getenv('METRICS_MULTIPROC_DIR') or os.getenv('PROMETHEUS_MULTIPROC_DIR') or None,
+    }
+
+
+def get_logging_config() -> dict:
+    """
+    Get the logging profile from environment variables
+    
+    Returns:
+        Dictionary with level, output format, per-email line sampling,
+        progress interval and agent debug tracing (see utils.logger)
+    """
+    production = os.getenv('LOG_PROFILE', 'development').lower() == 'production'
+    return {
+        'profile': 'production' if production else 'development',
+        # DEBUG shows per-batch step lines; INFO keeps per-run summaries and sampled per-email lines
+        'level': os.getenv('LOG_LEVEL', 'INFO' if production else 'DEBUG').upper(),
+        # text prints plain messages like the console output; json writes one object per line
+        'output': os.getenv('LOG_OUTPUT', 'json' if production else 'text').lower(),
+        # Share of per-email lines logged; errors are always logged
+        'item_sample_rate': float(os.getenv('LOG_ITEM_SAMPLE_RATE', '0.01' if production else '1')),
+        # Aggregated progress line every N emails per stage (0 = off)
+        'progress_every': int(os.getenv('LOG_PROGRESS_EVERY', '500' if production else '0')),
+        'agent_debug_mode': os.getenv('AGENT_DEBUG_MODE', 'false' if production else 'true').lower() == 'true',
     }
 
 
-def validate_config() -> bool:
+def get_cache_config() -> dict:
+    """
+    Get local cache configuration from environment variables
+    
+    Returns:
+        Dictionary with cache locations and limits
+    """
+    return {
+        'message_cache_enabled': os.getenv('MESSAGE_CACHE_ENABLED', 'true').lower() == 'true',
+        'message_cache_dir': os.getenv('MESSAGE_CACHE_DIR', '.message_cache'),
+        'message_cache_max_bytes': int(float(os.getenv('MESSAGE_CACHE_MAX_MB', '512')) * 1024 * 1024),
+        # Classification/extraction results (see utils.result_cache)
+        'result_cache_enabled': os.getenv('RESULT_CACHE_ENABLED', 'true').lower() == 'true',
+        'result_cache_path': os.getenv('RESULT_CACHE_PATH', '.result_cache/results.sqlite'),
+        'result_cache_ttl_seconds': int(float(os.getenv('RESULT_CACHE_TTL_DAYS', '30')) * 86400),
+    }
+
+
+def _split_list(value: str) -> list:
+    """Split a comma-separated environment value into a list of stripped items"""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def validate_config(require_email: bool = True) -> bool:
     """
     Validate that all required configuration is present
     
+    Args:
+        require_email: Require IMAP credentials (not needed for offline sources)
+    
     Returns:
         True if configuration is valid, False otherwise
     """
     email_config = get_email_config()
     ai_config = get_ai_config()
     
-    required_fields = [
-        ('EMAIL_ADDRESS', email_config['email_address']),
-        ('EMAIL_PASSWORD', email_config['email_password']),
+    # Pure replay never reaches the provider
+    required_fields = [] if get_llm_executor_config()['cassette_mode'] == 'replay' else [
         ('OPENAI_API_KEY', ai_config['openai_api_key']),
     ]
+    if require_email:
+        required_fields = [
+            ('EMAIL_ADDRESS', email_config['email_address']),
+            ('EMAIL_PASSWORD', email_config['email_password']),
+        ] + required_fields
     
     missing_fields = []
     for field_name, field_value in required_fields:
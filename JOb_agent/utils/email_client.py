@@ -1,21 +1,53 @@
 """
 Email client for connecting to IMAP servers and fetching emails
 """
-from imap_tools import MailBox, AND
+from imap_tools import MailBox, MailMessage, AND, OR, A, U
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from utils.config import get_email_config
+from typing import Callable, Iterator, List, Dict, Optional
+from utils.config import get_email_config, get_search_config, get_monitoring_config
+from utils.sync_state import load_sync_state, save_sync_state
+from utils.imap_pool import get_connection_pool
+from utils.message_cache import get_message_cache
 import email
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from email.header import decode_header
 
+logger = logging.getLogger(__name__)
+
+
+def mailbox_account_key(config: Dict) -> str:
+    """
+    Get the key identifying a mailbox account (email_address@imap_server)
+    
+    Args:
+        config: Email configuration (see get_email_config)
+    
+    Returns:
+        Account key used by the sync state and the work ledger
+    """
+    return f"{config['email_address']}@{config['imap_server']}"
+
 
 class EmailClient:
     """Client for connecting to email servers and fetching emails"""
     
-    def __init__(self):
-        """Initialize email client with configuration"""
-        self.config = get_email_config()
+    def __init__(self, config: Optional[Dict] = None, use_pool: Optional[bool] = None):
+        """
+        Initialize email client with configuration
+        
+        Args:
+            config: Email configuration (default: from environment, see get_email_config)
+            use_pool: Borrow sessions from the shared IMAP connection pool
+                (default: IMAP_POOL_ENABLED)
+        """
+        self.config = config or get_email_config()
+        self.use_pool = self.config.get('pool_enabled', False) if use_pool is None else use_pool
         self.mailbox = None
+        self.selected_folder = None
+        self.cache = get_message_cache()
+        self._uid_validity = {}
         
     def connect(self) -> bool:
         """
@@ -25,22 +57,51 @@ class EmailClient:
             True if connection successful, False otherwise
         """
         try:
-            self.mailbox = MailBox(self.config['imap_server'])
-            self.mailbox.login(
-                self.config['email_address'],
-                self.config['email_password']
-            )
-            print(f"✓ Connected to {self.config['imap_server']}")
+            if self.use_pool:
+                self.mailbox = get_connection_pool().acquire(self.config)
+                # A pooled session may still have another folder selected
+                self.mailbox.folder.set('INBOX')
+            else:
+                self.mailbox = MailBox(self.config['imap_server'], port=self.config.get('imap_port', 993))
+                self.mailbox.login(
+                    self.config['email_address'],
+                    self.config['email_password']
+                )
+            self.selected_folder = 'INBOX'
+            logger.debug(f"✓ Connected to {self.config['imap_server']}")
             return True
         except Exception as e:
-            print(f"✗ Failed to connect to email server: {e}")
+            if self.use_pool and self.mailbox:
+                get_connection_pool().release(self.config, self.mailbox, broken=True)
+                self.mailbox = None
+            logger.error(f"✗ Failed to connect to email server: {e}")
             return False
     
+    @property
+    def account_key(self) -> str:
+        """Key identifying this mailbox account in persisted sync state"""
+        return mailbox_account_key(self.config)
+    
     def disconnect(self):
-        """Disconnect from the email server"""
+        """Disconnect from the email server (returns the session to the pool when pooled)"""
         if self.mailbox:
-            self.mailbox.logout()
-            print("✓ Disconnected from email server")
+            if self.use_pool:
+                get_connection_pool().release(self.config, self.mailbox)
+            else:
+                self.mailbox.logout()
+            self.mailbox = None
+            logger.debug("✓ Disconnected from email server")
+    
+    def select_folder(self, folder: str):
+        """
+        Select a folder, skipping the round trip if it is already selected
+        
+        Args:
+            folder: Email folder to select
+        """
+        if folder != self.selected_folder:
+            self.mailbox.folder.set(folder)
+            self.selected_folder = folder
     
     def fetch_recent_emails(self, days: int = 7, folder: str = 'INBOX') -> List[Dict]:
         """
@@ -54,38 +115,45 @@ class EmailClient:
             List of email dictionaries
         """
         if not self.mailbox:
-            print("Error: Not connected to email server")
+            logger.error("Error: Not connected to email server")
             return []
         
         try:
-            # Calculate date range
-            since_date = datetime.now() - timedelta(days=days)
+            emails = list(self.iter_recent_emails(days=days, folder=folder))
             
-            # Fetch emails
-            emails = []
-            for msg in self.mailbox.fetch(
-                AND(date_gte=since_date.date()),
-                mark_seen=False
-            ):
-                email_data = {
-                    'message_id': msg.uid,
-                    'subject': msg.subject,
-                    'from': msg.from_,
-                    'to': msg.to,
-                    'date': msg.date,
-                    'body': msg.text or msg.html,
-                    'html': msg.html,
-                    'text': msg.text,
-                }
-                emails.append(email_data)
-            
-            print(f"✓ Fetched {len(emails)} emails from last {days} days")
+            logger.info(f"✓ Fetched {len(emails)} emails from last {days} days")
             return emails
             
         except Exception as e:
-            print(f"✗ Error fetching emails: {e}")
+            logger.error(f"✗ Error fetching emails: {e}")
             return []
     
+    def iter_recent_emails(
+        self,
+        days: int = 7,
+        folder: str = 'INBOX',
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield recent emails, fetching them in bounded UID chunks
+        
+        Args:
+            days: Number of days to look back
+            folder: Email folder to search (default: INBOX)
+            chunk_size: UIDs fetched per round trip (default: FETCH_CHUNK_SIZE)
+            
+        Yields:
+            Email dictionaries
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return
+        
+        self.select_folder(folder)
+        since_date = datetime.now() - timedelta(days=days)
+        uids = self.mailbox.uids(AND(date_gte=since_date.date()))
+        yield from self._iter_uid_chunks(uids, chunk_size)
+    
     def fetch_unread_emails(self, folder: str = 'INBOX') -> List[Dict]:
         """
         Fetch unread emails from the specified folder
@@ -97,31 +165,517 @@ class EmailClient:
             List of email dictionaries
         """
         if not self.mailbox:
-            print("Error: Not connected to email server")
+            logger.error("Error: Not connected to email server")
             return []
         
         try:
-            emails = []
-            for msg in self.mailbox.fetch(AND(seen=False), mark_seen=False):
-                email_data = {
-                    'message_id': msg.uid,
-                    'subject': msg.subject,
-                    'from': msg.from_,
-                    'to': msg.to,
-                    'date': msg.date,
-                    'body': msg.text or msg.html,
-                    'html': msg.html,
-                    'text': msg.text,
-                }
-                emails.append(email_data)
-            
-            print(f"✓ Fetched {len(emails)} unread emails")
+            emails = list(self.iter_unread_emails(folder=folder))
+            
+            logger.info(f"✓ Fetched {len(emails)} unread emails")
             return emails
             
         except Exception as e:
-            print(f"✗ Error fetching unread emails: {e}")
+            logger.error(f"✗ Error fetching unread emails: {e}")
             return []
     
+    def iter_unread_emails(
+        self,
+        folder: str = 'INBOX',
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield unread emails, fetching them in bounded UID chunks
+        
+        Args:
+            folder: Email folder to search (default: INBOX)
+            chunk_size: UIDs fetched per round trip (default: FETCH_CHUNK_SIZE)
+            
+        Yields:
+            Email dictionaries
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return
+        
+        self.select_folder(folder)
+        uids = self.mailbox.uids(AND(seen=False))
+        yield from self._iter_uid_chunks(uids, chunk_size)
+    
+    def fetch_new_emails(self, folder: str = 'INBOX') -> List[Dict]:
+        """
+        Fetch only emails that arrived since the last sync of this folder
+        
+        Uses the stored UIDVALIDITY and highest seen UID to request
+        ``UID last+1:*``. A full resync of the lookback window only happens on
+        the first run or when the server reports a new UIDVALIDITY.
+        
+        Args:
+            folder: Email folder to sync (default: INBOX)
+            
+        Returns:
+            List of email dictionaries
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return []
+        
+        try:
+            emails = list(self.iter_new_emails(folder=folder))
+            
+            logger.info(f"✓ Fetched {len(emails)} new emails from {folder}")
+            return emails
+            
+        except Exception as e:
+            logger.error(f"✗ Error fetching new emails: {e}")
+            return []
+    
+    def iter_new_emails(
+        self,
+        folder: str = 'INBOX',
+        chunk_size: Optional[int] = None,
+        checkpoint: Optional[Callable[[List[Dict]], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield emails that arrived since the last sync of this folder
+        
+        The sync watermark is advanced to the last UID of each chunk once the
+        chunk has been consumed, so an interrupted run (including a full
+        resync) resumes from the last completed chunk. It only moves up to
+        UIDNEXT - 1 after the final chunk.
+        
+        Args:
+            folder: Email folder to sync (default: INBOX)
+            chunk_size: UIDs fetched per round trip (default: FETCH_CHUNK_SIZE)
+            checkpoint: Called with the emails of each chunk before the
+                watermark moves past them (e.g. WorkLedger.mark_fetched), so
+                emails still queued for processing are not lost on a crash
+            
+        Yields:
+            Email dictionaries
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return
+        
+        self.select_folder(folder)
+        status = self.mailbox.folder.status(folder, ['UIDVALIDITY', 'UIDNEXT'])
+        uid_validity = int(status['UIDVALIDITY'])
+        self._uid_validity[folder] = uid_validity
+        
+        account = self.account_key
+        state = load_sync_state(account, folder)
+        
+        full_resync = not state or state['uid_validity'] != uid_validity
+        if not full_resync:
+            last_uid = state['last_uid']
+            criteria = AND(uid=U(last_uid + 1, '*'))
+        else:
+            if state:
+                logger.warning(f"ℹ UIDVALIDITY changed for {folder}, running full resync")
+            last_uid = 0
+            lookback_days = self.config.get('lookback_days') or get_monitoring_config()['lookback_days']
+            since_date = datetime.now() - timedelta(days=lookback_days)
+            criteria = AND(date_gte=since_date.date())
+        
+        # "UID n:*" always returns the newest message, even when uid < n
+        uids = sorted(uid for uid in map(int, self.mailbox.uids(criteria)) if uid > last_uid)
+        
+        chunk_size = chunk_size or self.config['fetch_chunk_size']
+        for start in range(0, len(uids), chunk_size):
+            chunk = [str(uid) for uid in uids[start:start + chunk_size]]
+            fetched = []
+            for email_data in self._iter_uid_chunks(chunk, chunk_size):
+                fetched.append(email_data)
+                yield email_data
+            if checkpoint:
+                checkpoint(fetched)
+            last_uid = int(chunk[-1])
+            save_sync_state(account, folder, uid_validity, last_uid)
+        
+        # Once every chunk has been consumed, everything below UIDNEXT is
+        # accounted for after a full resync, even if the lookback window
+        # itself was empty
+        if full_resync:
+            last_uid = max(last_uid, int(status['UIDNEXT']) - 1)
+        save_sync_state(account, folder, uid_validity, last_uid)
+    
+    def fetch_folders_parallel(
+        self,
+        folders: Optional[List[str]] = None,
+        mode: str = 'recent',
+        days: int = 7,
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Fetch several folders concurrently, one connection per folder
+        
+        Folders are scanned on a bounded worker pool, so wall-clock time is
+        roughly that of the slowest folder. This client's own session scans
+        the first folder and every other folder gets its own client, so an
+        account holds at most max_workers sessions at once. Results are
+        merged by ``message_id`` (the RFC Message-ID, see
+        _assign_message_ids), which also collapses Gmail labels that expose
+        the same message in several folders. All folders are held in memory;
+        iter_folders streams them instead.
+        
+        Args:
+            folders: Folders to scan (default: FETCH_FOLDERS)
+            mode: 'recent', 'unread', or 'incremental'
+            days: Number of days to look back (for 'recent' mode)
+            max_workers: Concurrent folder fetches (default: FOLDER_FETCH_WORKERS)
+            
+        Returns:
+            List of unique email dictionaries across all folders
+        
+        Raises:
+            ConnectionError: No session could be opened for a folder
+            Exception: Any error fetching a folder, so a failed folder is
+                not mistaken for an empty one
+        """
+        folders = folders or self.config['folders']
+        max_workers = max_workers or self.config['folder_workers']
+        
+        def fetch_on(client: 'EmailClient', folder: str) -> List[Dict]:
+            if mode == 'unread':
+                return list(client.iter_unread_emails(folder=folder))
+            elif mode == 'incremental':
+                return list(client.iter_new_emails(folder=folder))
+            return list(client.iter_recent_emails(days=days, folder=folder))
+        
+        def fetch_folder(folder: str) -> List[Dict]:
+            if folder == folders[0]:
+                return fetch_on(self, folder)
+            client = EmailClient(config=self.config, use_pool=self.use_pool)
+            if not client.connect():
+                raise ConnectionError(f"Could not open an IMAP session to fetch {folder}")
+            try:
+                return fetch_on(client, folder)
+            finally:
+                client.disconnect()
+        
+        merged = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(folders))) as executor:
+            for emails in executor.map(fetch_folder, folders):
+                for email_data in emails:
+                    merged.setdefault(email_data['message_id'], email_data)
+        
+        logger.info(f"✓ Fetched {len(merged)} unique emails from {len(folders)} folders")
+        return list(merged.values())
+    
+    def iter_folders(
+        self,
+        folders: Optional[List[str]] = None,
+        mode: str = 'recent',
+        days: int = 7,
+        chunk_size: Optional[int] = None,
+        checkpoint: Optional[Callable[[List[Dict]], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield emails of several folders, one folder after another
+        
+        Folders are streamed on this connection with the same iter_* methods
+        as a single folder, so only one chunk is held in memory and, in
+        'incremental' mode, each folder's watermark advances as its chunks
+        are consumed. Messages already yielded from an earlier folder (Gmail
+        labels) are skipped by ``message_id``.
+        
+        Args:
+            folders: Folders to scan (default: FETCH_FOLDERS)
+            mode: 'recent', 'unread', or 'incremental'
+            days: Number of days to look back (for 'recent' mode)
+            chunk_size: UIDs fetched per round trip (default: FETCH_CHUNK_SIZE)
+            checkpoint: Passed to iter_new_emails in 'incremental' mode
+            
+        Yields:
+            Email dictionaries, unique across all folders
+        """
+        seen = set()
+        for folder in folders or self.config['folders']:
+            if mode == 'unread':
+                emails = self.iter_unread_emails(folder=folder, chunk_size=chunk_size)
+            elif mode == 'incremental':
+                emails = self.iter_new_emails(folder=folder, chunk_size=chunk_size, checkpoint=checkpoint)
+            else:
+                emails = self.iter_recent_emails(days=days, folder=folder, chunk_size=chunk_size)
+            
+            for email_data in emails:
+                if email_data['message_id'] not in seen:
+                    seen.add(email_data['message_id'])
+                    yield email_data
+    
+    def wait_for_new_mail(self, timeout: int = 1500) -> bool:
+        """
+        Block in IMAP IDLE until the server reports new mail or the timeout expires
+        
+        The selected folder must already be set (fetch_new_emails does this).
+        IDLE is ended before returning, so the connection can be used for
+        fetching straight away and the caller re-arms it by calling again.
+        
+        Args:
+            timeout: Seconds to stay in IDLE before returning
+            
+        Returns:
+            True if an EXISTS notification was received, False on timeout
+        """
+        responses = self.mailbox.idle.wait(timeout=timeout)
+        return any(b'EXISTS' in response for response in responses)
+    
+    def fetch_recent_emails_headers_first(
+        self,
+        days: int = 7,
+        prefilter: Optional[Callable[[Dict], bool]] = None,
+        max_body_bytes: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Fetch recent emails in two phases: headers for everything, bodies for candidates
+        
+        Phase one pulls only the headers (From, Subject, Date, Message-ID,
+        List-Id, ...) for the whole window in one bulk FETCH. Phase two runs
+        ``BODY.PEEK[TEXT]<0.N>`` only for the UIDs that pass the pre-filter,
+        so bodies of mail that would be dropped anyway are never downloaded.
+        
+        Args:
+            days: Number of days to look back
+            prefilter: Callable taking a header-only email dict and returning
+                True for candidates (default: keyword/sender match from config)
+            max_body_bytes: Partial body size in bytes (default: BODY_FETCH_BYTES)
+            
+        Returns:
+            List of email dictionaries for candidate emails
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return []
+        
+        if prefilter is None:
+            prefilter = self._default_prefilter()
+        if max_body_bytes is None:
+            max_body_bytes = self.config['body_fetch_bytes']
+        
+        try:
+            since_date = datetime.now() - timedelta(days=days)
+            
+            headers = self.fetch_headers(AND(date_gte=since_date.date()))
+            candidates = [email_data for email_data in headers if prefilter(email_data)]
+            
+            # Full bodies already in the local cache need no download at all
+            cached = self.cache.get_many(
+                email_data['internet_message_id'] for email_data in candidates
+            ) if self.cache else {}
+            
+            bodies = self.fetch_partial_bodies(
+                [
+                    email_data['uid'] for email_data in candidates
+                    if email_data['internet_message_id'] not in cached
+                ],
+                max_body_bytes
+            )
+            for email_data in candidates:
+                email_data.update(
+                    cached.get(email_data['internet_message_id']) or
+                    bodies.get(email_data['uid'], {})
+                )
+            self._assign_message_ids(candidates)
+            self._attach_gmail_thread_ids(candidates)
+            
+            logger.info(f"✓ Fetched {len(headers)} headers, {len(candidates)} candidate bodies from last {days} days")
+            return candidates
+            
+        except Exception as e:
+            logger.error(f"✗ Error fetching emails: {e}")
+            return []
+    
+    def fetch_headers(self, criteria) -> List[Dict]:
+        """
+        Fetch only the headers of all messages matching the criteria
+        
+        Args:
+            criteria: imap_tools search criteria
+            
+        Returns:
+            List of email dictionaries without body content
+        """
+        return [
+            self._to_email_dict(msg, with_body=False, folder=self.selected_folder)
+            for msg in self.mailbox.fetch(criteria, headers_only=True, mark_seen=False, bulk=True)
+        ]
+    
+    def fetch_partial_bodies(self, uids: List[str], max_bytes: int) -> Dict[str, Dict]:
+        """
+        Fetch the first ``max_bytes`` of each message body without marking it seen
+        
+        Args:
+            uids: Message UIDs to fetch
+            max_bytes: Number of body bytes to download per message
+            
+        Returns:
+            Dictionary mapping UID to body/text/html fields
+        """
+        if not uids:
+            return {}
+        
+        typ, data = self.mailbox.client.uid(
+            'FETCH',
+            ','.join(uids),
+            f'(BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{max_bytes}>)'
+        )
+        if typ != 'OK':
+            raise RuntimeError(f"Partial body fetch failed: {typ}")
+        
+        bodies = {}
+        for uid, parts in self._group_fetch_response(data).items():
+            # Re-attach the MIME headers so the truncated body can still be decoded
+            msg = MailMessage.from_bytes(parts.get('HEADER', b'') + parts.get('TEXT', b''))
+            bodies[uid] = {
+                'body': msg.text or msg.html,
+                'html': msg.html,
+                'text': msg.text,
+            }
+        return bodies
+    
+    @property
+    def supports_gmail_threads(self) -> bool:
+        """Check whether the server supports Gmail's X-GM-THRID FETCH item"""
+        capabilities = getattr(self.mailbox.client, 'capabilities', ()) if self.mailbox else ()
+        return self.config.get('fetch_thread_ids', True) and 'X-GM-EXT-1' in capabilities
+    
+    def fetch_gmail_thread_ids(self, uids: List[str]) -> Dict[str, str]:
+        """
+        Fetch Gmail thread ids (X-GM-THRID) in one round trip
+        
+        Args:
+            uids: Message UIDs in the selected folder
+            
+        Returns:
+            Dictionary mapping UID to thread id (empty on non-Gmail servers)
+        """
+        if not uids or not self.supports_gmail_threads:
+            return {}
+        
+        typ, data = self.mailbox.client.uid('FETCH', ','.join(uids), '(X-GM-THRID)')
+        if typ != 'OK':
+            return {}
+        
+        thread_ids = {}
+        for item in data:
+            item = item[0] if isinstance(item, tuple) else item
+            if not isinstance(item, bytes):
+                continue
+            uid_match = re.search(rb'UID (\d+)', item)
+            thread_match = re.search(rb'X-GM-THRID (\d+)', item)
+            if uid_match and thread_match:
+                thread_ids[uid_match.group(1).decode()] = thread_match.group(1).decode()
+        return thread_ids
+    
+    def message_ids_for_uids(self, uids: List[str], folder: str = 'INBOX') -> Dict[str, str]:
+        """
+        Get the message_id the agents now store each UID of a folder under
+        
+        Args:
+            uids: UIDs of messages in the folder
+            folder: Folder the UIDs belong to
+        
+        Returns:
+            Dictionary mapping UID to message_id (UIDs no longer on the
+            server are left out)
+        """
+        self.select_folder(folder)
+        message_ids = {}
+        chunk_size = self.config['fetch_chunk_size']
+        for start in range(0, len(uids), chunk_size):
+            headers = self.fetch_headers(A(uid=uids[start:start + chunk_size]))
+            self._assign_message_ids(headers)
+            message_ids.update((email_data['uid'], email_data['message_id']) for email_data in headers)
+        return message_ids
+    
+    def _folder_uid_validity(self, folder: str) -> int:
+        """Get the UIDVALIDITY of a folder, asking the server once per folder"""
+        if folder not in self._uid_validity:
+            status = self.mailbox.folder.status(folder, ['UIDVALIDITY'])
+            self._uid_validity[folder] = int(status['UIDVALIDITY'])
+        return self._uid_validity[folder]
+    
+    def _assign_message_ids(self, emails: List[Dict]):
+        """
+        Set message_id of fetched emails to the key the agents store them under
+        
+        The RFC Message-ID is the same whichever folder, account or fetch mode
+        the message comes from. Messages without the header fall back to
+        account/folder/UIDVALIDITY:UID, since a UID alone is only unique
+        within one folder and only until the server resets UIDVALIDITY.
+        """
+        for email_data in emails:
+            email_data['account'] = self.account_key
+            email_data['message_id'] = email_data['internet_message_id'] or (
+                f"{self.account_key}/{email_data['folder']}/"
+                f"{self._folder_uid_validity(email_data['folder'])}:{email_data['uid']}"
+            )
+    
+    def _attach_gmail_thread_ids(self, emails: List[Dict]):
+        """Fill gmail_thread_id of fetched emails that did not carry the header"""
+        missing = [email_data['uid'] for email_data in emails if not email_data.get('gmail_thread_id')]
+        try:
+            thread_ids = self.fetch_gmail_thread_ids(missing)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not fetch Gmail thread ids: {e}")
+            return
+        for email_data in emails:
+            if email_data['uid'] in thread_ids:
+                email_data['gmail_thread_id'] = thread_ids[email_data['uid']]
+    
+    @staticmethod
+    def _group_fetch_response(data: list) -> Dict[str, Dict[str, bytes]]:
+        """
+        Group a raw imaplib FETCH response into literals per UID
+        
+        Servers may place the UID item before or after the literals, so all
+        metadata of one message is collected before the UID is looked up.
+        
+        Returns:
+            Dictionary mapping UID to {'HEADER': bytes, 'TEXT': bytes}
+        """
+        grouped = {}
+        meta, parts = b'', {}
+        
+        def flush():
+            uid_match = re.search(rb'UID (\d+)', meta)
+            if uid_match and parts:
+                grouped[uid_match.group(1).decode()] = dict(parts)
+        
+        for item in data:
+            if isinstance(item, tuple):
+                item_meta, literal = item
+                if re.match(rb'^\d+ \(', item_meta):
+                    flush()
+                    meta, parts = b'', {}
+                meta += item_meta
+                if b'BODY[HEADER]' in item_meta:
+                    parts['HEADER'] = literal
+                elif b'BODY[TEXT]' in item_meta:
+                    parts['TEXT'] = literal
+            elif isinstance(item, bytes):
+                meta += item
+        flush()
+        
+        return grouped
+    
+    @staticmethod
+    def _default_prefilter() -> Callable[[Dict], bool]:
+        """Build the default header pre-filter from the configured job keywords and senders"""
+        search_config = get_search_config()
+        keywords = [keyword.lower() for keyword in search_config['job_keywords']]
+        senders = [sender.lower() for sender in search_config['job_senders']]
+        
+        def prefilter(email_data: Dict) -> bool:
+            subject = (email_data.get('subject') or '').lower()
+            from_address = (email_data.get('from') or '').lower()
+            return (
+                any(keyword in subject for keyword in keywords) or
+                any(sender in from_address for sender in senders)
+            )
+        
+        return prefilter
+    
     def search_emails(self, query: str, days: int = 30) -> List[Dict]:
         """
         Search emails by subject or body
@@ -130,42 +684,173 @@ class EmailClient:
             query: Search query
             days: Number of days to look back
             
+        Returns:
+            List of matching email dictionaries
+        """
+        return self.search_job_emails(keywords=[query], senders=[], days=days)
+    
+    def search_job_emails(
+        self,
+        keywords: Optional[List[str]] = None,
+        senders: Optional[List[str]] = None,
+        days: int = 30
+    ) -> List[Dict]:
+        """
+        Search for job-related emails with a single server-side IMAP SEARCH
+        
+        All keywords and sender patterns are OR'd into one SEARCH command
+        (SUBJECT/BODY per keyword, FROM per sender) so the server does the
+        matching. Only the matching UIDs are then fetched, once each.
+        
+        Args:
+            keywords: Keywords to match in subject or body (default: from config)
+            senders: Sender address/domain fragments to match (default: from config)
+            days: Number of days to look back
+            
         Returns:
             List of matching email dictionaries
         """
         if not self.mailbox:
-            print("Error: Not connected to email server")
+            logger.error("Error: Not connected to email server")
             return []
         
         try:
-            since_date = datetime.now() - timedelta(days=days)
-            emails = []
-            
-            for msg in self.mailbox.fetch(
-                AND(date_gte=since_date.date()),
-                mark_seen=False
-            ):
-                # Simple search in subject and body
-                if (query.lower() in msg.subject.lower() or 
-                    query.lower() in (msg.text or '').lower()):
-                    email_data = {
-                        'message_id': msg.uid,
-                        'subject': msg.subject,
-                        'from': msg.from_,
-                        'to': msg.to,
-                        'date': msg.date,
-                        'body': msg.text or msg.html,
-                        'html': msg.html,
-                        'text': msg.text,
-                    }
-                    emails.append(email_data)
-            
-            print(f"✓ Found {len(emails)} emails matching '{query}'")
+            emails = list(self.iter_search_job_emails(keywords=keywords, senders=senders, days=days))
+            
+            logger.info(f"✓ Found {len(emails)} emails matching job keywords/senders")
             return emails
             
         except Exception as e:
-            print(f"✗ Error searching emails: {e}")
+            logger.error(f"✗ Error searching emails: {e}")
             return []
+    
+    def iter_search_job_emails(
+        self,
+        keywords: Optional[List[str]] = None,
+        senders: Optional[List[str]] = None,
+        days: int = 30,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Dict]:
+        """
+        Lazily yield emails matching the server-side job search, in bounded UID chunks
+        
+        Args:
+            keywords: Keywords to match in subject or body (default: from config)
+            senders: Sender address/domain fragments to match (default: from config)
+            days: Number of days to look back
+            chunk_size: UIDs fetched per round trip (default: FETCH_CHUNK_SIZE)
+            
+        Yields:
+            Email dictionaries
+        """
+        if not self.mailbox:
+            logger.error("Error: Not connected to email server")
+            return
+        
+        search_config = get_search_config()
+        if keywords is None:
+            keywords = search_config['job_keywords']
+        if senders is None:
+            senders = search_config['job_senders']
+        
+        if not keywords and not senders:
+            logger.error("Error: No search keywords or senders configured")
+            return
+        
+        since_date = datetime.now() - timedelta(days=days)
+        
+        terms = {}
+        if keywords:
+            terms['subject'] = keywords
+            terms['body'] = keywords
+        if senders:
+            terms['from_'] = senders
+        criteria = AND(OR(**terms), date_gte=since_date.date())
+        
+        # SEARCH returns each UID once even if several terms match
+        uids = list(dict.fromkeys(self.mailbox.uids(criteria)))
+        yield from self._iter_uid_chunks(uids, chunk_size)
+    
+    def _iter_uid_chunks(self, uids: List[str], chunk_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Fetch full messages for the given UIDs, one bounded chunk per round trip
+        
+        Only one chunk of messages is held in memory at a time.
+        """
+        chunk_size = chunk_size or self.config['fetch_chunk_size']
+        for start in range(0, len(uids), chunk_size):
+            chunk = uids[start:start + chunk_size]
+            if self.cache is None:
+                emails = [
+                    self._to_email_dict(msg, folder=self.selected_folder)
+                    for msg in self.mailbox.fetch(A(uid=chunk), mark_seen=False, bulk=True)
+                ]
+            else:
+                emails = self._fetch_chunk_cached(chunk)
+            self._assign_message_ids(emails)
+            self._attach_gmail_thread_ids(emails)
+            yield from emails
+    
+    def _fetch_chunk_cached(self, uids: List[str]) -> List[Dict]:
+        """
+        Fetch one chunk, downloading full bodies only for messages not in the local cache
+        
+        Headers are fetched for the whole chunk to learn the Message-IDs;
+        cached bodies are filled in locally and only the misses are fetched
+        in full (and then added to the cache).
+        """
+        headers = self.fetch_headers(A(uid=uids))
+        cached = self.cache.get_many(
+            email_data['internet_message_id'] for email_data in headers
+        )
+        
+        emails = {}
+        misses = []
+        for email_data in headers:
+            hit = cached.get(email_data['internet_message_id'])
+            if hit is None:
+                misses.append(email_data['uid'])
+                continue
+            email_data.update(hit)
+            emails[email_data['uid']] = email_data
+        
+        if misses:
+            for msg in self.mailbox.fetch(A(uid=misses), mark_seen=False, bulk=True):
+                email_data = self._to_email_dict(msg, folder=self.selected_folder)
+                self.cache.put(email_data['internet_message_id'], email_data)
+                emails[email_data['uid']] = email_data
+        
+        return [emails[uid] for uid in uids if uid in emails]
+    
+    @staticmethod
+    def _to_email_dict(msg, with_body: bool = True, folder: Optional[str] = None) -> Dict:
+        """Convert an imap_tools message into the email dictionary used by the agents"""
+        email_data = {
+            'message_id': msg.uid,
+            'account': None,
+            'uid': msg.uid,
+            'folder': folder,
+            'internet_message_id': (msg.headers.get('message-id') or ('',))[0].strip(),
+            'list_id': (msg.headers.get('list-id') or ('',))[0].strip(),
+            'list_unsubscribe': (msg.headers.get('list-unsubscribe') or ('',))[0].strip(),
+            # Threading headers (see utils.thread_index); Gmail thread ids come
+            # from X-GM-THRID, a header in Takeout exports and a FETCH item over IMAP
+            'in_reply_to': (msg.headers.get('in-reply-to') or ('',))[0].strip(),
+            'references': ' '.join(msg.headers.get('references') or ()).strip(),
+            'gmail_thread_id': (msg.headers.get('x-gm-thrid') or ('',))[0].strip() or None,
+            'subject': msg.subject,
+            'from': msg.from_,
+            'to': msg.to,
+            'date': msg.date,
+            'body': None,
+            'html': None,
+            'text': None,
+        }
+        if with_body:
+            email_data['body'] = msg.text or msg.html
+            email_data['html'] = msg.html
+            email_data['text'] = msg.text
+        return email_data
 
 
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""
+Rule-based email pre-filter - decides obvious emails before the LLM classifier
+
+Each email is marked definitely-job (sent from an applicant tracking system),
+definitely-not-job (known non-job senders, bulk marketing mail) or uncertain.
+Only uncertain emails need to be sent to the classifier agent. All patterns
+are compiled once per RuleFilter, so a decision costs a few set lookups and
+regex scans.
+"""
+from collections import Counter
+from email.utils import parseaddr
+from typing import Dict, Iterable, Optional
+import logging
+import re
+import threading
+from utils.config import get_rules_config
+from utils.text_normalizer import normalize_email
+
+logger = logging.getLogger(__name__)
+
+# Applicant tracking systems that only send mail about applications
+ATS_DOMAINS = {
+    'greenhouse.io', 'greenhouse-mail.io', 'lever.co', 'myworkdayjobs.com',
+    'myworkday.com', 'ashbyhq.com', 'smartrecruiters.com', 'icims.com',
+    'jobvite.com', 'taleo.net', 'successfactors.com', 'workablemail.com',
+    'bamboohr.com', 'recruitee.com', 'breezy.hr', 'applytojob.com',
+    'jazzhr.com', 'teamtailor.com', 'personio.com', 'pinpointhq.com',
+}
+
+# Senders that never send application emails
+NON_JOB_DOMAINS = {
+    'paypal.com', 'venmo.com', 'uber.com', 'doordash.com', 'netflix.com',
+    'spotify.com', 'facebookmail.com', 'instagram.com', 'x.com', 'twitter.com',
+    'medium.com', 'substack.com', 'quora.com', 'pinterest.com', 'reddit.com',
+    'youtube.com', 'eventbrite.com', 'groupon.com', 'etsy.com', 'ebay.com',
+}
+
+# Rejection phrases that are conclusive on their own, even in a conversational
+# reply (where a bare "unfortunately" is not; see utils.thread_index)
+REJECTION_PATTERN = (
+    r"not (?:to )?(?:move|moving) forward|other candidates|not been selected|"
+    r"decided to pursue|no longer (?:under )?consider|regret to inform"
+)
+
+# Checked in order; the first match decides the classification of ATS mail.
+# Rejection comes first because rejections often mention interviews and offers;
+# only conclusive phrases count, since confirmations also say "unfortunately"
+# ("unfortunately we are unable to respond to every applicant"). Confirmation
+# comes before interview because confirmations promise to "reach out to
+# schedule an interview".
+TYPE_PATTERNS = [
+    ('rejection', REJECTION_PATTERN),
+    ('offer', r"pleased to offer|offer letter|extend(?:ing)? (?:you )?(?:an|the) offer"),
+    ('application_confirmation', r"thank(?:s| you) for (?:applying|your application|your interest)|"
+                                 r"application (?:was |has been )?(?:received|submitted)|"
+                                 r"(?:we've|we have) received your application"),
+    ('interview_request', r"interview|phone screen|schedule (?:a |some )?(?:call|time|chat)|"
+                          r"your availability|assessment|coding challenge"),
+]
+
+# Subject words that keep bulk mail out of the not-job bucket
+JOB_SUBJECT_PATTERN = (
+    r"\bappl(?:y|ied|ying|ications?)\b|\bjobs?\b|interview|position|candida|\brole\b|"
+    r"offer|recruit|hiring|career"
+)
+
+# Confidence reported for rule decisions
+RULE_CONFIDENCE = 0.95
+
+# Characters of normalized body scanned when typing ATS mail
+BODY_SCAN_CHARS = 2000
+
+
+def sender_domain(from_address: str) -> str:
+    """Get the lower-cased domain of a From address"""
+    address = parseaddr(from_address or '')[1] or from_address or ''
+    return address.rpartition('@')[2].strip().strip('>').lower()
+
+
+class RuleFilter:
+    """Precompiled sender/header/keyword rules with per-run hit counters"""
+    
+    def __init__(
+        self,
+        ats_domains: Optional[Iterable[str]] = None,
+        non_job_domains: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize the filter
+        
+        Args:
+            ats_domains: Domains treated as definitely-job (default: built-in list + RULES_ATS_DOMAINS)
+            non_job_domains: Domains treated as definitely-not-job (default: built-in list + RULES_NON_JOB_DOMAINS)
+        """
+        rules_config = get_rules_config()
+        self.ats_domains = frozenset(
+            ats_domains if ats_domains is not None else ATS_DOMAINS | set(rules_config['ats_domains'])
+        )
+        self.non_job_domains = frozenset(
+            non_job_domains if non_job_domains is not None else NON_JOB_DOMAINS | set(rules_config['non_job_domains'])
+        )
+        self.type_patterns = [
+            (classification, re.compile(pattern, re.IGNORECASE))
+            for classification, pattern in TYPE_PATTERNS
+        ]
+        self.job_subject_pattern = re.compile(JOB_SUBJECT_PATTERN, re.IGNORECASE)
+        self.hits = Counter()
+        self.total = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _domain_matches(domain: str, domains: frozenset) -> bool:
+        """Check a domain and each of its parent domains against a set"""
+        labels = domain.split('.')
+        return any('.'.join(labels[i:]) in domains for i in range(len(labels) - 1))
+    
+    def classify(self, email: Dict) -> Optional[Dict]:
+        """
+        Decide an email by rules
+        
+        Args:
+            email: Email dictionary
+        
+        Returns:
+            Classification result dictionary (same shape as classify_email_task),
+            or None if the email is uncertain and needs the classifier
+        """
+        domain = sender_domain(email.get('from', ''))
+        subject = email.get('subject') or ''
+        
+        if self._domain_matches(domain, self.ats_domains):
+            text = f"{subject}\n{normalize_email(email)[:BODY_SCAN_CHARS]}"
+            classification = next(
+                (name for name, pattern in self.type_patterns if pattern.search(text)),
+                'general'
+            )
+            return self._decide(email, 'ats_domain', True, classification, f"ATS sender {domain}")
+        
+        if self._domain_matches(domain, self.non_job_domains):
+            return self._decide(email, 'non_job_sender', False, 'not_job_related', f"Non-job sender {domain}")
+        
+        if email.get('list_unsubscribe') and not self.job_subject_pattern.search(subject):
+            return self._decide(email, 'bulk_mail', False, 'not_job_related', "Bulk mail (List-Unsubscribe)")
+        
+        self._count('uncertain')
+        return None
+    
+    def _count(self, rule: str):
+        """Count a decision; classify() may run on several pipeline workers"""
+        with self._lock:
+            self.total += 1
+            self.hits[rule] += 1
+    
+    def _decide(self, email: Dict, rule: str, is_job_related: bool, classification: str, reasoning: str) -> Dict:
+        """Record a rule hit and build the classification result"""
+        self._count(rule)
+        return {
+            'message_id': email.get('message_id'),
+            'is_job_related': is_job_related,
+            'classification': classification,
+            'confidence': RULE_CONFIDENCE,
+            'reasoning': reasoning,
+            'source': 'rules',
+        }
+    
+    def report(self) -> Dict:
+        """
+        Get hit counts and rates for this run
+        
+        Returns:
+            Dictionary with total, per-rule counts and the share decided by rules
+        """
+        decided = self.total - self.hits['uncertain']
+        return {
+            'total': self.total,
+            'decided': decided,
+            'hit_rate': decided / self.total if self.total else 0.0,
+            'by_rule': dict(self.hits),
+        }
+    
+    def print_report(self):
+        """Log rule hit rates"""
+        report = self.report()
+        logger.info(f"📏 Rule pre-filter: {report['decided']}/{report['total']} decided without LLM ({report['hit_rate']:.0%})")
+        for rule, count in sorted(report['by_rule'].items()):
+            share = count / report['total'] if report['total'] else 0.0
+            logger.info(f"   - {rule}: {count} ({share:.0%})")
@@ -0,0 +1,269 @@
+"""
+IMAP connection pool - reuses authenticated MailBox sessions across workflow runs
+"""
+from imap_tools import MailBox
+from utils.config import get_email_config
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+import atexit
+import threading
+import time
+
+
+class IMAPConnectionPool:
+    """
+    Pool of authenticated IMAP sessions keyed by account
+    
+    Sessions are handed out with acquire()/release() (or the session()
+    context manager). Idle sessions are checked with NOOP before reuse and
+    re-authenticated when the check fails. The number of open sessions per
+    IMAP server is capped so provider connection limits are not exceeded.
+    """
+    
+    def __init__(
+        self,
+        max_sessions_per_server: int = 10,
+        max_idle_per_account: int = 2,
+        noop_interval: int = 300,
+        acquire_timeout: int = 60
+    ):
+        """
+        Initialize the pool
+        
+        Args:
+            max_sessions_per_server: Open sessions (in use + idle) allowed per IMAP server
+            max_idle_per_account: Idle sessions kept per account
+            noop_interval: Seconds after which an idle session is NOOP-checked before reuse
+            acquire_timeout: Seconds to wait for a free session slot before giving up
+        """
+        self.max_sessions_per_server = max_sessions_per_server
+        self.max_idle_per_account = max_idle_per_account
+        self.noop_interval = noop_interval
+        self.acquire_timeout = acquire_timeout
+        
+        self._idle: Dict[Tuple[str, str], List[Tuple[MailBox, float]]] = {}
+        self._open_per_server: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self._closed = False
+    
+    @staticmethod
+    def _key(config: Dict) -> Tuple[str, str]:
+        """Pool key for an account configuration"""
+        return (config['imap_server'], config['email_address'])
+    
+    def acquire(self, config: Dict) -> MailBox:
+        """
+        Get an authenticated session for the account
+        
+        Args:
+            config: Email configuration (see utils.config.get_email_config)
+        
+        Returns:
+            Logged-in MailBox
+        
+        Raises:
+            TimeoutError: If no session slot frees up within acquire_timeout
+        """
+        key = self._key(config)
+        server = config['imap_server']
+        deadline = time.monotonic() + self.acquire_timeout
+        
+        with self._condition:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    mailbox, last_used = idle.pop()
+                    break
+                if self._open_per_server.get(server, 0) < self.max_sessions_per_server:
+                    self._open_per_server[server] = self._open_per_server.get(server, 0) + 1
+                    mailbox, last_used = None, None
+                    break
+                if self._evict_idle_on_server(server):
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No IMAP session available for {server} after {self.acquire_timeout}s")
+                self._condition.wait(remaining)
+        
+        # Network I/O happens outside the lock
+        if mailbox is not None:
+            if time.monotonic() - last_used < self.noop_interval or self._is_alive(mailbox):
+                return mailbox
+            self._logout_quietly(mailbox)
+        
+        try:
+            return self._login(config)
+        except Exception:
+            self._forget_slot(server)
+            raise
+    
+    def release(self, config: Dict, mailbox: MailBox, broken: bool = False):
+        """
+        Return a session to the pool
+        
+        Args:
+            config: Email configuration the session was acquired with
+            mailbox: The session
+            broken: True if the session failed and must not be reused
+        """
+        key = self._key(config)
+        server = config['imap_server']
+        
+        if not broken:
+            broken = not self._is_alive(mailbox)
+        
+        with self._condition:
+            idle = self._idle.setdefault(key, [])
+            if not broken and not self._closed and len(idle) < self.max_idle_per_account:
+                idle.append((mailbox, time.monotonic()))
+                self._condition.notify()
+                return
+        
+        self._logout_quietly(mailbox)
+        self._forget_slot(server)
+    
+    @contextmanager
+    def session(self, config: Dict):
+        """
+        Context manager around acquire()/release()
+        
+        Usage:
+            with pool.session(config) as mailbox:
+                mailbox.fetch(...)
+        """
+        mailbox = self.acquire(config)
+        broken = False
+        try:
+            yield mailbox
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(config, mailbox, broken=broken)
+    
+    def keepalive(self):
+        """Send NOOP on every idle session and drop the ones that no longer respond"""
+        with self._condition:
+            sessions = [
+                (key, mailbox)
+                for key, idle in self._idle.items()
+                for mailbox, _ in idle
+            ]
+            self._idle = {}
+        
+        for key, mailbox in sessions:
+            if self._is_alive(mailbox):
+                with self._condition:
+                    self._idle.setdefault(key, []).append((mailbox, time.monotonic()))
+                    self._condition.notify()
+            else:
+                self._logout_quietly(mailbox)
+                self._forget_slot(key[0])
+    
+    def start_keepalive(self, interval: Optional[int] = None):
+        """
+        Start a daemon thread that runs keepalive() periodically
+        
+        Args:
+            interval: Seconds between keepalive rounds (default: noop_interval)
+        """
+        if self._keepalive_thread and self._keepalive_thread.is_alive():
+            return
+        interval = interval or self.noop_interval
+        
+        def loop():
+            while not self._closed:
+                time.sleep(interval)
+                self.keepalive()
+        
+        self._keepalive_thread = threading.Thread(target=loop, name="imap-pool-keepalive", daemon=True)
+        self._keepalive_thread.start()
+    
+    def close_all(self):
+        """Log out all idle sessions and stop handing out new ones to the pool"""
+        with self._condition:
+            self._closed = True
+            sessions = [
+                (key, mailbox)
+                for key, idle in self._idle.items()
+                for mailbox, _ in idle
+            ]
+            self._idle = {}
+        
+        for key, mailbox in sessions:
+            self._logout_quietly(mailbox)
+            self._forget_slot(key[0])
+    
+    def stats(self) -> Dict:
+        """Get open and idle session counts"""
+        with self._condition:
+            return {
+                'open_per_server': dict(self._open_per_server),
+                'idle_sessions': sum(len(idle) for idle in self._idle.values()),
+            }
+    
+    def _evict_idle_on_server(self, server: str) -> bool:
+        """Close one idle session of another account on the same server (lock held)"""
+        for key, idle in self._idle.items():
+            if key[0] == server and idle:
+                mailbox, _ = idle.pop(0)
+                self._open_per_server[server] -= 1
+                threading.Thread(target=self._logout_quietly, args=(mailbox,), daemon=True).start()
+                return True
+        return False
+    
+    def _forget_slot(self, server: str):
+        """Free a session slot for the server"""
+        with self._condition:
+            self._open_per_server[server] = max(self._open_per_server.get(server, 0) - 1, 0)
+            self._condition.notify()
+    
+    @staticmethod
+    def _login(config: Dict) -> MailBox:
+        """Open and authenticate a new session"""
+        mailbox = MailBox(config['imap_server'], port=config.get('imap_port', 993))
+        mailbox.login(config['email_address'], config['email_password'])
+        return mailbox
+    
+    @staticmethod
+    def _is_alive(mailbox: MailBox) -> bool:
+        """Check a session with NOOP"""
+        try:
+            typ, _ = mailbox.client.noop()
+            return typ == 'OK'
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _logout_quietly(mailbox: MailBox):
+        """Log out, ignoring errors from already dead sessions"""
+        try:
+            mailbox.logout()
+        except Exception:
+            pass
+
+
+_pool: Optional[IMAPConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> IMAPConnectionPool:
+    """
+    Get the process-wide IMAP connection pool, creating it on first use
+    
+    Returns:
+        Shared IMAPConnectionPool instance
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool_config = get_email_config()
+            _pool = IMAPConnectionPool(
+                max_sessions_per_server=pool_config['pool_max_sessions_per_server'],
+                max_idle_per_account=pool_config['pool_max_idle_per_account'],
+                noop_interval=pool_config['pool_noop_interval'],
+            )
+            _pool.start_keepalive()
+            atexit.register(_pool.close_all)
+        return _pool
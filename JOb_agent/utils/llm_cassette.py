@@ -0,0 +1,201 @@
+"""
+LLM cassette - records and replays agent calls at the LLMExecutor boundary
+
+In record mode every successful agent call is appended to a JSONL cassette
+(keyed by model and prompt hash) with its response text and latency. In
+replay mode calls are answered from the cassette, optionally sleeping for
+the recorded latency, so classify_email_task, extract_data_task and the
+whole orchestrator can be re-run deterministically without network or an
+API key. A replay miss raises CassetteMissError, which the agent tasks
+handle like any other failed call; 'auto' mode records misses instead.
+
+Usage:
+    LLM_CASSETTE_MODE=record python main.py --source mbox:./export.mbox
+    LLM_CASSETTE_MODE=replay python main.py --source mbox:./export.mbox
+    python -m utils.llm_cassette stats
+"""
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import threading
+import time
+from utils.config import get_llm_executor_config
+
+MODES = ('off', 'record', 'replay', 'auto')
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode for a call that is not in the cassette"""
+
+
+class CassetteResponse:
+    """Replayed agent response; exposes .content like agno's RunResponse"""
+    
+    def __init__(self, content: str):
+        self.content = content
+    
+    def __str__(self) -> str:
+        return self.content
+
+
+def cassette_key(model: str, prompt: str) -> str:
+    """Cassette key of a call"""
+    return hashlib.sha256(f"{model}\x00{prompt}".encode('utf-8')).hexdigest()
+
+
+class LLMCassette:
+    """Append-only JSONL store of agent call responses"""
+    
+    def __init__(self, path: str, mode: str = 'replay', replay_latency: bool = True):
+        """
+        Open a cassette, loading its recorded calls
+        
+        Args:
+            path: JSONL file
+            mode: 'record', 'replay' or 'auto' (replay hits, record misses)
+            replay_latency: Sleep for the recorded latency when replaying
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {', '.join(MODES)}")
+        self.path = Path(path)
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self.counters = {'hits': 0, 'misses': 0, 'recorded': 0}
+        
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as cassette_file:
+                for line in cassette_file:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        self._entries[entry['key']] = entry
+    
+    @property
+    def replaying(self) -> bool:
+        """Whether calls are answered from the cassette"""
+        return self.mode in ('replay', 'auto')
+    
+    @property
+    def recording(self) -> bool:
+        """Whether live calls are added to the cassette"""
+        return self.mode in ('record', 'auto')
+    
+    def lookup(self, model: str, prompt: str) -> Optional[Dict]:
+        """
+        Find a recorded call
+        
+        Args:
+            model: Model id
+            prompt: Prompt text
+        
+        Returns:
+            Entry with 'response' and 'latency_ms', or None
+        """
+        with self._lock:
+            entry = self._entries.get(cassette_key(model, prompt))
+            self.counters['hits' if entry else 'misses'] += 1
+            return entry
+    
+    def replay(self, model: str, prompt: str) -> Optional[CassetteResponse]:
+        """
+        Answer a call from the cassette
+        
+        Args:
+            model: Model id
+            prompt: Prompt text
+        
+        Returns:
+            Recorded response (after the recorded latency if replay_latency),
+            or None on a miss in 'auto' mode
+        
+        Raises:
+            CassetteMissError: On a miss in 'replay' mode
+        """
+        entry = self.lookup(model, prompt)
+        if entry is None:
+            if self.mode == 'replay':
+                raise CassetteMissError(f"No recorded response for this {model} prompt in {self.path}")
+            return None
+        if self.replay_latency:
+            time.sleep(entry['latency_ms'] / 1000)
+        return CassetteResponse(entry['response'])
+    
+    def record(self, model: str, prompt: str, response: str, latency: float):
+        """
+        Append a live call to the cassette
+        
+        Args:
+            model: Model id
+            prompt: Prompt text
+            response: Response content
+            latency: Call latency in seconds
+        """
+        entry = {
+            'key': cassette_key(model, prompt),
+            'model': model,
+            'response': response,
+            'latency_ms': round(latency * 1000, 1),
+            'recorded_at': time.time(),
+        }
+        with self._lock:
+            self._entries[entry['key']] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as cassette_file:
+                cassette_file.write(json.dumps(entry) + '\n')
+            self.counters['recorded'] += 1
+    
+    def latencies_ms(self):
+        """Recorded latencies, e.g. to fit the stand-in server's distribution"""
+        with self._lock:
+            return [entry['latency_ms'] for entry in self._entries.values()]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cassette: Optional[LLMCassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_llm_cassette() -> Optional[LLMCassette]:
+    """
+    Get the process-wide cassette, opening it on first use
+    
+    Returns:
+        Shared LLMCassette, or None if LLM_CASSETTE_MODE is off
+    """
+    global _cassette
+    executor_config = get_llm_executor_config()
+    if executor_config['cassette_mode'] == 'off':
+        return None
+    
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = LLMCassette(
+                executor_config['cassette_path'],
+                mode=executor_config['cassette_mode'],
+                replay_latency=executor_config['cassette_replay_latency'],
+            )
+        return _cassette
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Inspect an LLM call cassette')
+    parser.add_argument('command', choices=['stats'])
+    parser.add_argument('--path', default=get_llm_executor_config()['cassette_path'])
+    args = parser.parse_args()
+    
+    cassette = LLMCassette(args.path, mode='replay')
+    latencies = sorted(cassette.latencies_ms())
+    print(f"Cassette: {args.path} ({len(cassette)} calls)")
+    if latencies:
+        print(
+            f"  Latency p50 {latencies[len(latencies) // 2]:.0f} ms, "
+            f"p95 {latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]:.0f} ms, "
+            f"max {latencies[-1]:.0f} ms"
+        )
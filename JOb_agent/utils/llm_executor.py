@@ -0,0 +1,384 @@
+"""
+LLM call executor - concurrent agent calls under provider rate limits
+
+Every agent.run goes through LLMExecutor.call, which waits on a shared
+requests-per-minute and tokens-per-minute token bucket, retries 429/5xx
+errors with jittered exponential backoff and records the latency, outcome
+and prompt/completion tokens of each call (also per agent in utils.metrics).
+With LLM_CASSETTE_MODE set, calls are recorded to or replayed from a
+cassette (see utils.llm_cassette) at this same boundary.
+
+LLMExecutor.map runs a task over many items on an asyncio event loop with
+bounded concurrency (each in-flight call gets its own agent copy), so a
+large run is limited by the provider's rate limits rather than by the sum
+of call latencies. At most LLM_MAX_CONCURRENCY calls are in flight per
+process, however many pipeline workers or map() calls run at once.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import get_llm_executor_config
+from utils.llm_cassette import LLMCassette, get_llm_cassette
+from utils.metrics import get_metrics
+from utils.text_normalizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``"""
+    
+    def __init__(self, rate_per_minute: float):
+        """
+        Initialize the bucket
+        
+        Args:
+            rate_per_minute: Refill rate; also the burst capacity
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount: float) -> float:
+        """
+        Take ``amount`` tokens, going into debt if the bucket is short
+        
+        Args:
+            amount: Tokens to take (capped at the capacity)
+        
+        Returns:
+            Seconds the caller must wait before using the tokens
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether an LLM error is a rate limit, server error or transient network failure"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    
+    name = type(error).__name__
+    message = str(error).lower()
+    return (
+        name in ('RateLimitError', 'APIConnectionError', 'APITimeoutError', 'InternalServerError')
+        or '429' in message
+        or 'rate limit' in message
+    )
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After header of an HTTP error, in seconds"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _usage(response, prompt_tokens: int) -> Tuple[int, int]:
+    """Prompt and completion tokens of a response: the provider's counts when the model reports them, else estimates"""
+    metrics = getattr(response, 'metrics', None) or {}
+    
+    def total(key: str) -> int:
+        value = metrics.get(key) if isinstance(metrics, dict) else getattr(metrics, key, None)
+        if isinstance(value, (list, tuple)):
+            value = sum(item for item in value if item)
+        return int(value or 0)
+    
+    return (
+        total('input_tokens') or total('prompt_tokens') or prompt_tokens,
+        total('output_tokens') or total('completion_tokens') or count_tokens(str(getattr(response, 'content', '') or '')),
+    )
+
+
+def _clone_agent(agent):
+    """Copy an agent for a concurrent call; agents without deep_copy are shared"""
+    deep_copy = getattr(agent, 'deep_copy', None)
+    if callable(deep_copy):
+        try:
+            return deep_copy()
+        except Exception:
+            pass
+    return agent
+
+
+class LLMExecutor:
+    """Rate-limited, retrying, concurrent runner for agent calls"""
+    
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 200000,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        cassette: Optional[LLMCassette] = None
+    ):
+        """
+        Initialize the executor
+        
+        Args:
+            max_concurrency: Calls in flight at once across the process
+            requests_per_minute: Request rate limit
+            tokens_per_minute: Token rate limit (prompt + expected output)
+            max_retries: Retries of a call after retryable errors
+            backoff_base: First backoff ceiling in seconds (doubles per retry)
+            backoff_max: Maximum backoff in seconds
+            cassette: Cassette calls are recorded to or replayed from
+        """
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.cassette = cassette
+        # Shared by every caller, so concurrent map() calls do not multiply it
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        
+        self._stats_lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._latency_offset = 0
+        self._counters = {'calls': 0, 'retries': 0, 'failures': 0, 'throttle_seconds': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    
+    def call(self, agent, prompt: str, expected_output_tokens: int = 300):
+        """
+        Run ``agent.run(prompt)`` under the rate limits, retrying transient errors
+        
+        Args:
+            agent: Agent to run
+            prompt: Prompt text
+            expected_output_tokens: Output tokens counted against the TPM limit
+        
+        Returns:
+            The agent response
+        
+        Raises:
+            Exception: The last error once retries are exhausted, or any
+                non-retryable error
+        """
+        model = str(getattr(getattr(agent, 'model', None), 'id', ''))
+        agent_name = getattr(agent, 'name', None) or 'agent'
+        if self.cassette is not None and self.cassette.replaying:
+            # Replayed calls skip the rate limits; they never reach the provider
+            started = time.perf_counter()
+            response = self.cassette.replay(model, prompt)
+            if response is not None:
+                self._record(agent_name, time.perf_counter() - started, 0.0, replayed=True)
+                return response
+        
+        prompt_tokens = count_tokens(prompt)
+        tokens = prompt_tokens + expected_output_tokens
+        
+        for attempt in range(self.max_retries + 1):
+            wait = max(self.request_bucket.reserve(1), self.token_bucket.reserve(tokens))
+            if wait > 0:
+                time.sleep(wait)
+            
+            try:
+                # Backoff sleeps above and below do not hold a slot
+                with self._slots:
+                    started = time.perf_counter()
+                    response = agent.run(prompt)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    self._record(agent_name, time.perf_counter() - started, wait, failed=True)
+                    raise
+                # Full jitter; honour Retry-After when the provider sends it
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                delay = max(delay, _retry_after(e) or 0.0)
+                self._record(agent_name, time.perf_counter() - started, wait, retried=True)
+                time.sleep(delay)
+                continue
+            
+            latency = time.perf_counter() - started
+            self._record(agent_name, latency, wait, usage=_usage(response, prompt_tokens))
+            if self.cassette is not None and self.cassette.recording:
+                self.cassette.record(model, prompt, str(response.content), latency)
+            return response
+    
+    def map(
+        self,
+        agent,
+        task: Callable[..., Any],
+        items: Sequence[Any],
+        max_concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Run ``task(agent_copy, item)`` for every item concurrently
+        
+        Args:
+            agent: Agent passed (as a per-call copy) to the task
+            task: Blocking task function, e.g. classify_email_task
+            items: Task arguments
+            max_concurrency: Calls in flight at once (default: LLM_MAX_CONCURRENCY)
+        
+        Returns:
+            Task results, in the order of ``items``
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        if max_concurrency <= 1 or len(items) <= 1:
+            return [task(agent, item) for item in items]
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._map_async(agent, task, items, max_concurrency))
+        
+        # Called from inside an event loop (e.g. the backend): use a private loop
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(
+                asyncio.run,
+                self._map_async(agent, task, items, max_concurrency)
+            ).result()
+    
+    async def _map_async(self, agent, task: Callable[..., Any], items: Sequence[Any], max_concurrency: int) -> List[Any]:
+        """Event-loop side of map(): bounded fan-out over worker threads"""
+        workers = min(max_concurrency, len(items))
+        agents: asyncio.Queue = asyncio.Queue()
+        for _ in range(workers):
+            agents.put_nowait(_clone_agent(agent))
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-call") as pool:
+            loop = asyncio.get_running_loop()
+            
+            async def run_one(item):
+                worker_agent = await agents.get()
+                try:
+                    return await loop.run_in_executor(pool, task, worker_agent, item)
+                finally:
+                    agents.put_nowait(worker_agent)
+            
+            return await asyncio.gather(*(run_one(item) for item in items))
+    
+    def _record(
+        self,
+        agent_name: str,
+        latency: float,
+        throttle_wait: float,
+        retried: bool = False,
+        failed: bool = False,
+        replayed: bool = False,
+        usage: Tuple[int, int] = (0, 0)
+    ):
+        """Record one attempt; usage is (prompt tokens, completion tokens) of a successful call"""
+        with self._stats_lock:
+            self._latencies.append(latency)
+            self._counters['calls'] += 1
+            self._counters['throttle_seconds'] += throttle_wait
+            self._counters['prompt_tokens'] += usage[0]
+            self._counters['completion_tokens'] += usage[1]
+            if retried:
+                self._counters['retries'] += 1
+            if failed:
+                self._counters['failures'] += 1
+            # Keep memory bounded on long-running monitors
+            if len(self._latencies) > 20000:
+                self._latency_offset += 10000
+                self._latencies = self._latencies[10000:]
+        
+        outcome = 'failed' if failed else 'retried' if retried else 'replayed' if replayed else 'ok'
+        get_metrics().observe_llm_call(agent_name, latency, outcome, usage[0], usage[1], throttle_wait)
+    
+    def mark(self) -> Dict:
+        """Snapshot the statistics; pass to report() to get one run's numbers"""
+        with self._stats_lock:
+            return dict(self._counters, latency_index=self._latency_offset + len(self._latencies))
+    
+    def report(self, since: Optional[Dict] = None) -> Dict:
+        """
+        Get call counts and latency percentiles
+        
+        Args:
+            since: mark() value; only calls after it are included
+        
+        Returns:
+            Dictionary with calls, retries, failures, throttle time, prompt and
+            completion tokens and latency percentiles (ms)
+        """
+        since = since or {'calls': 0, 'retries': 0, 'failures': 0, 'throttle_seconds': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0, 'latency_index': 0}
+        with self._stats_lock:
+            start = max(since['latency_index'] - self._latency_offset, 0)
+            latencies = sorted(self._latencies[start:])
+            counters = {key: self._counters[key] - since[key] for key in self._counters}
+        
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000
+        
+        return dict(
+            counters,
+            latency_p50_ms=percentile(0.50),
+            latency_p95_ms=percentile(0.95),
+            latency_max_ms=latencies[-1] * 1000 if latencies else 0.0,
+        )
+    
+    def print_report(self, since: Optional[Dict] = None):
+        """Log call statistics"""
+        report = self.report(since)
+        if not report['calls']:
+            return
+        logger.info(
+            f"⏱️  LLM calls: {report['calls']} ({report['retries']} retried, {report['failures']} failed), "
+            f"p50 {report['latency_p50_ms']:.0f} ms, p95 {report['latency_p95_ms']:.0f} ms, "
+            f"throttled {report['throttle_seconds']:.1f}s, "
+            f"{report['prompt_tokens']} prompt + {report['completion_tokens']} completion tokens"
+        )
+
+
+_executor: Optional[LLMExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_llm_executor() -> LLMExecutor:
+    """
+    Get the process-wide executor, so all runs share one set of rate limits
+    
+    Returns:
+        Shared LLMExecutor instance
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            executor_config = get_llm_executor_config()
+            _executor = LLMExecutor(
+                max_concurrency=executor_config['max_concurrency'],
+                requests_per_minute=executor_config['requests_per_minute'],
+                tokens_per_minute=executor_config['tokens_per_minute'],
+                max_retries=executor_config['max_retries'],
+                backoff_base=executor_config['backoff_base'],
+                backoff_max=executor_config['backoff_max'],
+                cassette=get_llm_cassette(),
+            )
+        return _executor
+
+
+def call_agent(agent, prompt: str, expected_output_tokens: int = 300):
+    """
+    Run an agent prompt through the shared executor
+    
+    Args:
+        agent: Agent to run
+        prompt: Prompt text
+        expected_output_tokens: Output tokens counted against the TPM limit
+    
+    Returns:
+        The agent response
+    """
+    return get_llm_executor().call(agent, prompt, expected_output_tokens)
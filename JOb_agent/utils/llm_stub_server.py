@@ -0,0 +1,333 @@
+"""
+Local stand-in model server - an offline OpenAI-compatible endpoint for benchmarks
+
+Serves POST /v1/chat/completions with realistic timing: each request sleeps
+for a log-normal time to first token plus a per-output-token cost (or a
+latency drawn from a recorded cassette), and a configurable share of
+requests fails with 429 (with Retry-After) or 500, so the executor's rate
+limiting and retries are exercised too. Prompts recorded in a cassette get
+their recorded response; other prompts get a synthetic but well-formed
+answer for the classifier, batch classifier, extractor and fused analyzer
+prompts, built from the same keyword rules as utils.email_rules.
+
+Usage:
+    python -m utils.llm_stub_server --cassette .cassettes/llm_calls.jsonl
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub \\
+        python main.py --source mbox:./export.mbox
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from utils.config import get_llm_stub_config
+from utils.email_rules import JOB_SUBJECT_PATTERN, TYPE_PATTERNS
+from utils.llm_cassette import LLMCassette
+from utils.text_normalizer import count_tokens
+
+_TYPE_PATTERNS = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in TYPE_PATTERNS]
+_JOB_PATTERN = re.compile(JOB_SUBJECT_PATTERN, re.IGNORECASE)
+_BATCH_EMAIL_PATTERN = re.compile(r'^--- Email \(message_id: (\S+)\) ---$', re.MULTILINE)
+_FIELD_PATTERN = r'^{}: (.*)$'
+
+
+def _field(text: str, name: str) -> str:
+    """Value of a 'Name: value' line in a prompt"""
+    match = re.search(_FIELD_PATTERN.format(re.escape(name)), text, re.MULTILINE)
+    return match.group(1).strip() if match else ''
+
+
+# Prompt text that follows the email body
+_BODY_END_MARKERS = ('\nRespond ', '\nExtract the following')
+
+
+def _body(text: str) -> str:
+    """Body section of an email in a prompt"""
+    start = text.find('Body: ')
+    body = text[start + 6:] if start >= 0 else text
+    ends = [body.find(marker) for marker in _BODY_END_MARKERS if marker in body]
+    return body[:min(ends)] if ends else body
+
+
+def synthetic_classification(text: str) -> Dict:
+    """Keyword classification of one email section of a prompt"""
+    subject = _field(text, 'Subject')
+    scan = f"{subject}\n{_body(text)[:2000]}"
+    classification = next((name for name, pattern in _TYPE_PATTERNS if pattern.search(scan)), None)
+    if classification is None and _JOB_PATTERN.search(subject):
+        classification = 'general'
+    return {
+        'is_job_related': classification is not None,
+        'classification': classification or 'not_job_related',
+        'confidence': 0.9 if classification else 0.8,
+        'reasoning': 'Stand-in model keyword match',
+    }
+
+
+def synthetic_extraction(text: str, classification: str) -> Dict:
+    """Heuristic extraction of one email section of a prompt"""
+    from agents.data_extractor_agent import (
+        extract_company_fallback,
+        extract_role_fallback,
+        map_classification_to_status,
+    )
+    
+    subject = _field(text, 'Subject')
+    return {
+        'company_name': extract_company_fallback(_field(text, 'From'), subject),
+        'role_title': extract_role_fallback(subject),
+        'location': None,
+        'status': map_classification_to_status(classification),
+        'application_date': None,
+        'salary_range': None,
+        'application_url': None,
+        'next_steps': None,
+        'interview_datetime': None,
+        'contact_person': None,
+        'additional_notes': 'Stand-in model extraction',
+    }
+
+
+def synthetic_response(prompt: str) -> str:
+    """
+    Well-formed answer to one of the agent prompts
+    
+    Args:
+        prompt: Classifier, batch classifier, extractor or fused analyzer prompt
+    
+    Returns:
+        JSON response text in the format the prompt asks for
+    """
+    if 'Respond with a JSON array' in prompt:
+        sections = _BATCH_EMAIL_PATTERN.split(prompt)[1:]
+        return json.dumps([
+            dict(synthetic_classification(section), message_id=message_id)
+            for message_id, section in zip(sections[::2], sections[1::2])
+        ])
+    if '"extracted":' in prompt:
+        result = synthetic_classification(prompt)
+        result['extracted'] = (
+            synthetic_extraction(prompt, result['classification']) if result['is_job_related'] else None
+        )
+        return json.dumps(result)
+    if 'Extract structured information' in prompt:
+        return json.dumps(synthetic_extraction(prompt, _field(prompt, 'Email Type')))
+    return json.dumps(synthetic_classification(prompt))
+
+
+class StubModel:
+    """Response, latency and error model of the stand-in server"""
+    
+    def __init__(
+        self,
+        latency_median_ms: float = 700,
+        latency_sigma: float = 0.5,
+        ms_per_output_token: float = 12,
+        rate_limit_rate: float = 0.02,
+        server_error_rate: float = 0.01,
+        cassette: Optional[LLMCassette] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the model
+        
+        Args:
+            latency_median_ms: Median time to first token
+            latency_sigma: Log-normal sigma of the time to first token
+            ms_per_output_token: Generation time per output token
+            rate_limit_rate: Share of requests answered with 429
+            server_error_rate: Share of requests answered with 500
+            cassette: Recorded calls replayed (with their latency) when the prompt matches
+            seed: Random seed for reproducible benchmark runs
+        """
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_output_token = ms_per_output_token
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.cassette = cassette
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'replayed': 0, 'synthetic': 0, 'rate_limited': 0, 'server_errors': 0}
+    
+    def _draw(self) -> float:
+        """Uniform random number (thread-safe)"""
+        with self._lock:
+            return self._random.random()
+    
+    def latency_ms(self, output_tokens: int) -> float:
+        """Draw the latency of a synthetic response"""
+        with self._lock:
+            first_token = self.latency_median_ms * math.exp(self.latency_sigma * self._random.gauss(0, 1))
+        return first_token + self.ms_per_output_token * output_tokens
+    
+    def respond(self, model: str, prompt: str):
+        """
+        Produce the outcome of one request
+        
+        Args:
+            model: Requested model id
+            prompt: Last user message
+        
+        Returns:
+            (HTTP status, response content or error message, latency in ms)
+        """
+        with self._lock:
+            self.counters['requests'] += 1
+        
+        draw = self._draw()
+        if draw < self.rate_limit_rate:
+            with self._lock:
+                self.counters['rate_limited'] += 1
+            return 429, 'Rate limit reached (stand-in server)', self.latency_ms(0) / 10
+        if draw < self.rate_limit_rate + self.server_error_rate:
+            with self._lock:
+                self.counters['server_errors'] += 1
+            return 500, 'Internal server error (stand-in server)', self.latency_ms(0)
+        
+        entry = self.cassette.lookup(model, prompt) if self.cassette else None
+        if entry is not None:
+            with self._lock:
+                self.counters['replayed'] += 1
+            return 200, entry['response'], entry['latency_ms']
+        
+        content = synthetic_response(prompt)
+        with self._lock:
+            self.counters['synthetic'] += 1
+        return 200, content, self.latency_ms(count_tokens(content))
+
+
+def _prompt_of(messages: List[Dict]) -> str:
+    """Text of the last user message of a chat request"""
+    for message in reversed(messages):
+        if message.get('role') == 'user':
+            content = message.get('content')
+            if isinstance(content, list):
+                return ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+            return content or ''
+    return ''
+
+
+def make_handler(model: StubModel):
+    """Build the request handler class bound to a StubModel"""
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        """OpenAI chat completions endpoint"""
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_GET(self):
+            if self.path.rstrip('/').endswith('/models'):
+                self._send_json(200, {'object': 'list', 'data': []})
+            else:
+                self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+        
+        def do_POST(self):
+            if not self.path.rstrip('/').endswith('/chat/completions'):
+                self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+                return
+            
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            model_id = request.get('model', '')
+            prompt = _prompt_of(request.get('messages', []))
+            status, content, latency_ms = model.respond(model_id, prompt)
+            time.sleep(latency_ms / 1000)
+            
+            if status == 429:
+                self._send_json(429, {'error': {'message': content, 'type': 'rate_limit_exceeded', 'code': 'rate_limit_exceeded'}},
+                                headers={'Retry-After': '1'})
+                return
+            if status != 200:
+                self._send_json(status, {'error': {'message': content, 'type': 'server_error'}})
+                return
+            
+            prompt_tokens = sum(count_tokens(str(m.get('content') or '')) for m in request.get('messages', []))
+            completion_tokens = count_tokens(content)
+            self._send_json(200, {
+                'id': f"chatcmpl-stub-{uuid.uuid4().hex[:24]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model_id,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens,
+                },
+            })
+    
+    return StubHandler
+
+
+def serve(model: StubModel, host: str, port: int) -> ThreadingHTTPServer:
+    """
+    Start the server on a background thread
+    
+    Args:
+        model: Response model
+        host: Listen address
+        port: Listen port (0 picks a free one)
+    
+    Returns:
+        Running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='llm-stub-server', daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    stub_config = get_llm_stub_config()
+    parser = argparse.ArgumentParser(description='Run the local stand-in OpenAI-compatible model server')
+    parser.add_argument('--host', default=stub_config['host'])
+    parser.add_argument('--port', type=int, default=stub_config['port'])
+    parser.add_argument('--latency-median-ms', type=float, default=stub_config['latency_median_ms'])
+    parser.add_argument('--latency-sigma', type=float, default=stub_config['latency_sigma'])
+    parser.add_argument('--ms-per-output-token', type=float, default=stub_config['ms_per_output_token'])
+    parser.add_argument('--rate-limit-rate', type=float, default=stub_config['rate_limit_rate'])
+    parser.add_argument('--server-error-rate', type=float, default=stub_config['server_error_rate'])
+    parser.add_argument('--cassette', help='Replay responses and latencies recorded with LLM_CASSETTE_MODE=record')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    args = parser.parse_args()
+    
+    stub_model = StubModel(
+        latency_median_ms=args.latency_median_ms,
+        latency_sigma=args.latency_sigma,
+        ms_per_output_token=args.ms_per_output_token,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        cassette=LLMCassette(args.cassette, mode='replay') if args.cassette else None,
+        seed=args.seed,
+    )
+    server = serve(stub_model, args.host, args.port)
+    print(f"✓ Stand-in model server on http://{args.host}:{server.server_port}/v1")
+    print(f"   Latency: median {args.latency_median_ms:.0f} ms (sigma {args.latency_sigma}) + {args.ms_per_output_token:.0f} ms/token")
+    print(f"   Errors: {args.rate_limit_rate:.1%} 429, {args.server_error_rate:.1%} 500")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n✓ Stopped: {stub_model.counters}")
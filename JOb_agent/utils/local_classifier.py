@@ -0,0 +1,430 @@
+"""
+Local email classifier - TF-IDF features with a softmax linear model in NumPy
+
+Trained from classifications stored in the backend EmailLog table (plus the
+examples in sample_test_emails.py), it scores a whole batch of emails in a
+few milliseconds on CPU. Only emails it is not confident about are sent to
+the LLM classifier.
+
+Usage:
+    python -m utils.local_classifier train
+    python -m utils.local_classifier report
+    python -m utils.local_classifier export --output email_classifier.json
+"""
+from collections import Counter
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import logging
+import math
+import re
+import threading
+import numpy as np
+from utils.config import get_classifier_config
+from utils.text_normalizer import normalize_email
+
+logger = logging.getLogger(__name__)
+
+NOT_JOB_RELATED = 'not_job_related'
+
+# EmailLog classification_source values that are LLM labels (training data)
+LLM_SOURCES = ('llm', 'llm_fused')
+
+# Characters of normalized body used as features
+BODY_FEATURE_CHARS = 2000
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9']+")
+
+# Labels used by sample_test_emails.SAMPLE_EMAILS keys that differ from classifier labels
+SAMPLE_LABELS = {
+    'job_offer': 'offer',
+    'assessment_request': 'interview_request',
+}
+
+
+def email_to_text(email: Dict) -> str:
+    """Build the feature text (sender domain, subject, normalized body) of an email"""
+    domain = parseaddr(email.get('from') or '')[1].rpartition('@')[2].lower()
+    body = normalize_email(email)[:BODY_FEATURE_CHARS]
+    return f"domain_{domain.replace('.', '_')} {email.get('subject') or ''}\n{body}"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word unigrams and bigrams"""
+    words = _TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class LocalClassifier:
+    """Multinomial logistic regression over L2-normalized TF-IDF features"""
+    
+    def __init__(self, threshold: Optional[float] = None):
+        """
+        Initialize an untrained classifier
+        
+        Args:
+            threshold: Confidence at or above which predictions are accepted
+                       without the LLM (default: LOCAL_MODEL_THRESHOLD)
+        """
+        self.threshold = threshold if threshold is not None else get_classifier_config()['local_model_threshold']
+        self.classes: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.weights = np.zeros((0, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+        
+        # Per-run counters
+        self.accepted = 0
+        self.deferred = 0
+        self.compared = 0
+        self.agreed = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether fit() or load() has populated the model"""
+        return bool(self.classes)
+    
+    def _vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Turn texts into sparse TF-IDF rows
+        
+        Returns:
+            (row ids, feature ids, values) of the non-zero entries
+        """
+        rows, features, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = Counter(
+                self.vocabulary[token] for token in tokenize(text)
+                if token in self.vocabulary
+            )
+            if not counts:
+                continue
+            ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+            weighted = tf * self.idf[ids]
+            weighted /= np.linalg.norm(weighted) or 1.0
+            rows.append(np.full(len(ids), row, dtype=np.int64))
+            features.append(ids)
+            values.append(weighted.astype(np.float32))
+        
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(features), np.concatenate(values)
+    
+    def _scores(self, n_rows: int, rows: np.ndarray, features: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Compute softmax probabilities for sparse rows"""
+        logits = np.tile(self.bias, (n_rows, 1))
+        for c in range(len(self.classes)):
+            logits[:, c] += np.bincount(rows, weights=values * self.weights[features, c], minlength=n_rows)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+    
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        max_features: int = 20000,
+        epochs: int = 300,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4
+    ) -> 'LocalClassifier':
+        """
+        Train on labelled texts with full-batch gradient descent
+        
+        Args:
+            texts: Feature texts (see email_to_text)
+            labels: Classification label of each text
+            max_features: Vocabulary size (most frequent by document frequency)
+            epochs: Gradient descent iterations
+            learning_rate: Step size
+            l2: L2 regularization strength
+        
+        Returns:
+            self
+        """
+        self.classes = sorted(set(labels))
+        class_index = {label: i for i, label in enumerate(self.classes)}
+        
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(set(tokenize(text)))
+        min_df = 2 if len(texts) >= 50 else 1
+        tokens = [
+            token for token, df in document_frequency.most_common(max_features)
+            if df >= min_df
+        ]
+        self.vocabulary = {token: i for i, token in enumerate(tokens)}
+        self.idf = np.array([
+            math.log((1 + len(texts)) / (1 + document_frequency[token])) + 1.0
+            for token in tokens
+        ], dtype=np.float32)
+        
+        n_rows, n_features, n_classes = len(texts), len(tokens), len(self.classes)
+        rows, features, values = self._vectorize(texts)
+        targets = np.zeros((n_rows, n_classes), dtype=np.float32)
+        targets[np.arange(n_rows), [class_index[label] for label in labels]] = 1.0
+        
+        self.weights = np.zeros((n_features, n_classes), dtype=np.float32)
+        self.bias = np.zeros(n_classes, dtype=np.float32)
+        
+        for _ in range(epochs):
+            error = (self._scores(n_rows, rows, features, values) - targets) / n_rows
+            for c in range(n_classes):
+                gradient = np.bincount(features, weights=values * error[rows, c], minlength=n_features)
+                self.weights[:, c] -= learning_rate * (gradient + l2 * self.weights[:, c])
+            self.bias -= learning_rate * error.sum(axis=0)
+        
+        return self
+    
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Class probabilities for each text, columns ordered as self.classes"""
+        return self._scores(len(texts), *self._vectorize(texts))
+    
+    def classify_batch(self, emails: List[Dict]) -> List[Dict]:
+        """
+        Classify a batch of emails
+        
+        Args:
+            emails: Email dictionaries
+        
+        Returns:
+            Classification result dictionaries (same shape as classify_email_task)
+        """
+        if not emails:
+            return []
+        probabilities = self.predict_proba([email_to_text(email) for email in emails])
+        best = probabilities.argmax(axis=1)
+        
+        results = []
+        for email, index, row in zip(emails, best, probabilities):
+            classification = self.classes[index]
+            results.append({
+                'message_id': email.get('message_id'),
+                'is_job_related': classification != NOT_JOB_RELATED,
+                'classification': classification,
+                'confidence': float(row[index]),
+                'reasoning': 'Local model prediction',
+                'source': 'local_model',
+            })
+        return results
+    
+    def accept(self, prediction: Dict) -> bool:
+        """Check whether a prediction is confident enough to skip the LLM, counting the outcome"""
+        accepted = prediction['confidence'] >= self.threshold
+        with self._lock:
+            if accepted:
+                self.accepted += 1
+            else:
+                self.deferred += 1
+        return accepted
+    
+    def record_agreement(self, prediction: Dict, llm_result: Dict):
+        """Compare a deferred prediction with the LLM's answer"""
+        if llm_result.get('classification') == 'error':
+            return
+        with self._lock:
+            self.compared += 1
+            if prediction['classification'] == llm_result.get('classification'):
+                self.agreed += 1
+    
+    def report(self) -> Dict:
+        """
+        Get acceptance and LLM agreement counts for this run
+        
+        Returns:
+            Dictionary with accepted/deferred counts and agreement on deferred emails
+        """
+        return {
+            'accepted': self.accepted,
+            'deferred': self.deferred,
+            'agreement': self.agreed / self.compared if self.compared else None,
+            'compared': self.compared,
+        }
+    
+    def print_report(self):
+        """Log acceptance and agreement for this run"""
+        report = self.report()
+        total = report['accepted'] + report['deferred']
+        logger.info(f"🧮 Local model: {report['accepted']}/{total} decided without LLM (threshold {self.threshold:.2f})")
+        if report['agreement'] is not None:
+            logger.info(f"   Agreement with LLM on deferred emails: {report['agreement']:.0%} of {report['compared']}")
+    
+    def save(self, path: str):
+        """Save the model as a compressed NumPy archive"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path,
+            classes=np.array(self.classes),
+            tokens=np.array(tokens),
+            idf=self.idf,
+            weights=self.weights,
+            bias=self.bias,
+        )
+    
+    @classmethod
+    def load(cls, path: str, threshold: Optional[float] = None) -> 'LocalClassifier':
+        """Load a model saved with save()"""
+        model = cls(threshold=threshold)
+        with np.load(path, allow_pickle=False) as archive:
+            model.classes = archive['classes'].tolist()
+            model.vocabulary = {token: i for i, token in enumerate(archive['tokens'].tolist())}
+            model.idf = archive['idf']
+            model.weights = archive['weights']
+            model.bias = archive['bias']
+        return model
+    
+    def export(self, path: str):
+        """Export the model as plain JSON for use outside Python"""
+        tokens = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path, 'w') as f:
+            json.dump({
+                'classes': self.classes,
+                'tokens': tokens,
+                'idf': self.idf.tolist(),
+                'weights': self.weights.tolist(),
+                'bias': self.bias.tolist(),
+                'threshold': self.threshold,
+            }, f)
+
+
+def load_local_classifier() -> Optional[LocalClassifier]:
+    """
+    Load the trained local classifier if enabled and present
+    
+    Returns:
+        LocalClassifier, or None if disabled or not trained yet
+    """
+    classifier_config = get_classifier_config()
+    if not classifier_config['local_model_enabled']:
+        return None
+    path = Path(classifier_config['local_model_path'])
+    if not path.exists():
+        return None
+    try:
+        return LocalClassifier.load(str(path))
+    except Exception as e:
+        logger.warning(f"⚠️  Could not load local classifier from {path}: {e}")
+        return None
+
+
+def load_labelled_emails(min_confidence: float, sources: Optional[Iterable[str]] = LLM_SOURCES) -> List[Tuple[Dict, str]]:
+    """
+    Load classified emails from the backend EmailLog table
+    
+    By default only LLM labels are loaded: training on the local model's own
+    predictions (or on rule/thread decisions) would reinforce its errors.
+    
+    Args:
+        min_confidence: Minimum confidence_score of a label
+        sources: Only labels from these classifiers ('llm', 'rules', ...);
+            None loads every label
+    
+    Returns:
+        List of (email dictionary, classification) pairs
+    """
+    from agents.database_manager_agent import get_local_session
+    
+    session, is_backend = get_local_session()
+    if not is_backend:
+        session.close()
+        return []
+    
+    try:
+        from ios_app.backend.models.database import EmailLog
+        
+        logs = session.query(EmailLog).filter(
+            EmailLog.classification.isnot(None),
+            EmailLog.body_text.isnot(None)
+        ).all()
+        examples = []
+        for log in logs:
+            if log.confidence_score is not None and log.confidence_score < min_confidence:
+                continue
+            if sources is not None and (log.meta_data or {}).get('classification_source') not in sources:
+                continue
+            email = {
+                'subject': log.subject,
+                'from': log.from_address,
+                # Stored bodies are already normalized
+                'normalized_body': log.body_text,
+            }
+            examples.append((email, log.classification.value))
+        return examples
+    finally:
+        session.close()
+
+
+def load_sample_emails() -> List[Tuple[Dict, str]]:
+    """Load the labelled examples from sample_test_emails.py"""
+    from sample_test_emails import SAMPLE_EMAILS
+    
+    return [
+        ({'subject': sample['subject'], 'body': sample['body']}, SAMPLE_LABELS.get(key, key))
+        for key, sample in SAMPLE_EMAILS.items()
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description='Train and inspect the local email classifier')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('train', help='Train from LLM-labelled EmailLog rows and sample emails')
+    subparsers.add_parser('report', help='Measure agreement with stored LLM labels')
+    export_parser = subparsers.add_parser('export', help='Export the trained model as JSON')
+    export_parser.add_argument('--output', default='email_classifier.json', help='Output JSON path')
+    args = parser.parse_args()
+    
+    classifier_config = get_classifier_config()
+    model_path = classifier_config['local_model_path']
+    
+    if args.command == 'train':
+        examples = load_labelled_emails(classifier_config['min_label_confidence']) + load_sample_emails()
+        labels = [label for _, label in examples]
+        if len(set(labels)) < 2:
+            print("✗ Need labelled emails of at least two classes to train")
+            raise SystemExit(1)
+        
+        started = time.perf_counter()
+        model = LocalClassifier().fit([email_to_text(email) for email, _ in examples], labels)
+        model.save(model_path)
+        print(f"✓ Trained on {len(examples)} emails in {time.perf_counter() - started:.2f}s")
+        for label, count in sorted(Counter(labels).items()):
+            print(f"   - {label}: {count}")
+        print(f"✓ Saved model to {model_path}")
+    
+    elif args.command == 'report':
+        model = LocalClassifier.load(model_path)
+        examples = load_labelled_emails(0.0)
+        if not examples:
+            print("ℹ No LLM-labelled emails in EmailLog yet")
+            raise SystemExit(0)
+        
+        started = time.perf_counter()
+        predictions = model.classify_batch([email for email, _ in examples])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        agreed = [p['classification'] == label for p, (_, label) in zip(predictions, examples)]
+        confident = [p['confidence'] >= model.threshold for p in predictions]
+        covered = sum(confident)
+        covered_agreed = sum(a for a, c in zip(agreed, confident) if c)
+        
+        print(f"Scored {len(examples)} emails in {elapsed_ms:.1f} ms")
+        print(f"  Agreement with LLM (all): {sum(agreed) / len(examples):.1%}")
+        print(f"  Above threshold {model.threshold:.2f}: {covered / len(examples):.1%} of emails, "
+              f"agreement {covered_agreed / covered if covered else 0.0:.1%}")
+        for label in model.classes:
+            indices = [i for i, (_, l) in enumerate(examples) if l == label]
+            if indices:
+                print(f"   - {label}: {sum(agreed[i] for i in indices) / len(indices):.0%} of {len(indices)}")
+    
+    elif args.command == 'export':
+        LocalClassifier.load(model_path).export(args.output)
+        print(f"✓ Exported model to {args.output}")
@@ -0,0 +1,161 @@
+"""
+Logger - leveled, structured logging for the agents and the pipeline
+
+Workflow modules log through ``logging.getLogger(__name__)``.
+configure_logging() gives the agents and utils loggers one stdout handler
+set up by LOG_PROFILE:
+
+- development (default): plain messages down to DEBUG, so a run's console
+  output reads like before; every per-email line is shown and agno's agent
+  debug tracing stays on.
+- production: one JSON object per line with time, level, logger, message
+  and structured fields, at INFO: per-batch step lines (DEBUG) are off,
+  per-email lines are sampled (LOG_ITEM_SAMPLE_RATE), an aggregated
+  progress line is logged every LOG_PROGRESS_EVERY emails of a stage and
+  agent debug tracing is off, so log volume stays flat as runs grow.
+
+Per-email lines go through the stage's ItemLog, which counts every email
+but formats and writes only the sampled ones.
+"""
+from datetime import datetime, timezone
+from typing import Dict
+import json
+import logging
+import sys
+import threading
+import time
+from utils.config import get_logging_config
+
+# Loggers of the workflow packages; the backend's own loggers are left alone
+PACKAGE_LOGGERS = ('agents', 'utils')
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object: time, level, logger, message and extra fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            # Console decoration (blank lines, ==== rules) is dropped
+            'message': ' '.join(
+                line.strip() for line in record.getMessage().splitlines() if line.strip(' =')
+            ),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(force: bool = False) -> Dict:
+    """
+    Set up the agents and utils loggers for the configured profile
+    
+    Safe to call more than once; only the first call (or a forced one)
+    changes the handlers.
+    
+    Args:
+        force: Re-read the configuration and replace the handler
+    
+    Returns:
+        The logging configuration in effect
+    """
+    global _configured
+    config = get_logging_config()
+    with _configure_lock:
+        if _configured and not force:
+            return config
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if config['output'] == 'json' else logging.Formatter('%(message)s'))
+        for name in PACKAGE_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.handlers = [handler]
+            logger.setLevel(config['level'])
+            logger.propagate = False
+        _configured = True
+    return config
+
+
+def agent_debug_mode() -> bool:
+    """Whether agents are created with agno's debug tracing (off in production)"""
+    return get_logging_config()['agent_debug_mode']
+
+
+class ItemLog:
+    """Per-email lines of one stage: sampled, with an aggregated progress line every N emails"""
+    
+    def __init__(self, stage: str, sample_rate: float = 1.0, progress_every: int = 0):
+        """
+        Initialize an item log
+        
+        Args:
+            stage: Stage name added to every line
+            sample_rate: Share of per-email lines written (0 writes none)
+            progress_every: Emails between progress lines (0 = off)
+        """
+        self.stage = stage
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.progress_every = progress_every
+        self._lock = threading.Lock()
+        self.count = 0
+        self.started = time.perf_counter()
+    
+    def item(self, logger: logging.Logger, msg: str, *args, level: int = logging.INFO, **fields):
+        """
+        Count one email and log its line if it is in the sample
+        
+        The message is only formatted when it is written, so pass values as
+        %-style args rather than an f-string.
+        
+        Args:
+            logger: Logger of the calling module
+            msg: Message with %-style placeholders
+            *args: Message arguments
+            level: Log level of the line
+            **fields: Structured fields of the line
+        """
+        with self._lock:
+            index = self.count
+            self.count += 1
+            progress = self.progress_every and self.count % self.progress_every == 0
+        if self.sample_every and index % self.sample_every == 0 and logger.isEnabledFor(level):
+            logger.log(level, msg, *args, extra=dict(fields, stage=self.stage, item=index + 1))
+        if progress:
+            elapsed = time.perf_counter() - self.started
+            logger.info(
+                "%s: %d emails processed (%.1f/s)", self.stage, index + 1, (index + 1) / elapsed if elapsed else 0.0,
+                extra={'stage': self.stage, 'items': index + 1}
+            )
+
+
+_item_logs: Dict[str, ItemLog] = {}
+_item_logs_lock = threading.Lock()
+
+
+def get_item_log(stage: str) -> ItemLog:
+    """
+    Get the process-wide item log of a stage
+    
+    Counts carry over between batches and runs, so sampling and progress
+    lines follow the total volume rather than restarting with every chunk.
+    
+    Args:
+        stage: Stage name, e.g. 'classify'
+    
+    Returns:
+        Shared ItemLog configured from LOG_ITEM_SAMPLE_RATE and LOG_PROGRESS_EVERY
+    """
+    with _item_logs_lock:
+        if stage not in _item_logs:
+            config = get_logging_config()
+            _item_logs[stage] = ItemLog(stage, config['item_sample_rate'], config['progress_every'])
+        return _item_logs[stage]
@@ -0,0 +1,267 @@
+"""
+Local message cache - content-addressed, compressed store of email bodies keyed by Message-ID
+
+Bodies are stored once per content hash under ``objects/``; a small SQLite
+index maps RFC Message-IDs to content hashes and tracks last access for
+size-bounded LRU eviction. Re-running classification or extraction over
+history then needs no body downloads from the IMAP server.
+
+Usage:
+    python -m utils.message_cache stats
+    python -m utils.message_cache prune --max-mb 100
+    python -m utils.message_cache clear
+"""
+from typing import Dict, Iterable, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from utils.config import get_cache_config
+
+# Email dictionary fields that are stored in the cache
+CACHED_FIELDS = ('body', 'html', 'text')
+
+
+class MessageCache:
+    """Size-bounded LRU cache of email bodies on local disk"""
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the cache
+        
+        Args:
+            cache_dir: Directory holding the index and compressed objects
+            max_bytes: Total compressed size kept before LRU eviction
+        """
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.cache_dir / 'index.sqlite'), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON messages (last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT content_hash, size FROM messages)"
+        ).fetchone()[0]
+    
+    def get(self, message_id: str) -> Optional[Dict]:
+        """
+        Look up cached body fields for a message
+        
+        Args:
+            message_id: RFC Message-ID header value
+        
+        Returns:
+            Dictionary with body/html/text, or None on a miss
+        """
+        if not message_id:
+            return None
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM messages WHERE message_id = ?",
+                (message_id,)
+            ).fetchone()
+            if not row:
+                return None
+            path = self._object_path(row[0])
+            if not path.exists():
+                self._conn.execute("DELETE FROM messages WHERE message_id = ?", (message_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE messages SET last_access = ? WHERE message_id = ?",
+                (time.time(), message_id)
+            )
+            self._conn.commit()
+        
+        try:
+            return json.loads(zlib.decompress(path.read_bytes()).decode('utf-8'))
+        except (OSError, zlib.error, ValueError):
+            # Evicted concurrently or corrupted; treat as a miss
+            return None
+    
+    def get_many(self, message_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Look up several messages; returns only the hits"""
+        hits = {}
+        for message_id in message_ids:
+            cached = self.get(message_id)
+            if cached is not None:
+                hits[message_id] = cached
+        return hits
+    
+    def put(self, message_id: str, email_data: Dict):
+        """
+        Store body fields of an email
+        
+        Args:
+            message_id: RFC Message-ID header value
+            email_data: Email dictionary containing body/html/text
+        """
+        if not message_id:
+            return
+        
+        payload = json.dumps(
+            {field: email_data.get(field) for field in CACHED_FIELDS},
+            sort_keys=True
+        ).encode('utf-8')
+        content_hash = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(content_hash)
+        
+        compressed = zlib.compress(payload, 6)
+        
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                tmp_path.write_bytes(compressed)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(compressed)
+            
+            previous = self._conn.execute(
+                "SELECT content_hash FROM messages WHERE message_id = ?",
+                (message_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO messages (message_id, content_hash, size, last_access) VALUES (?, ?, ?, ?)",
+                (message_id, content_hash, len(compressed), time.time())
+            )
+            if previous and previous[0] != content_hash:
+                self._drop_object_if_unused(previous[0])
+            self._conn.commit()
+        
+        if self._total_bytes > self.max_bytes:
+            self.prune()
+    
+    def total_bytes(self) -> int:
+        """Total compressed size of all distinct cached objects"""
+        return self._total_bytes
+    
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least recently used entries until the cache fits
+        
+        Args:
+            max_bytes: Target size (default: the configured maximum)
+        
+        Returns:
+            Number of index entries removed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        
+        while self._total_bytes > max_bytes:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT message_id, content_hash FROM messages ORDER BY last_access LIMIT 100"
+                ).fetchall()
+                if not rows:
+                    break
+                for message_id, content_hash in rows:
+                    self._conn.execute("DELETE FROM messages WHERE message_id = ?", (message_id,))
+                    self._drop_object_if_unused(content_hash)
+                    removed += 1
+                    if self._total_bytes <= max_bytes:
+                        break
+                self._conn.commit()
+        
+        return removed
+    
+    def clear(self) -> int:
+        """Remove every cached message; returns the number of entries removed"""
+        return self.prune(max_bytes=0)
+    
+    def stats(self) -> Dict:
+        """Get entry count and size information"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return {
+            'entries': entries,
+            'total_bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+            'cache_dir': str(self.cache_dir),
+        }
+    
+    def _drop_object_if_unused(self, content_hash: str):
+        """Delete an object file once no index entry references it (lock held)"""
+        still_used = self._conn.execute(
+            "SELECT 1 FROM messages WHERE content_hash = ? LIMIT 1",
+            (content_hash,)
+        ).fetchone()
+        if still_used:
+            return
+        path = self._object_path(content_hash)
+        if path.exists():
+            self._total_bytes -= path.stat().st_size
+            path.unlink()
+    
+    def _object_path(self, content_hash: str) -> Path:
+        """Path of the compressed object for a content hash"""
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.json.z"
+
+
+_cache: Optional[MessageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_message_cache() -> Optional[MessageCache]:
+    """
+    Get the process-wide message cache, creating it on first use
+    
+    Returns:
+        Shared MessageCache, or None if MESSAGE_CACHE_ENABLED is false
+    """
+    global _cache
+    cache_config = get_cache_config()
+    if not cache_config['message_cache_enabled']:
+        return None
+    
+    with _cache_lock:
+        if _cache is None:
+            _cache = MessageCache(
+                cache_config['message_cache_dir'],
+                cache_config['message_cache_max_bytes']
+            )
+        return _cache
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Manage the local email message cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Show cache size and entry count')
+    prune_parser = subparsers.add_parser('prune', help='Evict least recently used messages')
+    prune_parser.add_argument('--max-mb', type=float, default=None, help='Target size in MB (default: configured maximum)')
+    subparsers.add_parser('clear', help='Remove all cached messages')
+    args = parser.parse_args()
+    
+    cache_config = get_cache_config()
+    cache = MessageCache(cache_config['message_cache_dir'], cache_config['message_cache_max_bytes'])
+    
+    if args.command == 'stats':
+        stats = cache.stats()
+        print(f"Cache: {stats['cache_dir']}")
+        print(f"  Entries: {stats['entries']}")
+        print(f"  Size: {stats['total_bytes'] / 1024 / 1024:.1f} MB / {stats['max_bytes'] / 1024 / 1024:.1f} MB")
+    elif args.command == 'prune':
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+        removed = cache.prune(max_bytes=max_bytes)
+        print(f"✓ Pruned {removed} messages")
+    elif args.command == 'clear':
+        removed = cache.clear()
+        print(f"✓ Removed {removed} messages")
@@ -0,0 +1,68 @@
+"""
+Message id backfill - rekey emails logged under the bare IMAP UID
+
+Emails used to be stored under their UID (message_id = UID), which is only
+unique within one folder and only until the server resets UIDVALIDITY. The
+email client now stores them under the RFC Message-ID, or
+account/folder/UIDVALIDITY:UID when the header is missing. Rows written
+before the change no longer match, so the next run would log and classify
+those emails again. This one-time backfill looks up the Message-ID of every
+UID key still on the server and rewrites EmailLog rows and application
+links to the new key.
+
+Usage:
+    python -m utils.message_id_backfill
+    python -m utils.message_id_backfill --folder INBOX --dry-run
+"""
+from typing import Dict
+import logging
+from agno.agent import Agent
+from agents.database_manager_agent import load_uid_keyed_message_ids, rekey_message_ids
+from utils.email_client import EmailClient
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_message_ids(agent: Agent, client: EmailClient, folder: str = 'INBOX', dry_run: bool = False) -> Dict[str, int]:
+    """
+    Rewrite UID message ids of one folder to the current message_id scheme
+    
+    Args:
+        agent: The database manager agent
+        client: Connected email client of the account the UIDs belong to
+        folder: Folder the old runs fetched from (UIDs are per folder)
+        dry_run: Only count what would be rewritten
+    
+    Returns:
+        Dictionary with the UID keys found, those still on the server and
+        the rows updated
+    """
+    uid_keys = load_uid_keyed_message_ids(agent)
+    key_map = client.message_ids_for_uids(uid_keys, folder=folder) if uid_keys else {}
+    updated = 0 if dry_run else rekey_message_ids(agent, key_map)
+    logger.info(
+        f"🔑 Message id backfill: {len(uid_keys)} UID keys, {len(key_map)} found in {folder}, "
+        f"{updated} rows updated{' (dry run)' if dry_run else ''}"
+    )
+    return {'uid_keys': len(uid_keys), 'found': len(key_map), 'updated': updated}
+
+
+if __name__ == "__main__":
+    import argparse
+    from agents.database_manager_agent import create_database_manager_agent
+    from utils.logger import configure_logging
+    
+    parser = argparse.ArgumentParser(description='Rekey emails logged under the bare IMAP UID')
+    parser.add_argument('--folder', default='INBOX', help='Folder the UIDs belong to (default: INBOX)')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would change')
+    args = parser.parse_args()
+    
+    configure_logging()
+    client = EmailClient()
+    if not client.connect():
+        raise SystemExit("✗ Could not connect to the email server")
+    try:
+        result = backfill_message_ids(create_database_manager_agent(), client, folder=args.folder, dry_run=args.dry_run)
+    finally:
+        client.disconnect()
+    print(f"✓ {result['updated']} rows rekeyed ({result['found']}/{result['uid_keys']} UIDs found in {args.folder})")
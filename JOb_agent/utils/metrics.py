@@ -0,0 +1,446 @@
+"""
+Metrics - process-wide counters and histograms for the agent pipeline
+
+The orchestrator stages, the LLM executor, the result cache and the
+pipeline queues record into one MetricsRegistry. It renders the Prometheus
+text exposition format (served by the backend at /metrics) and gives
+per-run summaries from snapshot differences, like LLMExecutor.mark().
+
+Workflows mostly run in sync worker processes, not in the API process that
+serves /metrics. With METRICS_MULTIPROC_DIR set, every process writes its
+totals to a file in that directory (at most every FLUSH_INTERVAL seconds
+and at the end of each run) and render() adds up the files of all
+processes, like prometheus_client's multiprocess mode. Clear the directory
+when deploying, not while workers are running.
+
+Example:
+    metrics = get_metrics()
+    mark = metrics.snapshot()
+    ...  # run the workflow
+    metrics.print_report(since=mark)
+    print(metrics.render())
+"""
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+import bisect
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from utils.config import get_metrics_config
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'job_agent_'
+
+# Seconds between writes of this process's totals to METRICS_MULTIPROC_DIR
+FLUSH_INTERVAL = 5.0
+
+# Seconds; covers cache hits (ms) up to slow batches (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value (backslash, double quote, newline)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a Prometheus label set"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels):
+        """Add to the counter of a label set"""
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def values(self) -> Dict[LabelValues, float]:
+        """Current value of each label set"""
+        with self._lock:
+            return dict(self._values)
+    
+    def state(self) -> Dict[LabelValues, float]:
+        """Raw state of each label set, as merged across processes"""
+        return self.values()
+    
+    @staticmethod
+    def merge(state: Dict[LabelValues, float], other: Dict[LabelValues, float]):
+        """Add another process's state into state"""
+        for key, value in other.items():
+            state[key] = state.get(key, 0.0) + value
+    
+    def render(self, state: Optional[Dict[LabelValues, float]] = None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted((self.state() if state is None else state).items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        """Record one observation for a label set"""
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            state[index] += 1
+            state[-1] += value
+    
+    def values(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """Observation count and sum of each label set"""
+        with self._lock:
+            return {key: (sum(state[:-1]), state[-1]) for key, state in self._values.items()}
+    
+    def state(self) -> Dict[LabelValues, list]:
+        """Raw bucket counts and sum of each label set, as merged across processes"""
+        with self._lock:
+            return {key: list(state) for key, state in self._values.items()}
+    
+    def merge(self, state: Dict[LabelValues, list], other: Dict[LabelValues, list]):
+        """Add another process's state into state (skipped if its buckets differ)"""
+        for key, counts in other.items():
+            if len(counts) != len(self.buckets) + 2:
+                continue
+            current = state.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            state[key] = [a + b for a, b in zip(current, counts)]
+    
+    def render(self, state: Optional[Dict[LabelValues, list]] = None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        states = self.state() if state is None else state
+        for key, state in sorted(states.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """Named counters and histograms of this process"""
+    
+    def __init__(
+        self,
+        prompt_price_per_mtok: float = 0.0,
+        completion_price_per_mtok: float = 0.0,
+        multiproc_dir: Optional[str] = None
+    ):
+        """
+        Create the pipeline metrics
+        
+        Args:
+            prompt_price_per_mtok: USD per million prompt tokens, for cost estimates
+            completion_price_per_mtok: USD per million completion tokens
+            multiproc_dir: Directory shared by the processes whose totals
+                render() adds up (None: this process only)
+        """
+        self.prompt_price_per_mtok = prompt_price_per_mtok
+        self.completion_price_per_mtok = completion_price_per_mtok
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self.stage_seconds = self._add(Histogram(
+            PREFIX + 'stage_duration_seconds', 'Wall time of one batch in a workflow stage', ('stage',)
+        ))
+        self.stage_emails = self._add(Counter(
+            PREFIX + 'stage_emails_total', 'Emails processed by a workflow stage', ('stage',)
+        ))
+        self.queue_wait_seconds = self._add(Histogram(
+            PREFIX + 'stage_queue_wait_seconds', 'Time a batch waited in the queue before a pipelined stage', ('stage',)
+        ))
+        self.email_seconds = self._add(Histogram(
+            PREFIX + 'email_processing_seconds', 'Time from classification start to the end of the last stage of an email'
+        ))
+        self.llm_seconds = self._add(Histogram(
+            PREFIX + 'llm_call_duration_seconds', 'Latency of one agent call attempt', ('agent',)
+        ))
+        self.llm_calls = self._add(Counter(
+            PREFIX + 'llm_calls_total', 'Agent call attempts by outcome (ok, retried, failed, replayed)', ('agent', 'outcome')
+        ))
+        self.llm_prompt_tokens = self._add(Counter(
+            PREFIX + 'llm_prompt_tokens_total', 'Prompt tokens sent to the model', ('agent',)
+        ))
+        self.llm_completion_tokens = self._add(Counter(
+            PREFIX + 'llm_completion_tokens_total', 'Completion tokens returned by the model', ('agent',)
+        ))
+        self.llm_cost = self._add(Counter(
+            PREFIX + 'llm_cost_usd_total', 'Estimated model cost from token counts and LLM_*_PRICE_PER_MTOK', ('agent',)
+        ))
+        self.llm_throttle_seconds = self._add(Counter(
+            PREFIX + 'llm_throttle_seconds_total', 'Time agent calls waited on the rate limits', ('agent',)
+        ))
+        self.cache_lookups = self._add(Counter(
+            PREFIX + 'result_cache_lookups_total', 'Result cache lookups by kind and result (hit, miss)', ('kind', 'result')
+        ))
+    
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def observe_stage(self, stage: str, seconds: float, emails: int):
+        """Record one batch of a workflow stage"""
+        self.stage_seconds.observe(seconds, stage=stage)
+        self.stage_emails.inc(emails, stage=stage)
+        self.flush(force=False)
+    
+    def observe_queue_wait(self, stage: str, seconds: float):
+        """Record how long a batch waited for a pipelined stage"""
+        self.queue_wait_seconds.observe(seconds, stage=stage)
+    
+    def observe_email(self, seconds: float):
+        """Record the end-to-end processing time of one email"""
+        self.email_seconds.observe(seconds)
+    
+    def observe_llm_call(
+        self,
+        agent: str,
+        seconds: float,
+        outcome: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        throttle_seconds: float = 0.0
+    ):
+        """Record one agent call attempt"""
+        self.llm_seconds.observe(seconds, agent=agent)
+        self.llm_calls.inc(agent=agent, outcome=outcome)
+        if prompt_tokens:
+            self.llm_prompt_tokens.inc(prompt_tokens, agent=agent)
+        if completion_tokens:
+            self.llm_completion_tokens.inc(completion_tokens, agent=agent)
+        cost = (prompt_tokens * self.prompt_price_per_mtok + completion_tokens * self.completion_price_per_mtok) / 1e6
+        if cost:
+            self.llm_cost.inc(cost, agent=agent)
+        if throttle_seconds:
+            self.llm_throttle_seconds.inc(throttle_seconds, agent=agent)
+    
+    def observe_cache_lookup(self, kind: str, hit: bool):
+        """Record one result cache lookup"""
+        self.cache_lookups.inc(kind=kind, result='hit' if hit else 'miss')
+    
+    @property
+    def _state_path(self) -> Path:
+        """File holding this process's totals in multiproc_dir"""
+        return self.multiproc_dir / f"{socket.gethostname()}-{os.getpid()}.json"
+    
+    def flush(self, force: bool = True):
+        """
+        Write this process's totals to multiproc_dir (no-op without one)
+        
+        Args:
+            force: Write even if the last write was less than FLUSH_INTERVAL ago
+        """
+        if self.multiproc_dir is None:
+            return
+        with self._flush_lock:
+            now = time.monotonic()
+            if not force and now - self._last_flush < FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+            state = {
+                name: [[list(key), value] for key, value in metric.state().items()]
+                for name, metric in self._metrics.items()
+            }
+            try:
+                self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._state_path.with_suffix('.tmp')
+                tmp_path.write_text(json.dumps(state))
+                os.replace(tmp_path, self._state_path)
+            except OSError as e:
+                logger.warning(f"⚠️  Could not write metrics to {self.multiproc_dir}: {e}")
+    
+    def merged_state(self) -> Dict[str, Dict]:
+        """
+        Add up the totals of this process and every process in multiproc_dir
+        
+        Returns:
+            Dictionary of metric name -> raw state (see Counter.state, Histogram.state)
+        """
+        merged = {name: metric.state() for name, metric in self._metrics.items()}
+        if self.multiproc_dir is None or not self.multiproc_dir.is_dir():
+            return merged
+        own_path = self._state_path
+        for path in self.multiproc_dir.glob('*.json'):
+            if path == own_path:
+                continue
+            try:
+                state = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # Being replaced, or left behind half-written by a crash
+                continue
+            for name, items in state.items():
+                metric = self._metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], {tuple(key): value for key, value in items})
+        return merged
+    
+    def render(self) -> str:
+        """
+        Get all metrics in the Prometheus text exposition format (version 0.0.4)
+        
+        Includes the totals of the other processes in multiproc_dir when set.
+        
+        Returns:
+            Metrics text, ending with a newline
+        """
+        merged = self.merged_state()
+        return '\n'.join(metric.render(merged[name]) for name, metric in self._metrics.items()) + '\n'
+    
+    def snapshot(self) -> Dict:
+        """Current totals; pass to report() to get one run's numbers"""
+        return {
+            name: metric.values()
+            for name, metric in self._metrics.items()
+        }
+    
+    def report(self, since: Optional[Dict] = None) -> Dict:
+        """
+        Get stage, agent call and cache totals
+        
+        Args:
+            since: snapshot() value; only activity after it is included
+        
+        Returns:
+            Dictionary with 'stages' (batches, emails, seconds, queue wait),
+            'agents' (calls, retries, failures, tokens, cost, seconds, throttle)
+            and 'cache' (lookups, hits) totals, plus the mean email processing time
+        """
+        since = since or {}
+        now = self.snapshot()
+        
+        def delta(metric) -> Dict:
+            before = since.get(metric.name, {})
+            if metric.kind == 'counter':
+                return {key: value - before.get(key, 0.0) for key, value in now[metric.name].items()}
+            return {
+                key: (count - before.get(key, (0, 0.0))[0], total - before.get(key, (0, 0.0))[1])
+                for key, (count, total) in now[metric.name].items()
+            }
+        
+        stages = {}
+        for (stage,), (batches, seconds) in delta(self.stage_seconds).items():
+            stages[stage] = {'batches': batches, 'emails': 0, 'seconds': seconds, 'queue_wait_seconds': 0.0}
+        for (stage,), emails in delta(self.stage_emails).items():
+            stages.setdefault(stage, {'batches': 0, 'emails': 0, 'seconds': 0.0, 'queue_wait_seconds': 0.0})['emails'] = int(emails)
+        for (stage,), (_, seconds) in delta(self.queue_wait_seconds).items():
+            if stage in stages:
+                stages[stage]['queue_wait_seconds'] = seconds
+        
+        agents = {}
+        
+        def agent_totals(agent: str) -> Dict:
+            return agents.setdefault(agent, {
+                'calls': 0, 'retries': 0, 'failures': 0, 'replayed': 0,
+                'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0, 'seconds': 0.0, 'throttle_seconds': 0.0,
+            })
+        
+        for (agent, outcome), count in delta(self.llm_calls).items():
+            totals = agent_totals(agent)
+            totals['calls'] += int(count)
+            if outcome in ('retried', 'failed', 'replayed'):
+                totals[{'retried': 'retries', 'failed': 'failures', 'replayed': 'replayed'}[outcome]] += int(count)
+        for (agent,), (_, seconds) in delta(self.llm_seconds).items():
+            agent_totals(agent)['seconds'] = seconds
+        for (agent,), tokens in delta(self.llm_prompt_tokens).items():
+            agent_totals(agent)['prompt_tokens'] = int(tokens)
+        for (agent,), tokens in delta(self.llm_completion_tokens).items():
+            agent_totals(agent)['completion_tokens'] = int(tokens)
+        for (agent,), cost in delta(self.llm_cost).items():
+            agent_totals(agent)['cost_usd'] = cost
+        for (agent,), seconds in delta(self.llm_throttle_seconds).items():
+            agent_totals(agent)['throttle_seconds'] = seconds
+        
+        cache = {}
+        for (kind, result), count in delta(self.cache_lookups).items():
+            totals = cache.setdefault(kind, {'lookups': 0, 'hits': 0})
+            totals['lookups'] += int(count)
+            if result == 'hit':
+                totals['hits'] += int(count)
+        
+        email_count, email_seconds = delta(self.email_seconds).get((), (0, 0.0))
+        return {
+            'stages': {stage: totals for stage, totals in stages.items() if totals['batches'] or totals['emails']},
+            'agents': {agent: totals for agent, totals in agents.items() if totals['calls']},
+            'cache': {kind: totals for kind, totals in cache.items() if totals['lookups']},
+            'emails': email_count,
+            'mean_email_seconds': email_seconds / email_count if email_count else 0.0,
+        }
+    
+    def print_report(self, since: Optional[Dict] = None):
+        """Log per-stage time and per-agent token totals"""
+        report = self.report(since)
+        if not report['stages'] and not report['agents']:
+            return
+        total_seconds = sum(stats['seconds'] for stats in report['stages'].values())
+        logger.info(f"📈 Stage timings ({report['emails']} emails, mean {report['mean_email_seconds'] * 1000:.0f} ms per email end to end):")
+        for stage, stats in report['stages'].items():
+            share = stats['seconds'] / total_seconds if total_seconds else 0.0
+            per_email = stats['seconds'] / stats['emails'] * 1000 if stats['emails'] else 0.0
+            logger.info(
+                f"   - {stage}: {stats['seconds']:.1f}s ({share:.0%}) over {stats['batches']} batches, "
+                f"{per_email:.0f} ms/email, queue wait {stats['queue_wait_seconds']:.1f}s"
+            )
+        for agent, stats in report['agents'].items():
+            logger.info(
+                f"🪙 {agent}: {stats['calls']} calls ({stats['retries']} retried, {stats['failures']} failed, "
+                f"{stats['replayed']} replayed), {stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens (${stats['cost_usd']:.4f}), "
+                f"{stats['seconds']:.1f}s in calls, {stats['throttle_seconds']:.1f}s throttled"
+            )
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Get the process-wide metrics registry
+    
+    Returns:
+        Shared MetricsRegistry
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry(**get_metrics_config())
+        return _metrics
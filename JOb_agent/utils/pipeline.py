@@ -0,0 +1,274 @@
+"""
+Pipeline - stages run as worker pools connected by bounded queues
+
+A Pipeline pulls items from a source iterator on its own thread and passes
+them through a list of Stages. Each stage has a pool of worker threads that
+take items from the stage's input queue, call the stage function and put
+the result on the next stage's queue. Queues are bounded, so a slow stage
+blocks the stages before it (backpressure) instead of letting items pile up
+in memory. Per-stage counters record items, busy time, time items waited in
+the input queue, time workers were blocked by a full output queue and the
+queue depth seen by each arriving item; queue waits also go to the
+utils.metrics histogram of the stage.
+
+Example:
+    pipeline = Pipeline([Stage('classify', classify, workers=2), Stage('save', save)], queue_size=4)
+    outputs = pipeline.run(batches, size=len)
+    pipeline.print_report()
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+import queue
+import threading
+import time
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Seconds between stop checks while a worker waits on a queue
+POLL_INTERVAL = 0.1
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class Stage:
+    """One pipeline stage: a function applied to each item by a pool of workers"""
+    
+    def __init__(self, name: str, fn: Callable, workers: int = 1):
+        """
+        Initialize a stage
+        
+        Args:
+            name: Stage name used in the report
+            fn: Function called with each item; its return value is passed
+                to the next stage, and None drops the item
+            workers: Worker threads running fn concurrently
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear the counters"""
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+    
+    def record(self, items: int, busy: float, queue_wait: float = 0.0):
+        """Count one processed item"""
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self.busy_seconds += busy
+            self.queue_wait_seconds += queue_wait
+    
+    def record_put(self, depth: int, blocked: float):
+        """Count one item put on the next queue and the depth it found"""
+        with self._lock:
+            self.blocked_seconds += blocked
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+    
+    def report(self, elapsed: float) -> Dict:
+        """
+        Get this stage's counters
+        
+        Args:
+            elapsed: Wall time of the pipeline run in seconds
+        
+        Returns:
+            Dictionary with items, throughput, utilization of the worker
+            pool, mean queue wait, backpressure time and output queue depth
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'batches': self.batches,
+                'items': self.items,
+                'items_per_second': self.items / elapsed if elapsed else 0.0,
+                'busy_seconds': round(self.busy_seconds, 3),
+                'utilization': self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0,
+                'mean_queue_wait_seconds': self.queue_wait_seconds / self.batches if self.batches else 0.0,
+                'blocked_seconds': round(self.blocked_seconds, 3),
+                'mean_queue_depth': self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+                'max_queue_depth': self.max_depth,
+            }
+
+
+class Pipeline:
+    """Runs a source iterator through stages connected by bounded queues"""
+    
+    def __init__(self, stages: List[Stage], queue_size: int = 4, source_name: str = 'fetch'):
+        """
+        Initialize a pipeline
+        
+        Args:
+            stages: Stages in order
+            queue_size: Capacity of each queue between stages
+            source_name: Name of the source stage in the report
+        """
+        self.source = Stage(source_name, None)
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.elapsed = 0.0
+    
+    def run(self, source: Iterable, size: Callable = lambda item: 1) -> List:
+        """
+        Pass every item of source through all stages
+        
+        Stages overlap: while one item is in the last stage, later items
+        are already being fetched and processed by earlier stages. Items
+        may finish out of order when a stage has several workers.
+        
+        Args:
+            source: Iterable of items; consumed on the pipeline's source thread
+            size: Function giving the number of units in an item (e.g. emails
+                in a batch) for the throughput counters
+        
+        Returns:
+            Return values of the last stage, in completion order
+        
+        Raises:
+            Exception: The first exception raised by the source or a stage;
+                the other stages stop taking new items when it happens
+        """
+        for stage in [self.source] + self.stages:
+            stage.reset()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        stop = threading.Event()
+        errors = []
+        outputs = []
+        outputs_lock = threading.Lock()
+        remaining = [stage.workers for stage in self.stages]
+        remaining_lock = threading.Lock()
+        
+        def fail(error: Exception):
+            errors.append(error)
+            stop.set()
+        
+        def put(stage: Stage, target: queue.Queue, item) -> bool:
+            """Put an item, waiting while the queue is full; False if stopped"""
+            started = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    target.put((time.perf_counter(), item), timeout=POLL_INTERVAL)
+                except queue.Full:
+                    continue
+                stage.record_put(target.qsize(), time.perf_counter() - started)
+                return True
+            return False
+        
+        def close(index: int):
+            """Send one end marker per worker of a stage; workers exit by themselves once stopped"""
+            for _ in range(self.stages[index].workers):
+                while not stop.is_set():
+                    try:
+                        queues[index].put((None, _DONE), timeout=POLL_INTERVAL)
+                        break
+                    except queue.Full:
+                        continue
+        
+        def finish(index: int):
+            """Close the next queue once the last worker of a stage exits"""
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(self.stages):
+                close(index + 1)
+        
+        def produce():
+            try:
+                iterator = iter(source)
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    self.source.record(size(item), time.perf_counter() - started)
+                    if not put(self.source, queues[0], item):
+                        break
+            except BaseException as e:
+                # Also KeyboardInterrupt/SystemExit, so the other stages stop instead of waiting forever
+                fail(e)
+            finally:
+                close(0)
+        
+        def work(index: int):
+            stage = self.stages[index]
+            try:
+                while not stop.is_set():
+                    try:
+                        enqueued_at, item = queues[index].get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        continue
+                    if item is _DONE:
+                        break
+                    started = time.perf_counter()
+                    units = size(item)
+                    result = stage.fn(item)
+                    stage.record(units, time.perf_counter() - started, started - enqueued_at)
+                    get_metrics().observe_queue_wait(stage.name, started - enqueued_at)
+                    if result is None:
+                        continue
+                    if index + 1 < len(self.stages):
+                        if not put(stage, queues[index + 1], result):
+                            break
+                    else:
+                        with outputs_lock:
+                            outputs.append(result)
+            except BaseException as e:
+                fail(e)
+            finally:
+                finish(index)
+        
+        started = time.perf_counter()
+        threads = [threading.Thread(target=produce, name=f"pipeline-{self.source.name}", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+                for n in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            stop.set()
+            raise
+        self.elapsed = time.perf_counter() - started
+        
+        if errors:
+            raise errors[0]
+        return outputs
+    
+    def report(self) -> Dict[str, Dict]:
+        """
+        Get per-stage counters of the last run
+        
+        Returns:
+            Dictionary of stage name -> Stage.report(), source first
+        """
+        return {stage.name: stage.report(self.elapsed) for stage in [self.source] + self.stages}
+    
+    def print_report(self):
+        """Log per-stage throughput, queue depth and backpressure"""
+        logger.info(f"🏭 Pipeline: {self.elapsed:.1f}s wall time, queue size {self.queue_size}")
+        for name, stats in self.report().items():
+            logger.info(
+                f"   - {name} x{stats['workers']}: {stats['items']} emails "
+                f"({stats['items_per_second']:.1f}/s, {stats['utilization']:.0%} busy), "
+                f"queue wait {stats['mean_queue_wait_seconds'] * 1000:.0f} ms, "
+                f"out-queue depth avg {stats['mean_queue_depth']:.1f} / max {stats['max_queue_depth']}, "
+                f"blocked {stats['blocked_seconds']:.1f}s"
+            )
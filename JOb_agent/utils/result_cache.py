@@ -0,0 +1,272 @@
+"""
+Result cache - persistent store of classification and extraction results
+
+Entries are keyed by RFC Message-ID, a hash of the normalized content that
+was sent to the model, the prompt version and the model, so re-seeing an
+email (overlapping --days windows, unread re-runs, reprocessing after a
+crash) costs no LLM call, while a changed prompt, model or normalizer simply
+misses. Entries expire after RESULT_CACHE_TTL_DAYS.
+
+Usage:
+    python -m utils.result_cache stats
+    python -m utils.result_cache prune
+    python -m utils.result_cache clear
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from utils.config import get_cache_config
+from utils.metrics import get_metrics
+
+CLASSIFICATION = 'classification'
+EXTRACTION = 'extraction'
+FUSED = 'fused'
+
+
+def prompt_version(template: str, *parts: str) -> str:
+    """
+    Version string for a prompt template
+    
+    Args:
+        template: Prompt template text; editing it changes the version
+        *parts: Other inputs that change results (normalizer version, ...)
+    
+    Returns:
+        Short hash identifying this prompt
+    """
+    return hashlib.sha256('\x00'.join((template,) + parts).encode('utf-8')).hexdigest()[:16]
+
+
+def content_hash(*fields: Optional[str]) -> str:
+    """Hash of the email content fields that go into a prompt"""
+    return hashlib.sha256('\x00'.join(str(f or '') for f in fields).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed cache of agent results with TTL and version invalidation"""
+    
+    def __init__(self, path: str, ttl_seconds: int):
+        """
+        Initialize the cache
+        
+        Args:
+            path: SQLite database file
+            ttl_seconds: Age after which entries are ignored and pruned
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                cache_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def _key(kind: str, message_id: str, content: str, version: str, model: str) -> str:
+        """Cache key of one result"""
+        return hashlib.sha256('\x00'.join((kind, message_id, content, version, model)).encode('utf-8')).hexdigest()
+    
+    def get(self, kind: str, message_id: Optional[str], content: str, version: str, model: str) -> Optional[Dict]:
+        """
+        Look up a cached result
+        
+        Args:
+            kind: CLASSIFICATION, EXTRACTION or FUSED
+            message_id: Email Message-ID (emails without one are never cached)
+            content: content_hash() of the prompt inputs
+            version: prompt_version() of the prompt
+            model: Model id
+        
+        Returns:
+            Cached result dictionary, or None on a miss
+        """
+        if not message_id:
+            return None
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE cache_key = ?",
+                (self._key(kind, message_id, content, version, model),)
+            ).fetchone()
+            hit = bool(row) and time.time() - row[1] <= self.ttl_seconds
+            self._counters[f"{kind}_{'hits' if hit else 'misses'}"] += 1
+        get_metrics().observe_cache_lookup(kind, hit)
+        return json.loads(row[0]) if hit else None
+    
+    def put(self, kind: str, message_id: Optional[str], content: str, version: str, model: str, value: Dict):
+        """
+        Store a result
+        
+        Args:
+            kind: CLASSIFICATION, EXTRACTION or FUSED
+            message_id: Email Message-ID
+            content: content_hash() of the prompt inputs
+            version: prompt_version() of the prompt
+            model: Model id
+            value: JSON-serializable result dictionary
+        """
+        if not message_id:
+            return
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (cache_key, kind, message_id, prompt_version, model, value, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(kind, message_id, content, version, model),
+                    kind, message_id, version, model,
+                    json.dumps(value, default=str),
+                    time.time(),
+                )
+            )
+            self._conn.commit()
+    
+    def counters(self) -> Counter:
+        """Hit/miss counters since the cache was opened (copy)"""
+        with self._lock:
+            return Counter(self._counters)
+    
+    @staticmethod
+    def hit_ratios(counters: Counter) -> Dict[str, Dict]:
+        """
+        Summarize hit/miss counters
+        
+        Args:
+            counters: counters() value, or the difference of two for one run
+        
+        Returns:
+            Dictionary per kind with hits, lookups and hit_ratio
+        """
+        summary = {}
+        for kind in (CLASSIFICATION, EXTRACTION, FUSED):
+            hits = counters[f'{kind}_hits']
+            lookups = hits + counters[f'{kind}_misses']
+            summary[kind] = {
+                'hits': hits,
+                'lookups': lookups,
+                'hit_ratio': hits / lookups if lookups else 0.0,
+            }
+        return summary
+    
+    def prune(self, current_versions: Optional[Dict[str, Iterable[str]]] = None) -> int:
+        """
+        Delete expired entries and entries of outdated prompt versions
+        
+        Args:
+            current_versions: Map of kind to its current prompt versions (a
+                kind can have several, e.g. single and packed classification);
+                entries of other versions are deleted
+        
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM results WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            removed = cursor.rowcount
+            for kind, versions in (current_versions or {}).items():
+                versions = [versions] if isinstance(versions, str) else list(versions)
+                placeholders = ', '.join('?' * len(versions))
+                cursor = self._conn.execute(
+                    f"DELETE FROM results WHERE kind = ? AND prompt_version NOT IN ({placeholders})",
+                    (kind, *versions)
+                )
+                removed += cursor.rowcount
+            self._conn.commit()
+        return removed
+    
+    def clear(self) -> int:
+        """Remove every entry; returns the number removed"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM results").rowcount
+            self._conn.commit()
+        return removed
+    
+    def stats(self) -> Dict:
+        """Get entry counts per kind"""
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*) FROM results GROUP BY kind").fetchall()
+        return {
+            'entries': dict(rows),
+            'path': str(self.path),
+            'ttl_days': self.ttl_seconds / 86400,
+        }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get the process-wide result cache, creating it on first use
+    
+    Returns:
+        Shared ResultCache, or None if RESULT_CACHE_ENABLED is false
+    """
+    global _cache
+    cache_config = get_cache_config()
+    if not cache_config['result_cache_enabled']:
+        return None
+    
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                cache_config['result_cache_path'],
+                cache_config['result_cache_ttl_seconds']
+            )
+        return _cache
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Manage the classification/extraction result cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Show entry counts')
+    subparsers.add_parser('prune', help='Remove expired entries and entries of old prompt versions')
+    subparsers.add_parser('clear', help='Remove all cached results')
+    args = parser.parse_args()
+    
+    cache_config = get_cache_config()
+    cache = ResultCache(cache_config['result_cache_path'], cache_config['result_cache_ttl_seconds'])
+    
+    if args.command == 'stats':
+        stats = cache.stats()
+        print(f"Cache: {stats['path']} (TTL {stats['ttl_days']:.0f} days)")
+        for kind, count in sorted(stats['entries'].items()):
+            print(f"  {kind}: {count} entries")
+    elif args.command == 'prune':
+        from agents.email_classifier_agent import CLASSIFIER_PROMPT_VERSION, BATCH_CLASSIFIER_PROMPT_VERSION
+        from agents.data_extractor_agent import EXTRACTOR_PROMPT_VERSION
+        from agents.email_analyzer_agent import FUSED_PROMPT_VERSION
+        
+        removed = cache.prune({
+            CLASSIFICATION: (CLASSIFIER_PROMPT_VERSION, BATCH_CLASSIFIER_PROMPT_VERSION),
+            EXTRACTION: EXTRACTOR_PROMPT_VERSION,
+            FUSED: FUSED_PROMPT_VERSION,
+        })
+        print(f"✓ Pruned {removed} results")
+    elif args.command == 'clear':
+        removed = cache.clear()
+        print(f"✓ Removed {removed} results")
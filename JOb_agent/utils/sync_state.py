@@ -0,0 +1,102 @@
+"""
+Persistent IMAP sync state (UIDVALIDITY + highest seen UID) per account and folder
+
+State is stored in the mailbox_sync_state table of the database the agents
+write to (see agents.database_manager_agent.get_local_session): the
+standalone SQLite database, or the backend database when running in the API,
+its sync workers or Celery workers, so every worker process continues from
+the same watermark.
+"""
+from typing import Dict, Optional
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _open_store():
+    """
+    Open a session on the database holding the sync state
+    
+    Returns:
+        (session, MailboxSyncState model) tuple
+    
+    Raises:
+        ImportError: Neither the backend nor the standalone schema is available
+    """
+    from agents.database_manager_agent import get_local_session
+    
+    session, is_backend = get_local_session()
+    if is_backend:
+        from ios_app.backend.models.database import MailboxSyncState
+    else:
+        from models.database import MailboxSyncState
+    return session, MailboxSyncState
+
+
+def load_sync_state(account: str, folder: str) -> Optional[Dict]:
+    """
+    Load the stored sync position for an account/folder
+    
+    Args:
+        account: Account key (email_address@imap_server)
+        folder: IMAP folder name
+    
+    Returns:
+        Dictionary with uid_validity and last_uid, or None if never synced
+    """
+    session, MailboxSyncState = _open_store()
+    try:
+        state = session.query(MailboxSyncState).filter_by(
+            account=account,
+            folder=folder
+        ).first()
+        if not state:
+            return None
+        return {
+            'uid_validity': state.uid_validity,
+            'last_uid': state.last_uid,
+            'last_sync': state.last_sync,
+        }
+    finally:
+        session.close()
+
+
+def save_sync_state(account: str, folder: str, uid_validity: int, last_uid: int) -> bool:
+    """
+    Store the sync position for an account/folder
+    
+    Args:
+        account: Account key (email_address@imap_server)
+        folder: IMAP folder name
+        uid_validity: UIDVALIDITY of the folder at sync time
+        last_uid: Highest UID that has been fetched
+    
+    Returns:
+        True if saved, False otherwise
+    """
+    session, MailboxSyncState = _open_store()
+    try:
+        state = session.query(MailboxSyncState).filter_by(
+            account=account,
+            folder=folder
+        ).first()
+        if state:
+            state.uid_validity = uid_validity
+            state.last_uid = last_uid
+            state.last_sync = datetime.utcnow()
+        else:
+            session.add(MailboxSyncState(
+                account=account,
+                folder=folder,
+                uid_validity=uid_validity,
+                last_uid=last_uid,
+            ))
+        session.commit()
+        return True
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Could not save sync state for {account}/{folder}: {e}")
+        return False
+    finally:
+        session.close()
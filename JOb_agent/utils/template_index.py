@@ -0,0 +1,529 @@
+"""
+ATS template index - fingerprints recurring email templates and learns slot extractors
+
+Confirmations and rejections mostly come from a few dozen applicant tracking
+system templates that differ only in company and role. Each email is
+fingerprinted with a 64-bit SimHash over word shingles of its subject and
+normalized body, with URLs, addresses and numbers masked. Emails within
+TEMPLATE_MAX_DISTANCE bits share a template. Once a template has
+TEMPLATE_MIN_EXAMPLES consistent LLM extractions, a regex per slot (the text
+around company_name and role_title in the examples) and the template's
+status fill new emails of that template without the extractor agent. The
+template also stores its examples' classifier label, and the fast path is
+only taken for emails classified the same way: an ATS's confirmation and
+rejection can be a few bits apart. A sample of fast-path extractions is
+re-checked by the extractor to measure accuracy; a disagreement sends the
+template back to learning.
+
+The index file is written under an exclusive lock and merged with what
+other workflow processes saved in the meantime, and is readable by its
+owner only (examples hold email text).
+
+Usage:
+    python -m utils.template_index stats
+    python -m utils.template_index clear
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+from utils.config import get_template_config
+from utils.text_normalizer import normalize_email
+
+try:
+    import fcntl
+except ImportError:
+    # Windows; the index file is locked with msvcrt instead
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# 2: templates and examples carry the classifier label
+INDEX_VERSION = 2
+
+# Slots filled by the learned extractors; status is a per-template constant
+SLOTS = ('company_name', 'role_title')
+
+# Characters of normalized body fingerprinted and searched by slot patterns
+TEMPLATE_TEXT_CHARS = 3000
+
+# Examples kept per template for learning
+MAX_EXAMPLES = 5
+
+# Templates kept in the index
+MAX_TEMPLATES = 5000
+
+# Longest slot value a learned pattern may capture
+MAX_SLOT_CHARS = 80
+
+# Context words tried on each side of a slot, most specific first
+_CONTEXT_WORDS = [(3, 2), (3, 1), (2, 2), (2, 1), (1, 2), (1, 1), (3, 0), (2, 0), (1, 0)]
+
+# Variable tokens masked before fingerprinting. Company names and role titles
+# are mostly runs of capitalized words, so each run becomes one placeholder
+_MASKS = [
+    (re.compile(r'https?://\S+|www\.\S+'), ' url '),
+    (re.compile(r'\S+@\S+'), ' address '),
+    (re.compile(r'\d+'), ' 0 '),
+    (re.compile(r"\b[A-Z][\w&'.-]*(?:[ \t]+[A-Z][\w&'.-]*)*"), ' name '),
+]
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def template_text(email: Dict) -> str:
+    """Subject and normalized body of an email, as fingerprinted and searched by slot patterns"""
+    return f"{email.get('subject') or ''}\n{normalize_email(email)[:TEMPLATE_TEXT_CHARS]}"
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """
+    64-bit SimHash of the word shingles of a text with variable tokens masked
+    
+    Args:
+        text: Text to fingerprint
+        shingle_size: Words per shingle
+    
+    Returns:
+        Fingerprint; similar texts differ in few bits
+    """
+    masked = text
+    for pattern, replacement in _MASKS:
+        masked = pattern.sub(replacement, masked)
+    words = _WORD_PATTERN.findall(masked.lower())
+    shingles = [' '.join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))]
+    
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints"""
+    return bin(a ^ b).count('1')
+
+
+def _context_pattern(context: str) -> str:
+    """Regex for a literal context with any whitespace run matching any whitespace"""
+    return r'\s+'.join(re.escape(part) for part in re.split(r'\s+', context))
+
+
+def slot_pattern_candidates(text: str, value: str) -> List[str]:
+    """
+    Regexes capturing ``value`` from ``text`` by the words around it
+    
+    Args:
+        text: template_text() of an example
+        value: Slot value extracted from the example
+    
+    Returns:
+        Candidate patterns with a 'value' group, most specific first
+        (empty if the value does not occur in the text)
+    """
+    start = text.lower().find(value.lower())
+    if start < 0:
+        return []
+    before, after = text[:start], text[start + len(value):]
+    
+    candidates = []
+    for left_words, right_words in _CONTEXT_WORDS:
+        left = re.search(r'(?:\S+\s+){%d}\S*$' % left_words, before)
+        right = re.match(r'\S*(?:\s+\S+){%d}' % right_words, after)
+        if not left or not right:
+            continue
+        right_pattern = _context_pattern(right.group(0)) if right.group(0) else r'[ \t]*$'
+        candidates.append(
+            _context_pattern(left.group(0)) +
+            r'(?P<value>[^\n]{1,%d}?)' % MAX_SLOT_CHARS +
+            right_pattern
+        )
+    return list(dict.fromkeys(candidates))
+
+
+def apply_slot_pattern(pattern: str, text: str) -> Optional[str]:
+    """Capture a slot value with a learned pattern"""
+    match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+    if not match:
+        return None
+    return match.group('value').strip() or None
+
+
+def _same(a: Optional[str], b: Optional[str]) -> bool:
+    """Compare two extracted values ignoring case and surrounding whitespace"""
+    return (a or '').strip().lower() == (b or '').strip().lower()
+
+
+def _is_complete_extraction(extracted: Dict) -> bool:
+    """Check that an extractor result filled every slot and was not an error fallback"""
+    return (
+        all(extracted.get(slot) for slot in SLOTS) and
+        bool(extracted.get('status')) and
+        bool(extracted.get('classification')) and
+        not str(extracted.get('additional_notes') or '').startswith('Extraction error')
+    )
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Hold an exclusive lock on ``<path>.lock`` (shared by all processes writing the index)"""
+    lock_path = path.with_suffix(path.suffix + '.lock')
+    with open(lock_path, 'a+b') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TemplateIndex:
+    """SimHash template index with learned slot extractors and per-run counters"""
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_distance: int = 4,
+        min_examples: int = 3,
+        audit_rate: float = 0.1
+    ):
+        """
+        Initialize an empty index
+        
+        Args:
+            path: JSON file the index is saved to
+            max_distance: Fingerprint bits that may differ within one template
+            min_examples: Consistent extractions needed before a template is used
+            audit_rate: Share of fast-path extractions that should be audited
+        """
+        self.path = Path(path) if path else None
+        self.max_distance = max_distance
+        self.min_examples = min_examples
+        self.audit_rate = audit_rate
+        self.templates: List[Dict] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.counters = {
+            'lookups': 0, 'matched': 0, 'label_mismatch': 0, 'fast_path': 0,
+            'audited': 0, 'audit_agreed': 0, 'learned': 0,
+        }
+    
+    def find(self, fingerprint: int) -> Optional[Dict]:
+        """
+        Get the nearest template within max_distance
+        
+        Args:
+            fingerprint: simhash() of an email
+        
+        Returns:
+            Template dictionary, or None
+        """
+        best, best_distance = None, self.max_distance + 1
+        for template in self.templates:
+            distance = hamming_distance(fingerprint, template['fingerprint'])
+            if distance < best_distance:
+                best, best_distance = template, distance
+        return best
+    
+    def extract(self, email: Dict, classification: Dict) -> Optional[Dict]:
+        """
+        Fill company, role and status from a learned template
+        
+        Args:
+            email: Email dictionary
+            classification: Classification result of the email
+        
+        Returns:
+            Extracted data dictionary (same shape as extract_data_task), or
+            None if the email matches no ready template, was classified
+            differently from the template's examples or a slot is not found
+        """
+        text = template_text(email)
+        fingerprint = simhash(text)
+        with self._lock:
+            self.counters['lookups'] += 1
+            template = self.find(fingerprint)
+            if template is None:
+                return None
+            self.counters['matched'] += 1
+            if not template.get('patterns'):
+                return None
+            if classification.get('classification') != template['classification']:
+                self.counters['label_mismatch'] += 1
+                return None
+            
+            values = {slot: apply_slot_pattern(pattern, text) for slot, pattern in template['patterns'].items()}
+            if not all(values.values()):
+                return None
+            
+            self.counters['fast_path'] += 1
+            template['hits'] = template.get('hits', 0) + 1
+            return {
+                'company_name': values['company_name'],
+                'role_title': values['role_title'],
+                'location': None,
+                'status': template['status'],
+                'application_date': None,
+                'salary_range': None,
+                'application_url': None,
+                'next_steps': None,
+                'interview_datetime': None,
+                'contact_person': None,
+                'additional_notes': f"Extracted by ATS template {template['id']}",
+                'email_subject': email.get('subject', ''),
+                'email_from': email.get('from', ''),
+                'email_date': email.get('date', ''),
+                'email_message_id': email.get('message_id'),
+                'classification': classification.get('classification', 'unknown'),
+                'extraction_source': 'template',
+                'template_id': template['id'],
+            }
+    
+    def should_audit(self) -> bool:
+        """Decide whether a fast-path extraction should also go to the extractor agent"""
+        return random.random() < self.audit_rate
+    
+    def record_audit(self, fast_result: Dict, llm_result: Dict) -> bool:
+        """
+        Compare a fast-path extraction with the extractor agent's
+        
+        A disagreement clears the template's patterns; learn() with the
+        extractor result then rebuilds them if the examples allow.
+        
+        Args:
+            fast_result: extract() result
+            llm_result: extract_data_task result for the same email
+        
+        Returns:
+            True if company, role and status all agree (False, and not
+            counted, when the extractor failed)
+        """
+        if not _is_complete_extraction(llm_result):
+            return False
+        agreed = all(_same(fast_result.get(field), llm_result.get(field)) for field in SLOTS + ('status',))
+        with self._lock:
+            self.counters['audited'] += 1
+            self.counters['audit_agreed'] += int(agreed)
+            if not agreed:
+                for template in self.templates:
+                    if template['id'] == fast_result.get('template_id'):
+                        template['patterns'] = {}
+            return agreed
+    
+    def learn(self, email: Dict, extracted: Dict):
+        """
+        Add an extractor agent result as an example of the email's template
+        
+        Args:
+            email: Email dictionary
+            extracted: extract_data_task (or fused analyzer) result
+        """
+        if not _is_complete_extraction(extracted):
+            return
+        
+        text = template_text(email)
+        fingerprint = simhash(text)
+        with self._lock:
+            template = self.find(fingerprint)
+            if template is None:
+                if len(self.templates) >= MAX_TEMPLATES:
+                    return
+                template = {
+                    'id': self._next_id, 'fingerprint': fingerprint, 'examples': [],
+                    'patterns': {}, 'status': None, 'classification': None, 'hits': 0,
+                }
+                self._next_id += 1
+                self.templates.append(template)
+            
+            example = {'text': text, 'status': extracted['status'], 'classification': extracted['classification']}
+            example.update({slot: extracted[slot] for slot in SLOTS})
+            template['examples'] = (template['examples'] + [example])[-MAX_EXAMPLES:]
+            self.counters['learned'] += 1
+            self._fit(template)
+    
+    def _fit(self, template: Dict):
+        """Learn slot patterns, status and classifier label of a template from its examples"""
+        examples = template['examples']
+        template['patterns'] = {}
+        template['status'] = None
+        template['classification'] = None
+        if len(examples) < self.min_examples:
+            return
+        
+        statuses = {example['status'].strip().lower() for example in examples}
+        labels = {example['classification'] for example in examples}
+        if len(statuses) != 1 or len(labels) != 1:
+            return
+        
+        patterns = {}
+        for slot in SLOTS:
+            pattern = next(
+                (
+                    candidate
+                    for candidate in slot_pattern_candidates(examples[-1]['text'], examples[-1][slot])
+                    if all(_same(apply_slot_pattern(candidate, example['text']), example[slot]) for example in examples)
+                ),
+                None
+            )
+            if pattern is None:
+                return
+            patterns[slot] = pattern
+        
+        template['patterns'] = patterns
+        template['status'] = examples[-1]['status']
+        template['classification'] = examples[-1]['classification']
+    
+    def merge(self, other: 'TemplateIndex'):
+        """
+        Add the templates and examples of another index (e.g. the saved file
+        another process wrote since this one loaded it)
+        
+        Args:
+            other: Index to merge into this one
+        """
+        with self._lock:
+            for theirs in other.templates:
+                ours = self.find(theirs['fingerprint'])
+                if ours is None:
+                    if len(self.templates) >= MAX_TEMPLATES:
+                        continue
+                    ours = dict(theirs, id=self._next_id, examples=[])
+                    self._next_id += 1
+                    self.templates.append(ours)
+                known = {example['text'] for example in ours['examples']}
+                new_examples = [example for example in theirs['examples'] if example['text'] not in known]
+                ours['examples'] = (ours['examples'] + new_examples)[-MAX_EXAMPLES:]
+                ours['hits'] = max(ours.get('hits', 0), theirs.get('hits', 0))
+                self._fit(ours)
+    
+    def report(self) -> Dict:
+        """
+        Get template coverage and fast-path accuracy for this run
+        
+        Returns:
+            Dictionary with lookups, template coverage, fast-path rate,
+            audit accuracy and the number of ready templates
+        """
+        counters = self.counters
+        lookups = counters['lookups']
+        return dict(
+            counters,
+            coverage=counters['matched'] / lookups if lookups else 0.0,
+            fast_path_rate=counters['fast_path'] / lookups if lookups else 0.0,
+            accuracy=counters['audit_agreed'] / counters['audited'] if counters['audited'] else None,
+            templates=len(self.templates),
+            ready_templates=sum(1 for template in self.templates if template.get('patterns')),
+        )
+    
+    def print_report(self):
+        """Log template coverage and fast-path accuracy"""
+        report = self.report()
+        if not report['lookups']:
+            return
+        accuracy = f"{report['accuracy']:.0%} of {report['audited']} audited" if report['accuracy'] is not None else "not audited"
+        logger.info(
+            f"🧩 ATS templates: {report['matched']}/{report['lookups']} matched ({report['coverage']:.0%}), "
+            f"{report['fast_path']} extracted without LLM ({report['fast_path_rate']:.0%}), accuracy {accuracy}"
+        )
+        logger.info(f"   {report['ready_templates']}/{report['templates']} templates ready")
+    
+    def to_dict(self) -> Dict:
+        """Serializable form of the index"""
+        return {'version': INDEX_VERSION, 'next_id': self._next_id, 'templates': self.templates}
+    
+    def save(self, path: Optional[str] = None):
+        """
+        Write the index as JSON, merged with the file's current contents
+        
+        Concurrent workflows (e.g. the sync engine's accounts) each hold an
+        index; under the file lock this one first takes in what the others
+        saved, so no process overwrites another's templates.
+        """
+        path = Path(path) if path else self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _file_lock(path):
+            self.merge(TemplateIndex.load(str(path), max_distance=self.max_distance, min_examples=self.min_examples))
+            with self._lock:
+                data = json.dumps(self.to_dict())
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            # Examples hold email text: owner-only permissions
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'TemplateIndex':
+        """Load an index saved with save(); a missing or outdated file gives an empty index"""
+        index = cls(path=path, **kwargs)
+        try:
+            data = json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return index
+        if data.get('version') != INDEX_VERSION:
+            return index
+        index.templates = data['templates']
+        index._next_id = data['next_id']
+        # Re-fit with the current thresholds
+        for template in index.templates:
+            index._fit(template)
+        return index
+
+
+def load_template_index() -> Optional[TemplateIndex]:
+    """
+    Load the template index if enabled
+    
+    Returns:
+        TemplateIndex (empty on first use), or None if TEMPLATE_INDEX_ENABLED is false
+    """
+    template_config = get_template_config()
+    if not template_config['template_index_enabled']:
+        return None
+    return TemplateIndex.load(
+        template_config['template_index_path'],
+        max_distance=template_config['max_distance'],
+        min_examples=template_config['min_examples'],
+        audit_rate=template_config['audit_rate'],
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Manage the ATS template index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='List templates')
+    subparsers.add_parser('clear', help='Remove all templates')
+    args = parser.parse_args()
+    
+    template_config = get_template_config()
+    index_path = template_config['template_index_path']
+    
+    if args.command == 'stats':
+        index = TemplateIndex.load(index_path, min_examples=template_config['min_examples'])
+        report = index.report()
+        print(f"Index: {index_path} ({report['ready_templates']}/{report['templates']} templates ready)")
+        for template in sorted(index.templates, key=lambda t: -len(t['examples'])):
+            state = 'ready' if template.get('patterns') else 'learning'
+            subject = template['examples'][-1]['text'].split('\n', 1)[0][:60] if template['examples'] else ''
+            print(f"  #{template['id']}: {state}, {len(template['examples'])} examples, {template.get('hits', 0)} hits - {subject}")
+    elif args.command == 'clear':
+        Path(index_path).unlink(missing_ok=True)
+        print(f"✓ Removed {index_path}")
@@ -0,0 +1,268 @@
+"""
+Email body normalization - turns raw bodies into compact text before LLM calls
+
+HTML is converted to text, quoted reply history and boilerplate footers are
+stripped, whitespace is collapsed, and the result is truncated by token count
+rather than characters.
+"""
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+import html
+import logging
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    # Optional; token counts fall back to a ~4 characters per token estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the normalization rules change, so cached outputs are not reused
+NORMALIZER_VERSION = '1'
+
+# Tags whose content is never visible text
+_SKIP_TAGS = {'script', 'style', 'head', 'title', 'noscript'}
+
+# Tags that start a new line of text
+_BLOCK_TAGS = {
+    'p', 'div', 'br', 'tr', 'li', 'ul', 'ol', 'table', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'blockquote', 'section', 'article', 'header', 'footer',
+}
+
+# Lines after which everything is quoted reply history
+_QUOTE_HEADER_PATTERNS = [
+    re.compile(r'^\s*On .{0,200}wrote:\s*$', re.IGNORECASE),
+    re.compile(r'^\s*-{2,}\s*Original Message\s*-{2,}', re.IGNORECASE),
+    re.compile(r'^\s*-{2,}\s*Forwarded message\s*-{2,}', re.IGNORECASE),
+    re.compile(r'^\s*From:\s.+$', re.IGNORECASE),  # Outlook reply block
+    re.compile(r'^\s*_{10,}\s*$'),
+]
+
+# Lines that mark the start of a footer; everything after is dropped
+_FOOTER_PATTERNS = [
+    re.compile(r'^--\s*$'),  # Signature delimiter
+    re.compile(r'unsubscribe', re.IGNORECASE),
+    re.compile(r'(manage|update) (your )?(email )?(preferences|subscription)', re.IGNORECASE),
+    re.compile(r'this (e-?mail|message) was sent to', re.IGNORECASE),
+    re.compile(r'you are receiving this (e-?mail|message)', re.IGNORECASE),
+    re.compile(r'^\s*privacy policy', re.IGNORECASE),
+]
+
+# Individual noise lines removed wherever they appear
+_NOISE_PATTERNS = [
+    re.compile(r'^\s*view (this email )?in (your )?browser', re.IGNORECASE),
+    re.compile(r'^\s*sent from my (iphone|ipad|android|mobile)', re.IGNORECASE),
+    re.compile(r'^\s*\[?image:?[^\]]*\]?\s*$', re.IGNORECASE),
+]
+
+_URL_PATTERN = re.compile(r'https?://\S{80,}')
+
+# Footers are only trusted after this share of the body, so a job email that
+# mentions "unsubscribe" in its first lines keeps its content
+_FOOTER_MIN_POSITION = 0.3
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collect the visible text of an HTML document"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+    
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(raw_html: str) -> str:
+    """
+    Convert HTML to plain text
+    
+    Args:
+        raw_html: HTML document or fragment
+    
+    Returns:
+        Visible text with block elements on separate lines
+    """
+    parser = _HTMLTextExtractor()
+    try:
+        parser.feed(raw_html)
+        parser.close()
+    except Exception:
+        # Malformed markup: fall back to stripping tags
+        return html.unescape(re.sub(r'<[^>]+>', ' ', raw_html))
+    return ''.join(parser.parts)
+
+
+def strip_quoted_and_footer(text: str) -> str:
+    """
+    Remove quoted reply history, footers and noise lines
+    
+    Args:
+        text: Plain text body
+    
+    Returns:
+        Text containing only the new content of the message
+    """
+    lines = text.splitlines()
+    kept = []
+    
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith('>'):
+            continue
+        if kept and any(pattern.match(line) for pattern in _QUOTE_HEADER_PATTERNS):
+            break
+        if index >= len(lines) * _FOOTER_MIN_POSITION and any(
+            pattern.search(line) for pattern in _FOOTER_PATTERNS
+        ):
+            break
+        if any(pattern.match(line) for pattern in _NOISE_PATTERNS):
+            continue
+        kept.append(line)
+    
+    return '\n'.join(kept)
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines"""
+    text = text.replace('\xa0', ' ').replace('\u200c', '').replace('\u200b', '')
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when available, otherwise estimate"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to at most ``max_tokens`` tokens
+    
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+    
+    Returns:
+        Truncated text, with "..." appended if anything was cut
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens]) + "..."
+    
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(' ', 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars] + "..."
+
+
+def normalize_body(text: Optional[str], html_body: Optional[str] = None) -> str:
+    """
+    Normalize an email body into compact plain text
+    
+    Args:
+        text: Plain text part (may be empty)
+        html_body: HTML part, used when there is no text part
+    
+    Returns:
+        Normalized text (not truncated)
+    """
+    raw = text or ''
+    if not raw.strip() and html_body:
+        raw = html_to_text(html_body)
+    elif re.search(r'<(html|body|div|table|p)\b', raw[:2000], re.IGNORECASE):
+        # Some senders put HTML in the text part or only send HTML as 'body'
+        raw = html_to_text(raw)
+    
+    normalized = _URL_PATTERN.sub('[link]', raw)
+    return collapse_whitespace(strip_quoted_and_footer(normalized))
+
+
+def normalize_email(email: Dict) -> str:
+    """
+    Get the normalized body of an email, computing it once per message
+    
+    The result is stored on the email dictionary as ``normalized_body`` so
+    every agent that reads the body reuses it.
+    
+    Args:
+        email: Email dictionary with text/html/body fields
+    
+    Returns:
+        Normalized body text
+    """
+    if email.get('normalized_body') is None:
+        email['normalized_body'] = normalize_body(
+            email.get('text') or email.get('body'),
+            email.get('html')
+        )
+    return email['normalized_body']
+
+
+def normalize_emails(emails: List[Dict]) -> List[Dict]:
+    """
+    Pipeline stage: normalize the bodies of a list of emails in place
+    
+    Args:
+        emails: Email dictionaries
+    
+    Returns:
+        The same list, each email carrying ``normalized_body``
+    """
+    raw_tokens = 0
+    normalized_tokens = 0
+    for email in emails:
+        raw_tokens += count_tokens(email.get('text') or email.get('body') or email.get('html') or '')
+        normalized_tokens += count_tokens(normalize_email(email))
+    
+    if emails:
+        logger.debug(f"✓ Normalized {len(emails)} bodies: ~{raw_tokens} → ~{normalized_tokens} tokens")
+    return emails
+
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """
+    Get the tiktoken encoding, or None when it is unavailable
+    
+    tiktoken downloads the encoding file on first use; when that fails
+    (offline, no cache) token counts fall back to the character estimate.
+    """
+    global _encoding, _encoding_failed
+    if tiktoken is None or _encoding_failed:
+        return None
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception as e:
+            _encoding_failed = True
+            logger.warning(f"⚠ tiktoken encoding unavailable ({e}); estimating ~4 characters per token")
+            return None
+    return _encoding
@@ -0,0 +1,169 @@
+"""
+Thread index - attaches replies in known job threads to their application
+
+Recruiter conversations are long threads. Once one email of a thread has
+been saved as a job application, its thread keys (Gmail X-GM-THRID and the
+RFC Message-IDs in Message-ID/In-Reply-To/References) are stored in the
+backend email_threads table. Later replies whose keys match skip the
+classifier and extractor agents: a keyword status check decides what the
+reply means and the email is attached to the existing JobApplication.
+Replies that read as both a rejection and an interview or offer are left to
+the classifier rather than moving the application's status.
+"""
+from typing import Dict, List, Optional
+import logging
+import re
+import threading
+from utils.email_rules import TYPE_PATTERNS, BODY_SCAN_CHARS
+from utils.text_normalizer import normalize_email
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_ID_PATTERN = re.compile(r'<[^<>\s]+>')
+
+# Keys are namespaced so a Gmail thread id can never collide with a Message-ID
+GMAIL_THREAD_PREFIX = 'gm:'
+MESSAGE_ID_PREFIX = 'id:'
+
+# Confidence reported for thread matches; the thread is known to be job-related
+THREAD_CONFIDENCE = 0.9
+
+# Status check of replies: TYPE_PATTERNS with interview ahead of confirmation,
+# since a recruiter's "Thanks for your interest, are you free for a call?" is
+# an interview request rather than an ATS receipt
+REPLY_ORDER = ['rejection', 'offer', 'interview_request', 'application_confirmation']
+REPLY_PATTERNS = sorted(TYPE_PATTERNS, key=lambda item: REPLY_ORDER.index(item[0]))
+
+# Classifications that move an application's status
+STATUS_CLASSIFICATIONS = {'rejection', 'offer', 'interview_request'}
+
+
+def parse_message_ids(value: Optional[str]) -> List[str]:
+    """
+    Get the <...> Message-IDs in an In-Reply-To or References header
+    
+    Args:
+        value: Header value
+    
+    Returns:
+        Message-IDs in header order, without duplicates
+    """
+    return list(dict.fromkeys(MESSAGE_ID_PATTERN.findall(value or '')))
+
+
+def lookup_keys(email: Dict) -> List[str]:
+    """
+    Thread keys that identify the conversation an email replies to
+    
+    Args:
+        email: Email dictionary
+    
+    Returns:
+        Gmail thread key, then the parent and the other referenced
+        Message-IDs, nearest first
+    """
+    keys = []
+    if email.get('gmail_thread_id'):
+        keys.append(GMAIL_THREAD_PREFIX + str(email['gmail_thread_id']))
+    references = parse_message_ids(email.get('in_reply_to')) + parse_message_ids(email.get('references'))[::-1]
+    keys.extend(MESSAGE_ID_PREFIX + message_id for message_id in references)
+    return list(dict.fromkeys(keys))
+
+
+def thread_keys(email: Dict) -> List[str]:
+    """
+    Thread keys to register for an email saved to an application
+    
+    Args:
+        email: Email dictionary
+    
+    Returns:
+        The email's own Message-ID key plus all of its lookup keys, so a
+        later reply to any message of the conversation matches
+    """
+    keys = lookup_keys(email)
+    own_ids = parse_message_ids(email.get('internet_message_id'))
+    if own_ids:
+        keys.insert(0, MESSAGE_ID_PREFIX + own_ids[0])
+    return list(dict.fromkeys(keys))
+
+
+class ThreadIndex:
+    """Status check and per-run counters for replies in known application threads"""
+    
+    def __init__(self):
+        """Initialize the status patterns and counters"""
+        self.type_patterns = [
+            (classification, re.compile(pattern, re.IGNORECASE))
+            for classification, pattern in REPLY_PATTERNS
+        ]
+        self.total = 0
+        self.matched = 0
+        self.ambiguous = 0
+        self.by_classification: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def classify_reply(self, email: Dict, application_id: int) -> Optional[Dict]:
+        """
+        Decide a reply in a known job thread without the classifier agent
+        
+        Args:
+            email: Email dictionary
+            application_id: JobApplication the thread belongs to
+        
+        Returns:
+            Classification result dictionary (same shape as
+            classify_email_task) with the application_id it attaches to, or
+            None if the reply reads as both a rejection and an interview or
+            offer and needs the classifier
+        """
+        text = f"{email.get('subject') or ''}\n{normalize_email(email)[:BODY_SCAN_CHARS]}"
+        matches = [name for name, pattern in self.type_patterns if pattern.search(text)]
+        statuses = STATUS_CLASSIFICATIONS.intersection(matches)
+        if 'rejection' in statuses and len(statuses) > 1:
+            with self._lock:
+                self.ambiguous += 1
+            return None
+        classification = matches[0] if matches else 'follow_up'
+        with self._lock:
+            self.matched += 1
+            self.by_classification[classification] = self.by_classification.get(classification, 0) + 1
+        return {
+            'message_id': email.get('message_id'),
+            'is_job_related': True,
+            'classification': classification,
+            'confidence': THREAD_CONFIDENCE,
+            'reasoning': f"Reply in the thread of application {application_id}",
+            'source': 'thread',
+            'application_id': application_id,
+        }
+    
+    def count(self, emails: int):
+        """Count emails checked against the index"""
+        with self._lock:
+            self.total += emails
+    
+    def report(self) -> Dict:
+        """
+        Get match counts for this run
+        
+        Returns:
+            Dictionary with emails checked, thread matches, their status check
+            results and the matches left to the classifier as ambiguous
+        """
+        return {
+            'total': self.total,
+            'matched': self.matched,
+            'ambiguous': self.ambiguous,
+            'match_rate': self.matched / self.total if self.total else 0.0,
+            'by_classification': dict(self.by_classification),
+        }
+    
+    def print_report(self):
+        """Log thread match rates"""
+        report = self.report()
+        logger.info(f"🧵 Thread index: {report['matched']}/{report['total']} emails attached to known applications without LLM ({report['match_rate']:.0%})")
+        for classification, count in sorted(report['by_classification'].items()):
+            logger.info(f"   - {classification}: {count}")
+        if report['ambiguous']:
+            logger.info(f"   - ambiguous, sent to classifier: {report['ambiguous']}")
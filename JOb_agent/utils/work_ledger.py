@@ -0,0 +1,303 @@
+"""
+Work ledger - per-email checkpoints so an interrupted run resumes without repeating LLM calls
+
+Every email moves through the workflow stages fetched -> classified ->
+extracted -> done. Each transition is written to the work_ledger table
+(next to email_logs, in the backend or standalone database) with what the
+stage produced: a snapshot of the email when it is picked up, its
+classification, its extracted data and finally the application it was
+saved to. When an email is seen again - because the next run fetches the
+same window, or because it is resumed from the ledger - finished stages are
+skipped and their stored results are used instead of calling the
+classifier or extractor agent. Emails a run left unfinished are processed
+first by the next run, even when the IMAP watermark has already moved past
+them.
+
+Entries are keyed by (account, message_id): the message_id the email client
+assigns (RFC Message-ID, or account/folder/UIDVALIDITY:UID) within the
+mailbox account the email was fetched from, so the same message reaching
+two accounts is tracked separately.
+
+Usage:
+    python -m utils.work_ledger stats
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import threading
+import uuid
+from utils.text_normalizer import normalize_email
+
+logger = logging.getLogger(__name__)
+
+FETCHED = 'fetched'
+CLASSIFIED = 'classified'
+EXTRACTED = 'extracted'
+DONE = 'done'
+
+# Stages in order; the ledger never moves an email backwards
+STAGES = (FETCHED, CLASSIFIED, EXTRACTED, DONE)
+
+# Email fields stored so a resumed email can be processed without fetching it again
+SNAPSHOT_FIELDS = (
+    'message_id', 'account', 'uid', 'folder', 'internet_message_id', 'list_id', 'list_unsubscribe',
+    'in_reply_to', 'references', 'gmail_thread_id', 'subject', 'from', 'to', 'date',
+)
+
+
+def ledger_key(email: Dict) -> Tuple[str, str]:
+    """
+    Get the (account, message_id) key of an email's ledger entry
+    
+    Args:
+        email: Email dictionary with a message_id
+    
+    Returns:
+        Tuple of account ('' for offline sources) and message id
+    """
+    return email.get('account') or '', email['message_id']
+
+
+def to_jsonable(value):
+    """Convert a result dictionary to plain JSON types (dates become ISO strings)"""
+    return json.loads(json.dumps(value, default=lambda obj: obj.isoformat() if hasattr(obj, 'isoformat') else str(obj)))
+
+
+def email_snapshot(email: Dict) -> Dict:
+    """
+    Get the part of an email the ledger stores
+    
+    The normalized body replaces the raw text and HTML, which keeps entries
+    small and is all the agents read.
+    
+    Args:
+        email: Email dictionary
+    
+    Returns:
+        JSON-serializable email dictionary
+    """
+    snapshot = {field: email.get(field) for field in SNAPSHOT_FIELDS}
+    snapshot['normalized_body'] = normalize_email(email)
+    snapshot['body'] = snapshot['normalized_body']
+    return to_jsonable(snapshot)
+
+
+def restore_email(snapshot: Dict) -> Dict:
+    """
+    Rebuild an email dictionary from its ledger snapshot
+    
+    Args:
+        snapshot: email_snapshot() result
+    
+    Returns:
+        Email dictionary usable by the workflow
+    """
+    email = dict(snapshot)
+    if isinstance(email.get('date'), str):
+        try:
+            email['date'] = datetime.fromisoformat(email['date'])
+        except ValueError:
+            pass
+    return email
+
+
+class WorkLedger:
+    """Per-run view of the work ledger: resume points, checkpoints and counters"""
+    
+    def __init__(
+        self,
+        load: Callable[[List[Tuple[str, str]]], Dict[Tuple[str, str], Dict]],
+        record: Callable[[List[Dict], str], int]
+    ):
+        """
+        Initialize a ledger for one workflow run
+        
+        Args:
+            load: Function returning the ledger entries of a list of
+                ledger_key() keys (see database_manager_agent.load_ledger_entries)
+            record: Function writing ledger records for a run id (see
+                database_manager_agent.record_ledger_entries)
+        """
+        self.load = load
+        self.record = record
+        self.run_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._claimed = set()
+        # Keys already checkpointed as fetched by this run
+        self._fetched = set()
+        # Extracted records only carry the message id; remember its account
+        self._accounts = {}
+        self.counters = {'resumed': 0, 'duplicates': 0, 'skipped_done': 0, 'skipped_classify': 0, 'skipped_extract': 0}
+    
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+    
+    def count_resumed(self, emails: int):
+        """Count unfinished emails from earlier runs queued for this run"""
+        self._count('resumed', emails)
+    
+    def resume(self, emails: List[Dict]) -> Tuple[List[Dict], Dict[str, Dict], List[Tuple[Dict, Dict]]]:
+        """
+        Split a batch by how far earlier runs got with each email
+        
+        Emails already handled in this run (e.g. resumed and then fetched
+        again) are dropped, as are emails the ledger marks done.
+        
+        Args:
+            emails: Email dictionaries of a batch
+        
+        Returns:
+            Tuple of (emails still to classify or extract, stored
+            classifications by message id for emails past classification,
+            (email, stored extracted data) pairs that only need saving)
+        """
+        fresh = []
+        with self._lock:
+            for email in emails:
+                if email.get('message_id') is not None:
+                    if ledger_key(email) in self._claimed:
+                        continue
+                    self._claimed.add(ledger_key(email))
+                fresh.append(email)
+        self._count('duplicates', len(emails) - len(fresh))
+        
+        entries = self.load([ledger_key(email) for email in fresh if email.get('message_id') is not None])
+        pending, classifications, extracted = [], {}, []
+        for email in fresh:
+            entry = entries.get(ledger_key(email)) if email.get('message_id') is not None else None
+            stage = entry['stage'] if entry else None
+            if stage == DONE:
+                self._count('skipped_done')
+            elif stage == EXTRACTED and entry.get('extracted_data'):
+                self._count('skipped_extract')
+                extracted.append((email, entry['extracted_data']))
+            else:
+                if stage == CLASSIFIED and entry.get('classification'):
+                    self._count('skipped_classify')
+                    classifications[email['message_id']] = entry['classification']
+                pending.append(email)
+        return pending, classifications, extracted
+    
+    def mark_fetched(self, emails: List[Dict]):
+        """
+        Checkpoint emails picked up by this run, storing their snapshot
+        
+        Called on the fetching thread before the sync watermark moves past
+        the emails, and again by the classify stage for pushed and resumed
+        emails; emails this run already checkpointed are skipped.
+        
+        Args:
+            emails: Email dictionaries
+        """
+        new = []
+        with self._lock:
+            for email in emails:
+                if email.get('message_id') is not None and ledger_key(email) not in self._fetched:
+                    self._fetched.add(ledger_key(email))
+                    new.append(email)
+        self.record([
+            self._record(email, FETCHED, email=email_snapshot(email), attempt=True)
+            for email in new
+        ], self.run_id)
+    
+    def mark_classified(self, emails: List[Dict], classifications: List[Dict], attached: set):
+        """
+        Checkpoint classification results
+        
+        Job-related emails move to classified; emails that are not job
+        related, and thread replies already attached, are done. Failed
+        classifications stay at fetched and are retried.
+        
+        Args:
+            emails: Email dictionaries
+            classifications: Classification result for each email
+            attached: Indexes of emails attached to known applications
+        """
+        records = []
+        for i, (email, classification) in enumerate(zip(emails, classifications)):
+            if email.get('message_id') is None or classification.get('classification') == 'error':
+                continue
+            if i in attached:
+                records.append(self._record(email, DONE, application_id=classification.get('application_id')))
+            elif classification.get('is_job_related', False):
+                records.append(self._record(email, CLASSIFIED, classification=to_jsonable(classification)))
+            else:
+                records.append(self._record(email, DONE, classification=to_jsonable(classification)))
+        self.record(records, self.run_id)
+    
+    def mark_extracted(self, extracted_data_list: List[Dict]):
+        """Checkpoint extraction results"""
+        self.record([
+            self._extracted_record(data, EXTRACTED, extracted_data=to_jsonable(data))
+            for data in extracted_data_list if data.get('email_message_id') is not None
+        ], self.run_id)
+    
+    def mark_saved(self, extracted_data_list: List[Dict]):
+        """
+        Checkpoint saved applications
+        
+        Records saved to an application, and records that can never be
+        saved because company or role is missing, are done. Records that
+        failed to save for other reasons stay at extracted and are retried.
+        
+        Args:
+            extracted_data_list: Records passed to save_applications_batch
+        """
+        self.record([
+            self._extracted_record(data, DONE, application_id=data.get('application_id'))
+            for data in extracted_data_list
+            if data.get('email_message_id') is not None and (
+                data.get('application_id') or not data.get('company_name') or not data.get('role_title')
+            )
+        ], self.run_id)
+    
+    def _record(self, email_data: Dict, stage: str, **fields) -> Dict:
+        """Build a ledger record for an email (fields may include the email snapshot)"""
+        account, message_id = ledger_key(email_data)
+        with self._lock:
+            self._accounts[message_id] = account
+        return dict(fields, account=account, message_id=message_id, stage=stage)
+    
+    def _extracted_record(self, data: Dict, stage: str, **fields) -> Dict:
+        """Build a ledger record for an extracted record of an email checkpointed in this run"""
+        with self._lock:
+            account = self._accounts.get(data['email_message_id'], '')
+        return dict(fields, account=account, message_id=data['email_message_id'], stage=stage)
+    
+    def report(self) -> Dict:
+        """
+        Get resume counts for this run
+        
+        Returns:
+            Dictionary with emails resumed from earlier runs and the stages
+            skipped because the ledger already had their results
+        """
+        with self._lock:
+            return dict(self.counters, run_id=self.run_id)
+    
+    def print_report(self):
+        """Log resumed emails and skipped agent calls"""
+        report = self.report()
+        if not any(report[name] for name in self.counters):
+            return
+        logger.info(
+            f"📒 Work ledger: {report['resumed']} emails resumed from interrupted runs, "
+            f"{report['skipped_classify']} classifications and {report['skipped_extract']} extractions reused, "
+            f"{report['skipped_done']} emails already done"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+    from agents.database_manager_agent import create_database_manager_agent, get_ledger_stats
+    
+    parser = argparse.ArgumentParser(description='Inspect the work ledger')
+    parser.add_argument('command', choices=['stats'])
+    args = parser.parse_args()
+    
+    stats = get_ledger_stats(create_database_manager_agent())
+    print(f"Work ledger: {sum(stats.values())} emails")
+    for stage in STAGES:
+        print(f"  {stage}: {stats.get(stage, 0)}")